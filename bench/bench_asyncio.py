@@ -0,0 +1,110 @@
+"""Measure concurrent checks per second on one asyncio event loop.
+
+The "sync" rows call :class:`~rush.throttle.Throttle` from a coroutine, as a
+service would before the asyncio APIs existed, so every Redis round trip
+blocks the event loop and requests are served one at a time. The "async"
+rows use :class:`~rush.throttle.AsyncThrottle` with ``--concurrency``
+requests in flight, overlapping their round trips.
+
+Usage::
+
+    python bench/bench_asyncio.py --redis-url redis://localhost --checks 5000
+"""
+import argparse
+import asyncio
+import time
+
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.limiters import periodic
+from rush.limiters import redis_gcra
+from rush.stores import redis as redis_store
+
+RATE = quota.Quota.per_second(1_000_000)
+
+LIMITERS = {
+    "gcra": (gcra.GenericCellRatelimiter, gcra.AsyncGenericCellRatelimiter),
+    "periodic": (periodic.PeriodicLimiter, periodic.AsyncPeriodicLimiter),
+    "redis_gcra": (
+        redis_gcra.GenericCellRatelimiter,
+        redis_gcra.AsyncGenericCellRatelimiter,
+    ),
+}
+
+
+async def run_sync(url: str, name: str, limiter_class, checks: int) -> float:
+    """Serve ``checks`` requests with the blocking Throttle.
+
+    Keys are prefixed with ``name`` because limiters store data differently.
+
+    :returns:
+        Checks per second.
+    """
+    thr = throttle.Throttle(
+        rate=RATE, limiter=limiter_class(store=redis_store.RedisStore(url))
+    )
+    thr.check(f"bench-{name}-warmup", 1)
+
+    async def handle(n: int) -> None:
+        thr.check(f"bench-{name}-{n % 1000}", 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handle(n) for n in range(checks)))
+    return checks / (time.perf_counter() - started)
+
+
+async def run_async(
+    url: str, name: str, limiter_class, checks: int, concurrency: int
+) -> float:
+    """Serve ``checks`` requests with ``concurrency`` of them in flight.
+
+    Each worker uses its own keys so that the pure-Python limiters never
+    race to swap the same key.
+
+    :returns:
+        Checks per second.
+    """
+    store = redis_store.AsyncRedisStore(
+        url, client_config={"max_connections": concurrency}
+    )
+    thr = throttle.AsyncThrottle(
+        rate=RATE, limiter=limiter_class(store=store)
+    )
+    # Warm up so script loading is not counted
+    await thr.check(f"bench-{name}-warmup", 1)
+
+    async def worker(offset: int) -> None:
+        for n in range(offset, checks, concurrency):
+            await thr.check(f"bench-{name}-{offset}-{n % 10}", 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await store.client.aclose()
+    return checks / elapsed
+
+
+async def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--checks", type=int, default=5_000)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 10, 100]
+    )
+    args = parser.parse_args()
+
+    print(f"{'limiter':<11} {'api':<5} {'in flight':>9} {'checks/s':>9}")
+    for name, (sync_class, async_class) in LIMITERS.items():
+        rate = await run_sync(args.redis_url, name, sync_class, args.checks)
+        print(f"{name:<11} {'sync':<5} {1:>9} {rate:>9,.0f}")
+        for concurrency in args.concurrency:
+            rate = await run_async(
+                args.redis_url, name, async_class, args.checks, concurrency
+            )
+            print(f"{name:<11} {'async':<5} {concurrency:>9} {rate:>9,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main())
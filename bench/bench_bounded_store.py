@@ -0,0 +1,64 @@
+"""Measure memory use of the in-memory stores with many unique clients.
+
+Every check uses a new key, mimicking a stream of one-off clients. The
+:class:`~rush.stores.dictionary.DictionaryStore` grows with every key while
+the :class:`~rush.stores.bounded.BoundedDictionaryStore` stays flat.
+
+Usage::
+
+    python bench/bench_bounded_store.py --clients 1000000 --max-keys 10000
+"""
+import argparse
+import time
+import tracemalloc
+
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.stores import bounded
+from rush.stores import dictionary
+
+
+def run(store, clients: int) -> tuple:
+    """Check ``clients`` distinct keys once each.
+
+    :returns:
+        A tuple of checks per second and peak traced memory in bytes.
+    """
+    limiter = gcra.GenericCellRatelimiter(store=store)
+    thr = throttle.Throttle(rate=quota.Quota.per_hour(100), limiter=limiter)
+    tracemalloc.start()
+    started = time.perf_counter()
+    for n in range(clients):
+        thr.check(f"user-{n}@192.0.2.{n % 256}", 1)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return clients / elapsed, peak
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--max-keys", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'store':<22} {'keys':>9} {'peak MiB':>9} {'checks/s':>10}")
+    store = dictionary.DictionaryStore()
+    rate, peak = run(store, args.clients)
+    print(
+        f"{'DictionaryStore':<22} {len(store.store):>9}"
+        f" {peak / 2**20:>9.1f} {rate:>10,.0f}"
+    )
+    store = bounded.BoundedDictionaryStore(max_keys=args.max_keys)
+    rate, peak = run(store, args.clients)
+    print(
+        f"{'BoundedDictionaryStore':<22} {len(store.store):>9}"
+        f" {peak / 2**20:>9.1f} {rate:>10,.0f}"
+    )
+    print(f"evictions={store.evictions} expirations={store.expirations}")
+
+
+if __name__ == "__main__":
+    main()
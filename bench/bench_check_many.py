@@ -0,0 +1,86 @@
+"""Compare Throttle.check_many with calling Throttle.check in a loop.
+
+Each row checks a batch of distinct keys, as a batch ingestion endpoint
+would, and reports the time per batch for both APIs. The loop makes every
+key's round trips one after another while ``check_many`` pipelines the Lua
+scripts or uses the stores' bulk operations.
+
+Usage::
+
+    python bench/bench_check_many.py --redis-url redis://localhost --batches 20
+"""
+import argparse
+import time
+
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.limiters import periodic
+from rush.limiters import redis_gcra
+from rush.stores import redis as redis_store
+
+LIMITERS = {
+    "gcra": gcra.GenericCellRatelimiter,
+    "periodic": periodic.PeriodicLimiter,
+    "redis_gcra": redis_gcra.GenericCellRatelimiter,
+}
+
+
+def run(thr: throttle.Throttle, keys: list, batches: int) -> tuple:
+    """Check ``batches`` batches of ``keys`` with each API.
+
+    :returns:
+        A tuple of the milliseconds per batch with the loop and with
+        ``check_many``.
+    """
+    requests = [(key, 1) for key in keys]
+    # Warm up so script loading is not counted
+    thr.check_many(requests)
+
+    started = time.perf_counter()
+    for _ in range(batches):
+        for key, quantity in requests:
+            thr.check(key, quantity)
+    looped = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(batches):
+        thr.check_many(requests)
+    batched = time.perf_counter() - started
+    return looped * 1000 / batches, batched * 1000 / batches
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument(
+        "--keys", type=int, nargs="+", default=[10, 100, 1000]
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'limiter':<11} {'keys':>5} {'loop ms':>8} {'many ms':>8}"
+        f" {'x':>5}"
+    )
+    for name, limiter_class in LIMITERS.items():
+        store = redis_store.RedisStore(url=args.redis_url)
+        thr = throttle.Throttle(
+            rate=quota.Quota.per_second(1_000_000),
+            limiter=limiter_class(store=store),
+        )
+        for count in args.keys:
+            store.client.flushdb()
+            # Keys are prefixed with the limiter's name because limiters
+            # store data differently
+            keys = [f"bench-{name}-{n}" for n in range(count)]
+            looped, batched = run(thr, keys, args.batches)
+            print(
+                f"{name:<11} {count:>5} {looped:>8.2f} {batched:>8.2f}"
+                f" {looped / batched:>5.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measure multi-threaded throughput of the in-memory stores.
+
+Each thread performs checks through a :class:`~rush.throttle.Throttle`
+backed by the pure-Python GCRA limiter against its own set of keys. The
+store under test is shared between all threads.
+
+Usage::
+
+    python bench/bench_concurrent_store.py --threads 1 2 4 8 --checks 20000
+"""
+import argparse
+import threading
+import time
+
+from rush import exceptions
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.stores import concurrent
+from rush.stores import dictionary
+
+
+def run(store, threads: int, checks: int) -> tuple:
+    """Run ``checks`` checks on each of ``threads`` threads.
+
+    :returns:
+        A tuple of total checks per second and the number of atomicity
+        errors raised by the store.
+    """
+    limiter = gcra.GenericCellRatelimiter(store=store)
+    rate = quota.Quota.per_second(1_000_000)
+    thr = throttle.Throttle(rate=rate, limiter=limiter)
+    barrier = threading.Barrier(threads + 1)
+    errors = [0] * threads
+
+    def worker(index: int) -> None:
+        keys = [f"thread-{index}-key-{n}" for n in range(16)]
+        barrier.wait()
+        for n in range(checks):
+            try:
+                thr.check(keys[n % 16], 1)
+            except exceptions.AtomicOperationError:
+                errors[index] += 1
+
+    workers = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    return (threads * checks) / elapsed, sum(errors)
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--checks", type=int, default=20_000)
+    args = parser.parse_args()
+
+    stores = {
+        "DictionaryStore (unsafe)": dictionary.DictionaryStore,
+        "Concurrent, 1 lock": lambda: concurrent.ConcurrentDictionaryStore(
+            lock_count=1
+        ),
+        "Concurrent, 64 locks": concurrent.ConcurrentDictionaryStore,
+    }
+    print(f"{'store':<26} {'threads':>7} {'checks/s':>12} {'errors':>7}")
+    for name, factory in stores.items():
+        for threads in args.threads:
+            rate, errors = run(factory(), threads, args.checks)
+            print(f"{name:<26} {threads:>7} {rate:>12,.0f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure limiters checking one key from many threads at once.
+
+Every thread checks the same key through a shared limiter, so the limiter's
+compare-and-swap often finds that another thread wrote first. Each row
+reports total checks per second, how many checks raised an
+:class:`~rush.exceptions.AtomicOperationError` and the limiter's
+:class:`~rush.limiters.ContentionStats`. A retry budget of ``0`` is how the
+limiters behaved before they retried.
+
+A short thread switch interval makes conflicts more frequent than
+Python's default 5ms would.
+
+Usage::
+
+    python bench/bench_contention.py --threads 2 8 --checks 20000
+"""
+import argparse
+import sys
+import threading
+import time
+
+from rush import exceptions
+from rush import limiters
+from rush import quota
+from rush.limiters import gcra
+from rush.limiters import periodic
+from rush.stores import concurrent
+
+
+def run(limiter, threads: int, checks: int) -> tuple:
+    """Run ``checks`` checks of one key on each of ``threads`` threads.
+
+    :returns:
+        A tuple of total checks per second and the number of atomicity
+        errors raised by the limiter.
+    """
+    rate = quota.Quota.per_second(1_000_000)
+    barrier = threading.Barrier(threads + 1)
+    errors = [0] * threads
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        for _ in range(checks):
+            try:
+                limiter.rate_limit("hot", 1, rate)
+            except exceptions.AtomicOperationError:
+                errors[index] += 1
+
+    workers = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    return (threads * checks) / elapsed, sum(errors)
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[2, 8])
+    parser.add_argument("--checks", type=int, default=20_000)
+    parser.add_argument("--retries", type=int, nargs="+", default=[0, 3])
+    parser.add_argument("--switch-interval", type=float, default=1e-5)
+    args = parser.parse_args()
+    sys.setswitchinterval(args.switch_interval)
+
+    print(
+        f"{'limiter':<9} {'retries':>7} {'threads':>7} {'checks/s':>10}"
+        f" {'errors':>7} {'conflicts':>9} {'retried':>7}"
+    )
+    for name, factory in (
+        ("gcra", gcra.GenericCellRatelimiter),
+        ("periodic", periodic.PeriodicLimiter),
+    ):
+        for retries in args.retries:
+            for threads in args.threads:
+                limiter = factory(
+                    store=concurrent.ConcurrentDictionaryStore(),
+                    retry_policy=limiters.RetryPolicy(max_retries=retries),
+                )
+                rate, errors = run(limiter, threads, args.checks)
+                stats = limiter.contention
+                print(
+                    f"{name:<9} {retries:>7} {threads:>7} {rate:>10,.0f}"
+                    f" {errors:>7} {stats.conflicts:>9} {stats.retries:>7}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Measure checks per second of the pure-Python GCRA limiter.
+
+Every row checks keys in a :class:`~rush.stores.dictionary.DictionaryStore`
+so the time is spent in the limiter rather than in I/O. ``hot`` checks one
+key over and over, mostly while it is limited, and ``spread`` cycles through
+many keys which are rarely limited.
+
+Usage::
+
+    python bench/bench_gcra.py --checks 200000 --keys 1000
+"""
+import argparse
+import time
+
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.stores import dictionary
+
+
+def run(keys: list, checks: int) -> float:
+    """Check ``keys`` in turn until ``checks`` checks are made.
+
+    :returns:
+        The number of checks per second.
+    """
+    thr = throttle.Throttle(
+        rate=quota.Quota.per_second(100, maximum_burst=10),
+        limiter=gcra.GenericCellRatelimiter(
+            store=dictionary.DictionaryStore()
+        ),
+    )
+    count = len(keys)
+    started = time.perf_counter()
+    for n in range(checks):
+        thr.check(keys[n % count], 1)
+    return checks / (time.perf_counter() - started)
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'pattern':<8} {'keys':>6} {'checks/s':>10}")
+    for name, keys in (
+        ("hot", ["hot"]),
+        ("spread", [f"user-{n}" for n in range(args.keys)]),
+    ):
+        rate = run(keys, args.checks)
+        print(f"{name:<8} {len(keys):>6} {rate:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare LimitData with the attrs class it replaced.
+
+``legacy`` is a copy of the previous class, which ran converters, including
+``strptime`` for strings, on every construction and formatted times with
+``strftime``. Each row reports operations per second for both classes.
+
+Usage::
+
+    python bench/bench_limit_data.py --number 200000
+"""
+import argparse
+import datetime
+import timeit
+import typing
+
+import attr
+
+from rush import limit_data
+
+
+def _strptime(value):
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value, limit_data.DATETIME_FORMAT)
+    return value
+
+
+def _maybe_strptime(value):
+    return None if value == "" else _strptime(value)
+
+
+@attr.s(frozen=True)
+class LegacyLimitData:
+    """The previous implementation of LimitData."""
+
+    used: int = attr.ib(converter=int)
+    remaining: int = attr.ib(converter=int)
+    created_at: datetime.datetime = attr.ib(converter=_strptime)
+    time: typing.Optional[datetime.datetime] = attr.ib(
+        converter=attr.converters.optional(_maybe_strptime),
+        default=None,
+        kw_only=True,
+    )
+
+    def asdict(self) -> typing.Dict[str, str]:
+        """Return the data as a dictionary."""
+        time = ""
+        if self.time is not None:
+            time = self.time.strftime(limit_data.DATETIME_FORMAT)
+        return {
+            "used": str(self.used),
+            "remaining": str(self.remaining),
+            "created_at": self.created_at.strftime(
+                limit_data.DATETIME_FORMAT
+            ),
+            "time": time,
+        }
+
+    def copy_with(self, *, used=None, remaining=None, time=None):
+        """Create a copy of this with updated values."""
+        return LegacyLimitData(
+            used=used if used is not None else self.used,
+            remaining=remaining if remaining is not None else self.remaining,
+            created_at=self.created_at,
+            time=time if time is not None else self.time,
+        )
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    now_us = limit_data.datetime_to_microseconds(now)
+    fields = limit_data.LimitData(
+        used=1, remaining=9, created_at=now, time=now
+    ).asdict()
+    legacy = LegacyLimitData(used=1, remaining=9, created_at=now, time=now)
+    current = limit_data.LimitData(
+        used=1, remaining=9, created_at=now, time=now
+    )
+    fast = limit_data.LimitData.from_microseconds(1, 9, now_us, now_us)
+
+    cases = [
+        (
+            "construct",
+            lambda: LegacyLimitData(1, 9, now, time=now),
+            lambda: limit_data.LimitData(1, 9, now, time=now),
+        ),
+        (
+            "from_microseconds",
+            lambda: LegacyLimitData(1, 9, now, time=now),
+            lambda: limit_data.LimitData.from_microseconds(
+                1, 9, now_us, now_us
+            ),
+        ),
+        (
+            "parse",
+            lambda: LegacyLimitData(**fields),
+            lambda: limit_data.LimitData(**fields),
+        ),
+        (
+            "copy_with",
+            lambda: legacy.copy_with(used=2, remaining=8),
+            lambda: current.copy_with(used=2, remaining=8),
+        ),
+        ("asdict", legacy.asdict, current.asdict),
+        ("asdict (lazy)", legacy.asdict, fast.asdict),
+    ]
+    print(f"{'operation':<18} {'legacy/s':>12} {'current/s':>12} {'x':>5}")
+    for name, old, new in cases:
+        old_rate = args.number / timeit.timeit(old, number=args.number)
+        new_rate = args.number / timeit.timeit(new, number=args.number)
+        print(
+            f"{name:<18} {old_rate:>12,.0f} {new_rate:>12,.0f}"
+            f" {new_rate / old_rate:>5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare the hash and packed codecs of the Redis store.
+
+The encode/decode timings run without Redis. When a Redis URL is given, the
+benchmark also writes ``--keys`` keys with each codec and reports Redis's
+memory use extrapolated to one million keys.
+
+Usage::
+
+    python bench/bench_redis_codec.py --redis-url redis://localhost
+"""
+import argparse
+import datetime
+import timeit
+
+from rush import limit_data
+from rush.stores import redis as redis_store
+
+DATA = limit_data.LimitData(
+    used=12,
+    remaining=88,
+    time=datetime.datetime.now(datetime.timezone.utc),
+)
+
+
+def codec_timings(number: int) -> None:
+    """Print encode and decode operations per second for each codec."""
+    store = redis_store.RedisStore(url="redis://localhost", client=None)
+    print(f"{'codec':<8} {'encode/s':>12} {'decode/s':>12}")
+    for codec in redis_store.CODECS:
+        store.codec = codec
+        fields = store._encode(DATA)
+        encode = timeit.timeit(lambda: store._encode(DATA), number=number)
+        decode = timeit.timeit(
+            lambda: redis_store.decode(fields), number=number
+        )
+        print(
+            f"{codec:<8} {number / encode:>12,.0f} {number / decode:>12,.0f}"
+        )
+
+
+def memory_per_million_keys(url: str, keys: int) -> None:
+    """Print Redis memory used per million keys for each codec."""
+    print(f"{'codec':<8} {'MiB per 1M keys':>16} {'writes/s':>10}")
+    for codec in redis_store.CODECS:
+        store = redis_store.RedisStore(url=url, codec=codec)
+        client = store.client
+        client.flushdb()
+        before = client.info("memory")["used_memory"]
+        started = timeit.default_timer()
+        with client.pipeline(transaction=False) as p:
+            for n in range(keys):
+                p.hset(f"bench-key-{n}", mapping=store._encode(DATA))
+                if n % 1000 == 999:
+                    p.execute()
+            p.execute()
+        elapsed = timeit.default_timer() - started
+        used = client.info("memory")["used_memory"] - before
+        per_million = used * (1_000_000 / keys) / 2 ** 20
+        print(f"{codec:<8} {per_million:>16,.1f} {keys / elapsed:>10,.0f}")
+        client.flushdb()
+
+
+def main() -> None:
+    """Run the benchmark and print tables of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    codec_timings(args.number)
+    if args.redis_url:
+        memory_per_million_keys(args.redis_url, args.keys)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Count Redis round trips per Throttle.check.
+
+Every time redis-py writes a command (or a pipeline of commands) to a
+connection it waits for the reply, so counting writes counts round trips.
+The "before" row uses the WATCH/MULTI/EXEC compare-and-swap that
+:class:`~rush.stores.redis.RedisStore` used before it switched to a single
+Lua script. The "split" row reads the time and the key's data with two
+commands, as the pure-Python limiters did before they used
+:meth:`~rush.stores.redis.RedisStore.get_with_current_time`. The "clock" row
+estimates Redis's clock locally instead of
+sending ``TIME`` for every check.
+
+Usage::
+
+    python bench/bench_redis_round_trips.py --redis-url redis://localhost
+"""
+import argparse
+import contextlib
+import datetime
+import time
+
+import redis
+
+from rush import exceptions
+from rush import limit_data
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.limiters import periodic
+from rush.stores import base
+from rush.stores import redis as redis_store
+
+
+class WatchMultiRedisStore(redis_store.RedisStore):
+    """RedisStore using the original WATCH/MULTI/EXEC compare-and-swap."""
+
+    def compare_and_swap(self, key, old, new, expiry=None):
+        """Perform the compare and swap over several round trips."""
+        with self.client.pipeline() as p:
+            try:
+                p.watch(key)
+                data = p.hgetall(key)
+                current = limit_data.LimitData(**data) if data else None
+                if old != current:
+                    raise exceptions.MismatchedDataError(
+                        "old limit data did not match expected limit data",
+                        expected_limit_data=old,
+                        actual_limit_data=current,
+                    )
+                p.multi()
+                p.hmset(key, new.asdict())
+                p.execute()
+            except redis.WatchError as we:
+                raise exceptions.DataChangedInStoreError(
+                    "error swapping the limit data", original_exception=we
+                )
+        return new
+
+
+class SplitReadsRedisStore(redis_store.RedisStore):
+    """RedisStore sending TIME and HGETALL as separate round trips."""
+
+    get_with_current_time = base.BaseStore.get_with_current_time
+
+
+@contextlib.contextmanager
+def counting_round_trips(client):
+    """Count the round trips made by connections from a client's pool."""
+    connection = client.connection_pool.get_connection()
+    client.connection_pool.release(connection)
+    connection_class = type(connection)
+    original = connection_class.send_packed_command
+    counter = {"round_trips": 0}
+
+    def send_packed_command(self, *args, **kwargs):
+        counter["round_trips"] += 1
+        return original(self, *args, **kwargs)
+
+    connection_class.send_packed_command = send_packed_command
+    try:
+        yield counter
+    finally:
+        connection_class.send_packed_command = original
+
+
+def run(store, limiter_class, checks: int) -> tuple:
+    """Perform ``checks`` checks over a handful of keys.
+
+    :returns:
+        A tuple of round trips per check and checks per second.
+    """
+    thr = throttle.Throttle(
+        rate=quota.Quota.per_second(1_000_000),
+        limiter=limiter_class(store=store),
+    )
+    # Warm up so script loading is not counted
+    thr.check("bench-warmup", 1)
+    with counting_round_trips(store.client) as counter:
+        started = time.perf_counter()
+        for n in range(checks):
+            thr.check(f"bench-key-{n % 10}", 1)
+        elapsed = time.perf_counter() - started
+    return counter["round_trips"] / checks, checks / elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--checks", type=int, default=5_000)
+    args = parser.parse_args()
+
+    stores = {
+        "before": WatchMultiRedisStore(url=args.redis_url),
+        "split": SplitReadsRedisStore(url=args.redis_url),
+        "after": redis_store.RedisStore(url=args.redis_url),
+        "clock": redis_store.RedisStore(
+            url=args.redis_url,
+            clock_resync_interval=datetime.timedelta(seconds=10),
+        ),
+    }
+    limiters = {
+        "gcra": gcra.GenericCellRatelimiter,
+        "periodic": periodic.PeriodicLimiter,
+    }
+    print(f"{'store':<7} {'limiter':<9} {'RTTs/check':>10} {'checks/s':>9}")
+    for store_name, store in stores.items():
+        for limiter_name, limiter_class in limiters.items():
+            store.client.flushdb()
+            rtts, rate = run(store, limiter_class, args.checks)
+            print(
+                f"{store_name:<7} {limiter_name:<9} {rtts:>10.2f}"
+                f" {rate:>9,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measure how evenly ShardedRedisStore spreads keys.
+
+For each number of virtual nodes this reports how far the busiest server is
+above a perfectly even share of keys and what fraction of keys moves when one
+more server is added (the ideal is ``1 / (servers + 1)``). No Redis server is
+needed because only the hash ring is exercised.
+
+Usage::
+
+    python bench/bench_redis_sharding.py --servers 4 --keys 100000
+"""
+import argparse
+import collections
+import time
+
+from rush.stores import redis_sharded
+
+
+def run(servers: int, virtual_nodes: int, keys: int) -> tuple:
+    """Place ``keys`` keys on a ring of ``servers`` servers.
+
+    :returns:
+        A tuple of the busiest server's load relative to an even share, the
+        fraction of keys moved by adding a server and lookups per second.
+    """
+    urls = [f"redis://node-{n}:6379" for n in range(servers)]
+    store = redis_sharded.ShardedRedisStore(urls, virtual_nodes=virtual_nodes)
+    grown = redis_sharded.ShardedRedisStore(
+        urls + [f"redis://node-{servers}:6379"], virtual_nodes=virtual_nodes
+    )
+    names = [f"bench-key-{n}" for n in range(keys)]
+
+    started = time.perf_counter()
+    owners = [store.shard_for(name).url for name in names]
+    elapsed = time.perf_counter() - started
+
+    busiest = max(collections.Counter(owners).values())
+    moved = sum(
+        owner != grown.shard_for(name).url
+        for name, owner in zip(names, owners)
+    )
+    return busiest / (keys / servers), moved / keys, keys / elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"ideal moved fraction: {1 / (args.servers + 1):.3f}")
+    print(f"{'vnodes':>6} {'max load':>8} {'moved':>6} {'lookups/s':>10}")
+    for virtual_nodes in (1, 10, 40, 160, 640):
+        load, moved, rate = run(args.servers, virtual_nodes, args.keys)
+        print(
+            f"{virtual_nodes:>6} {load:>8.3f} {moved:>6.3f} {rate:>10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
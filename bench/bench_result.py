@@ -0,0 +1,99 @@
+"""Compare RateLimitResult with the attrs class it replaced.
+
+``legacy`` is a copy of the previous class, which held two timedeltas built
+by every check and called ``datetime.now`` again in ``resets_at``. Each row
+reports operations per second for both classes.
+
+Usage::
+
+    python bench/bench_result.py --number 200000
+"""
+import argparse
+import datetime
+import timeit
+import typing
+
+import attr
+
+from rush import limit_data
+from rush import result
+
+
+@attr.s(frozen=True)
+class LegacyRateLimitResult:
+    """The previous implementation of RateLimitResult."""
+
+    limit: int = attr.ib()
+    limited: bool = attr.ib()
+    remaining: int = attr.ib()
+    reset_after: datetime.timedelta = attr.ib()
+    retry_after: datetime.timedelta = attr.ib()
+
+    def resets_at(
+        self, from_when: typing.Optional[datetime.datetime] = None
+    ) -> datetime.datetime:
+        """Calculate the reset time from UTC now."""
+        if from_when is None:
+            from_when = datetime.datetime.now(datetime.timezone.utc)
+        return from_when + self.reset_after
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    now_us = limit_data.current_microseconds()
+    legacy = LegacyRateLimitResult(
+        10,
+        False,
+        9,
+        datetime.timedelta(microseconds=100_000),
+        datetime.timedelta(microseconds=-1_000_000),
+    )
+    current = result.RateLimitResult.from_microseconds(
+        10, False, 9, 100_000, -1_000_000, now_us
+    )
+
+    cases = [
+        (
+            "construct",
+            lambda: LegacyRateLimitResult(
+                10,
+                False,
+                9,
+                datetime.timedelta(microseconds=100_000),
+                datetime.timedelta(microseconds=-1_000_000),
+            ),
+            lambda: result.RateLimitResult.from_microseconds(
+                10, False, 9, 100_000, -1_000_000, now_us
+            ),
+        ),
+        (
+            "construct+read",
+            lambda: LegacyRateLimitResult(
+                10,
+                False,
+                9,
+                datetime.timedelta(microseconds=100_000),
+                datetime.timedelta(microseconds=-1_000_000),
+            ).retry_after,
+            lambda: result.RateLimitResult.from_microseconds(
+                10, False, 9, 100_000, -1_000_000, now_us
+            ).retry_after,
+        ),
+        ("resets_at", legacy.resets_at, current.resets_at),
+    ]
+    print(f"{'operation':<16} {'legacy/s':>12} {'current/s':>12} {'x':>5}")
+    for name, old, new in cases:
+        old_rate = args.number / timeit.timeit(old, number=args.number)
+        new_rate = args.number / timeit.timeit(new, number=args.number)
+        print(
+            f"{name:<16} {old_rate:>12,.0f} {new_rate:>12,.0f}"
+            f" {new_rate / old_rate:>5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
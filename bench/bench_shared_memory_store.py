@@ -0,0 +1,117 @@
+"""Compare the shared memory store against Redis on localhost.
+
+This runs the pure-Python GCRA limiter with each store from several worker
+processes at once, reporting the aggregate checks per second and how many
+requests were allowed against a single shared key. With a shared store the
+number allowed matches the quota no matter how many processes there are.
+
+Usage::
+
+    python bench/bench_shared_memory_store.py --redis-url redis://localhost
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from rush import exceptions
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.stores import dictionary
+from rush.stores import shared_memory
+
+QUOTA = quota.Quota.per_hour(1_000)
+
+
+def _make_store(kind: str, location: str):
+    if kind == "shared-memory":
+        return shared_memory.SharedMemoryStore(path=location, capacity=4096)
+    if kind == "redis":
+        from rush.stores import redis as redis_store
+
+        return redis_store.RedisStore(url=location)
+    return dictionary.DictionaryStore()
+
+
+def _worker(kind, location, index, checks, start, results):
+    thr = throttle.Throttle(
+        rate=QUOTA,
+        limiter=gcra.GenericCellRatelimiter(store=_make_store(kind, location)),
+    )
+    allowed = 0
+    start.wait()
+    for n in range(checks):
+        # One shared hot key and a spread of per-process keys
+        key = "shared" if n % 10 == 0 else f"proc-{index}-key-{n % 64}"
+        for _ in range(5):
+            try:
+                checked = thr.check(key, 1)
+            except exceptions.AtomicOperationError:
+                continue
+            if key == "shared" and not checked.limited:
+                allowed += 1
+            break
+    results.put(allowed)
+
+
+def run(kind: str, location: str, processes: int, checks: int) -> tuple:
+    """Run ``checks`` checks in each of ``processes`` worker processes.
+
+    :returns:
+        A tuple of aggregate checks per second and requests allowed on the
+        shared key.
+    """
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=_worker,
+            args=(kind, location, index, checks, start, results),
+        )
+        for index in range(processes)
+    ]
+    for w in workers:
+        w.start()
+    started = time.perf_counter()
+    start.set()
+    allowed = sum(results.get() for _ in workers)
+    elapsed = time.perf_counter() - started
+    for w in workers:
+        w.join()
+    return (processes * checks) / elapsed, allowed
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--checks", type=int, default=20_000)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir="/dev/shm") as tmpdir:
+        stores = [
+            ("dictionary", ""),
+            ("shared-memory", os.path.join(tmpdir, "rush-bench")),
+        ]
+        if args.redis_url:
+            _make_store("redis", args.redis_url).client.flushdb()
+            stores.append(("redis", args.redis_url))
+        print(f"quota: {QUOTA.limit} per hour on the shared key")
+        print(
+            f"{'store':<14} {'processes':>9} {'checks/s':>12}"
+            f" {'allowed':>8}"
+        )
+        for kind, location in stores:
+            rate, allowed = run(kind, location, args.processes, args.checks)
+            print(
+                f"{kind:<14} {args.processes:>9} {rate:>12,.0f}"
+                f" {allowed:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
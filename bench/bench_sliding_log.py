@@ -0,0 +1,134 @@
+"""Compare the memory and speed of the sliding log and periodic limiters.
+
+The first table reports the memory each key uses once it has made its
+quota's limit of requests. The in-memory limiters are measured with
+:mod:`tracemalloc`: the periodic limiter's data in a
+:class:`~rush.stores.dictionary.DictionaryStore` and the sliding log
+limiter's ring buffers. With ``--redis-url`` the Lua limiters' keys are
+measured with ``MEMORY USAGE``.
+
+The second table reports checks per second. ``hot`` checks one key over and
+over, mostly while it is limited, and ``spread`` cycles through many keys
+which are rarely limited.
+
+Usage::
+
+    python bench/bench_sliding_log.py --keys 1000 --limits 10 100
+    python bench/bench_sliding_log.py --redis-url redis://localhost
+"""
+import argparse
+import time
+import tracemalloc
+
+from rush import quota
+from rush import throttle
+from rush.limiters import periodic
+from rush.limiters import redis_periodic
+from rush.limiters import redis_sliding_log
+from rush.limiters import sliding_log
+from rush.stores import dictionary
+from rush.stores import redis as redis_store
+
+
+def periodic_limiter() -> periodic.PeriodicLimiter:
+    """Create a periodic limiter with a dictionary store of its own."""
+    return periodic.PeriodicLimiter(store=dictionary.DictionaryStore())
+
+
+LIMITERS = (
+    ("periodic", periodic_limiter),
+    ("sliding log", sliding_log.SlidingLogLimiter),
+)
+REDIS_LIMITERS = (
+    ("redis periodic", redis_periodic.PeriodicLimiter),
+    ("redis log", redis_sliding_log.SlidingLogLimiter),
+)
+
+
+def fill(limiter, keys: list, limit: int) -> None:
+    """Make every key use its whole limit."""
+    rate = quota.Quota.per_hour(limit)
+    for key in keys:
+        for _ in range(limit):
+            limiter.rate_limit(key, 1, rate)
+
+
+def bytes_per_key(factory, keys: list, limit: int) -> float:
+    """Measure the memory allocated per key by an in-memory limiter."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    limiter = factory()
+    fill(limiter, keys, limit)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(keys)
+
+
+def redis_bytes_per_key(limiter, keys: list, limit: int) -> float:
+    """Measure the memory Redis uses per key for a Lua limiter."""
+    fill(limiter, keys, limit)
+    rate = quota.Quota.per_hour(limit)
+    total = sum(
+        limiter.client.memory_usage(limiter.stored_key(key, rate))
+        for key in keys
+    )
+    return total / len(keys)
+
+
+def run(limiter, keys: list, checks: int) -> float:
+    """Check ``keys`` in turn until ``checks`` checks are made.
+
+    :returns:
+        The number of checks per second.
+    """
+    thr = throttle.Throttle(rate=quota.Quota.per_second(100), limiter=limiter)
+    count = len(keys)
+    started = time.perf_counter()
+    for n in range(checks):
+        thr.check(keys[n % count], 1)
+    return checks / (time.perf_counter() - started)
+
+
+def main() -> None:
+    """Run the benchmark and print tables of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=100_000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--limits", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+    store = None
+    if args.redis_url:
+        store = redis_store.RedisStore(args.redis_url)
+
+    print(f"{'limiter':<15} {'limit':>6} {'bytes/key':>10}")
+    for limit in args.limits:
+        keys = [f"bench:{limit}:user-{n}" for n in range(args.keys)]
+        for name, factory in LIMITERS:
+            used = bytes_per_key(factory, keys, limit)
+            print(f"{name:<15} {limit:>6} {used:>10,.0f}")
+        if store is not None:
+            for name, factory in REDIS_LIMITERS:
+                limiter = factory(store=store, key_prefix=f"bench:{name}:")
+                used = redis_bytes_per_key(limiter, keys, limit)
+                print(f"{name:<15} {limit:>6} {used:>10,.0f}")
+
+    limiters = [(name, factory()) for name, factory in LIMITERS]
+    if store is not None:
+        limiters += [
+            (name, factory(store=store)) for name, factory in REDIS_LIMITERS
+        ]
+
+    print()
+    print(f"{'limiter':<15} {'pattern':<8} {'keys':>6} {'checks/s':>10}")
+    for name, limiter in limiters:
+        for pattern, keys in (
+            ("hot", [f"bench:{name}:hot"]),
+            ("spread", [f"bench:{name}:user-{n}" for n in range(args.keys)]),
+        ):
+            rate = run(limiter, keys, args.checks)
+            print(f"{name:<15} {pattern:<8} {len(keys):>6} {rate:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
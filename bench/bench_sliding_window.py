@@ -0,0 +1,138 @@
+"""Compare the sliding window limiter with the periodic and GCRA limiters.
+
+The first table reports checks per second. ``hot`` checks one key over and
+over, mostly while it is limited, and ``spread`` cycles through many keys
+which are rarely limited. The pure-Python limiters use a
+:class:`~rush.stores.dictionary.DictionaryStore` so the time is spent in the
+limiter rather than in I/O. With ``--redis-url`` the Lua limiters are
+measured against that server too.
+
+The second table replays, on a simulated clock, a single request followed
+a second later by a burst of four times the quota of ``--limit`` per
+second, and reports the most requests each pure-Python limiter allowed
+within any one second. The periodic limiter allows up to twice its limit
+where two of its windows meet. This uses a
+:class:`~rush.stores.bounded.BoundedDictionaryStore` since the
+epoch-aligned periodic limiter needs a store which expires data.
+
+Usage::
+
+    python bench/bench_sliding_window.py --checks 100000 --keys 1000
+    python bench/bench_sliding_window.py --redis-url redis://localhost
+"""
+import argparse
+import bisect
+import datetime
+import functools
+import time
+
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.limiters import periodic
+from rush.limiters import redis_gcra
+from rush.limiters import redis_periodic
+from rush.limiters import redis_sliding_window
+from rush.limiters import sliding_window
+from rush.stores import bounded
+from rush.stores import dictionary
+from rush.stores import redis as redis_store
+
+LIMITERS = (
+    ("gcra", gcra.GenericCellRatelimiter),
+    ("periodic", periodic.PeriodicLimiter),
+    ("sliding", sliding_window.SlidingWindowLimiter),
+)
+ALIGNED_LIMITERS = (
+    (
+        "periodic epoch",
+        functools.partial(periodic.PeriodicLimiter, align_to_epoch=True),
+    ),
+)
+REDIS_LIMITERS = (
+    ("redis gcra", redis_gcra.GenericCellRatelimiter),
+    ("redis periodic", redis_periodic.PeriodicLimiter),
+    ("redis sliding", redis_sliding_window.SlidingWindowLimiter),
+)
+
+
+def run(limiter, keys: list, checks: int) -> float:
+    """Check ``keys`` in turn until ``checks`` checks are made.
+
+    :returns:
+        The number of checks per second.
+    """
+    thr = throttle.Throttle(
+        rate=quota.Quota.per_second(100, maximum_burst=10), limiter=limiter
+    )
+    count = len(keys)
+    started = time.perf_counter()
+    for n in range(checks):
+        thr.check(keys[n % count], 1)
+    return checks / (time.perf_counter() - started)
+
+
+def worst_burst(factory, limit: int) -> int:
+    """Find the most requests allowed within any one second.
+
+    One request starts a second, then ``4 * limit`` requests arrive evenly
+    between 0.9 and 1.1 seconds later.
+    """
+    store = bounded.BoundedDictionaryStore()
+    start = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    clock = [start]
+    store.current_time = lambda tzinfo=None: clock[0]
+    limiter = factory(store=store)
+    rate = quota.Quota.per_second(limit)
+    arrivals = [start] + [
+        start + datetime.timedelta(seconds=0.9 + n * 0.2 / (4 * limit))
+        for n in range(4 * limit)
+    ]
+    allowed = []
+    for clock[0] in arrivals:
+        if not limiter.rate_limit("key", 1, rate).limited:
+            allowed.append(clock[0])
+    second = datetime.timedelta(seconds=1)
+    return max(
+        bisect.bisect_left(allowed, at + second) - n
+        for n, at in enumerate(allowed)
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print tables of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=100_000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    limiters = [
+        (name, factory(store=dictionary.DictionaryStore()))
+        for name, factory in LIMITERS
+    ]
+    if args.redis_url:
+        store = redis_store.RedisStore(args.redis_url)
+        limiters += [
+            (name, factory(store=store)) for name, factory in REDIS_LIMITERS
+        ]
+
+    print(f"{'limiter':<15} {'pattern':<8} {'keys':>6} {'checks/s':>10}")
+    for name, limiter in limiters:
+        for pattern, keys in (
+            ("hot", [f"bench:{name}:hot"]),
+            ("spread", [f"bench:{name}:user-{n}" for n in range(args.keys)]),
+        ):
+            rate = run(limiter, keys, args.checks)
+            print(f"{name:<15} {pattern:<8} {len(keys):>6} {rate:>10,.0f}")
+
+    print()
+    print(f"{'limiter':<15} {'limit':>6} {'most in 1s':>10}")
+    for name, factory in LIMITERS + ALIGNED_LIMITERS:
+        most = worst_burst(factory, args.limit)
+        print(f"{name:<15} {args.limit:>6} {most:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Measure checks per second with the SQLite store.
+
+Runs the pure-Python GCRA limiter against a SQLite database in a temporary
+directory with several group commit sizes.
+
+Usage::
+
+    python bench/bench_sqlite_store.py --checks 50000 --commit-every 1 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.stores import sqlite
+
+
+def run(path: str, checks: int, commit_every: int) -> float:
+    """Perform ``checks`` checks spread over 1,000 keys.
+
+    :returns:
+        Checks per second.
+    """
+    store = sqlite.SQLiteStore(path=path, commit_every=commit_every)
+    thr = throttle.Throttle(
+        rate=quota.Quota.per_second(1_000_000),
+        limiter=gcra.GenericCellRatelimiter(store=store),
+    )
+    started = time.perf_counter()
+    for n in range(checks):
+        thr.check(f"key-{n % 1000}", 1)
+    store.flush()
+    elapsed = time.perf_counter() - started
+    store.close()
+    return checks / elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=50_000)
+    parser.add_argument(
+        "--commit-every", type=int, nargs="+", default=[1, 10, 100, 1000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'commit every':>12} {'checks/s':>10}")
+    for commit_every in args.commit_every:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rush.db")
+            rate = run(path, args.checks, commit_every)
+        print(f"{commit_every:>12} {rate:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
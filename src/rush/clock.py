@@ -0,0 +1,184 @@
+"""Estimate a store's clock from occasional samples."""
+import datetime
+import time
+import typing
+
+import attr
+
+_NANOSECONDS_PER_MICROSECOND = 1_000
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _monotonic_ns() -> int:
+    """Read the monotonic clock in nanoseconds on Python 3.6.
+
+    :func:`time.monotonic_ns` is new in Python 3.7.
+    """
+    return int(time.monotonic() * 1_000_000_000)
+
+
+_MONOTONIC_NS = getattr(time, "monotonic_ns", _monotonic_ns)
+
+
+class _Estimate(typing.NamedTuple):
+    # Store time minus local monotonic time at the anchor
+    offset_ns: int
+    # Local monotonic time at the midpoint of the sample's round trip
+    anchor_ns: int
+    round_trip_ns: int
+    # How many nanoseconds the store's clock gains per local nanosecond
+    drift: float
+    # A bound on the error of ``drift``
+    drift_error: float
+
+
+@attr.s
+class SynchronizedClock:
+    """A local estimate of a store's clock.
+
+    Reading the clock of a store such as Redis costs a round trip. Instead,
+    this samples the store's clock every ``resync_interval`` and serves the
+    time in between from the local monotonic clock, :func:`time.monotonic_ns`
+    where it is available.
+
+    Like NTP, each sample records the local time a request was sent and its
+    response received. The store read its clock at some point in between, so
+    the estimate assumes the midpoint and is off by at most half the round
+    trip. Consecutive samples also estimate how fast the two clocks drift
+    apart, which is applied between samples. A sample with a longer round
+    trip than the current estimate's error is discarded, unless it
+    contradicts the estimate, e.g., because the store's clock was stepped.
+
+    .. attribute:: resync_interval
+
+        How often to sample the store's clock.
+
+    .. attribute:: max_drift
+
+        The largest plausible drift between the two clocks as a fraction,
+        e.g., ``200e-6`` is 200 parts per million. This bounds the error
+        until the drift has been estimated.
+
+    .. attribute:: uncertainty
+
+        A bound on the difference between :meth:`now_microseconds` and the
+        store's clock.
+    """
+
+    resync_interval: datetime.timedelta = attr.ib(
+        default=datetime.timedelta(seconds=10)
+    )
+    max_drift: float = attr.ib(default=200e-6)
+    monotonic_ns: typing.Callable[[], int] = attr.ib(
+        default=_MONOTONIC_NS, repr=False
+    )
+    _estimate: typing.Optional[_Estimate] = attr.ib(
+        init=False, default=None, repr=False
+    )
+    _sampled_at_ns: int = attr.ib(init=False, default=0, repr=False)
+
+    @resync_interval.validator
+    def _validate_resync_interval(self, attribute, value):
+        if value <= datetime.timedelta(0):
+            raise ValueError("resync_interval must be positive")
+
+    @max_drift.validator
+    def _validate_max_drift(self, attribute, value):
+        if not 0 <= value < 1:
+            raise ValueError("max_drift must be between 0 and 1")
+
+    def needs_sample(self) -> bool:
+        """Return whether the store's clock should be sampled."""
+        if self._estimate is None:
+            return True
+        elapsed_ns = self.monotonic_ns() - self._sampled_at_ns
+        interval_us = self.resync_interval // _ONE_MICROSECOND
+        return elapsed_ns >= interval_us * _NANOSECONDS_PER_MICROSECOND
+
+    def add_sample(
+        self, sent_ns: int, store_microseconds: int, received_ns: int
+    ) -> None:
+        """Update the estimate with a reading of the store's clock.
+
+        :param int sent_ns:
+            The local monotonic time at which the request was sent.
+        :param int store_microseconds:
+            The time the store returned, in microseconds since the epoch.
+        :param int received_ns:
+            The local monotonic time at which the response arrived.
+        """
+        self._sampled_at_ns = received_ns
+        round_trip_ns = received_ns - sent_ns
+        anchor_ns = sent_ns + round_trip_ns // 2
+        store_ns = store_microseconds * _NANOSECONDS_PER_MICROSECOND
+        offset_ns = store_ns - anchor_ns
+        drift, drift_error = 0.0, self.max_drift
+        previous = self._estimate
+        if previous is not None:
+            elapsed_ns = anchor_ns - previous.anchor_ns
+            predicted_ns = previous.offset_ns + previous.drift * elapsed_ns
+            bound_ns = self._uncertainty_ns(previous, anchor_ns)
+            if abs(offset_ns - predicted_ns) > bound_ns + round_trip_ns / 2:
+                # The sample contradicts the estimate, e.g., because the
+                # store's clock was stepped, so start over from this sample
+                pass
+            elif round_trip_ns / 2 > bound_ns:
+                # The old estimate is still more precise than this sample
+                return
+            else:
+                drift, drift_error = previous.drift, previous.drift_error
+                if elapsed_ns > 0:
+                    estimated = (offset_ns - previous.offset_ns) / elapsed_ns
+                    error = (
+                        (previous.round_trip_ns + round_trip_ns) / 2
+                    ) / elapsed_ns
+                    if error < drift_error:
+                        drift, drift_error = estimated, error
+        self._estimate = _Estimate(
+            offset_ns, anchor_ns, round_trip_ns, drift, drift_error
+        )
+
+    def sample(self, read: typing.Callable[[], int]) -> None:
+        """Sample the store's clock.
+
+        :param read:
+            A callable returning the store's time in microseconds since the
+            epoch.
+        """
+        sent_ns = self.monotonic_ns()
+        store_microseconds = read()
+        self.add_sample(sent_ns, store_microseconds, self.monotonic_ns())
+
+    def now_microseconds(self) -> int:
+        """Estimate the store's current time in microseconds since the epoch.
+
+        :raises ValueError:
+            If the clock has never been sampled.
+        """
+        estimate = self._estimate
+        if estimate is None:
+            raise ValueError("The store's clock has not been sampled yet")
+        now_ns = self.monotonic_ns()
+        drift_ns = estimate.drift * (now_ns - estimate.anchor_ns)
+        return (
+            now_ns + estimate.offset_ns + round(drift_ns)
+        ) // _NANOSECONDS_PER_MICROSECOND
+
+    @property
+    def uncertainty(self) -> typing.Optional[datetime.timedelta]:
+        """Bound the error of the current estimate.
+
+        This is ``None`` until the clock has been sampled.
+        """
+        estimate = self._estimate
+        if estimate is None:
+            return None
+        uncertainty_ns = self._uncertainty_ns(estimate, self.monotonic_ns())
+        return datetime.timedelta(
+            microseconds=uncertainty_ns / _NANOSECONDS_PER_MICROSECOND
+        )
+
+    @staticmethod
+    def _uncertainty_ns(estimate: _Estimate, now_ns: int) -> float:
+        elapsed_ns = abs(now_ns - estimate.anchor_ns)
+        return estimate.round_trip_ns / 2 + estimate.drift_error * elapsed_ns
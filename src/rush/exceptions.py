@@ -12,11 +12,14 @@ class AtomicOperationError(RushError):
 class MismatchedDataError(AtomicOperationError):
     """An error occurred while swapping data."""
 
-    def __init__(self, message, *, expected_limit_data, actual_limit_data):
+    def __init__(
+        self, message, *, expected_limit_data, actual_limit_data, key=None
+    ):
         """Handle extra arguments for easier access by users."""
         super().__init__(message)
         self.expected_limit_data = expected_limit_data
         self.actual_limit_data = actual_limit_data
+        self.key = key
 
 
 class DataChangedInStoreError(AtomicOperationError):
@@ -40,3 +43,21 @@ class InvalidRedisURL(RedisStoreError):
         super().__init__(message)
         self.url = url
         self.error = error
+
+
+class SharedMemoryStoreError(RushError):
+    """Base class for all SharedMemoryStore-related exceptions."""
+
+    def __init__(self, message, *, path):
+        """Handle extra arguments for easier access by users."""
+        super().__init__(message)
+        self.path = path
+
+
+class SharedMemoryStoreFull(SharedMemoryStoreError):
+    """There are no free buckets left in the shared memory table."""
+
+    def __init__(self, message, *, path, capacity):
+        """Handle extra arguments for easier access by users."""
+        super().__init__(message, path=path)
+        self.capacity = capacity
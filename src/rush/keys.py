@@ -0,0 +1,157 @@
+"""Helpers for building the keys limiters store their data under."""
+import base64
+import datetime
+import hashlib
+import typing
+
+import attr
+
+from . import quota
+
+_one_microsecond: datetime.timedelta = datetime.timedelta(microseconds=1)
+
+
+def hash_tag_of(key: str) -> typing.Optional[str]:
+    """Return the Redis Cluster hash tag of a key, if it has one.
+
+    The hash tag is the non-empty text between the first ``{`` and the
+    following ``}``.
+    """
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1 : end]
+    return None
+
+
+def _digest(data: str, size: int) -> str:
+    digest = hashlib.blake2b(data.encode("utf-8"), digest_size=size).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+
+def quota_fingerprint(rate: quota.Quota) -> str:
+    """Return a short string identifying a quota.
+
+    Quotas with the same count, maximum burst and period share a
+    fingerprint.
+
+    :param rate:
+        The quota to identify.
+    :type rate:
+        :class:`~rush.quota.Quota`
+    :returns:
+        Six URL-safe characters.
+    """
+    return _digest(
+        f"{rate.count}:{rate.maximum_burst}:{rate.period // _one_microsecond}",
+        4,
+    )
+
+
+def shorten(key: str, max_length: int) -> str:
+    """Replace a key longer than ``max_length`` with its digest.
+
+    The digest is 22 URL-safe characters. If the key has a hash tag, the
+    digest is prefixed with the tag so the key stays in the same slot or on
+    the same server.
+
+    :param str key:
+        The key to shorten.
+    :param int max_length:
+        The length of the longest key which is kept as it is.
+    :returns:
+        The key or its digest.
+    """
+    if len(key) <= max_length:
+        return key
+    digest = _digest(key, 16)
+    tag = hash_tag_of(key)
+    if tag is None:
+        return digest
+    return f"{{{tag}}}{digest}"
+
+
+def namespaced(
+    key: str,
+    rate: quota.Quota,
+    *,
+    prefix: str = "",
+    include_quota: bool = False,
+    max_length: typing.Optional[int] = None,
+) -> str:
+    """Build the key a limiter stores a caller's key under.
+
+    :param str key:
+        The caller's key.
+    :param rate:
+        The quota the key is limited with.
+    :type rate:
+        :class:`~rush.quota.Quota`
+    :param str prefix:
+        Text to start the key with. It must not contain ``{`` so that hash
+        tags in ``key`` keep working.
+    :param bool include_quota:
+        Whether to add the :func:`quota_fingerprint` of ``rate`` so that
+        different quotas never share a key.
+    :param int max_length:
+        If given, :func:`shorten` ``key`` to this length.
+    :returns:
+        The stored key.
+    """
+    if max_length is not None:
+        key = shorten(key, max_length)
+    if include_quota:
+        key = f"{quota_fingerprint(rate)}:{key}"
+    return prefix + key
+
+
+@attr.s
+class KeyNamespace:
+    """Keyword arguments configuring the keys a limiter stores data under.
+
+    Limiters built on this store a caller's key under :meth:`stored_key`.
+
+    .. attribute:: key_prefix
+
+        Text to start every stored key with, e.g., to keep limiters sharing a
+        Redis database apart. It must not contain ``{``. Defaults to the
+        limiter's :attr:`default_key_prefix`.
+
+    .. attribute:: include_quota
+
+        Whether to add a fingerprint of the quota to every stored key, so
+        throttles with different quotas never share state for a key.
+
+    .. attribute:: max_key_length
+
+        If set, keys longer than this are stored under a fixed-width digest,
+        see :func:`shorten`.
+    """
+
+    #: The ``key_prefix`` used when none is given.
+    default_key_prefix: typing.ClassVar[str] = ""
+
+    key_prefix: str = attr.ib(
+        default=attr.Factory(
+            lambda self: self.default_key_prefix, takes_self=True
+        ),
+        kw_only=True,
+    )
+    include_quota: bool = attr.ib(default=False, kw_only=True)
+    max_key_length: typing.Optional[int] = attr.ib(default=None, kw_only=True)
+
+    @key_prefix.validator
+    def _validate_key_prefix(self, attribute, value):
+        if "{" in value:
+            raise ValueError("key_prefix must not contain a hash tag")
+
+    def stored_key(self, key: str, rate: quota.Quota) -> str:
+        """Return the key the data for a key and quota is stored under."""
+        return namespaced(
+            key,
+            rate,
+            prefix=self.key_prefix,
+            include_quota=self.include_quota,
+            max_length=self.max_key_length,
+        )
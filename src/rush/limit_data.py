@@ -5,6 +5,35 @@ import typing
 import attr
 
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+_NAIVE_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+# The length of a datetime formatted with DATETIME_FORMAT without its offset
+_WITHOUT_OFFSET = len("2018-12-11T12:12:15.123456")
+# datetime.fromisoformat is new in Python 3.7
+_fromisoformat = getattr(datetime.datetime, "fromisoformat", None)
+
+
+def datetime_to_microseconds(value: datetime.datetime) -> int:
+    """Convert a datetime to microseconds since the epoch.
+
+    Naive datetimes are taken to be in UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return (value - EPOCH) // _ONE_MICROSECOND
+
+
+def current_microseconds() -> int:
+    """Return the current time in microseconds since the epoch."""
+    return datetime_to_microseconds(
+        datetime.datetime.now(datetime.timezone.utc)
+    )
+
+
+def microseconds_to_datetime(value: int) -> datetime.datetime:
+    """Convert microseconds since the epoch to a datetime in UTC."""
+    return EPOCH + datetime.timedelta(microseconds=value)
 
 
 def convert_str_to_datetime(
@@ -12,7 +41,20 @@ def convert_str_to_datetime(
 ) -> datetime.datetime:
     """Convert datetime strings to datetimes."""
     if isinstance(value, str):
-        return datetime.datetime.strptime(value, DATETIME_FORMAT)
+        has_offset = value[-5:-4] in ("+", "-") and value[-4:].isdigit()
+        if _fromisoformat is not None:
+            # DATETIME_FORMAT writes offsets as +0000 which fromisoformat
+            # only accepts from Python 3.11, so add the colon it expects
+            isoformatted = value
+            if has_offset:
+                isoformatted = f"{value[:-2]}:{value[-2:]}"
+            try:
+                return _fromisoformat(isoformatted)
+            except ValueError:
+                pass
+        if has_offset:
+            return datetime.datetime.strptime(value, DATETIME_FORMAT)
+        return datetime.datetime.strptime(value, _NAIVE_DATETIME_FORMAT)
     return value
 
 
@@ -25,22 +67,191 @@ def maybe_convert_str_to_datetime(
     return convert_str_to_datetime(value)
 
 
-@attr.s(frozen=True)
+def _format(value: datetime.datetime) -> str:
+    """Format a datetime like ``value.strftime(DATETIME_FORMAT)``."""
+    formatted = value.isoformat(timespec="microseconds")
+    return formatted[:_WITHOUT_OFFSET] + formatted[
+        _WITHOUT_OFFSET:
+    ].replace(":", "")
+
+
 class LimitData:
-    """Data class that organizes our limit data for storage."""
-
-    used: int = attr.ib(converter=int)
-    remaining: int = attr.ib(converter=int)
-    created_at: datetime.datetime = attr.ib(converter=convert_str_to_datetime)
-    time: typing.Optional[datetime.datetime] = attr.ib(
-        converter=attr.converters.optional(maybe_convert_str_to_datetime),
-        default=None,
-        kw_only=True,
+    """Data class that organizes our limit data for storage.
+
+    Times are available both as datetimes, :attr:`created_at` and
+    :attr:`time`, and as integer microseconds since the epoch,
+    :attr:`created_at_us` and :attr:`time_us`. Whichever form the data was
+    created with is kept and the other is computed when first used, so
+    neither the limiters, which work in microseconds, nor callers using
+    datetimes pay for conversions they do not need.
+
+    Limit data is immutable and compares equal when it represents the same
+    values, regardless of how it was created.
+    """
+
+    # Only the form of the times the data was created with is set; the slots
+    # of the other form are set when they are first computed.
+
+    __slots__ = (
+        "used",
+        "remaining",
+        "_created_at_us",
+        "_time_us",
+        "_created_at",
+        "_time",
     )
 
-    @created_at.default
-    def _now(self):
-        return datetime.datetime.now(datetime.timezone.utc)
+    used: int
+    remaining: int
+    _created_at_us: int
+    _time_us: typing.Optional[int]
+    _created_at: datetime.datetime
+    _time: typing.Optional[datetime.datetime]
+
+    def __init__(
+        self,
+        used: typing.Union[int, str],
+        remaining: typing.Union[int, str],
+        created_at: typing.Union[str, datetime.datetime, None] = None,
+        *,
+        time: typing.Union[str, datetime.datetime, None] = None,
+    ) -> None:
+        """Create limit data, converting strings as needed.
+
+        :param int used:
+        :param int remaining:
+        :param created_at:
+            When the data was created, as a datetime or a string in
+            :data:`DATETIME_FORMAT`. Defaults to now.
+        :param time:
+            The data's time, as a datetime, a string in
+            :data:`DATETIME_FORMAT`, or an empty string or ``None`` when it
+            is not set.
+        """
+        if created_at is None:
+            created_at = datetime.datetime.now(datetime.timezone.utc)
+        elif created_at.__class__ is str:
+            created_at = convert_str_to_datetime(created_at)
+        if time.__class__ is str:
+            time = maybe_convert_str_to_datetime(time)
+        _set_used(self, int(used))
+        _set_remaining(self, int(remaining))
+        _set_created_at(self, created_at)
+        _set_time(self, time)
+
+    @classmethod
+    def from_microseconds(
+        cls,
+        used: int,
+        remaining: int,
+        created_at_us: int,
+        time_us: typing.Optional[int] = None,
+    ) -> "LimitData":
+        """Create limit data from trusted values without converting them.
+
+        :param int used:
+        :param int remaining:
+        :param int created_at_us:
+            When the data was created, in microseconds since the epoch.
+        :param int time_us:
+            The data's time in microseconds since the epoch, if it is set.
+        :returns:
+            The limit data.
+        :rtype:
+            :class:`~rush.limit_data.LimitData`
+        """
+        self = object.__new__(cls)
+        _set_used(self, used)
+        _set_remaining(self, remaining)
+        _set_created_at_us(self, created_at_us)
+        _set_time_us(self, time_us)
+        return self
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        """Refuse to change limit data."""
+        raise attr.exceptions.FrozenInstanceError()
+
+    def __delattr__(self, name: str) -> None:
+        """Refuse to change limit data."""
+        raise attr.exceptions.FrozenInstanceError()
+
+    def __reduce__(self):
+        """Pickle the data as microseconds."""
+        return (
+            LimitData.from_microseconds,
+            (self.used, self.remaining, self.created_at_us, self.time_us),
+        )
+
+    def _key(self) -> typing.Tuple[int, int, int, typing.Optional[int]]:
+        return (self.used, self.remaining, self.created_at_us, self.time_us)
+
+    def __eq__(self, other: typing.Any) -> bool:
+        """Compare the values of limit data."""
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __ne__(self, other: typing.Any) -> bool:
+        """Compare the values of limit data."""
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self) -> int:
+        """Hash the values of limit data."""
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        """Show the values of limit data."""
+        return (
+            f"LimitData(used={self.used!r}, remaining={self.remaining!r},"
+            f" created_at={self.created_at!r}, time={self.time!r})"
+        )
+
+    @property
+    def created_at_us(self) -> int:
+        """Return when the data was created in microseconds."""
+        try:
+            return self._created_at_us
+        except AttributeError:
+            created_at_us = datetime_to_microseconds(self._created_at)
+            _set_created_at_us(self, created_at_us)
+            return created_at_us
+
+    @property
+    def time_us(self) -> typing.Optional[int]:
+        """Return the data's time in microseconds, if it is set."""
+        try:
+            return self._time_us
+        except AttributeError:
+            time = self._time
+            time_us = None if time is None else datetime_to_microseconds(time)
+            _set_time_us(self, time_us)
+            return time_us
+
+    @property
+    def created_at(self) -> datetime.datetime:
+        """Return when the data was created."""
+        try:
+            return self._created_at
+        except AttributeError:
+            created_at = microseconds_to_datetime(self._created_at_us)
+            _set_created_at(self, created_at)
+            return created_at
+
+    @property
+    def time(self) -> typing.Optional[datetime.datetime]:
+        """Return the data's time, if it is set."""
+        try:
+            return self._time
+        except AttributeError:
+            time_us = self._time_us
+            time = None
+            if time_us is not None:
+                time = microseconds_to_datetime(time_us)
+            _set_time(self, time)
+            return time
 
     def asdict(self) -> typing.Dict[str, str]:
         """Return the data as a dictionary.
@@ -49,16 +260,47 @@ class LimitData:
             A dictionary mapping the attributes to string representations
             of the values.
         """
-        time = ""
-        if self.time is not None:
-            time = self.time.strftime(DATETIME_FORMAT)
+        time = self.time
         return {
             "used": str(self.used),
             "remaining": str(self.remaining),
-            "created_at": self.created_at.strftime(DATETIME_FORMAT),
-            "time": time,
+            "created_at": _format(self.created_at),
+            "time": "" if time is None else _format(time),
         }
 
+    def aspacked(self) -> str:
+        """Return the data packed into one compact string.
+
+        The string holds ``used``, ``remaining``, ``created_at`` and ``time``
+        separated by colons, with times as integer microseconds since the
+        epoch. ``time`` is empty when it is not set.
+
+        :returns:
+            The packed representation of this data.
+        """
+        time_us = self.time_us
+        time = "" if time_us is None else str(time_us)
+        return f"{self.used}:{self.remaining}:{self.created_at_us}:{time}"
+
+    @classmethod
+    def frompacked(cls, value: str) -> "LimitData":
+        """Create limit data from the output of :meth:`aspacked`.
+
+        :param str value:
+            The packed representation of the data.
+        :returns:
+            The unpacked limit data.
+        :rtype:
+            :class:`~rush.limit_data.LimitData`
+        """
+        used, remaining, created_at, time = value.split(":")
+        return cls.from_microseconds(
+            int(used),
+            int(remaining),
+            int(created_at),
+            int(time) if time else None,
+        )
+
     def copy_with(
         self,
         *,
@@ -78,10 +320,27 @@ class LimitData:
         :rtype:
             :class:`~rush.stores.base.LimitData`
         """
-        used = used if used is not None else self.used
-        remaining = remaining if remaining is not None else self.remaining
-        created_at = created_at if created_at is not None else self.created_at
-        time = time if time is not None else self.time
-        return LimitData(
-            used=used, remaining=remaining, created_at=created_at, time=time
+        copy = object.__new__(LimitData)
+        _set_used(copy, self.used if used is None else used)
+        _set_remaining(
+            copy, self.remaining if remaining is None else remaining
         )
+        if created_at is None:
+            _set_created_at_us(copy, self.created_at_us)
+        else:
+            _set_created_at(copy, created_at)
+        if time is None:
+            _set_time_us(copy, self.time_us)
+        else:
+            _set_time(copy, time)
+        return copy
+
+
+# LimitData refuses attribute assignment, so its slots are set through their
+# descriptors
+_set_used = LimitData.used.__set__  # type: ignore
+_set_remaining = LimitData.remaining.__set__  # type: ignore
+_set_created_at_us = LimitData._created_at_us.__set__  # type: ignore
+_set_time_us = LimitData._time_us.__set__  # type: ignore
+_set_created_at = LimitData._created_at.__set__  # type: ignore
+_set_time = LimitData._time.__set__  # type: ignore
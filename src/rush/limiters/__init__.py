@@ -1,5 +1,17 @@
 """Module containing built-in limiters."""
 
+from .base import AsyncBaseLimiter
+from .base import AsyncCompareAndSwapLimiter
 from .base import BaseLimiter
+from .base import CompareAndSwapLimiter
+from .base import ContentionStats
+from .base import RetryPolicy
 
-__all__ = ("BaseLimiter",)
+__all__ = (
+    "AsyncBaseLimiter",
+    "AsyncCompareAndSwapLimiter",
+    "BaseLimiter",
+    "CompareAndSwapLimiter",
+    "ContentionStats",
+    "RetryPolicy",
+)
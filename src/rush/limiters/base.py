@@ -1,10 +1,44 @@
 """Interface definition for limiters."""
+import asyncio
+import datetime
+import random
+import threading
+import time
+import typing
+
 import attr
 
+from .. import exceptions
+from .. import limit_data
 from .. import quota
 from .. import result
 from .. import stores
 
+_T = typing.TypeVar("_T")
+
+
+def reset_result(
+    limit: int, remaining: int, reset_after_us: int = result.NO_WAIT_US
+) -> result.RateLimitResult:
+    """Build the result of resetting a key by deleting its data.
+
+    :param int limit:
+    :param int remaining:
+    :param int reset_after_us:
+        How long until the limit resets, in microseconds, if there is
+        anything to wait for.
+    :returns:
+        An unlimited result decided now.
+    """
+    return result.RateLimitResult.from_microseconds(
+        limit,
+        False,
+        remaining,
+        reset_after_us,
+        result.NO_WAIT_US,
+        limit_data.current_microseconds(),
+    )
+
 
 @attr.s
 class BaseLimiter:
@@ -20,6 +54,212 @@ class BaseLimiter:
         """Apply the rate-limit to a quantity of requests."""
         raise NotImplementedError()
 
+    def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys.
+
+        Each request is a tuple of a key and a quantity. A key may appear
+        more than once, in which case its requests are applied in order.
+        Limiters are encouraged to override this to apply every request in a
+        few store operations. The default calls :meth:`rate_limit` for each
+        request.
+
+        :returns:
+            The result for each request, in the order of ``requests``.
+        """
+        return [
+            self.rate_limit(key, quantity, rate) for key, quantity in requests
+        ]
+
     def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
         """Reset the rate-limit for a given key."""
         raise NotImplementedError()
+
+
+@attr.s
+class AsyncBaseLimiter:
+    """Base object defining the interface for asyncio limiters."""
+
+    store: stores.AsyncBaseStore = attr.ib(
+        validator=attr.validators.instance_of(stores.AsyncBaseStore)
+    )
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        raise NotImplementedError()
+
+    async def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys.
+
+        This works like :meth:`BaseLimiter.rate_limit_many`. The default
+        awaits :meth:`rate_limit` for each request in turn.
+
+        :returns:
+            The result for each request, in the order of ``requests``.
+        """
+        return [
+            await self.rate_limit(key, quantity, rate)
+            for key, quantity in requests
+        ]
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        raise NotImplementedError()
+
+
+@attr.s(frozen=True)
+class RetryPolicy:
+    """How a limiter retries when another client changes its data.
+
+    Limiters which write with compare-and-swap read the stored data, compute
+    the new data and write it only if the stored data has not changed. When
+    it has, they wait and then read, compute and write again.
+
+    .. attribute:: max_retries
+
+        How many times to try again before letting the store's
+        :class:`~rush.exceptions.AtomicOperationError` escape. ``0`` never
+        retries. Defaults to 3.
+
+    .. attribute:: base_delay
+
+        The longest wait before the first retry, as a
+        :class:`~datetime.timedelta`. The longest wait doubles with every
+        retry. Defaults to 1 millisecond.
+
+    .. attribute:: max_delay
+
+        The longest wait before any retry. Defaults to 20 milliseconds.
+    """
+
+    max_retries: int = attr.ib(default=3)
+    base_delay: datetime.timedelta = attr.ib(
+        default=datetime.timedelta(milliseconds=1)
+    )
+    max_delay: datetime.timedelta = attr.ib(
+        default=datetime.timedelta(milliseconds=20)
+    )
+
+    @max_retries.validator
+    def _max_retries_is_not_negative(self, attribute, value: int) -> None:
+        if value < 0:
+            raise ValueError("The max_retries must not be negative.")
+
+    def delay(self, retry: int) -> float:
+        """Return how many seconds to wait before a retry.
+
+        The wait is chosen uniformly at random up to the longest wait for the
+        retry, so clients which conflicted once are unlikely to conflict
+        again.
+
+        :param int retry:
+            How many retries came before this one.
+        :returns:
+            The number of seconds to wait.
+        """
+        longest = min(
+            self.max_delay.total_seconds(),
+            self.base_delay.total_seconds() * 2 ** min(retry, 32),
+        )
+        return random.uniform(0, longest)
+
+
+@attr.s
+class ContentionStats:
+    """Counts of the conflicts a limiter has seen writing its data.
+
+    .. attribute:: conflicts
+
+        How many writes failed because another client changed the data.
+
+    .. attribute:: retries
+
+        How many of those conflicts were retried. The rest exhausted the
+        limiter's :class:`RetryPolicy` and raised.
+    """
+
+    conflicts: int = attr.ib(default=0)
+    retries: int = attr.ib(default=0)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, repr=False)
+
+    def record(self, *, retried: bool) -> None:
+        """Count a conflict and whether it was retried."""
+        with self._lock:
+            self.conflicts += 1
+            if retried:
+                self.retries += 1
+
+
+@attr.s
+class CompareAndSwapLimiter(BaseLimiter):
+    """Base class for limiters writing with compare-and-swap.
+
+    .. attribute:: retry_policy
+
+        The :class:`RetryPolicy` to follow when another client changes a
+        key's data while it is being limited.
+
+    .. attribute:: contention
+
+        The :class:`ContentionStats` counting those conflicts.
+    """
+
+    retry_policy: RetryPolicy = attr.ib(
+        factory=RetryPolicy,
+        validator=attr.validators.instance_of(RetryPolicy),
+        kw_only=True,
+    )
+    contention: ContentionStats = attr.ib(factory=ContentionStats, init=False)
+
+    def _retrying(self, attempt: typing.Callable[..., _T], *args) -> _T:
+        """Call ``attempt`` until it does not conflict or retries run out."""
+        retry = 0
+        while True:
+            try:
+                return attempt(*args)
+            except exceptions.AtomicOperationError:
+                if retry >= self.retry_policy.max_retries:
+                    self.contention.record(retried=False)
+                    raise
+                self.contention.record(retried=True)
+                time.sleep(self.retry_policy.delay(retry))
+                retry += 1
+
+
+@attr.s
+class AsyncCompareAndSwapLimiter(AsyncBaseLimiter):
+    """The asyncio counterpart of :class:`CompareAndSwapLimiter`."""
+
+    retry_policy: RetryPolicy = attr.ib(
+        factory=RetryPolicy,
+        validator=attr.validators.instance_of(RetryPolicy),
+        kw_only=True,
+    )
+    contention: ContentionStats = attr.ib(factory=ContentionStats, init=False)
+
+    async def _retrying(
+        self, attempt: typing.Callable[..., typing.Awaitable[_T]], *args
+    ) -> _T:
+        """Await ``attempt`` until it does not conflict or retries run out."""
+        retry = 0
+        while True:
+            try:
+                return await attempt(*args)
+            except exceptions.AtomicOperationError:
+                if retry >= self.retry_policy.max_retries:
+                    self.contention.record(retried=False)
+                    raise
+                self.contention.record(retried=True)
+                await asyncio.sleep(self.retry_policy.delay(retry))
+                retry += 1
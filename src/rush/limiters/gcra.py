@@ -1,99 +1,218 @@
 """Module containing implementations for GCRA."""
 import datetime
-import math
+import functools
+import typing
 
 from . import base
 from .. import limit_data
 from .. import quota
 from .. import result
+from .. import stores
 
 
-class GenericCellRatelimiter(base.BaseLimiter):
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+@functools.lru_cache(maxsize=256)
+def _constants(rate: quota.Quota) -> typing.Tuple[int, int]:
+    """Return a quota's emission interval and delay variation tolerance.
+
+    Both are integer microseconds, rounded like the
+    :class:`~datetime.timedelta` arithmetic they replace.
+    """
+    # Emission interval is how much is allowed per period
+    emission_interval = (rate.period / rate.limit) // _ONE_MICROSECOND
+    return emission_interval, emission_interval * rate.limit
+
+
+def _apply(
+    rate: quota.Quota,
+    quantity: int,
+    now: datetime.datetime,
+    data: typing.Optional[limit_data.LimitData],
+) -> typing.Tuple[
+    limit_data.LimitData, datetime.timedelta, result.RateLimitResult
+]:
+    """Calculate the outcome of a request against the stored data.
+
+    Times are integer microseconds relative to ``now``, so the only datetime
+    arithmetic is converting ``now`` to microseconds.
+
+    :returns:
+        The limit data to store, how long it remains relevant, and the result
+        to return.
+    """
+    emission_interval, delay_variation_tolerance = _constants(rate)
+    # The increment uses the emission interval to find out how much time
+    # quantity should have been issued over
+    increment = emission_interval * quantity
+    # tat is short for theoretical arrival time, we store this as
+    # "time" on our limit data
+    now_us = limit_data.datetime_to_microseconds(now)
+    stored_tat = getattr(data, "time_us", None)
+    tat = 0 if stored_tat is None else stored_tat - now_us
+    new_tat = max(0, tat) + increment
+    # The theoretical arrival time defines the end-period (in the future)
+    # of our bucket. We want to find, however, which is later - our tat or
+    # now. Once we have that, we can find the earliest point in our bucket
+    # which is the time we would start allowing new requests.
+    allow_at = new_tat - delay_variation_tolerance
+    # Okay, we have our tat, the time we would have started allowing new
+    # requests, and present time so let's figure out the difference from
+    # our earliest point in time and now.
+    distance_from_start_of_bucket = -allow_at
+    # Now that we know how far we are from the start, let's find out how
+    # much we have remaining in our quota, rounding half up.
+    remaining = (2 * distance_from_start_of_bucket + emission_interval) // (
+        2 * emission_interval
+    )
+    # We also need to calculate the next reset_after for the user
+    reset_after = tat if tat else result.NO_WAIT_US
+
+    if remaining < 1:
+        # It's possible that distance_from_start_of_bucket is negative so
+        # it is then also possible that there are fewer than 0 remaining
+        # requests available. In that case, we're going to be ratelimited.
+        remaining = 0
+        limited = True
+        retry_after = emission_interval - distance_from_start_of_bucket
+        new_time = tat
+    else:
+        limited = False
+        retry_after = result.NO_WAIT_US
+        new_time = new_tat
+
+    # Once the theoretical arrival time passes, the stored data is
+    # equivalent to having no data at all.
+    used = rate.limit - remaining
+    if data is None:
+        limitdata = limit_data.LimitData.from_microseconds(
+            used, remaining, now_us, now_us + new_time
+        )
+    elif limited and stored_tat is not None:
+        # A limited request leaves the stored tat as it is
+        limitdata = data.copy_with(used=used, remaining=remaining)
+    else:
+        limitdata = limit_data.LimitData.from_microseconds(
+            used, remaining, data.created_at_us, now_us + new_time
+        )
+
+    return (
+        limitdata,
+        datetime.timedelta(microseconds=new_time),
+        result.RateLimitResult.from_microseconds(
+            rate.count, limited, remaining, reset_after, retry_after, now_us
+        ),
+    )
+
+
+def _reset(
+    rate: quota.Quota, now: datetime.datetime
+) -> typing.Tuple[limit_data.LimitData, result.RateLimitResult]:
+    reset_tat = now - (rate.period * 2)
+    data = limit_data.LimitData(
+        used=0, remaining=rate.limit, created_at=now, time=reset_tat
+    )
+    return data, result.RateLimitResult.from_microseconds(
+        rate.count,
+        False,
+        rate.limit,
+        result.NO_WAIT_US,
+        result.NO_WAIT_US,
+        limit_data.datetime_to_microseconds(now),
+    )
+
+
+class GenericCellRatelimiter(base.CompareAndSwapLimiter):
     """A Generic Cell Ratelimit Algorithm implementation in Pure Python."""
 
     def rate_limit(
         self, key: str, quantity: int, rate: quota.Quota
     ) -> result.RateLimitResult:
-        """Apply the rate-limit to a quantity of requests."""
-        # Emission interval is how much is allowed per period
-        emission_interval: datetime.timedelta = rate.period / rate.limit
-        limit = rate.limit
-        delay_variation_tolerance: datetime.timedelta = (
-            emission_interval * limit
-        )
-        # The increment uses the emission interval to find out how much time
-        # quantity should have been issued over
-        increment: datetime.timedelta = emission_interval * quantity
-        now = self.store.current_time()
-        data = self.store.get(key)
-        # tat is short for theoretical arrival time, we store this as
-        # "time" on our limit data
-        tat = getattr(data, "time", None) or now
-        new_tat = max(now, tat) + increment
-        # The theoretical arrival time defines the end-period (in the future)
-        # of our bucket. We want to find, however, which is later - our tat or
-        # now. Once we have that, we can find the earliest point in our bucket
-        # which is the time we would start allowing new requests.
-        allow_at: datetime.datetime = new_tat - delay_variation_tolerance
-        # Okay, we have our tat, the time we would have started allowing new
-        # requests, and present time so let's figure out the difference from
-        # our earliest point in time and now.
-        distance_from_start_of_bucket = now - allow_at
-        # Now that we know how far we are from the start, let's find out how
-        # much we have remaining in our quota.
-        remaining = math.floor(
-            (distance_from_start_of_bucket / emission_interval) + 0.5
+        """Apply the rate-limit to a quantity of requests.
+
+        If another client changes the key's data first, this is retried
+        according to :attr:`retry_policy`.
+        """
+        return self._retrying(self._rate_limit, key, quantity, rate)
+
+    def _rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        now, data = self.store.get_with_current_time(key)
+        limitdata, expiry, ratelimitresult = _apply(rate, quantity, now, data)
+        self.store.compare_and_swap(
+            key=key, old=data, new=limitdata, expiry=expiry
         )
-        # We also need to calculate the next reset_after for the user
-        reset_after = tat - now
-        if reset_after.total_seconds() == 0:
-            reset_after = datetime.timedelta(seconds=-1)
-
-        if remaining < 1:
-            # It's possible that distance_from_start_of_bucket is negative so
-            # it is then also possible that there are fewer than 0 remaining
-            # requests available. In that case, we're going to be ratelimited.
-            remaining = 0
-            limited = True
-            retry_after = emission_interval - distance_from_start_of_bucket
-            new_time = tat
-        else:
-            limited = False
-            retry_after = datetime.timedelta(seconds=-1)
-            new_time = new_tat
-
-        used = rate.limit - remaining
-        if data is not None:
-            limitdata = data.copy_with(
-                used=used, remaining=remaining, time=new_time
-            )
-        else:
-            limitdata = limit_data.LimitData(
-                used=used, remaining=remaining, created_at=now, time=new_time
-            )
+        return ratelimitresult
 
-        self.store.compare_and_swap(key=key, old=data, new=limitdata)
+    def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys.
 
-        return result.RateLimitResult(
-            limit=rate.count,
-            limited=limited,
-            remaining=remaining,
-            reset_after=reset_after,
-            retry_after=retry_after,
+        This reads every key with one call to
+        :meth:`~rush.stores.base.BaseStore.get_many`, applies the requests in
+        order and writes the new data with one call to
+        :meth:`~rush.stores.base.BaseStore.compare_and_swap_many`.
+        """
+        now = self.store.current_time()
+        keys = list(dict.fromkeys(key for key, _ in requests))
+        stored = dict(zip(keys, self.store.get_many(keys)))
+        current = dict(stored)
+        updated: typing.Dict[str, limit_data.LimitData] = {}
+        expiries: typing.Dict[str, datetime.timedelta] = {}
+        results = []
+        for key, quantity in requests:
+            updated[key], expiries[key], ratelimitresult = _apply(
+                rate, quantity, now, current[key]
+            )
+            current[key] = updated[key]
+            results.append(ratelimitresult)
+        self.store.compare_and_swap_many(
+            [
+                stores.Swap(key, stored[key], updated[key], expiries[key])
+                for key in keys
+            ]
         )
+        return results
 
     def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
         """Reset the rate-limit for a given key."""
-        now = self.store.current_time()
-        reset_tat = now - (rate.period * 2)
-        data = limit_data.LimitData(
-            used=0, remaining=rate.limit, created_at=now, time=reset_tat
-        )
-        self.store.set(key=key, data=data)
-        return result.RateLimitResult(
-            limit=rate.count,
-            limited=False,
-            remaining=rate.limit,
-            reset_after=datetime.timedelta(seconds=-1),
-            retry_after=datetime.timedelta(seconds=-1),
+        data, ratelimitresult = _reset(rate, self.store.current_time())
+        self.store.set(key=key, data=data, expiry=rate.period)
+        return ratelimitresult
+
+
+class AsyncGenericCellRatelimiter(base.AsyncCompareAndSwapLimiter):
+    """A Generic Cell Ratelimit Algorithm implementation for asyncio."""
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests.
+
+        If another client changes the key's data first, this is retried
+        according to :attr:`retry_policy`.
+        """
+        return await self._retrying(self._rate_limit, key, quantity, rate)
+
+    async def _rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        now, data = await self.store.get_with_current_time(key)
+        limitdata, expiry, ratelimitresult = _apply(rate, quantity, now, data)
+        await self.store.compare_and_swap(
+            key=key, old=data, new=limitdata, expiry=expiry
         )
+        return ratelimitresult
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        data, ratelimitresult = _reset(rate, await self.store.current_time())
+        await self.store.set(key=key, data=data, expiry=rate.period)
+        return ratelimitresult
@@ -2,10 +2,15 @@
 import datetime
 import typing as t
 
+import attr
+
 from . import base
 from .. import limit_data
 from .. import quota
 from .. import result
+from .. import stores
+
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
 
 
 def _fresh_limitdata(rate, now, used=0):
@@ -14,60 +19,243 @@ def _fresh_limitdata(rate, now, used=0):
     )
 
 
-class PeriodicLimiter(base.BaseLimiter):
-    """A limiter that works as a function of the quota's period."""
+def _apply(
+    rate: quota.Quota,
+    quantity: int,
+    now: datetime.datetime,
+    olddata: t.Optional[limit_data.LimitData],
+) -> t.Tuple[bool, bool, limit_data.LimitData, datetime.timedelta]:
+    """Calculate the outcome of a request against the stored data.
+
+    :returns:
+        Whether the request is limited, whether it starts a new period, the
+        limit data to store and the time elapsed since the period started.
+    """
+    elapsed_time = now - (olddata.created_at if olddata else now)
+    new_period = olddata is None or rate.period <= elapsed_time
+    if new_period:
+        current = _fresh_limitdata(rate, now)
+        elapsed_time = datetime.timedelta(0)
+    else:
+        current = olddata
+
+    if current.remaining == 0 or current.remaining < quantity:
+        return True, False, current, elapsed_time
+
+    limitdata = current.copy_with(
+        remaining=(current.remaining - quantity),
+        used=(current.used + quantity),
+    )
+    return False, new_period, limitdata, elapsed_time
+
+
+def _window(
+    rate: quota.Quota, now: datetime.datetime, key: str
+) -> t.Tuple[str, int, int]:
+    """Find the epoch-aligned window containing ``now``.
+
+    :returns:
+        The key the window's counter is stored under, now in microseconds
+        and the microseconds left in the window.
+    """
+    period_us = rate.period // _ONE_MICROSECOND
+    now_us = limit_data.datetime_to_microseconds(now)
+    window, elapsed_us = divmod(now_us, period_us)
+    return f"{key}:{window}", now_us, period_us - elapsed_us
+
+
+def _aligned_result(
+    rate: quota.Quota,
+    quantity: int,
+    used: int,
+    now_us: int,
+    left_us: int,
+) -> result.RateLimitResult:
+    """Decide a request from its window's counter after charging it.
+
+    Like :func:`_apply`, a request is limited when nothing remains or when
+    less than ``quantity`` remains.
+    """
+    previously_used = used - quantity
+    if previously_used >= rate.limit or used > rate.limit:
+        return result.RateLimitResult.from_microseconds(
+            rate.count,
+            True,
+            max(rate.limit - previously_used, 0),
+            left_us,
+            left_us,
+            now_us,
+        )
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        False,
+        rate.limit - used,
+        left_us,
+        result.NO_WAIT_US,
+        now_us,
+    )
+
+
+def _validate_store_expires_data(instance, attribute, value: bool) -> None:
+    """Ensure the counters of past windows will be removed."""
+    if value and not instance.store.expires_data:
+        raise ValueError(
+            "Aligning periods to the epoch needs a store which expires data."
+        )
+
+
+@attr.s
+class PeriodicLimiter(base.CompareAndSwapLimiter):
+    """A limiter that works as a function of the quota's period.
+
+    .. attribute:: align_to_epoch
+
+        If ``True``, periods start at multiples of the quota's period since
+        the Unix epoch rather than at a key's first request, so every client
+        sees the same periods and they can be predicted. The requests made
+        in each period are counted under the key followed by ``:`` and the
+        period's number with :meth:`~rush.stores.base.BaseStore.increment`,
+        so a request needs no read before its write, and the counters of
+        past periods are left to expire. This needs a store which
+        :attr:`~rush.stores.base.BaseStore.expires_data`. Defaults to
+        ``False``.
+    """
+
+    align_to_epoch: bool = attr.ib(
+        default=False, validator=_validate_store_expires_data, kw_only=True
+    )
 
     def rate_limit(
         self, key: str, quantity: int, rate: quota.Quota
     ) -> result.RateLimitResult:
-        """Apply the rate-limit to a quantity of requests."""
-        now = self.store.current_time()
-        olddata = self.store.get(key)
-
-        elapsed_time = now - (olddata.created_at if olddata else now)
-
-        if (
-            rate.period > elapsed_time
-            and olddata is not None
-            and (olddata.remaining == 0 or olddata.remaining < quantity)
-        ):
-            return self.result_from_quota(
-                rate=rate,
-                limited=True,
-                limitdata=olddata or _fresh_limitdata(rate, now),
-                elapsed_since_period_start=elapsed_time,
-            )
+        """Apply the rate-limit to a quantity of requests.
+
+        If another client changes the key's data first, this is retried
+        according to :attr:`retry_policy`.
+        """
+        if self.align_to_epoch:
+            return self._rate_limit_aligned(key, quantity, rate)
+        return self._retrying(self._rate_limit, key, quantity, rate)
+
+    def _rate_limit_aligned(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        window_key, now_us, left_us = _window(
+            rate, self.store.current_time(), key
+        )
+        expiry = datetime.timedelta(microseconds=left_us)
+        used = self._retrying(
+            self.store.increment, window_key, quantity, expiry
+        )
+        ratelimitresult = _aligned_result(
+            rate, quantity, used, now_us, left_us
+        )
+        if ratelimitresult.limited and quantity:
+            # Limited requests are not counted
+            self._retrying(self.store.increment, window_key, -quantity, expiry)
+        return ratelimitresult
+
+    def _rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        now, olddata = self.store.get_with_current_time(key)
+        limited, new_period, limitdata, elapsed_time = _apply(
+            rate, quantity, now, olddata
+        )
 
-        if rate.period < elapsed_time:
-            # New period to start
-            limitdata = _fresh_limitdata(rate, now, used=quantity)
-            limitdata = self.store.set(key=key, data=limitdata)
-        else:
-            copy_from = olddata or _fresh_limitdata(rate, now)
-            limitdata = copy_from.copy_with(
-                remaining=(copy_from.remaining - quantity),
-                used=(copy_from.used + quantity),
+        if new_period:
+            self.store.compare_and_swap(
+                key=key, old=olddata, new=limitdata, expiry=rate.period
+            )
+        elif not limited:
+            self.store.compare_and_swap(
+                key=key,
+                old=olddata,
+                new=limitdata,
+                expiry=rate.period - elapsed_time,
             )
-            self.store.compare_and_swap(key=key, old=olddata, new=limitdata)
 
         return self.result_from_quota(
             rate=rate,
-            limited=False,
+            limited=limited,
             limitdata=limitdata,
             elapsed_since_period_start=elapsed_time,
+            decided_at=now,
+        )
+
+    def rate_limit_many(
+        self, requests: t.Sequence[t.Tuple[str, int]], rate: quota.Quota
+    ) -> t.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys.
+
+        This reads every key with one call to
+        :meth:`~rush.stores.base.BaseStore.get_many`, applies the requests in
+        order and writes the data that changed with one call to
+        :meth:`~rush.stores.base.BaseStore.compare_and_swap_many`. With
+        :attr:`align_to_epoch`, each request is an increment instead.
+        """
+        if self.align_to_epoch:
+            return super().rate_limit_many(requests, rate)
+        now = self.store.current_time()
+        keys = list(dict.fromkeys(key for key, _ in requests))
+        stored = dict(zip(keys, self.store.get_many(keys)))
+        current = dict(stored)
+        updated: t.Dict[str, limit_data.LimitData] = {}
+        expiries: t.Dict[str, datetime.timedelta] = {}
+        results = []
+        for key, quantity in requests:
+            limited, new_period, limitdata, elapsed_time = _apply(
+                rate, quantity, now, current[key]
+            )
+            if new_period:
+                expiries[key] = rate.period
+            elif not limited:
+                expiries[key] = rate.period - elapsed_time
+            if new_period or not limited:
+                current[key] = updated[key] = limitdata
+            results.append(
+                self.result_from_quota(
+                    rate=rate,
+                    limited=limited,
+                    limitdata=limitdata,
+                    elapsed_since_period_start=elapsed_time,
+                    decided_at=now,
+                )
+            )
+        self.store.compare_and_swap_many(
+            [
+                stores.Swap(key, stored[key], updated[key], expiry)
+                for key, expiry in expiries.items()
+            ]
         )
+        return results
 
     def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
         """Reset the rate-limit for a given key."""
-        data = _fresh_limitdata(rate, self.store.current_time())
-        limitdata = self.store.set(key=key, data=data)
+        if self.align_to_epoch:
+            return self._reset_aligned(key, rate)
+        now = self.store.current_time()
+        data = _fresh_limitdata(rate, now)
+        limitdata = self.store.set(key=key, data=data, expiry=rate.period)
         return self.result_from_quota(
             rate=rate,
             limited=False,
             limitdata=limitdata,
             elapsed_since_period_start=datetime.timedelta(microseconds=0),
+            decided_at=now,
         )
 
+    def _reset_aligned(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        window_key, now_us, left_us = _window(
+            rate, self.store.current_time(), key
+        )
+        expiry = datetime.timedelta(microseconds=left_us)
+        used = self._retrying(self.store.increment, window_key, 0, expiry)
+        self._retrying(self.store.increment, window_key, -used, expiry)
+        return _aligned_result(rate, 0, 0, now_us, left_us)
+
     @staticmethod
     def result_from_quota(
         rate: quota.Quota,
@@ -75,6 +263,7 @@ class PeriodicLimiter(base.BaseLimiter):
         limitdata: limit_data.LimitData,
         elapsed_since_period_start: datetime.timedelta,
         retry_after: t.Optional[datetime.timedelta] = None,
+        decided_at: t.Optional[datetime.datetime] = None,
     ) -> result.RateLimitResult:
         """Generate the RateLimitResult for a given set of parameters.
 
@@ -89,6 +278,8 @@ class PeriodicLimiter(base.BaseLimiter):
         :param datetime.timedelta elapsed_since_period_start:
             The differenece in time between when this latest period started
             and when the quota was applied.
+        :param datetime.datetime decided_at:
+            When the quota was applied, if it is known.
         :returns:
             The rate limit result.
         :rtype:
@@ -106,4 +297,112 @@ class PeriodicLimiter(base.BaseLimiter):
             remaining=limitdata.remaining,
             reset_after=reset_after,
             retry_after=retry_after,
+            decided_at=decided_at,
+        )
+
+
+@attr.s
+class AsyncPeriodicLimiter(base.AsyncCompareAndSwapLimiter):
+    """A limiter for asyncio that works as a function of the quota's period.
+
+    .. attribute:: align_to_epoch
+
+        Whether periods are aligned to the Unix epoch, see
+        :attr:`PeriodicLimiter.align_to_epoch`.
+    """
+
+    align_to_epoch: bool = attr.ib(
+        default=False, validator=_validate_store_expires_data, kw_only=True
+    )
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests.
+
+        If another client changes the key's data first, this is retried
+        according to :attr:`retry_policy`.
+        """
+        if self.align_to_epoch:
+            return await self._rate_limit_aligned(key, quantity, rate)
+        return await self._retrying(self._rate_limit, key, quantity, rate)
+
+    async def _rate_limit_aligned(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        window_key, now_us, left_us = _window(
+            rate, await self.store.current_time(), key
+        )
+        expiry = datetime.timedelta(microseconds=left_us)
+        used = await self._retrying(
+            self.store.increment, window_key, quantity, expiry
+        )
+        ratelimitresult = _aligned_result(
+            rate, quantity, used, now_us, left_us
+        )
+        if ratelimitresult.limited and quantity:
+            # Limited requests are not counted
+            await self._retrying(
+                self.store.increment, window_key, -quantity, expiry
+            )
+        return ratelimitresult
+
+    async def _rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        now, olddata = await self.store.get_with_current_time(key)
+        limited, new_period, limitdata, elapsed_time = _apply(
+            rate, quantity, now, olddata
+        )
+
+        if new_period:
+            await self.store.compare_and_swap(
+                key=key, old=olddata, new=limitdata, expiry=rate.period
+            )
+        elif not limited:
+            await self.store.compare_and_swap(
+                key=key,
+                old=olddata,
+                new=limitdata,
+                expiry=rate.period - elapsed_time,
+            )
+
+        return PeriodicLimiter.result_from_quota(
+            rate=rate,
+            limited=limited,
+            limitdata=limitdata,
+            elapsed_since_period_start=elapsed_time,
+            decided_at=now,
+        )
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        if self.align_to_epoch:
+            return await self._reset_aligned(key, rate)
+        now = await self.store.current_time()
+        data = _fresh_limitdata(rate, now)
+        limitdata = await self.store.set(
+            key=key, data=data, expiry=rate.period
+        )
+        return PeriodicLimiter.result_from_quota(
+            rate=rate,
+            limited=False,
+            limitdata=limitdata,
+            elapsed_since_period_start=datetime.timedelta(microseconds=0),
+            decided_at=now,
+        )
+
+    async def _reset_aligned(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        window_key, now_us, left_us = _window(
+            rate, await self.store.current_time(), key
+        )
+        expiry = datetime.timedelta(microseconds=left_us)
+        used = await self._retrying(
+            self.store.increment, window_key, 0, expiry
         )
+        await self._retrying(self.store.increment, window_key, -used, expiry)
+        return _aligned_result(rate, 0, 0, now_us, left_us)
@@ -1,17 +1,25 @@
 """Module containing implementations for GCRA."""
 import datetime
+import itertools
 import typing
 
 import attr
 
 from . import base
+from .. import keys
+from .. import limit_data
 from .. import quota
 from .. import result
 from ..stores import redis
+from ..stores import redis_sharded
 
+_one_microsecond: datetime.timedelta = datetime.timedelta(microseconds=1)
+
+# The scripts before TATs were stored as integer microseconds. They are kept
+# for reference; the scripts below read the TATs they stored.
 # Copied from
 # https://github.com/rwz/redis-gcra/blob/d6723797d3353ff0e607eb96235b3ec5b1135fd7/vendor/perform_gcra_ratelimit.lua
-APPLY_RATELIMIT_LUA = """
+LEGACY_APPLY_RATELIMIT_LUA = """
 -- this script has side-effects, so it requires replicate commands mode
 redis.replicate_commands()
 
@@ -73,7 +81,7 @@ return {limited, remaining, tostring(retry_after), tostring(reset_after)}
 
 # Copied from
 # https://github.com/rwz/redis-gcra/blob/d6723797d3353ff0e607eb96235b3ec5b1135fd7/vendor/inspect_gcra_ratelimit.lua
-CHECK_RATELIMIT_LUA = """
+LEGACY_CHECK_RATELIMIT_LUA = """
 local rate_limit_key = KEYS[1]
 local burst = ARGV[1]
 local rate = ARGV[2]
@@ -128,9 +136,296 @@ return {limited, remaining, tostring(retry_after), tostring(reset_after)}
 """
 
 
+_GCRA_FUNCTIONS_LUA = """
+-- reported for retry_after and reset_after when there is nothing to wait for
+local none = -1000000
+
+-- redis returns time as an array containing two integers: seconds of the epoch
+-- time (10 digits) and microseconds (6 digits). as microseconds of the epoch,
+-- now is a 16 digit integer, which a double represents exactly until the year
+-- 2255.
+local function current_time()
+  local time = redis.call("TIME")
+  return time[1] * 1000000 + time[2]
+end
+
+-- the LEGACY_ scripts stored TATs as floating point seconds since Jan 1, 2017
+-- 00:00:00 GMT, which are far below 1e12. convert them to microseconds of the
+-- epoch so existing keys keep their limits.
+local function read_tat(key, now)
+  local tat = tonumber(redis.call("GET", key))
+  if not tat then
+    return now
+  elseif tat < 1e12 then
+    return math.floor((tat + 1483228800) * 1000000 + 0.5)
+  end
+  return tat
+end
+
+-- redis formats numbers with 14 significant digits, so write TATs as integers
+local function store_tat(key, tat, reset_after)
+  redis.call(
+    "SET", key, string.format("%d", tat), "PX", math.ceil(reset_after / 1000)
+  )
+end
+"""
+
+# Based on
+# https://github.com/rwz/redis-gcra/blob/d6723797d3353ff0e607eb96235b3ec5b1135fd7/vendor/perform_gcra_ratelimit.lua
+# with TATs and results in integer microseconds.
+APPLY_RATELIMIT_LUA = (
+    """
+-- this script has side-effects, so it requires replicate commands mode,
+-- which is always on, and the function gone, from Redis 7
+if redis.replicate_commands then redis.replicate_commands() end
+"""
+    + _GCRA_FUNCTIONS_LUA
+    + """
+local rate_limit_key = KEYS[1]
+local burst = tonumber(ARGV[1])
+local count = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local emission_interval = period / count
+local increment = math.ceil(emission_interval * cost)
+local burst_offset = emission_interval * burst
+local now = current_time()
+local tat = read_tat(rate_limit_key, now)
+
+local new_tat = math.max(tat, now) + increment
+
+-- now - (new_tat - burst_offset), with the integers subtracted first
+local diff = burst_offset - (new_tat - now)
+
+local limited
+local retry_after
+local reset_after
+
+-- poor person's round
+local remaining = math.floor(diff / emission_interval + 0.5)
+
+if remaining < 0 then
+  limited = 1
+  remaining = 0
+  reset_after = tat - now
+  retry_after = math.ceil(diff * -1)
+else
+  limited = 0
+  reset_after = new_tat - now
+  store_tat(rate_limit_key, new_tat, reset_after)
+  retry_after = none
+end
+
+return {limited, remaining, retry_after, reset_after}
+"""
+)
+
+# Based on
+# https://github.com/rwz/redis-gcra/blob/d6723797d3353ff0e607eb96235b3ec5b1135fd7/vendor/inspect_gcra_ratelimit.lua
+# with TATs and results in integer microseconds.
+CHECK_RATELIMIT_LUA = (
+    _GCRA_FUNCTIONS_LUA
+    + """
+local rate_limit_key = KEYS[1]
+local burst = tonumber(ARGV[1])
+local count = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+
+local emission_interval = period / count
+local burst_offset = emission_interval * burst
+local now = current_time()
+local tat = read_tat(rate_limit_key, now)
+
+-- now - (math.max(tat, now) - burst_offset), with the integers subtracted
+-- first
+local diff = burst_offset - (math.max(tat, now) - now)
+
+-- poor person's round
+local remaining = math.floor(diff / emission_interval + 0.5)
+
+local reset_after = tat - now
+if reset_after == 0 then
+  reset_after = none
+end
+
+local limited
+local retry_after
+
+if remaining < 1 then
+  remaining = 0
+  limited = 1
+  retry_after = math.ceil(emission_interval - diff)
+else
+  limited = 0
+  retry_after = none
+end
+
+return {limited, remaining, retry_after, reset_after}
+"""
+)
+
+APPLY_RATELIMIT_MANY_LUA = (
+    """
+-- this script has side-effects, so it requires replicate commands mode,
+-- which is always on, and the function gone, from Redis 7
+if redis.replicate_commands then redis.replicate_commands() end
+"""
+    + _GCRA_FUNCTIONS_LUA
+    + """
+-- ARGV[1] is 1 to charge no key unless every key has capacity and 0 to
+-- charge each key independently. It is followed by the burst, count, period
+-- and cost of each key in KEYS. A cost of 0 inspects the key like
+-- CHECK_RATELIMIT_LUA. A key may appear more than once, in which case later
+-- entries see the cost charged by earlier ones.
+local all_or_nothing = ARGV[1] == "1"
+local now = current_time()
+
+local stored = {}
+local tats = {}
+local expiries = {}
+local results = {}
+local denied = false
+
+for k, key in ipairs(KEYS) do
+  local offset = 2 + (k - 1) * 4
+  local burst = tonumber(ARGV[offset])
+  local count = tonumber(ARGV[offset + 1])
+  local period = tonumber(ARGV[offset + 2])
+  local cost = tonumber(ARGV[offset + 3])
+  local emission_interval = period / count
+  local burst_offset = emission_interval * burst
+
+  if stored[key] == nil then
+    stored[key] = read_tat(key, now)
+  end
+  local tat = tats[key] or stored[key]
+
+  local limited
+  local remaining
+  local retry_after
+  local reset_after
+
+  if cost == 0 then
+    local diff = burst_offset - (math.max(tat, now) - now)
+    remaining = math.floor(diff / emission_interval + 0.5)
+    reset_after = tat - now
+    if reset_after == 0 then
+      reset_after = none
+    end
+    if remaining < 1 then
+      remaining = 0
+      limited = 1
+      retry_after = math.ceil(emission_interval - diff)
+    else
+      limited = 0
+      retry_after = none
+    end
+  else
+    local new_tat = math.max(tat, now) + math.ceil(emission_interval * cost)
+    local diff = burst_offset - (new_tat - now)
+    remaining = math.floor(diff / emission_interval + 0.5)
+    if remaining < 0 then
+      limited = 1
+      remaining = 0
+      reset_after = tat - now
+      retry_after = math.ceil(diff * -1)
+      denied = true
+    else
+      limited = 0
+      reset_after = new_tat - now
+      retry_after = none
+      tats[key] = new_tat
+      expiries[key] = reset_after
+    end
+  end
+
+  results[k] = {limited, remaining, retry_after, reset_after}
+end
+
+if all_or_nothing and denied then
+  -- Nothing is charged, so every key is limited. Keys which had capacity
+  -- report what they have left and that they do not need to be waited for.
+  for k, key in ipairs(KEYS) do
+    local offset = 2 + (k - 1) * 4
+    local cost = tonumber(ARGV[offset + 3])
+    if cost > 0 and results[k][1] == 0 then
+      local burst = tonumber(ARGV[offset])
+      local emission_interval = tonumber(ARGV[offset + 2]) / tonumber(
+        ARGV[offset + 1]
+      )
+      local tat = stored[key]
+      local diff = emission_interval * burst - (math.max(tat, now) - now)
+      local remaining = math.floor(diff / emission_interval + 0.5)
+      results[k] = {1, math.max(remaining, 0), 0, tat - now}
+    end
+  end
+  return results
+end
+
+for key, tat in pairs(tats) do
+  store_tat(key, tat, expiries[key])
+end
+return results
+"""
+)
+
+
+def _result(
+    rate: quota.Quota,
+    response: typing.Tuple[int, int, int, int],
+    decided_at_us: int,
+) -> result.RateLimitResult:
+    limited, remaining, retry_after_us, reset_after_us = response
+    return result.RateLimitResult.from_microseconds(
+        rate.limit,
+        limited == 1,
+        remaining,
+        reset_after_us,
+        retry_after_us,
+        decided_at_us,
+    )
+
+
+def _results(
+    rates: typing.Iterable[quota.Quota],
+    responses: typing.Iterable[typing.Tuple[int, int, int, int]],
+) -> typing.List[result.RateLimitResult]:
+    """Build the results of one round trip, all decided at the same time."""
+    decided_at_us = limit_data.current_microseconds()
+    return [
+        _result(rate, response, decided_at_us)
+        for rate, response in zip(rates, responses)
+    ]
+
+
+def _args(rate: quota.Quota) -> typing.List[int]:
+    """Return the burst, count and period in microseconds of a quota."""
+    return [rate.limit, rate.count, rate.period // _one_microsecond]
+
+
+def _many_args(
+    requests: typing.Sequence[typing.Tuple[str, int, quota.Quota]],
+    all_or_nothing: bool,
+) -> typing.Tuple[typing.List[str], typing.List[int]]:
+    """Build the keys and arguments for :data:`APPLY_RATELIMIT_MANY_LUA`."""
+    keys = []
+    args = [int(all_or_nothing)]
+    for key, quantity, rate in requests:
+        keys.append(key)
+        args.extend(_args(rate) + [quantity])
+    return keys, args
+
+
 @attr.s
-class GenericCellRatelimiter(base.BaseLimiter):
-    """A Generic Cell Ratelimit Algorithm implementation in Redis LUA."""
+class GenericCellRatelimiter(keys.KeyNamespace, base.BaseLimiter):
+    """A Generic Cell Ratelimit Algorithm implementation in Redis LUA.
+
+    The stored keys are configured with the ``key_prefix``,
+    ``include_quota`` and ``max_key_length`` keyword arguments described by
+    :class:`~rush.keys.KeyNamespace`. Keys are stored without a prefix by
+    default.
+    """
 
     store: redis.RedisStore = attr.ib(
         validator=attr.validators.instance_of(redis.RedisStore)
@@ -145,6 +440,9 @@ class GenericCellRatelimiter(base.BaseLimiter):
         self.apply_ratelimit = self.client.register_script(
             APPLY_RATELIMIT_LUA
         )
+        self.apply_ratelimit_many = self.client.register_script(
+            APPLY_RATELIMIT_MANY_LUA
+        )
 
     def _call_lua(
         self,
@@ -152,46 +450,268 @@ class GenericCellRatelimiter(base.BaseLimiter):
         keys: typing.List[str],
         cost: int,
         burst: int,
-        rate: float,
-        period: float,
-    ) -> typing.Tuple[int, int, str, str]:
+        count: int,
+        period: int,
+    ) -> typing.Tuple[int, int, int, int]:
         if cost == 0:
-            return self.check_ratelimit(keys=keys, args=[burst, rate, period])
+            return self.check_ratelimit(keys=keys, args=[burst, count, period])
         else:
             return self.apply_ratelimit(
-                keys=keys, args=[burst, rate, period, cost]
+                keys=keys, args=[burst, count, period, cost]
             )
 
     def rate_limit(
         self, key: str, quantity: int, rate: quota.Quota
     ) -> result.RateLimitResult:
         """Apply the rate-limit to a quantity of requests."""
-        period = rate.period.total_seconds()
-        limited, remaining, retry_after_s, reset_after_s = self._call_lua(
-            keys=[key],
+        burst, count, period = _args(rate)
+        response = self._call_lua(
+            keys=[self.stored_key(key, rate)],
             cost=quantity,
-            burst=rate.limit,
-            rate=rate.count / period,
+            burst=burst,
+            count=count,
             period=period,
         )
-        retry_after = datetime.timedelta(seconds=float(retry_after_s))
-        reset_after = datetime.timedelta(seconds=float(reset_after_s))
-
-        return result.RateLimitResult(
-            limit=rate.limit,
-            limited=limited == 1,
-            remaining=remaining,
-            retry_after=retry_after,
-            reset_after=reset_after,
+        return _result(rate, response, limit_data.current_microseconds())
+
+    def _call_lua_many(
+        self,
+        store: redis.RedisStore,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[typing.Tuple[int, int, int, int]]:
+        """Run the script for each request in one pipeline to a server."""
+        args = _args(rate)
+        return store.run_scripts(
+            [
+                (self.check_ratelimit, [key], args)
+                if quantity == 0
+                else (self.apply_ratelimit, [key], args + [quantity])
+                for key, quantity in requests
+            ]
+        )
+
+    def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys in one round trip.
+
+        The scripts for every request are sent in a single pipeline and run
+        in order, so repeated keys see the effect of earlier requests.
+        """
+        requests = [
+            (self.stored_key(key, rate), quantity)
+            for key, quantity in requests
+        ]
+        responses = self._call_lua_many(self.store, requests, rate)
+        return _results(itertools.repeat(rate), responses)
+
+    def _client_for(self, keys: typing.List[str]):
+        """Return the client to run a script for these keys with.
+
+        ``None`` uses the client the scripts were registered with.
+        """
+        return None
+
+    def rate_limit_keys(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int, quota.Quota]],
+        *,
+        all_or_nothing: bool = False,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply a separate rate-limit to each of several keys at once.
+
+        This runs :data:`APPLY_RATELIMIT_MANY_LUA` once for every key, so
+        composite limits, e.g., per user and per tenant, cost a single round
+        trip and are decided against the same instant. With Redis Cluster,
+        every key must hash to the same slot.
+
+        :param requests:
+            Tuples of a key, the quantity to charge it and its
+            :class:`~rush.quota.Quota`. A key may appear more than once.
+        :param bool all_or_nothing:
+            If ``True``, no key is charged unless every key has capacity. If
+            any key is limited, every result is limited and keys which had
+            capacity have a ``retry_after`` of zero, so the request may be
+            retried after the longest ``retry_after``.
+        :returns:
+            The result for each request, in the order of ``requests``.
+        """
+        keys, args = _many_args(
+            [
+                (self.stored_key(key, rate), quantity, rate)
+                for key, quantity, rate in requests
+            ],
+            all_or_nothing,
+        )
+        responses = self.apply_ratelimit_many(
+            keys=keys, args=args, client=self._client_for(keys)
+        )
+        return _results((rate for _, _, rate in requests), responses)
+
+    def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(rate.limit, rate.count)
+
+
+@attr.s
+class ShardedGenericCellRatelimiter(GenericCellRatelimiter):
+    """A Lua GCRA implementation for keys sharded across Redis servers.
+
+    Each key is limited by running the scripts on the server that owns it in
+    the :class:`~rush.stores.redis_sharded.ShardedRedisStore`.
+    """
+
+    store: redis_sharded.ShardedRedisStore = attr.ib(  # type: ignore
+        validator=attr.validators.instance_of(
+            redis_sharded.ShardedRedisStore
+        )
+    )
+
+    def __attrs_post_init__(self):
+        """Register our scripts once for use with every server's client."""
+        self.client = self.store.shards[0].client
+        self.check_ratelimit = self.client.register_script(
+            CHECK_RATELIMIT_LUA
         )
+        self.apply_ratelimit = self.client.register_script(
+            APPLY_RATELIMIT_LUA
+        )
+        self.apply_ratelimit_many = self.client.register_script(
+            APPLY_RATELIMIT_MANY_LUA
+        )
+
+    def _call_lua(
+        self,
+        *,
+        keys: typing.List[str],
+        cost: int,
+        burst: int,
+        count: int,
+        period: int,
+    ) -> typing.Tuple[int, int, int, int]:
+        # Scripts are loaded into each server the first time they run there
+        client = self.store.shard_for(keys[0]).client
+        if cost == 0:
+            return self.check_ratelimit(
+                keys=keys, args=[burst, count, period], client=client
+            )
+        else:
+            return self.apply_ratelimit(
+                keys=keys, args=[burst, count, period, cost], client=client
+            )
+
+    def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to keys with one pipeline per server."""
+        requests = [
+            (self.stored_key(key, rate), quantity)
+            for key, quantity in requests
+        ]
+        found: typing.List[typing.Optional[result.RateLimitResult]] = [
+            None
+        ] * len(requests)
+        for shard, positions in self.store.group_by_shard(
+            key for key, _ in requests
+        ):
+            responses = self._call_lua_many(
+                shard, [requests[n] for n in positions], rate
+            )
+            decided_at_us = limit_data.current_microseconds()
+            for position, response in zip(positions, responses):
+                found[position] = _result(rate, response, decided_at_us)
+        return typing.cast(typing.List[result.RateLimitResult], found)
+
+    def _client_for(self, keys: typing.List[str]):
+        """Return the client of the one server owning all of the keys.
+
+        :raises ValueError:
+            If the keys belong to more than one server.
+        """
+        groups = self.store.group_by_shard(keys)
+        if len(groups) != 1:
+            raise ValueError(
+                "Every key must belong to the same server, e.g., by sharing"
+                " a {tag}"
+            )
+        shard, _ = groups[0]
+        return shard.client
 
     def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
         """Reset the rate-limit for a given key."""
-        self.client.delete(key)
-        return result.RateLimitResult(
-            limit=rate.limit,
-            limited=False,
-            remaining=rate.count,
-            reset_after=datetime.timedelta(seconds=-1),
-            retry_after=datetime.timedelta(seconds=-1),
+        key = self.stored_key(key, rate)
+        self.store.shard_for(key).client.delete(key)
+        return base.reset_result(rate.limit, rate.count)
+
+
+@attr.s
+class AsyncGenericCellRatelimiter(keys.KeyNamespace, base.AsyncBaseLimiter):
+    """A Generic Cell Ratelimit Algorithm in Redis LUA for asyncio.
+
+    The stored keys are configured like those of
+    :class:`GenericCellRatelimiter`.
+    """
+
+    store: redis.AsyncRedisStore = attr.ib(
+        validator=attr.validators.instance_of(redis.AsyncRedisStore)
+    )
+
+    def __attrs_post_init__(self):
+        """Configure our redis client based off our store."""
+        self.client = self.store.client
+        self.check_ratelimit = self.client.register_script(
+            CHECK_RATELIMIT_LUA
+        )
+        self.apply_ratelimit = self.client.register_script(
+            APPLY_RATELIMIT_LUA
         )
+        self.apply_ratelimit_many = self.client.register_script(
+            APPLY_RATELIMIT_MANY_LUA
+        )
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        args = _args(rate)
+        keys = [self.stored_key(key, rate)]
+        if quantity == 0:
+            response = await self.check_ratelimit(keys=keys, args=args)
+        else:
+            response = await self.apply_ratelimit(
+                keys=keys, args=args + [quantity]
+            )
+        return _result(rate, response, limit_data.current_microseconds())
+
+    async def rate_limit_keys(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int, quota.Quota]],
+        *,
+        all_or_nothing: bool = False,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply a separate rate-limit to each of several keys at once.
+
+        See :meth:`GenericCellRatelimiter.rate_limit_keys`.
+        """
+        keys, args = _many_args(
+            [
+                (self.stored_key(key, rate), quantity, rate)
+                for key, quantity, rate in requests
+            ],
+            all_or_nothing,
+        )
+        responses = await self.apply_ratelimit_many(keys=keys, args=args)
+        return _results((rate for _, _, rate in requests), responses)
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        await self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(rate.limit, rate.count)
@@ -0,0 +1,174 @@
+"""A periodic limiter implemented as a Lua script in Redis."""
+import datetime
+import typing
+
+import attr
+
+from . import base
+from .. import keys
+from .. import limit_data
+from .. import quota
+from .. import result
+from ..stores import redis
+
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+_ONE_MILLISECOND = datetime.timedelta(milliseconds=1)
+
+# The key counts the requests made in the current window and expires when the
+# window ends. Requests which would exceed the limit are not counted.
+APPLY_PERIODIC_LUA = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local used = 0
+local ttl = redis.call("PTTL", key)
+local new_window = ttl <= 0
+if new_window then
+  ttl = period
+else
+  used = tonumber(redis.call("GET", key))
+end
+
+if used >= limit or used + cost > limit then
+  return {1, math.max(limit - used, 0), ttl}
+end
+
+if new_window then
+  -- also replaces keys which were left without an expiry
+  redis.call("SET", key, cost, "PX", period)
+  used = cost
+elseif cost > 0 then
+  used = redis.call("INCRBY", key, cost)
+end
+
+return {0, limit - used, ttl}
+"""
+
+
+def _args(rate: quota.Quota, quantity: int) -> typing.List[int]:
+    """Return the limit, the period in whole milliseconds and the cost."""
+    return [rate.limit, -(-rate.period // _ONE_MILLISECOND), quantity]
+
+
+def _result(
+    rate: quota.Quota,
+    response: typing.Tuple[int, int, int],
+    decided_at_us: int,
+) -> result.RateLimitResult:
+    limited, remaining, ttl = response
+    reset_after_us = ttl * 1000
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        limited == 1,
+        remaining,
+        reset_after_us,
+        reset_after_us if limited == 1 else result.NO_WAIT_US,
+        decided_at_us,
+    )
+
+
+@attr.s
+class PeriodicLimiter(keys.KeyNamespace, base.BaseLimiter):
+    """A periodic limiter implemented as a Lua script in Redis.
+
+    This limits requests exactly like
+    :class:`~rush.limiters.periodic.PeriodicLimiter`, but each check is a
+    single atomic script call.
+
+    The stored keys are configured with the ``key_prefix``,
+    ``include_quota`` and ``max_key_length`` keyword arguments described by
+    :class:`~rush.keys.KeyNamespace`. Keys start with ``"periodic:"`` by
+    default, so they do not collide with the keys of limiters storing
+    other kinds of data, which Redis would reject with ``WRONGTYPE``.
+    """
+
+    default_key_prefix = "periodic:"
+
+    store: redis.RedisStore = attr.ib(
+        validator=attr.validators.instance_of(redis.RedisStore)
+    )
+
+    def __attrs_post_init__(self):
+        """Configure our redis client based off our store."""
+        self.client = self.store.client
+        self.apply_periodic = self.client.register_script(APPLY_PERIODIC_LUA)
+
+    def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        response = self.apply_periodic(
+            keys=[self.stored_key(key, rate)], args=_args(rate, quantity)
+        )
+        return _result(rate, response, limit_data.current_microseconds())
+
+    def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys in one round trip.
+
+        The script for every request is sent in a single pipeline and run in
+        order, so repeated keys see the effect of earlier requests.
+        """
+        responses = self.store.run_scripts(
+            [
+                (
+                    self.apply_periodic,
+                    [self.stored_key(key, rate)],
+                    _args(rate, quantity),
+                )
+                for key, quantity in requests
+            ]
+        )
+        decided_at_us = limit_data.current_microseconds()
+        return [
+            _result(rate, response, decided_at_us) for response in responses
+        ]
+
+    def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(
+            rate.count, rate.limit, rate.period // _ONE_MICROSECOND
+        )
+
+
+@attr.s
+class AsyncPeriodicLimiter(keys.KeyNamespace, base.AsyncBaseLimiter):
+    """A periodic limiter implemented as a Lua script in Redis for asyncio.
+
+    The stored keys are configured like those of :class:`PeriodicLimiter`.
+    """
+
+    default_key_prefix = "periodic:"
+
+    store: redis.AsyncRedisStore = attr.ib(
+        validator=attr.validators.instance_of(redis.AsyncRedisStore)
+    )
+
+    def __attrs_post_init__(self):
+        """Configure our redis client based off our store."""
+        self.client = self.store.client
+        self.apply_periodic = self.client.register_script(APPLY_PERIODIC_LUA)
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        response = await self.apply_periodic(
+            keys=[self.stored_key(key, rate)], args=_args(rate, quantity)
+        )
+        return _result(rate, response, limit_data.current_microseconds())
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        await self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(
+            rate.count, rate.limit, rate.period // _ONE_MICROSECOND
+        )
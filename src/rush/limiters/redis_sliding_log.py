@@ -0,0 +1,213 @@
+"""A sliding log limiter implemented as a Lua script in Redis."""
+import datetime
+import typing
+
+import attr
+
+from . import base
+from .. import keys
+from .. import limit_data
+from .. import quota
+from .. import result
+from ..stores import redis
+
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+# The key is a sorted set of the requests allowed within the last period,
+# scored by the microseconds since the epoch at which they were made. It is
+# trimmed before every check, so it holds at most the quota's limit.
+# Requests which would exceed the limit are not logged. The arithmetic
+# matches rush.limiters.sliding_log.
+APPLY_SLIDING_LOG_LUA = """
+-- this script has side-effects, so it requires replicate commands mode,
+-- which is always on, and the function gone, from Redis 7
+if redis.replicate_commands then redis.replicate_commands() end
+
+-- reported for retry_after and reset_after when there is nothing to wait for
+local none = -1000000
+
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+-- microseconds of the epoch, which a double represents exactly
+local time = redis.call("TIME")
+local now = time[1] * 1000000 + time[2]
+
+-- redis formats numbers with 14 significant digits, so write integers
+redis.call(
+  "ZREMRANGEBYSCORE", key, "-inf", string.format("%d", now - period)
+)
+local used = redis.call("ZCARD", key)
+local limited = used >= limit or used + cost > limit
+
+if not limited and cost > 0 then
+  local score = string.format("%d", now)
+  local entries = {}
+  for n = used, used + cost - 1 do
+    -- members must be unique, and requests made within one microsecond
+    -- always see every earlier one
+    table.insert(entries, score)
+    table.insert(entries, score .. ":" .. n)
+    -- unpack is limited to a few thousand values
+    if #entries == 1000 or n == used + cost - 1 then
+      redis.call("ZADD", key, unpack(entries))
+      entries = {}
+    end
+  end
+  redis.call("PEXPIRE", key, math.ceil(period / 1000))
+  used = used + cost
+end
+
+local reset_after = none
+local newest = redis.call("ZRANGE", key, -1, -1, "WITHSCORES")
+if newest[2] then
+  reset_after = tonumber(newest[2]) + period - now
+end
+
+if not limited then
+  return {0, limit - used, none, reset_after}
+end
+
+-- requests of nothing are limited until there is room for one request
+cost = math.max(cost, 1)
+local retry_after = period
+if cost <= limit then
+  -- wait for enough of the oldest requests to expire
+  local index = used + cost - limit - 1
+  local oldest = redis.call("ZRANGE", key, index, index, "WITHSCORES")
+  retry_after = tonumber(oldest[2]) + period - now
+end
+
+return {1, math.max(limit - used, 0), retry_after, reset_after}
+"""
+
+
+def _args(rate: quota.Quota, quantity: int) -> typing.List[int]:
+    """Return the limit, the period in microseconds and the cost."""
+    return [rate.limit, rate.period // _ONE_MICROSECOND, quantity]
+
+
+def _result(
+    rate: quota.Quota,
+    response: typing.Tuple[int, int, int, int],
+    decided_at_us: int,
+) -> result.RateLimitResult:
+    limited, remaining, retry_after_us, reset_after_us = response
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        limited == 1,
+        remaining,
+        reset_after_us,
+        retry_after_us,
+        decided_at_us,
+    )
+
+
+@attr.s
+class SlidingLogLimiter(keys.KeyNamespace, base.BaseLimiter):
+    """A sliding log limiter implemented as a Lua script in Redis.
+
+    This limits requests like
+    :class:`~rush.limiters.sliding_log.SlidingLogLimiter`, but each check
+    is a single atomic script call and each key is a sorted set of the times
+    of the requests allowed within the last period, so the logs are shared
+    by every client.
+
+    The stored keys are configured with the ``key_prefix``,
+    ``include_quota`` and ``max_key_length`` keyword arguments described by
+    :class:`~rush.keys.KeyNamespace`. Keys start with ``"sliding-log:"`` by
+    default, so they do not collide with the keys of limiters storing
+    other kinds of data, which Redis would reject with ``WRONGTYPE``.
+    """
+
+    default_key_prefix = "sliding-log:"
+
+    store: redis.RedisStore = attr.ib(
+        validator=attr.validators.instance_of(redis.RedisStore)
+    )
+
+    def __attrs_post_init__(self):
+        """Configure our redis client based off our store."""
+        self.client = self.store.client
+        self.apply_sliding_log = self.client.register_script(
+            APPLY_SLIDING_LOG_LUA
+        )
+
+    def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        response = self.apply_sliding_log(
+            keys=[self.stored_key(key, rate)], args=_args(rate, quantity)
+        )
+        return _result(rate, response, limit_data.current_microseconds())
+
+    def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys in one round trip.
+
+        The script for every request is sent in a single pipeline and run in
+        order, so repeated keys see the effect of earlier requests.
+        """
+        responses = self.store.run_scripts(
+            [
+                (
+                    self.apply_sliding_log,
+                    [self.stored_key(key, rate)],
+                    _args(rate, quantity),
+                )
+                for key, quantity in requests
+            ]
+        )
+        decided_at_us = limit_data.current_microseconds()
+        return [
+            _result(rate, response, decided_at_us) for response in responses
+        ]
+
+    def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(rate.count, rate.limit)
+
+
+@attr.s
+class AsyncSlidingLogLimiter(keys.KeyNamespace, base.AsyncBaseLimiter):
+    """A sliding log limiter in Redis for asyncio.
+
+    The stored keys are configured like those of
+    :class:`SlidingLogLimiter`.
+    """
+
+    default_key_prefix = "sliding-log:"
+
+    store: redis.AsyncRedisStore = attr.ib(
+        validator=attr.validators.instance_of(redis.AsyncRedisStore)
+    )
+
+    def __attrs_post_init__(self):
+        """Configure our redis client based off our store."""
+        self.client = self.store.client
+        self.apply_sliding_log = self.client.register_script(
+            APPLY_SLIDING_LOG_LUA
+        )
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        response = await self.apply_sliding_log(
+            keys=[self.stored_key(key, rate)], args=_args(rate, quantity)
+        )
+        return _result(rate, response, limit_data.current_microseconds())
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        await self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(rate.count, rate.limit)
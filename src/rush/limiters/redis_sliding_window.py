@@ -0,0 +1,230 @@
+"""A sliding window counter limiter implemented as a Lua script in Redis."""
+import datetime
+import typing
+
+import attr
+
+from . import base
+from .. import keys
+from .. import limit_data
+from .. import quota
+from .. import result
+from ..stores import redis
+
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+# The key is a hash of the current window's number, "w", and the requests
+# counted in it, "c", and in the window before it, "p". Requests which would
+# exceed the limit are not counted. The arithmetic matches
+# rush.limiters.sliding_window.
+APPLY_SLIDING_WINDOW_LUA = """
+-- this script has side-effects, so it requires replicate commands mode,
+-- which is always on, and the function gone, from Redis 7
+if redis.replicate_commands then redis.replicate_commands() end
+
+-- reported for retry_after and reset_after when there is nothing to wait for
+local none = -1000000
+
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+-- microseconds of the epoch, which a double represents exactly
+local time = redis.call("TIME")
+local now = time[1] * 1000000 + time[2]
+-- integer arithmetic, as dividing first could round to the wrong window
+local elapsed = now % period
+local window = (now - elapsed) / period
+local left = period - elapsed
+
+local previous = 0
+local current = 0
+local stored = redis.call("HMGET", key, "w", "c", "p")
+local stored_window = tonumber(stored[1])
+if stored_window == window then
+  current = tonumber(stored[2])
+  previous = tonumber(stored[3])
+elseif stored_window == window - 1 then
+  previous = tonumber(stored[2])
+end
+
+local weighted = math.floor(previous * (left / period))
+local used = weighted + current
+local limited = used >= limit or used + cost > limit
+
+if not limited then
+  current = current + cost
+  used = used + cost
+  if cost > 0 then
+    -- redis formats numbers with 14 significant digits, so write integers
+    redis.call(
+      "HSET", key,
+      "w", string.format("%d", window),
+      "c", current,
+      "p", previous
+    )
+    redis.call("PEXPIRE", key, math.ceil((left + period) / 1000))
+  end
+end
+
+local reset_after = none
+if current > 0 then
+  reset_after = left + period
+elseif weighted > 0 then
+  reset_after = left
+end
+
+if not limited then
+  return {0, limit - used, none, reset_after}
+end
+
+-- requests of nothing are limited until there is room for one request
+cost = math.max(cost, 1)
+local retry_after
+local room = limit - current - cost
+if room >= 0 then
+  -- the previous window's weight falls enough later in this window
+  retry_after = math.floor(period - (room + 1) * period / previous) + 1
+    - elapsed
+else
+  room = limit - cost
+  if room < 0 then
+    retry_after = left + period
+  else
+    -- this window becomes the previous window and its weight must fall too
+    retry_after = left
+      + math.floor(period - (room + 1) * period / current) + 1
+  end
+end
+
+return {1, math.max(limit - used, 0), retry_after, reset_after}
+"""
+
+
+def _args(rate: quota.Quota, quantity: int) -> typing.List[int]:
+    """Return the limit, the period in microseconds and the cost."""
+    return [rate.limit, rate.period // _ONE_MICROSECOND, quantity]
+
+
+def _result(
+    rate: quota.Quota,
+    response: typing.Tuple[int, int, int, int],
+    decided_at_us: int,
+) -> result.RateLimitResult:
+    limited, remaining, retry_after_us, reset_after_us = response
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        limited == 1,
+        remaining,
+        reset_after_us,
+        retry_after_us,
+        decided_at_us,
+    )
+
+
+@attr.s
+class SlidingWindowLimiter(keys.KeyNamespace, base.BaseLimiter):
+    """A sliding window counter limiter implemented as a Lua script in Redis.
+
+    This limits requests like
+    :class:`~rush.limiters.sliding_window.SlidingWindowLimiter`, but each
+    check is a single atomic script call and each key is a single hash
+    holding the current window's number and the counts of both windows.
+
+    The stored keys are configured with the ``key_prefix``,
+    ``include_quota`` and ``max_key_length`` keyword arguments described by
+    :class:`~rush.keys.KeyNamespace`. Keys start with ``"sliding-window:"`` by
+    default, so they do not collide with the keys of limiters storing
+    other kinds of data, which Redis would reject with ``WRONGTYPE``.
+    """
+
+    default_key_prefix = "sliding-window:"
+
+    store: redis.RedisStore = attr.ib(
+        validator=attr.validators.instance_of(redis.RedisStore)
+    )
+
+    def __attrs_post_init__(self):
+        """Configure our redis client based off our store."""
+        self.client = self.store.client
+        self.apply_sliding_window = self.client.register_script(
+            APPLY_SLIDING_WINDOW_LUA
+        )
+
+    def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        response = self.apply_sliding_window(
+            keys=[self.stored_key(key, rate)], args=_args(rate, quantity)
+        )
+        return _result(rate, response, limit_data.current_microseconds())
+
+    def rate_limit_many(
+        self,
+        requests: typing.Sequence[typing.Tuple[str, int]],
+        rate: quota.Quota,
+    ) -> typing.List[result.RateLimitResult]:
+        """Apply the rate-limit to several keys in one round trip.
+
+        The script for every request is sent in a single pipeline and run in
+        order, so repeated keys see the effect of earlier requests.
+        """
+        responses = self.store.run_scripts(
+            [
+                (
+                    self.apply_sliding_window,
+                    [self.stored_key(key, rate)],
+                    _args(rate, quantity),
+                )
+                for key, quantity in requests
+            ]
+        )
+        decided_at_us = limit_data.current_microseconds()
+        return [
+            _result(rate, response, decided_at_us) for response in responses
+        ]
+
+    def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(rate.count, rate.limit)
+
+
+@attr.s
+class AsyncSlidingWindowLimiter(keys.KeyNamespace, base.AsyncBaseLimiter):
+    """A sliding window counter limiter in Redis for asyncio.
+
+    The stored keys are configured like those of
+    :class:`SlidingWindowLimiter`.
+    """
+
+    default_key_prefix = "sliding-window:"
+
+    store: redis.AsyncRedisStore = attr.ib(
+        validator=attr.validators.instance_of(redis.AsyncRedisStore)
+    )
+
+    def __attrs_post_init__(self):
+        """Configure our redis client based off our store."""
+        self.client = self.store.client
+        self.apply_sliding_window = self.client.register_script(
+            APPLY_SLIDING_WINDOW_LUA
+        )
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        response = await self.apply_sliding_window(
+            keys=[self.stored_key(key, rate)], args=_args(rate, quantity)
+        )
+        return _result(rate, response, limit_data.current_microseconds())
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        await self.client.delete(self.stored_key(key, rate))
+        return base.reset_result(rate.count, rate.limit)
@@ -0,0 +1,288 @@
+"""Sliding log rate limiting logic."""
+import array
+import collections
+import datetime
+import threading
+import typing
+
+import attr
+
+from . import base
+from .. import limit_data
+from .. import quota
+from .. import result
+from .. import stores
+
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class SlidingLog:
+    """The times of the requests a key made within a quota's period.
+
+    The times are integer microseconds since the epoch, kept oldest first in
+    a ring buffer. The buffer starts empty and grows as requests are logged,
+    up to the quota's limit, so a log needs at most eight bytes per request
+    it can hold.
+    """
+
+    __slots__ = ("times", "start", "size", "limit", "period_us")
+
+    def __init__(self, limit: int, period_us: int) -> None:
+        """Create an empty log.
+
+        :param int limit:
+            The most requests the log can hold.
+        :param int period_us:
+            How long requests stay in the log, in microseconds.
+        """
+        self.times = array.array("q")
+        self.start = 0
+        self.size = 0
+        self.limit = limit
+        self.period_us = period_us
+
+    def time_at(self, index: int) -> int:
+        """Return the time of a request, counting from the oldest."""
+        return self.times[(self.start + index) % len(self.times)]
+
+    def expire(self, now_us: int) -> None:
+        """Forget requests made a whole period or more before now."""
+        cutoff_us = now_us - self.period_us
+        while self.size and self.times[self.start] <= cutoff_us:
+            self.start = (self.start + 1) % len(self.times)
+            self.size -= 1
+
+    def append(self, now_us: int, quantity: int) -> None:
+        """Record ``quantity`` requests made now.
+
+        Callers must check that the log has room for them within its limit.
+        """
+        size = self.size + quantity
+        if size > len(self.times):
+            # Unroll the buffer into a larger one, doubling it to keep
+            # appending one request at a time cheap
+            grown = array.array("q", self._ordered())
+            capacity = min(max(size, 2 * self.size), self.limit)
+            grown.frombytes(bytes(8 * (capacity - self.size)))
+            self.times = grown
+            self.start = 0
+        capacity = len(self.times)
+        for offset in range(self.size, size):
+            self.times[(self.start + offset) % capacity] = now_us
+        self.size = size
+
+    def _ordered(self, first: int = 0) -> typing.Iterator[int]:
+        return (self.time_at(index) for index in range(first, self.size))
+
+    def resized(self, limit: int, period_us: int) -> "SlidingLog":
+        """Return a log for another quota with the newest requests kept."""
+        log = SlidingLog(limit, period_us)
+        log.times.extend(self._ordered(max(self.size - limit, 0)))
+        log.size = len(log.times)
+        return log
+
+    def idle(self, now_us: int) -> bool:
+        """Return whether every request in the log has expired."""
+        return not self.size or (
+            self.time_at(self.size - 1) <= now_us - self.period_us
+        )
+
+
+def _apply(
+    log: SlidingLog, rate: quota.Quota, quantity: int, now_us: int
+) -> result.RateLimitResult:
+    """Check a request against a log and record it unless it is limited."""
+    limit = rate.limit
+    log.expire(now_us)
+    used = log.size
+    limited = used >= limit or used + quantity > limit
+    if not limited:
+        log.append(now_us, quantity)
+        used += quantity
+    if log.size:
+        reset_after_us = log.time_at(log.size - 1) + log.period_us - now_us
+    else:
+        reset_after_us = result.NO_WAIT_US
+    if not limited:
+        return result.RateLimitResult.from_microseconds(
+            rate.count,
+            False,
+            limit - used,
+            reset_after_us,
+            result.NO_WAIT_US,
+            now_us,
+        )
+    # Requests of nothing are limited until there is room for one request
+    quantity = max(quantity, 1)
+    if quantity > limit:
+        retry_after_us = log.period_us
+    else:
+        # Wait for enough of the oldest requests to expire
+        retry_after_us = (
+            log.time_at(used + quantity - limit - 1) + log.period_us - now_us
+        )
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        True,
+        max(limit - used, 0),
+        reset_after_us,
+        retry_after_us,
+        now_us,
+    )
+
+
+def _reset_result(rate: quota.Quota, now_us: int) -> result.RateLimitResult:
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        False,
+        rate.limit,
+        result.NO_WAIT_US,
+        result.NO_WAIT_US,
+        now_us,
+    )
+
+
+@attr.s
+class SlidingLogs:
+    """The sliding logs of a limiter's keys, least recently used first.
+
+    Each check also forgets the least recently used log if every request in
+    it has expired, so keys which are no longer used are eventually freed.
+    """
+
+    logs: typing.MutableMapping[str, SlidingLog] = attr.ib(
+        factory=collections.OrderedDict, init=False, repr=False
+    )
+    _lock: threading.Lock = attr.ib(
+        factory=threading.Lock, init=False, repr=False
+    )
+
+    def __len__(self) -> int:
+        """Return the number of keys with a log."""
+        return len(self.logs)
+
+    def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota, now_us: int
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests made now."""
+        period_us = rate.period // _ONE_MICROSECOND
+        with self._lock:
+            if self.logs:
+                oldest_key = next(iter(self.logs))
+                if oldest_key != key and self.logs[oldest_key].idle(now_us):
+                    del self.logs[oldest_key]
+            log = self.logs.get(key)
+            if log is None:
+                log = self.logs[key] = SlidingLog(rate.limit, period_us)
+            elif log.limit != rate.limit or log.period_us != period_us:
+                log = self.logs[key] = log.resized(rate.limit, period_us)
+            else:
+                self.logs.move_to_end(key)  # type: ignore
+            return _apply(log, rate, quantity, now_us)
+
+    def reset(self, key: str) -> None:
+        """Forget the log of a key."""
+        with self._lock:
+            self.logs.pop(key, None)
+
+
+def _store_validator(store_type: type) -> typing.Callable:
+    return attr.validators.optional(attr.validators.instance_of(store_type))
+
+
+@attr.s
+class SlidingLogLimiter(base.BaseLimiter):
+    """A limiter which logs the time of every request it allows.
+
+    A request is limited when the requests logged within the quota's period
+    before it leave no room for it, so the window slides exactly with time.
+    This suits small limits, e.g., a few password resets a day, where the
+    estimates of :class:`~rush.limiters.sliding_window.SlidingWindowLimiter`
+    are too coarse.
+
+    The logs are kept in the limiter, in the memory of this process, so
+    each process limits requests on its own. Use
+    :class:`~rush.limiters.redis_sliding_log.SlidingLogLimiter` to share
+    limits between processes. Each key's log is a :class:`SlidingLog`
+    holding at most the quota's limit of times.
+
+    .. attribute:: store
+
+        An optional :class:`~rush.stores.base.BaseStore` whose
+        :meth:`~rush.stores.base.BaseStore.current_time` is the time
+        requests are logged at. Nothing is stored in it. Defaults to
+        ``None``.
+
+    .. attribute:: clock
+
+        A callable returning the current time as integer microseconds since
+        the epoch, used when there is no store. Defaults to
+        :func:`~rush.limit_data.current_microseconds`.
+
+    .. attribute:: logs
+
+        The :class:`SlidingLogs` of every key.
+    """
+
+    store: typing.Optional[stores.BaseStore] = attr.ib(  # type: ignore
+        default=None, validator=_store_validator(stores.BaseStore)
+    )
+    clock: typing.Callable[[], int] = attr.ib(
+        default=limit_data.current_microseconds, kw_only=True
+    )
+    logs: SlidingLogs = attr.ib(factory=SlidingLogs, init=False)
+
+    def _now_us(self) -> int:
+        if self.store is None:
+            return self.clock()
+        return limit_data.datetime_to_microseconds(self.store.current_time())
+
+    def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        return self.logs.rate_limit(key, quantity, rate, self._now_us())
+
+    def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        self.logs.reset(key)
+        return _reset_result(rate, self._now_us())
+
+
+@attr.s
+class AsyncSlidingLogLimiter(base.AsyncBaseLimiter):
+    """A sliding log limiter for asyncio.
+
+    This limits requests exactly like :class:`SlidingLogLimiter`, and its
+    logs are likewise kept in the memory of this process. Its optional
+    :attr:`~SlidingLogLimiter.store` is a
+    :class:`~rush.stores.base.AsyncBaseStore`.
+    """
+
+    store: typing.Optional[stores.AsyncBaseStore] = attr.ib(  # type: ignore
+        default=None, validator=_store_validator(stores.AsyncBaseStore)
+    )
+    clock: typing.Callable[[], int] = attr.ib(
+        default=limit_data.current_microseconds, kw_only=True
+    )
+    logs: SlidingLogs = attr.ib(factory=SlidingLogs, init=False)
+
+    async def _now_us(self) -> int:
+        if self.store is None:
+            return self.clock()
+        return limit_data.datetime_to_microseconds(
+            await self.store.current_time()
+        )
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests."""
+        return self.logs.rate_limit(key, quantity, rate, await self._now_us())
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        self.logs.reset(key)
+        return _reset_result(rate, await self._now_us())
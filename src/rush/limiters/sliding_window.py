@@ -0,0 +1,266 @@
+"""Sliding window counter rate limiting logic."""
+import datetime
+import typing
+
+from . import base
+from .. import limit_data
+from .. import quota
+from .. import result
+
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _retry_after_us(
+    limit: int,
+    period_us: int,
+    elapsed_us: int,
+    previous: int,
+    current: int,
+    quantity: int,
+) -> int:
+    """Find how long a limited request must wait.
+
+    :returns:
+        The microseconds until the estimate has room for ``quantity``, or
+        until the end of the next window if it never will.
+    """
+    left_us = period_us - elapsed_us
+    # Requests of nothing are limited until there is room for one request
+    quantity = max(quantity, 1)
+    room = limit - current - quantity
+    if room >= 0:
+        # The previous window's weight falls enough later in this window
+        allowed_at_us = int(period_us - (room + 1) * period_us / previous) + 1
+        return allowed_at_us - elapsed_us
+    room = limit - quantity
+    if room < 0:
+        return left_us + period_us
+    # This window becomes the previous window and its weight must fall too
+    allowed_at_us = int(period_us - (room + 1) * period_us / current) + 1
+    return left_us + allowed_at_us
+
+
+def _decide(
+    rate: quota.Quota,
+    elapsed_us: int,
+    previous: int,
+    current: int,
+    quantity: int,
+    decided_at_us: typing.Optional[int] = None,
+) -> result.RateLimitResult:
+    """Decide a request from the counts of the previous and current windows.
+
+    The previous window's count is weighted by how much of it the sliding
+    window still overlaps and rounded down. The request is limited when the
+    estimate leaves nothing, or less than ``quantity``, of the quota's limit.
+
+    :param rate:
+        The quota to apply.
+    :param int elapsed_us:
+        The microseconds elapsed since the current window started.
+    :param int previous:
+        The number of requests counted in the previous window.
+    :param int current:
+        The number of requests counted in the current window, not
+        including this request.
+    :param int quantity:
+        The number of requests to make.
+    :param int decided_at_us:
+        When the decision was made, in microseconds since the epoch.
+    :returns:
+        The result.
+    :rtype:
+        :class:`~rush.result.RateLimitResult`
+    """
+    limit = rate.limit
+    period_us = rate.period // _ONE_MICROSECOND
+    left_us = period_us - elapsed_us
+    weighted = int(previous * (left_us / period_us))
+    used = weighted + current
+    limited = used >= limit or used + quantity > limit
+    if not limited:
+        current += quantity
+        used += quantity
+    if current:
+        reset_after_us = left_us + period_us
+    elif weighted:
+        reset_after_us = left_us
+    else:
+        reset_after_us = result.NO_WAIT_US
+    if limited:
+        return result.RateLimitResult.from_microseconds(
+            rate.count,
+            True,
+            max(limit - used, 0),
+            reset_after_us,
+            _retry_after_us(
+                limit, period_us, elapsed_us, previous, current, quantity
+            ),
+            decided_at_us,
+        )
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        False,
+        limit - used,
+        reset_after_us,
+        result.NO_WAIT_US,
+        decided_at_us,
+    )
+
+
+def _counts(
+    rate: quota.Quota,
+    now: datetime.datetime,
+    data: typing.Optional[limit_data.LimitData],
+) -> typing.Tuple[int, int, int, int]:
+    """Find the epoch-aligned window containing now and the stored counts.
+
+    The stored data's ``created_at`` is the start of the window whose
+    requests are counted in ``used``, and ``remaining`` holds the count of
+    the window before it. Counts of windows the sliding window no longer
+    overlaps are dropped.
+
+    :returns:
+        Now and the start of the current window in microseconds, and the
+        counts of the previous and current windows.
+    """
+    period_us = rate.period // _ONE_MICROSECOND
+    now_us = limit_data.datetime_to_microseconds(now)
+    started_at_us = now_us - now_us % period_us
+    previous = current = 0
+    if data is not None:
+        if data.created_at_us == started_at_us:
+            previous, current = data.remaining, data.used
+        elif data.created_at_us == started_at_us - period_us:
+            previous = data.used
+    return now_us, started_at_us, previous, current
+
+
+def _expiry(rate: quota.Quota, elapsed_us: int) -> datetime.timedelta:
+    """Return how long stored counts matter: until the next window ends."""
+    return 2 * rate.period - datetime.timedelta(microseconds=elapsed_us)
+
+
+def _reset_result(rate: quota.Quota, now_us: int) -> result.RateLimitResult:
+    return result.RateLimitResult.from_microseconds(
+        rate.count,
+        False,
+        rate.limit,
+        result.NO_WAIT_US,
+        result.NO_WAIT_US,
+        now_us,
+    )
+
+
+class SlidingWindowLimiter(base.CompareAndSwapLimiter):
+    """A limiter which approximates a window sliding with time.
+
+    Requests are counted in windows aligned to the Unix epoch, like
+    :class:`~rush.limiters.periodic.PeriodicLimiter` with ``align_to_epoch``.
+    A request is checked against the current window's count plus the
+    previous window's count weighted by how much of the previous window lies
+    within the quota's period before now. This smooths the bursts fixed
+    windows allow where two windows meet, while each key needs only two
+    counts. Both are kept in the key's one
+    :class:`~rush.limit_data.LimitData`, read and written with
+    compare-and-swap.
+    """
+
+    def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests.
+
+        If another client changes the key's data first, this is retried
+        according to :attr:`retry_policy`.
+        """
+        return self._retrying(self._rate_limit, key, quantity, rate)
+
+    def _rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        now, olddata = self.store.get_with_current_time(key)
+        now_us, started_at_us, previous, current = _counts(
+            rate, now, olddata
+        )
+        elapsed_us = now_us - started_at_us
+        ratelimitresult = _decide(
+            rate, elapsed_us, previous, current, quantity, now_us
+        )
+        if quantity and not ratelimitresult.limited:
+            # Limited requests are not counted
+            self.store.compare_and_swap(
+                key=key,
+                old=olddata,
+                new=limit_data.LimitData.from_microseconds(
+                    current + quantity, previous, started_at_us
+                ),
+                expiry=_expiry(rate, elapsed_us),
+            )
+        return ratelimitresult
+
+    def reset(self, key: str, rate: quota.Quota) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        now_us, started_at_us, _, _ = _counts(
+            rate, self.store.current_time(), None
+        )
+        self.store.set(
+            key=key,
+            data=limit_data.LimitData.from_microseconds(0, 0, started_at_us),
+            expiry=_expiry(rate, now_us - started_at_us),
+        )
+        return _reset_result(rate, now_us)
+
+
+class AsyncSlidingWindowLimiter(base.AsyncCompareAndSwapLimiter):
+    """A sliding window counter limiter for asyncio.
+
+    This limits requests exactly like :class:`SlidingWindowLimiter`.
+    """
+
+    async def rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Apply the rate-limit to a quantity of requests.
+
+        If another client changes the key's data first, this is retried
+        according to :attr:`retry_policy`.
+        """
+        return await self._retrying(self._rate_limit, key, quantity, rate)
+
+    async def _rate_limit(
+        self, key: str, quantity: int, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        now, olddata = await self.store.get_with_current_time(key)
+        now_us, started_at_us, previous, current = _counts(
+            rate, now, olddata
+        )
+        elapsed_us = now_us - started_at_us
+        ratelimitresult = _decide(
+            rate, elapsed_us, previous, current, quantity, now_us
+        )
+        if quantity and not ratelimitresult.limited:
+            # Limited requests are not counted
+            await self.store.compare_and_swap(
+                key=key,
+                old=olddata,
+                new=limit_data.LimitData.from_microseconds(
+                    current + quantity, previous, started_at_us
+                ),
+                expiry=_expiry(rate, elapsed_us),
+            )
+        return ratelimitresult
+
+    async def reset(
+        self, key: str, rate: quota.Quota
+    ) -> result.RateLimitResult:
+        """Reset the rate-limit for a given key."""
+        now_us, started_at_us, _, _ = _counts(
+            rate, await self.store.current_time(), None
+        )
+        await self.store.set(
+            key=key,
+            data=limit_data.LimitData.from_microseconds(0, 0, started_at_us),
+            expiry=_expiry(rate, now_us - started_at_us),
+        )
+        return _reset_result(rate, now_us)
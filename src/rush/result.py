@@ -4,8 +4,14 @@ import typing
 
 import attr
 
+from . import limit_data
+
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+#: Reported for ``reset_after`` and ``retry_after``, in microseconds, when
+#: there is nothing to wait for
+NO_WAIT_US = -1_000_000
+
 
-@attr.s(frozen=True)
 class RateLimitResult:
     """A result of checking a ratelimit.
 
@@ -43,13 +49,216 @@ class RateLimitResult:
         This will be a :class:`~datetime.timedelta` representing the length of
         time after which a retry can be made.
 
+    .. attribute:: reset_after_us
+
+        :attr:`reset_after` as integer microseconds.
+
+    .. attribute:: retry_after_us
+
+        :attr:`retry_after` as integer microseconds.
+
+    .. attribute:: decided_at
+
+        The UTC timezone-aware datetime at which the limiter made its
+        decision, or ``None`` if it is not known.
+
+    .. attribute:: decided_at_us
+
+        :attr:`decided_at` as integer microseconds since the epoch.
+
+    The limiters create results from integer microseconds and the
+    :class:`~datetime.timedelta` and :class:`~datetime.datetime` attributes
+    are only built when they are first used.
+
+    Results are immutable and compare equal when their limit, remaining and
+    times to wait are equal, regardless of when they were decided.
     """
 
-    limit: int = attr.ib()
-    limited: bool = attr.ib()
-    remaining: int = attr.ib()
-    reset_after: datetime.timedelta = attr.ib()
-    retry_after: datetime.timedelta = attr.ib()
+    __slots__ = (
+        "limit",
+        "limited",
+        "remaining",
+        "reset_after_us",
+        "retry_after_us",
+        "decided_at_us",
+        "_reset_after",
+        "_retry_after",
+        "_decided_at",
+    )
+
+    limit: int
+    limited: bool
+    remaining: int
+    reset_after_us: int
+    retry_after_us: int
+    decided_at_us: typing.Optional[int]
+    _reset_after: datetime.timedelta
+    _retry_after: datetime.timedelta
+    _decided_at: typing.Optional[datetime.datetime]
+
+    def __init__(
+        self,
+        limit: int,
+        limited: bool,
+        remaining: int,
+        reset_after: datetime.timedelta,
+        retry_after: datetime.timedelta,
+        *,
+        decided_at: typing.Optional[datetime.datetime] = None,
+    ) -> None:
+        """Create a result from timedeltas.
+
+        :param int limit:
+        :param bool limited:
+        :param int remaining:
+        :param datetime.timedelta reset_after:
+        :param datetime.timedelta retry_after:
+        :param datetime.datetime decided_at:
+            When the decision was made, if it is known.
+        """
+        _set_limit(self, limit)
+        _set_limited(self, limited)
+        _set_remaining(self, remaining)
+        _set_reset_after(self, reset_after)
+        _set_reset_after_us(self, reset_after // _ONE_MICROSECOND)
+        _set_retry_after(self, retry_after)
+        _set_retry_after_us(self, retry_after // _ONE_MICROSECOND)
+        _set_decided_at(self, decided_at)
+        _set_decided_at_us(
+            self,
+            None
+            if decided_at is None
+            else limit_data.datetime_to_microseconds(decided_at),
+        )
+
+    @classmethod
+    def from_microseconds(
+        cls,
+        limit: int,
+        limited: bool,
+        remaining: int,
+        reset_after_us: int,
+        retry_after_us: int,
+        decided_at_us: typing.Optional[int] = None,
+    ) -> "RateLimitResult":
+        """Create a result from integer microseconds without converting them.
+
+        :param int limit:
+        :param bool limited:
+        :param int remaining:
+        :param int reset_after_us:
+            How long until the limit resets, in microseconds.
+        :param int retry_after_us:
+            How long until a retry can be made, in microseconds.
+        :param int decided_at_us:
+            When the decision was made, in microseconds since the epoch, if
+            it is known.
+        :returns:
+            The result.
+        :rtype:
+            :class:`~rush.result.RateLimitResult`
+        """
+        self = object.__new__(cls)
+        _set_limit(self, limit)
+        _set_limited(self, limited)
+        _set_remaining(self, remaining)
+        _set_reset_after_us(self, reset_after_us)
+        _set_retry_after_us(self, retry_after_us)
+        _set_decided_at_us(self, decided_at_us)
+        return self
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        """Refuse to change a result."""
+        raise attr.exceptions.FrozenInstanceError()
+
+    def __delattr__(self, name: str) -> None:
+        """Refuse to change a result."""
+        raise attr.exceptions.FrozenInstanceError()
+
+    def __reduce__(self):
+        """Pickle the result as microseconds."""
+        return (
+            RateLimitResult.from_microseconds,
+            (
+                self.limit,
+                self.limited,
+                self.remaining,
+                self.reset_after_us,
+                self.retry_after_us,
+                self.decided_at_us,
+            ),
+        )
+
+    def _key(self) -> typing.Tuple[int, bool, int, int, int]:
+        return (
+            self.limit,
+            self.limited,
+            self.remaining,
+            self.reset_after_us,
+            self.retry_after_us,
+        )
+
+    def __eq__(self, other: typing.Any) -> bool:
+        """Compare the values of results."""
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __ne__(self, other: typing.Any) -> bool:
+        """Compare the values of results."""
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self) -> int:
+        """Hash the values of a result."""
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        """Show the values of a result."""
+        return (
+            f"RateLimitResult(limit={self.limit!r}, limited={self.limited!r},"
+            f" remaining={self.remaining!r},"
+            f" reset_after={self.reset_after!r},"
+            f" retry_after={self.retry_after!r},"
+            f" decided_at={self.decided_at!r})"
+        )
+
+    @property
+    def reset_after(self) -> datetime.timedelta:
+        """Return how much time is left until the ratelimit resets."""
+        try:
+            return self._reset_after
+        except AttributeError:
+            reset_after = datetime.timedelta(microseconds=self.reset_after_us)
+            _set_reset_after(self, reset_after)
+            return reset_after
+
+    @property
+    def retry_after(self) -> datetime.timedelta:
+        """Return the length of time after which a retry can be made."""
+        try:
+            return self._retry_after
+        except AttributeError:
+            retry_after = datetime.timedelta(microseconds=self.retry_after_us)
+            _set_retry_after(self, retry_after)
+            return retry_after
+
+    @property
+    def decided_at(self) -> typing.Optional[datetime.datetime]:
+        """Return when the decision was made, if it is known."""
+        try:
+            return self._decided_at
+        except AttributeError:
+            decided_at_us = self.decided_at_us
+            decided_at = None
+            if decided_at_us is not None:
+                decided_at = limit_data.microseconds_to_datetime(
+                    decided_at_us
+                )
+            _set_decided_at(self, decided_at)
+            return decided_at
 
     @staticmethod
     def _now() -> datetime.datetime:
@@ -58,25 +267,44 @@ class RateLimitResult:
     def resets_at(
         self, from_when: typing.Optional[datetime.datetime] = None
     ) -> datetime.datetime:
-        """Calculate the reset time from UTC now.
+        """Calculate the reset time.
 
+        :param datetime.datetime from_when:
+            The time to count from. Defaults to when the decision was made or,
+            if that is not known, UTC now.
         :returns:
             The UTC timezone-aware datetime representing when the limit
             resets.
         """
         if from_when is None:
-            from_when = self._now()
+            from_when = self.decided_at or self._now()
         return from_when + self.reset_after
 
     def retry_at(
         self, from_when: typing.Optional[datetime.datetime] = None
     ) -> datetime.datetime:
-        """Calculate the retry time from UTC now.
+        """Calculate the retry time.
 
+        :param datetime.datetime from_when:
+            The time to count from. Defaults to when the decision was made or,
+            if that is not known, UTC now.
         :returns:
             The UTC timezone-aware datetime representing when the user
             can retry.
         """
         if from_when is None:
-            from_when = self._now()
+            from_when = self.decided_at or self._now()
         return from_when + self.retry_after
+
+
+# RateLimitResult refuses attribute assignment, so its slots are set through
+# their descriptors
+_set_limit = RateLimitResult.limit.__set__  # type: ignore
+_set_limited = RateLimitResult.limited.__set__  # type: ignore
+_set_remaining = RateLimitResult.remaining.__set__  # type: ignore
+_set_reset_after_us = RateLimitResult.reset_after_us.__set__  # type: ignore
+_set_retry_after_us = RateLimitResult.retry_after_us.__set__  # type: ignore
+_set_decided_at_us = RateLimitResult.decided_at_us.__set__  # type: ignore
+_set_reset_after = RateLimitResult._reset_after.__set__  # type: ignore
+_set_retry_after = RateLimitResult._retry_after.__set__  # type: ignore
+_set_decided_at = RateLimitResult._decided_at.__set__  # type: ignore
@@ -1,5 +1,8 @@
 """Module contianing built-in stores."""
 
+from .base import AsyncBaseStore
 from .base import BaseStore
+from .base import Swap
+from .base import Write
 
-__all__ = ("BaseStore",)
+__all__ = ("AsyncBaseStore", "BaseStore", "Swap", "Write")
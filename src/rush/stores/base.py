@@ -2,20 +2,85 @@
 import datetime
 import typing
 
+from .. import exceptions
 from .. import limit_data
 
 
+class Write(typing.NamedTuple):
+    """The arguments to :meth:`BaseStore.set` for one key."""
+
+    key: str
+    data: limit_data.LimitData
+    expiry: typing.Optional[datetime.timedelta] = None
+
+
+class Swap(typing.NamedTuple):
+    """The arguments to :meth:`BaseStore.compare_and_swap` for one key."""
+
+    key: str
+    old: typing.Optional[limit_data.LimitData]
+    new: limit_data.LimitData
+    expiry: typing.Optional[datetime.timedelta] = None
+
+
+def incremented(
+    data: typing.Optional[limit_data.LimitData], amount: int
+) -> limit_data.LimitData:
+    """Return the data :meth:`BaseStore.increment` stores for a counter.
+
+    The counter is kept in ``used`` and ``created_at`` records when it was
+    first incremented.
+
+    :param data:
+        The counter's current data, or ``None`` if it has none.
+    :param int amount:
+        The amount to add to the counter.
+    :returns:
+        The counter's new data.
+    """
+    if data is None:
+        return limit_data.LimitData.from_microseconds(
+            amount, 0, limit_data.current_microseconds()
+        )
+    return limit_data.LimitData.from_microseconds(
+        data.used + amount, 0, data.created_at_us
+    )
+
+
+def check_unique_keys(swaps: typing.Sequence[Swap]) -> None:
+    """Refuse to swap the same key more than once in one operation.
+
+    :raises ValueError:
+        If a key appears more than once.
+    """
+    if len({swap.key for swap in swaps}) != len(swaps):
+        raise ValueError("Each key may only be swapped once at a time")
+
+
 class BaseStore:
     """Base object defining the interface for storage."""
 
+    #: Whether the store discards data once the ``expiry`` it was written
+    #: with has passed. Limiters which write a new key for every period rely
+    #: on this to remove the keys of past periods.
+    expires_data: typing.ClassVar[bool] = False
+
     def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
         """Retrieve the data for a given key."""
         raise NotImplementedError()
 
     def set(
-        self, *, key: str, data: limit_data.LimitData
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
     ) -> limit_data.LimitData:
-        """Store the values for a given key."""
+        """Store the values for a given key.
+
+        ``expiry`` is a hint from the limiter of how long the data remains
+        relevant. Stores that can expire data should discard it afterwards.
+        """
         raise NotImplementedError()
 
     def compare_and_swap(
@@ -24,10 +89,106 @@ class BaseStore:
         key: str,
         old: typing.Optional[limit_data.LimitData],
         new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
     ) -> limit_data.LimitData:
-        """Perform an atomic compare-and-swap operation if supported."""
+        """Perform an atomic compare-and-swap operation if supported.
+
+        ``expiry`` is a hint from the limiter of how long the data remains
+        relevant. Stores that can expire data should discard it afterwards.
+        """
         raise NotImplementedError()
 
+    def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Atomically add to the integer counter stored for a key.
+
+        Counters which do not exist start at zero. ``expiry`` is a hint of
+        how long the counter remains relevant, like that of :meth:`set`.
+
+        Stores are encouraged to override this with a native increment. The
+        default reads the data and stores :func:`incremented` data with a
+        single :meth:`compare_and_swap`, so callers decide whether to retry
+        when another client changed the key in between.
+
+        :param str key:
+        :param int amount:
+            The amount to add, which may be zero to read the counter or
+            negative to take back an earlier increment.
+        :returns:
+            The counter's new value.
+        :raises rush.exceptions.AtomicOperationError:
+            If the default finds that another client changed the key.
+        """
+        old = self.get(key)
+        new = incremented(old, amount)
+        self.compare_and_swap(key=key, old=old, new=new, expiry=expiry)
+        return new.used
+
+    def get_many(
+        self, keys: typing.Sequence[str]
+    ) -> typing.List[typing.Optional[limit_data.LimitData]]:
+        """Retrieve the data for several keys.
+
+        Stores are encouraged to override this to retrieve every key in a
+        single operation. The default calls :meth:`get` for each key.
+
+        :returns:
+            The data for each key, in the order of ``keys``.
+        """
+        return [self.get(key) for key in keys]
+
+    def set_many(
+        self, writes: typing.Sequence[Write]
+    ) -> typing.List[limit_data.LimitData]:
+        """Store the values for several keys.
+
+        Stores are encouraged to override this to store every key in a
+        single operation. The default calls :meth:`set` for each key.
+        """
+        return [
+            self.set(key=key, data=data, expiry=expiry)
+            for key, data, expiry in writes
+        ]
+
+    def compare_and_swap_many(
+        self, swaps: typing.Sequence[Swap]
+    ) -> typing.List[limit_data.LimitData]:
+        """Compare and swap the data for several keys.
+
+        Stores that can are encouraged to override this to swap every key
+        atomically so that nothing is written unless all of the stored data
+        matches. The default compares all of the data with
+        :meth:`get_many` first and then calls :meth:`compare_and_swap` for
+        each key, so each key is swapped atomically but another client may
+        change a later key after earlier keys were swapped.
+
+        :raises ValueError:
+            If a key appears more than once.
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data for a key does not match its ``old`` data.
+            The ``key`` attribute names the key.
+        """
+        check_unique_keys(swaps)
+        current = self.get_many([swap.key for swap in swaps])
+        for swap, data in zip(swaps, current):
+            if swap.old != data:
+                raise exceptions.MismatchedDataError(
+                    "old limit data did not match expected limit data",
+                    expected_limit_data=swap.old,
+                    actual_limit_data=data,
+                    key=swap.key,
+                )
+        return [
+            self.compare_and_swap(
+                key=swap.key, old=swap.old, new=swap.new, expiry=swap.expiry
+            )
+            for swap in swaps
+        ]
+
     def get_with_time(
         self,
         key: str,
@@ -45,6 +206,23 @@ class BaseStore:
         data = data.copy_with(time=tzaware_dt)
         return tzaware_dt, data
 
+    def get_with_current_time(
+        self,
+        key: str,
+        tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc,
+    ) -> typing.Tuple[
+        datetime.datetime, typing.Optional[limit_data.LimitData]
+    ]:
+        """Retrieve the current time and the data for a given key.
+
+        Unlike :meth:`get_with_time`, the time returned is always
+        :meth:`current_time`. Stores that talk to a server are encouraged to
+        override this to read both in a single round trip.
+
+        The default is to call :meth:`current_time` and then :meth:`get`.
+        """
+        return self.current_time(tzinfo), self.get(key)
+
     def set_with_time(
         self,
         *,
@@ -74,3 +252,91 @@ class BaseStore:
             :class:`~datetime.datetime`
         """
         return datetime.datetime.now(tzinfo)
+
+
+class AsyncBaseStore:
+    """Base object defining the interface for asyncio storage.
+
+    This mirrors :class:`BaseStore` with coroutine methods for use with
+    :class:`~rush.throttle.AsyncThrottle` and the asyncio limiters.
+    """
+
+    #: See :attr:`BaseStore.expires_data`.
+    expires_data: typing.ClassVar[bool] = False
+
+    async def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
+        """Retrieve the data for a given key."""
+        raise NotImplementedError()
+
+    async def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key.
+
+        ``expiry`` is a hint from the limiter of how long the data remains
+        relevant. Stores that can expire data should discard it afterwards.
+        """
+        raise NotImplementedError()
+
+    async def compare_and_swap(
+        self,
+        *,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Perform an atomic compare-and-swap operation.
+
+        ``expiry`` is a hint from the limiter of how long the data remains
+        relevant. Stores that can expire data should discard it afterwards.
+        """
+        raise NotImplementedError()
+
+    async def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Atomically add to the integer counter stored for a key.
+
+        See :meth:`BaseStore.increment`. The default likewise makes a single
+        :meth:`compare_and_swap` and lets its
+        :class:`~rush.exceptions.AtomicOperationError` escape.
+        """
+        old = await self.get(key)
+        new = incremented(old, amount)
+        await self.compare_and_swap(key=key, old=old, new=new, expiry=expiry)
+        return new.used
+
+    async def get_with_current_time(
+        self,
+        key: str,
+        tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc,
+    ) -> typing.Tuple[
+        datetime.datetime, typing.Optional[limit_data.LimitData]
+    ]:
+        """Retrieve the current time and the data for a given key.
+
+        The default is to await :meth:`current_time` and then :meth:`get`.
+        """
+        return await self.current_time(tzinfo), await self.get(key)
+
+    async def current_time(
+        self, tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc
+    ) -> datetime.datetime:
+        """Return the curent date and time as a datetime.
+
+        The default is to use the local clock.
+
+        :returns:
+            Now in UTC
+        :retype:
+            :class:`~datetime.datetime`
+        """
+        return datetime.datetime.now(tzinfo)
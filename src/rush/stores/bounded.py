@@ -0,0 +1,230 @@
+"""Module containing the logic for our bounded in-memory store."""
+import collections
+import datetime
+import threading
+import typing
+
+import attr
+
+from . import base
+from .. import exceptions
+from .. import limit_data
+
+
+@attr.s
+class BoundedDictionaryStore(base.BaseStore):
+    """In-memory storage that holds a bounded number of keys.
+
+    Keys are kept in least-recently-used order. Entries whose limit data can
+    no longer affect a limiter's decision are expired automatically and,
+    once ``max_keys`` is exceeded, the least-recently-used key is evicted.
+
+    An entry is considered expired when:
+
+    - the ``expiry`` hint it was stored with has elapsed,
+    - it was stored without a hint and its ``time`` (the theoretical
+      arrival time used by GCRA) has passed, or
+    - it has neither and ``ttl`` has elapsed since its ``created_at``
+      (the period used by the periodic limiter).
+
+    .. attribute:: max_keys
+
+        The maximum number of keys to hold at once. Defaults to 10,000.
+
+    .. attribute:: ttl
+
+        An optional :class:`~datetime.timedelta` after which entries without
+        a ``time`` expire. This should usually be the period of the quota.
+
+    .. attribute:: evictions
+
+        The number of unexpired keys evicted to stay within ``max_keys``.
+
+    .. attribute:: expirations
+
+        The number of keys removed because they expired.
+    """
+
+    #: The number of least-recently-used keys checked for expiry on each
+    #: write. This keeps expiry amortized O(1) per operation.
+    sweep_size: typing.ClassVar[int] = 2
+    expires_data: typing.ClassVar[bool] = True
+
+    max_keys: int = attr.ib(default=10_000)
+    ttl: typing.Optional[datetime.timedelta] = attr.ib(default=None)
+    store: typing.MutableMapping[str, limit_data.LimitData] = attr.ib(
+        factory=collections.OrderedDict, init=False, repr=False
+    )
+    _deadlines: typing.Dict[str, datetime.datetime] = attr.ib(
+        factory=dict, init=False, repr=False
+    )
+    evictions: int = attr.ib(default=0, init=False)
+    expirations: int = attr.ib(default=0, init=False)
+    _lock: threading.Lock = attr.ib(
+        factory=threading.Lock, init=False, repr=False
+    )
+
+    @max_keys.validator
+    def _max_keys_is_positive(self, attribute, value: int) -> None:
+        if value < 1:
+            raise ValueError("The max_keys must be a positive value.")
+
+    def _is_expired(
+        self, key: str, data: limit_data.LimitData, now: datetime.datetime
+    ) -> bool:
+        deadline = self._deadlines.get(key)
+        if deadline is not None:
+            return deadline <= now
+        if data.time is not None:
+            return data.time <= now
+        if self.ttl is not None:
+            return data.created_at + self.ttl <= now
+        return False
+
+    def _remove(self, key: str) -> None:
+        # NOTE: Callers must hold self._lock
+        del self.store[key]
+        self._deadlines.pop(key, None)
+
+    def _store(
+        self,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta],
+    ) -> None:
+        # NOTE: Callers must hold self._lock
+        store = typing.cast(collections.OrderedDict, self.store)
+        now = self.current_time()
+        store[key] = data
+        store.move_to_end(key)
+        if expiry is not None:
+            self._deadlines[key] = now + expiry
+        else:
+            self._deadlines.pop(key, None)
+        for _ in range(self.sweep_size):
+            oldest_key, oldest = next(iter(store.items()))
+            if oldest_key == key or not self._is_expired(
+                oldest_key, oldest, now
+            ):
+                break
+            self._remove(oldest_key)
+            self.expirations += 1
+        while len(store) > self.max_keys:
+            evicted_key, evicted = next(iter(store.items()))
+            if self._is_expired(evicted_key, evicted, now):
+                self.expirations += 1
+            else:
+                self.evictions += 1
+            self._remove(evicted_key)
+
+    def compare_and_swap(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Atomically compare the stored data for a key and swap it.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data does not match ``old``.
+        """
+        with self._lock:
+            current = self.store.get(key, None)
+            if old != current:
+                raise exceptions.MismatchedDataError(
+                    "old limit data did not match expected limit data",
+                    expected_limit_data=old,
+                    actual_limit_data=current,
+                )
+            self._store(key, new, expiry)
+        return new
+
+    def _get(
+        self, key: str, now: datetime.datetime
+    ) -> typing.Optional[limit_data.LimitData]:
+        # NOTE: Callers must hold self._lock
+        data = self.store.get(key, None)
+        if data is None:
+            return None
+        if self._is_expired(key, data, now):
+            self._remove(key)
+            self.expirations += 1
+            return None
+        typing.cast(collections.OrderedDict, self.store).move_to_end(key)
+        return data
+
+    def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
+        """Retrieve the data for a given key."""
+        with self._lock:
+            return self._get(key, self.current_time())
+
+    def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key."""
+        with self._lock:
+            self._store(key, data, expiry)
+        return data
+
+    def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Atomically add to the integer counter stored for a key.
+
+        Expired counters start again from zero.
+        """
+        with self._lock:
+            data = self._get(key, self.current_time())
+            data = base.incremented(data, amount)
+            self._store(key, data, expiry)
+        return data.used
+
+    def get_many(
+        self, keys: typing.Sequence[str]
+    ) -> typing.List[typing.Optional[limit_data.LimitData]]:
+        """Retrieve the data for several keys while holding the lock once."""
+        now = self.current_time()
+        with self._lock:
+            return [self._get(key, now) for key in keys]
+
+    def set_many(
+        self, writes: typing.Sequence[base.Write]
+    ) -> typing.List[limit_data.LimitData]:
+        """Store the values for several keys while holding the lock once."""
+        with self._lock:
+            for key, data, expiry in writes:
+                self._store(key, data, expiry)
+        return [write.data for write in writes]
+
+    def compare_and_swap_many(
+        self, swaps: typing.Sequence[base.Swap]
+    ) -> typing.List[limit_data.LimitData]:
+        """Atomically compare the stored data for several keys and swap it.
+
+        Nothing is swapped unless the data for every key matches.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data for a key does not match its ``old`` data.
+        """
+        base.check_unique_keys(swaps)
+        with self._lock:
+            for swap in swaps:
+                current = self.store.get(swap.key, None)
+                if swap.old != current:
+                    raise exceptions.MismatchedDataError(
+                        "old limit data did not match expected limit data",
+                        expected_limit_data=swap.old,
+                        actual_limit_data=current,
+                        key=swap.key,
+                    )
+            for swap in swaps:
+                self._store(swap.key, swap.new, swap.expiry)
+        return [swap.new for swap in swaps]
@@ -0,0 +1,130 @@
+"""Module containing the logic for our thread-safe dictionary store."""
+import contextlib
+import datetime
+import threading
+import typing
+
+import attr
+
+from . import base
+from . import dictionary
+from .. import exceptions
+from .. import limit_data
+
+
+@attr.s
+class ConcurrentDictionaryStore(dictionary.DictionaryStore):
+    """In-memory storage that is safe to share between threads.
+
+    Rather than serializing every operation behind one global lock, this
+    store selects one of ``lock_count`` locks based on the hash of the key.
+    Operations on the same key are always serialized while operations on
+    unrelated keys rarely contend with each other.
+
+    .. attribute:: lock_count
+
+        The number of locks to stripe keys across. This must be greater than
+        0 and defaults to 64.
+    """
+
+    lock_count: int = attr.ib(default=64)
+    _locks: typing.List[threading.Lock] = attr.ib(init=False, repr=False)
+
+    @lock_count.validator
+    def _lock_count_is_positive(self, attribute, value: int) -> None:
+        if value < 1:
+            raise ValueError("The lock_count must be a positive value.")
+
+    @_locks.default
+    def _make_locks(self) -> typing.List[threading.Lock]:
+        return [threading.Lock() for _ in range(self.lock_count)]
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % self.lock_count]
+
+    @contextlib.contextmanager
+    def _locked_for(self, keys: typing.Iterable[str]):
+        """Hold the lock for each of the keys.
+
+        Each lock is acquired once, in a consistent order so that threads
+        locking overlapping keys cannot deadlock.
+        """
+        indices = sorted({hash(key) % self.lock_count for key in keys})
+        with contextlib.ExitStack() as stack:
+            for index in indices:
+                stack.enter_context(self._locks[index])
+            yield
+
+    def compare_and_swap(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Atomically compare the stored data for a key and swap it.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data does not match ``old``.
+        """
+        with self._lock_for(key):
+            current = self.store.get(key, None)
+            if old != current:
+                raise exceptions.MismatchedDataError(
+                    "old limit data did not match expected limit data",
+                    expected_limit_data=old,
+                    actual_limit_data=current,
+                )
+            self.store[key] = new
+        return new
+
+    def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key."""
+        with self._lock_for(key):
+            self.store[key] = data
+        return data
+
+    def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Atomically add to the integer counter stored for a key."""
+        with self._lock_for(key):
+            data = base.incremented(self.store.get(key, None), amount)
+            self.store[key] = data
+        return data.used
+
+    def get_many(
+        self, keys: typing.Sequence[str]
+    ) -> typing.List[typing.Optional[limit_data.LimitData]]:
+        """Retrieve the data for several keys."""
+        with self._locked_for(keys):
+            return super().get_many(keys)
+
+    def set_many(
+        self, writes: typing.Sequence[base.Write]
+    ) -> typing.List[limit_data.LimitData]:
+        """Store the values for several keys."""
+        with self._locked_for(write.key for write in writes):
+            return super().set_many(writes)
+
+    def compare_and_swap_many(
+        self, swaps: typing.Sequence[base.Swap]
+    ) -> typing.List[limit_data.LimitData]:
+        """Atomically compare the stored data for several keys and swap it.
+
+        Nothing is swapped unless the data for every key matches.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data for a key does not match its ``old`` data.
+        """
+        with self._locked_for(swap.key for swap in swaps):
+            return super().compare_and_swap_many(swaps)
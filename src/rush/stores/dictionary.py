@@ -1,4 +1,5 @@
 """Module containing the logic for our dictionary store."""
+import datetime
 import typing
 
 import attr
@@ -8,6 +9,22 @@ from .. import exceptions
 from .. import limit_data
 
 
+def _check_swaps(
+    store: typing.Mapping[str, limit_data.LimitData],
+    swaps: typing.Sequence[base.Swap],
+) -> None:
+    """Ensure the stored data for every swap matches its ``old`` data."""
+    for swap in swaps:
+        current = store.get(swap.key, None)
+        if swap.old != current:
+            raise exceptions.MismatchedDataError(
+                "old limit data did not match expected limit data",
+                expected_limit_data=swap.old,
+                actual_limit_data=current,
+                key=swap.key,
+            )
+
+
 @attr.s
 class DictionaryStore(base.BaseStore):
     """Basic storage for testing that utilizes a dictionary."""
@@ -19,6 +36,7 @@ class DictionaryStore(base.BaseStore):
         key: str,
         old: typing.Optional[limit_data.LimitData],
         new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
     ) -> limit_data.LimitData:
         """Re-retrieve the limit data, compare and swap it.
 
@@ -44,8 +62,118 @@ class DictionaryStore(base.BaseStore):
         return data
 
     def set(
-        self, *, key: str, data: limit_data.LimitData
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
     ) -> limit_data.LimitData:
         """Store the values for a given key."""
         self.store[key] = data
         return self.store[key]
+
+    def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Add to the integer counter stored for a key.
+
+        .. warning::
+
+            Like :meth:`compare_and_swap`, this does not use any locking.
+        """
+        data = base.incremented(self.store.get(key, None), amount)
+        self.store[key] = data
+        return data.used
+
+    def get_many(
+        self, keys: typing.Sequence[str]
+    ) -> typing.List[typing.Optional[limit_data.LimitData]]:
+        """Retrieve the data for several keys."""
+        return [self.store.get(key, None) for key in keys]
+
+    def set_many(
+        self, writes: typing.Sequence[base.Write]
+    ) -> typing.List[limit_data.LimitData]:
+        """Store the values for several keys."""
+        for write in writes:
+            self.store[write.key] = write.data
+        return [write.data for write in writes]
+
+    def compare_and_swap_many(
+        self, swaps: typing.Sequence[base.Swap]
+    ) -> typing.List[limit_data.LimitData]:
+        """Compare the stored data for several keys and swap all of it.
+
+        Nothing is swapped unless the data for every key matches.
+
+        .. warning::
+
+            Like :meth:`compare_and_swap`, this does not use any locking.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data for a key does not match its ``old`` data.
+        """
+        base.check_unique_keys(swaps)
+        _check_swaps(self.store, swaps)
+        for swap in swaps:
+            self.store[swap.key] = swap.new
+        return [swap.new for swap in swaps]
+
+
+@attr.s
+class AsyncDictionaryStore(base.AsyncBaseStore):
+    """Basic asyncio storage for testing that utilizes a dictionary.
+
+    Since nothing is awaited between reading and writing a key,
+    :meth:`compare_and_swap` is atomic with respect to other tasks on the
+    same event loop.
+    """
+
+    store: typing.Dict[str, limit_data.LimitData] = attr.ib(factory=dict)
+
+    async def compare_and_swap(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Re-retrieve the limit data, compare and swap it."""
+        old_limitdata = self.store.get(key, None)
+        if old != old_limitdata:
+            raise exceptions.MismatchedDataError(
+                "old limit data did not match expected limit data",
+                expected_limit_data=old,
+                actual_limit_data=old_limitdata,
+            )
+        self.store[key] = new
+        return new
+
+    async def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Add to the integer counter stored for a key."""
+        data = base.incremented(self.store.get(key, None), amount)
+        self.store[key] = data
+        return data.used
+
+    async def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
+        """Retrieve the data for a given key."""
+        return self.store.get(key, None)
+
+    async def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key."""
+        self.store[key] = data
+        return data
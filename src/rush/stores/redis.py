@@ -1,12 +1,15 @@
 """Redis storage logic."""
 import datetime
+import math
 import typing
 
 import attr
 import redis
+import redis.asyncio
 import rfc3986
 
 from . import base
+from .. import clock as store_clock
 from .. import exceptions
 from .. import limit_data
 
@@ -16,6 +19,89 @@ URL_VALIDATOR = (
     .require_presence_of("scheme")
 )
 
+_ONE_MILLISECOND = datetime.timedelta(milliseconds=1)
+# Microseconds in a second, as returned by TIME
+_SECOND = 1_000_000
+#: The hash field holding data stored with the "packed" codec
+PACKED_FIELD = "p"
+CODECS = ("hash", "packed")
+
+_COMPARE_AND_SWAP_FUNCTIONS_LUA = """
+-- args holds the number of expected field/value pairs followed by the pairs.
+-- Zero pairs means we expect there to be no data stored for the key. The
+-- pairs are followed by the expected data packed into one string (for keys
+-- stored with the packed codec), the number of milliseconds after which the
+-- new data expires (or 0 to never expire it) and then the field/value pairs
+-- of the new data.
+local function matches(current, args)
+  local expected_pairs = tonumber(args[1])
+  if expected_pairs == 0 then
+    return #current == 0
+  end
+  local stored = {}
+  for i = 1, #current, 2 do
+    stored[current[i]] = current[i + 1]
+  end
+  if #current == 0 then
+    return false
+  end
+  if stored["p"] then
+    return stored["p"] == args[expected_pairs * 2 + 2]
+  end
+  for i = 2, expected_pairs * 2, 2 do
+    if (stored[args[i]] or "") ~= args[i + 1] then
+      return false
+    end
+  end
+  return true
+end
+
+local function swap(key, args)
+  local expected_pairs = tonumber(args[1])
+  local expiry = tonumber(args[expected_pairs * 2 + 3])
+  -- Remove fields left behind by the other codec
+  redis.call("DEL", key)
+  redis.call("HMSET", key, unpack(args, expected_pairs * 2 + 4))
+  if expiry > 0 then
+    redis.call("PEXPIRE", key, expiry)
+  end
+end
+"""
+
+COMPARE_AND_SWAP_LUA = _COMPARE_AND_SWAP_FUNCTIONS_LUA + """
+local current = redis.call("HGETALL", KEYS[1])
+if not matches(current, ARGV) then
+  return {0, current}
+end
+swap(KEYS[1], ARGV)
+return {1}
+"""
+
+COMPARE_AND_SWAP_MANY_LUA = _COMPARE_AND_SWAP_FUNCTIONS_LUA + """
+-- ARGV holds one group of arguments per key, each starting with its length
+-- followed by the arguments described above. Nothing is written unless the
+-- data for every key matches. Otherwise, the (1-based) index of the first
+-- mismatched key and its data are returned.
+local groups = {}
+local offset = 1
+for k = 1, #KEYS do
+  local length = tonumber(ARGV[offset])
+  groups[k] = {unpack(ARGV, offset + 1, offset + length)}
+  offset = offset + length + 1
+end
+
+for k = 1, #KEYS do
+  local current = redis.call("HGETALL", KEYS[k])
+  if not matches(current, groups[k]) then
+    return {0, k, current}
+  end
+end
+for k = 1, #KEYS do
+  swap(KEYS[k], groups[k])
+end
+return {1}
+"""
+
 
 def parse(value: str) -> rfc3986.ParseResult:
     """Convert strings to parsed URIs.
@@ -25,26 +111,205 @@ def parse(value: str) -> rfc3986.ParseResult:
     return rfc3986.urlparse(value)
 
 
+def expiry_milliseconds(expiry: typing.Optional[datetime.timedelta]) -> int:
+    """Convert an expiry hint to whole milliseconds.
+
+    :returns:
+        The expiry rounded up to at least 1 millisecond, or 0 if there is no
+        expiry.
+    """
+    if expiry is None:
+        return 0
+    return max(1, math.ceil(expiry / _ONE_MILLISECOND))
+
+
+def decode(
+    fields: typing.Mapping[str, str]
+) -> typing.Optional[limit_data.LimitData]:
+    """Convert the fields of a hash to limit data.
+
+    This understands both the field-per-attribute hashes written by the
+    ``hash`` codec and the single packed field written by the ``packed``
+    codec.
+    """
+    if not fields:
+        return None
+    if PACKED_FIELD in fields:
+        return limit_data.LimitData.frompacked(fields[PACKED_FIELD])
+    return limit_data.LimitData(**fields)
+
+
+def validate_url(instance, attribute, value: rfc3986.ParseResult) -> None:
+    """Ensure a URL has the bare minimum we need."""
+    try:
+        URL_VALIDATOR.validate(value.reference)
+    except rfc3986.exceptions.ValidationError as err:
+        url = value.unsplit()
+        raise exceptions.InvalidRedisURL(
+            f"Provided URL {url} is invalid for Redis storage.",
+            url=url,
+            error=err,
+        )
+
+
+def encode(data: limit_data.LimitData, codec: str) -> typing.Dict[str, str]:
+    """Convert limit data to the fields of a hash using a codec."""
+    if codec == "packed":
+        return {PACKED_FIELD: data.aspacked()}
+    return data.asdict()
+
+
+def queue_increment(
+    p: typing.Any,
+    key: str,
+    amount: int,
+    expiry: typing.Optional[datetime.timedelta],
+) -> None:
+    """Queue the commands adding to a key's counter on a pipeline.
+
+    The counter is the ``used`` field of the key's hash and the other
+    fields are only written when missing, so the key holds the limit data
+    from :func:`~rush.stores.base.incremented` and can be read with
+    ``get``.
+    """
+    p.hincrby(key, "used", amount)
+    for field, value in base.incremented(None, 0).asdict().items():
+        if field != "used":
+            p.hsetnx(key, field, value)
+    if expiry is not None:
+        p.pexpire(key, expiry_milliseconds(expiry))
+
+
+def compare_and_swap_args(
+    old: typing.Optional[limit_data.LimitData],
+    new: limit_data.LimitData,
+    expiry: typing.Optional[datetime.timedelta],
+    codec: str,
+) -> typing.List[typing.Union[int, str]]:
+    """Build the arguments for :data:`COMPARE_AND_SWAP_LUA`."""
+    expected = old.asdict() if old is not None else {}
+    args: typing.List[typing.Union[int, str]] = [len(expected)]
+    for field, value in expected.items():
+        args.extend((field, value))
+    args.append(old.aspacked() if old is not None else "")
+    args.append(expiry_milliseconds(expiry))
+    for field, value in encode(new, codec).items():
+        args.extend((field, value))
+    return args
+
+
+def compare_and_swap_many_args(
+    swaps: typing.Sequence[base.Swap], codec: str
+) -> typing.List[typing.Union[int, str]]:
+    """Build the arguments for :data:`COMPARE_AND_SWAP_MANY_LUA`."""
+    args: typing.List[typing.Union[int, str]] = []
+    for swap in swaps:
+        group = compare_and_swap_args(swap.old, swap.new, swap.expiry, codec)
+        args.append(len(group))
+        args.extend(group)
+    return args
+
+
+def mismatched_data_error(
+    old: typing.Optional[limit_data.LimitData],
+    fields: typing.List[str],
+    key: typing.Optional[str] = None,
+) -> exceptions.MismatchedDataError:
+    """Build the error for a swap refused by :data:`COMPARE_AND_SWAP_LUA`.
+
+    :param fields:
+        The flattened field/value pairs the script found stored.
+    """
+    return exceptions.MismatchedDataError(
+        "old limit data did not match expected limit data",
+        expected_limit_data=old,
+        actual_limit_data=decode(dict(zip(fields[::2], fields[1::2]))),
+        key=key,
+    )
+
+
+def _make_clock(store) -> typing.Optional[store_clock.SynchronizedClock]:
+    if store.clock_resync_interval is None:
+        return None
+    return store_clock.SynchronizedClock(
+        resync_interval=store.clock_resync_interval
+    )
+
+
+def _timestamp_to_datetime(
+    seconds: int, microseconds: int, tzinfo: typing.Optional[datetime.tzinfo]
+) -> datetime.datetime:
+    return datetime.datetime.utcfromtimestamp(
+        seconds + (microseconds / 1_000_000)
+    ).replace(tzinfo=tzinfo)
+
+
+def _sampled_time(
+    clock: typing.Optional[store_clock.SynchronizedClock],
+    sent_ns: int,
+    seconds: int,
+    microseconds: int,
+    tzinfo: typing.Optional[datetime.tzinfo],
+) -> datetime.datetime:
+    """Convert a response to ``TIME``, sampling the clock if there is one."""
+    if clock is None:
+        return _timestamp_to_datetime(seconds, microseconds, tzinfo)
+    clock.add_sample(
+        sent_ns, seconds * _SECOND + microseconds, clock.monotonic_ns()
+    )
+    return _estimated_time(clock, tzinfo)
+
+
+def _estimated_time(
+    clock: store_clock.SynchronizedClock,
+    tzinfo: typing.Optional[datetime.tzinfo],
+) -> datetime.datetime:
+    seconds, microseconds = divmod(clock.now_microseconds(), _SECOND)
+    return _timestamp_to_datetime(seconds, microseconds, tzinfo)
+
+
 @attr.s
 class RedisStore(base.BaseStore):
-    """Logic for storing things in redis."""
+    """Logic for storing things in redis.
+
+    .. attribute:: codec
 
-    url: rfc3986.ParseResult = attr.ib(converter=parse)
+        How limit data is encoded in each key's hash. ``"hash"`` (the
+        default) stores one field per attribute with formatted datetimes.
+        ``"packed"`` stores a single field holding integers, see
+        :meth:`~rush.limit_data.LimitData.aspacked`, which uses less memory
+        and is faster to encode and decode. Data written with either codec
+        can always be read.
+
+    .. attribute:: clock_resync_interval
+
+        If provided, :meth:`current_time` samples Redis's clock this often
+        and estimates it locally in between with a
+        :class:`~rush.clock.SynchronizedClock` instead of sending ``TIME``
+        each time. The estimate's error is available from
+        ``store.clock.uncertainty``.
+    """
+
+    expires_data: typing.ClassVar[bool] = True
+
+    url: rfc3986.ParseResult = attr.ib(
+        converter=parse, validator=validate_url
+    )
     client_config: typing.Dict[str, typing.Any] = attr.ib(factory=dict)
+    codec: str = attr.ib(
+        default="hash", validator=attr.validators.in_(CODECS), kw_only=True
+    )
+    clock_resync_interval: typing.Optional[datetime.timedelta] = attr.ib(
+        default=None, kw_only=True
+    )
     client: redis.StrictRedis = attr.ib()
-
-    @url.validator
-    def _validate_url(self, attribute, value):
-        """Ensure our URL has the bare minimum we need."""
-        try:
-            URL_VALIDATOR.validate(value.reference)
-        except rfc3986.exceptions.ValidationError as err:
-            url = value.unsplit()
-            raise exceptions.InvalidRedisURL(
-                f"Provided URL {url} is invalid for Redis storage.",
-                url=url,
-                error=err,
-            )
+    clock: typing.Optional[store_clock.SynchronizedClock] = attr.ib(
+        init=False, default=attr.Factory(_make_clock, takes_self=True)
+    )
+    _compare_and_swap_script = attr.ib(init=False, default=None, repr=False)
+    _compare_and_swap_many_script = attr.ib(
+        init=False, default=None, repr=False
+    )
 
     @client.default
     def _make_client(self):
@@ -61,32 +326,54 @@ class RedisStore(base.BaseStore):
         key: str,
         old: typing.Optional[limit_data.LimitData],
         new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
     ) -> limit_data.LimitData:
-        """Perform an atomic compare and swap operation."""
-        with self.client.pipeline() as p:
-            try:
-                p.watch(key)
-                data = p.hgetall(key)
-                current_data = limit_data.LimitData(**data) if data else None
-                if old != current_data:
-                    raise exceptions.MismatchedDataError(
-                        "old limit data did not match expected limit data",
-                        expected_limit_data=old,
-                        actual_limit_data=current_data,
-                    )
-                p.multi()
-                p.hmset(key, new.asdict())
-                p.execute()
-            except redis.WatchError as we:
-                raise exceptions.DataChangedInStoreError(
-                    "error swapping the limit data", original_exception=we
-                )
+        """Perform an atomic compare and swap operation.
+
+        This runs a single Lua script in Redis which compares the stored data
+        to ``old`` and writes ``new`` if they match. If an ``expiry`` is
+        provided, the key expires after it in the same operation.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data does not match ``old``. The stored data is
+            available as ``actual_limit_data`` so callers can retry without
+            retrieving it again.
+        """
+        if self._compare_and_swap_script is None:
+            self._compare_and_swap_script = self.client.register_script(
+                COMPARE_AND_SWAP_LUA
+            )
+        swapped, *current = self._compare_and_swap_script(
+            keys=[key],
+            args=compare_and_swap_args(old, new, expiry, self.codec),
+        )
+        if not swapped:
+            raise mismatched_data_error(old, current[0])
         return new
 
     def set(
-        self, *, key: str, data: limit_data.LimitData
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
     ) -> limit_data.LimitData:
-        """Store the values for a given key."""
+        """Store the values for a given key.
+
+        If an ``expiry`` is provided, the key expires after it.
+        """
+        with self.client.pipeline() as p:
+            self._queue_set(p, key, data, expiry)
+            p.execute()
+        return data
+
+    def _queue_set(
+        self,
+        p: redis.client.Pipeline,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta],
+    ) -> None:
         datadict = typing.cast(  # Cast until the stubs are fixed
             typing.Mapping[
                 typing.Union[bytes, float, int, str],
@@ -94,29 +381,318 @@ class RedisStore(base.BaseStore):
             ],
             # See also https://stackoverflow.com/a/64484841/1953283 as an
             # explanation of why the redis-py typeshed stubs are wrong
-            data.asdict(),
+            encode(data, self.codec),
         )
-        self.client.hmset(key, datadict)
-        return data
+        # Remove fields left behind by the other codec
+        p.delete(key)
+        p.hmset(key, datadict)
+        if expiry is not None:
+            p.pexpire(key, expiry_milliseconds(expiry))
+
+    def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Atomically add to the integer counter stored for a key.
+
+        The counter is the ``used`` field of the key's hash, updated with
+        ``HINCRBY`` in a transaction which fills in the other fields of
+        limit data when the key is new, so the key can still be read with
+        :meth:`get`. Counters are always stored with the ``"hash"`` codec.
+        If an ``expiry`` is provided, the key expires after it.
+        """
+        with self.client.pipeline() as p:
+            queue_increment(p, key, amount, expiry)
+            return int(p.execute()[0])
 
     def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
         """Retrieve the data for a given key."""
-        data = self.client.hgetall(key)
-        return limit_data.LimitData(**data) if data else None
+        return decode(self.client.hgetall(key))
+
+    def get_many(
+        self, keys: typing.Sequence[str]
+    ) -> typing.List[typing.Optional[limit_data.LimitData]]:
+        """Retrieve the data for several keys in one pipeline."""
+        with self.client.pipeline(transaction=False) as p:
+            for key in keys:
+                p.hgetall(key)
+            return [decode(fields) for fields in p.execute()]
+
+    def run_scripts(
+        self,
+        calls: typing.Sequence[
+            typing.Tuple[typing.Any, typing.Sequence[str], typing.Sequence]
+        ],
+    ) -> typing.List[typing.Any]:
+        """Run Lua scripts for several keys in one pipeline.
+
+        :param calls:
+            Tuples of a script registered with :attr:`client`, its keys and
+            its arguments. The scripts run in order.
+        :returns:
+            The reply of each script, in the order of ``calls``.
+        """
+        with self.client.pipeline(transaction=False) as p:
+            for script, keys, args in calls:
+                script(keys=keys, args=args, client=p)
+            return p.execute()
+
+    def set_many(
+        self, writes: typing.Sequence[base.Write]
+    ) -> typing.List[limit_data.LimitData]:
+        """Store the values for several keys in one pipeline.
+
+        The pipeline is a ``MULTI``/``EXEC`` transaction, so other clients
+        see either none or all of the new data. Redis Cluster has no
+        transactions across nodes, so with
+        :class:`~rush.stores.redis_cluster.RedisClusterStore` each key is
+        written on its own.
+        """
+        with self.client.pipeline() as p:
+            for key, data, expiry in writes:
+                self._queue_set(p, key, data, expiry)
+            p.execute()
+        return [write.data for write in writes]
+
+    def compare_and_swap_many(
+        self, swaps: typing.Sequence[base.Swap]
+    ) -> typing.List[limit_data.LimitData]:
+        """Atomically compare and swap the data for several keys.
+
+        This runs a single Lua script which writes nothing unless the data
+        stored for every key matches. With Redis Cluster, every key must
+        hash to the same slot, see :func:`~rush.stores.redis_cluster.hash_tag`.
+
+        :raises ValueError:
+            If a key appears more than once.
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data for a key does not match its ``old`` data.
+            The ``key`` attribute names the first such key.
+        """
+        base.check_unique_keys(swaps)
+        if not swaps:
+            return []
+        if self._compare_and_swap_many_script is None:
+            self._compare_and_swap_many_script = self.client.register_script(
+                COMPARE_AND_SWAP_MANY_LUA
+            )
+        swapped, *mismatch = self._compare_and_swap_many_script(
+            keys=[swap.key for swap in swaps],
+            args=compare_and_swap_many_args(swaps, self.codec),
+        )
+        if not swapped:
+            index, fields = mismatch
+            swap = swaps[index - 1]
+            raise mismatched_data_error(swap.old, fields, key=swap.key)
+        return [swap.new for swap in swaps]
+
+    def get_with_current_time(
+        self,
+        key: str,
+        tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc,
+    ) -> typing.Tuple[
+        datetime.datetime, typing.Optional[limit_data.LimitData]
+    ]:
+        """Retrieve the current time and the data for a given key.
+
+        This sends ``TIME`` and ``HGETALL`` in one pipeline so that both take
+        a single round trip. If the local estimate of Redis's clock does not
+        need a sample, only ``HGETALL`` is sent.
+        """
+        if self.clock is not None and not self.clock.needs_sample():
+            return _estimated_time(self.clock, tzinfo), self.get(key)
+        sent_ns = self.clock.monotonic_ns() if self.clock is not None else 0
+        (seconds, microseconds), fields = self._time_and_fields(key)
+        now = _sampled_time(
+            self.clock, sent_ns, seconds, microseconds, tzinfo
+        )
+        return now, decode(fields)
+
+    def _time_and_fields(self, key: str) -> typing.List[typing.Any]:
+        """Return Redis's ``TIME`` and the fields stored for a key."""
+        with self.client.pipeline(transaction=False) as p:
+            p.time()
+            p.hgetall(key)
+            return p.execute()
 
     def current_time(
         self, tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc
     ) -> datetime.datetime:
         """Return the curent date and time as a datetime.
 
-        This uses Redis's ``TIME`` command to determine the current time.
+        This uses Redis's ``TIME`` command to determine the current time, or
+        the local estimate of it if ``clock_resync_interval`` was provided.
 
         :returns:
             Now in UTC
         :retype:
             :class:`~datetime.datetime`
         """
+        if self.clock is None:
+            seconds, microseconds = self.client.time()
+            return _timestamp_to_datetime(seconds, microseconds, tzinfo)
+        if self.clock.needs_sample():
+            self.clock.sample(self._time_microseconds)
+        return _estimated_time(self.clock, tzinfo)
+
+    def _time_microseconds(self) -> int:
         seconds, microseconds = self.client.time()
-        return datetime.datetime.utcfromtimestamp(
-            seconds + (microseconds / 1_000_000)
-        ).replace(tzinfo=tzinfo)
+        return seconds * _SECOND + microseconds
+
+
+@attr.s
+class AsyncRedisStore(base.AsyncBaseStore):
+    """Logic for storing things in redis from asyncio.
+
+    This stores data exactly like :class:`RedisStore`, using a
+    :mod:`redis.asyncio` client, so both stores can share keys.
+
+    .. attribute:: codec
+
+        How limit data is encoded in each key's hash, see
+        :attr:`RedisStore.codec`.
+
+    .. attribute:: clock_resync_interval
+
+        How often to sample Redis's clock, if at all, see
+        :attr:`RedisStore.clock_resync_interval`.
+    """
+
+    expires_data: typing.ClassVar[bool] = True
+
+    url: rfc3986.ParseResult = attr.ib(
+        converter=parse, validator=validate_url
+    )
+    client_config: typing.Dict[str, typing.Any] = attr.ib(factory=dict)
+    codec: str = attr.ib(
+        default="hash", validator=attr.validators.in_(CODECS), kw_only=True
+    )
+    clock_resync_interval: typing.Optional[datetime.timedelta] = attr.ib(
+        default=None, kw_only=True
+    )
+    client: redis.asyncio.StrictRedis = attr.ib()
+    clock: typing.Optional[store_clock.SynchronizedClock] = attr.ib(
+        init=False, default=attr.Factory(_make_clock, takes_self=True)
+    )
+    _compare_and_swap_script = attr.ib(init=False, default=None, repr=False)
+
+    @client.default
+    def _make_client(self):
+        """Create the asyncio Redis client from the URL and config."""
+        attr.validate(self)  # Force validation of self.url
+        self.client_config.setdefault("decode_responses", True)
+        return redis.asyncio.StrictRedis.from_url(
+            url=self.url.unsplit(),
+            **self.client_config,
+        )
+
+    async def compare_and_swap(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Perform an atomic compare and swap operation.
+
+        This runs the same Lua script as :meth:`RedisStore.compare_and_swap`.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data does not match ``old``.
+        """
+        if self._compare_and_swap_script is None:
+            self._compare_and_swap_script = self.client.register_script(
+                COMPARE_AND_SWAP_LUA
+            )
+        swapped, *current = await self._compare_and_swap_script(
+            keys=[key],
+            args=compare_and_swap_args(old, new, expiry, self.codec),
+        )
+        if not swapped:
+            raise mismatched_data_error(old, current[0])
+        return new
+
+    async def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key.
+
+        If an ``expiry`` is provided, the key expires after it.
+        """
+        async with self.client.pipeline() as p:
+            # Remove fields left behind by the other codec
+            p.delete(key)
+            p.hset(key, mapping=encode(data, self.codec))
+            if expiry is not None:
+                p.pexpire(key, expiry_milliseconds(expiry))
+            await p.execute()
+        return data
+
+    async def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Atomically add to the integer counter stored for a key.
+
+        See :meth:`RedisStore.increment`.
+        """
+        async with self.client.pipeline() as p:
+            queue_increment(p, key, amount, expiry)
+            return int((await p.execute())[0])
+
+    async def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
+        """Retrieve the data for a given key."""
+        return decode(await self.client.hgetall(key))
+
+    async def get_with_current_time(
+        self,
+        key: str,
+        tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc,
+    ) -> typing.Tuple[
+        datetime.datetime, typing.Optional[limit_data.LimitData]
+    ]:
+        """Retrieve the current time and the data for a given key.
+
+        Like :meth:`RedisStore.get_with_current_time`, this takes a single
+        round trip.
+        """
+        if self.clock is not None and not self.clock.needs_sample():
+            return _estimated_time(self.clock, tzinfo), await self.get(key)
+        sent_ns = self.clock.monotonic_ns() if self.clock is not None else 0
+        async with self.client.pipeline(transaction=False) as p:
+            p.time()
+            p.hgetall(key)
+            (seconds, microseconds), fields = await p.execute()
+        now = _sampled_time(
+            self.clock, sent_ns, seconds, microseconds, tzinfo
+        )
+        return now, decode(fields)
+
+    async def current_time(
+        self, tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc
+    ) -> datetime.datetime:
+        """Return the curent date and time as a datetime.
+
+        This uses Redis's ``TIME`` command to determine the current time, or
+        the local estimate of it if ``clock_resync_interval`` was provided.
+
+        :returns:
+            Now in UTC
+        :retype:
+            :class:`~datetime.datetime`
+        """
+        if self.clock is not None and not self.clock.needs_sample():
+            return _estimated_time(self.clock, tzinfo)
+        sent_ns = self.clock.monotonic_ns() if self.clock is not None else 0
+        seconds, microseconds = await self.client.time()
+        return _sampled_time(
+            self.clock, sent_ns, seconds, microseconds, tzinfo
+        )
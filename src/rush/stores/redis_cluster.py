@@ -0,0 +1,113 @@
+"""Redis Cluster storage logic."""
+import typing
+
+import attr
+from redis import cluster
+from redis import exceptions as redis_exceptions
+
+from . import redis
+
+# Reads the time and a key's data on the node serving the key's slot
+TIME_AND_FIELDS_LUA = """
+return {redis.call("TIME"), redis.call("HGETALL", KEYS[1])}
+"""
+
+
+def hash_tag(tag: str, key: str) -> str:
+    """Prefix a key with a Redis Cluster hash tag.
+
+    Redis Cluster only hashes the part of a key between the first ``{`` and
+    the following ``}`` to pick a slot. Keys that share a tag are therefore
+    stored on the same node which allows checking them together.
+
+    :param str tag:
+        The tag shared by keys that must live on the same node, e.g., a
+        user's id.
+    :param str key:
+        The rest of the key.
+    :returns:
+        The tagged key.
+    """
+    return f"{{{tag}}}{key}"
+
+
+@attr.s
+class RedisClusterStore(redis.RedisStore):
+    """Logic for storing things in a Redis Cluster.
+
+    This accepts the URL of any node in the cluster. The client discovers
+    the rest of the cluster, routes each command to the node serving the
+    key's slot and follows ``MOVED`` and ``ASK`` redirections when slots
+    migrate between nodes.
+
+    Redis Cluster pipelines are not transactions, so unlike
+    :class:`~rush.stores.redis.RedisStore`, :meth:`set`, :meth:`set_many`
+    and :meth:`increment` send their commands to each key's node without
+    ``MULTI``/``EXEC``. The compare-and-swap methods are Lua scripts and
+    stay atomic. :meth:`current_time` reads the clock of the cluster's
+    default node, while :meth:`get_with_current_time` reads the clock of
+    the node serving the key.
+    """
+
+    client: cluster.RedisCluster = attr.ib()  # type: ignore[assignment]
+    _time_and_fields_script = attr.ib(init=False, default=None, repr=False)
+    _loaded_scripts: typing.Set[str] = attr.ib(
+        init=False, factory=set, repr=False
+    )
+
+    @client.default
+    def _make_client(self):
+        """Create the Redis Cluster client from the URL and config."""
+        attr.validate(self)  # Force validation of self.url
+        self.client_config.setdefault("decode_responses", True)
+        return cluster.RedisCluster.from_url(
+            url=self.url.unsplit(),
+            **self.client_config,
+        )
+
+    def keyslot(self, key: str) -> int:
+        """Return the cluster slot that a key hashes to."""
+        return self.client.keyslot(key)
+
+    def _time_and_fields(self, key: str) -> typing.List[typing.Any]:
+        """Return the time and a key's fields from the key's node.
+
+        A pipeline would send ``TIME`` to the cluster's default node, so
+        both are read by one script instead.
+        """
+        if self._time_and_fields_script is None:
+            self._time_and_fields_script = self.client.register_script(
+                TIME_AND_FIELDS_LUA
+            )
+        (seconds, microseconds), fields = self._time_and_fields_script(
+            keys=[key]
+        )
+        return [
+            (int(seconds), int(microseconds)),
+            dict(zip(fields[::2], fields[1::2])),
+        ]
+
+    def run_scripts(
+        self,
+        calls: typing.Sequence[
+            typing.Tuple[typing.Any, typing.Sequence[str], typing.Sequence]
+        ],
+    ) -> typing.List[typing.Any]:
+        """Run Lua scripts for several keys in one pipeline per node.
+
+        Cluster pipelines cannot load scripts, so each script is loaded into
+        every primary node the first time it is run this way. If a node has
+        lost its scripts, e.g., after a failover,
+        :class:`redis.exceptions.NoScriptError` is raised, the scripts are
+        loaded again by the next call and the scripts other nodes already
+        ran are not undone.
+        """
+        for script, _, _ in calls:
+            if script.sha not in self._loaded_scripts:
+                self.client.script_load(script.script)
+                self._loaded_scripts.add(script.sha)
+        try:
+            return super().run_scripts(calls)
+        except redis_exceptions.NoScriptError:
+            self._loaded_scripts.clear()
+            raise
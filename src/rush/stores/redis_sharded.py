@@ -0,0 +1,233 @@
+"""Client-side sharding of limit data across standalone Redis nodes."""
+import bisect
+import datetime
+import hashlib
+import typing
+
+import attr
+
+from . import base
+from . import redis
+from .. import keys
+from .. import limit_data
+
+
+def _hash(value: str) -> int:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def hashed_part(key: str) -> str:
+    """Return the part of a key used to pick its shard.
+
+    Like Redis Cluster, if the key contains a non-empty hash tag, i.e., text
+    between the first ``{`` and the following ``}``, only the tag is hashed.
+    This keeps keys built with :func:`~rush.stores.redis_cluster.hash_tag`
+    on the same node.
+    """
+    tag = keys.hash_tag_of(key)
+    return key if tag is None else tag
+
+
+@attr.s
+class ShardedRedisStore(base.BaseStore):
+    """Logic for spreading limit data across several Redis servers.
+
+    Keys are assigned to servers with consistent hashing. Each server is
+    placed on a hash ring ``virtual_nodes`` times and a key belongs to the
+    first point on the ring at or after its hash. Adding a server therefore
+    only moves the keys that now hash closest to one of its points, roughly
+    ``1 / len(urls)`` of them, to it.
+
+    Each server gets its own :class:`~rush.stores.redis.RedisStore`, and
+    with it its own client and connection pool.
+
+    .. attribute:: urls
+
+        The URLs of the Redis servers. Each is validated like the URL of a
+        :class:`~rush.stores.redis.RedisStore`. A server's position on the
+        ring is derived from its URL, so changing the order of the URLs does
+        not move keys.
+
+    .. attribute:: virtual_nodes
+
+        How many points each server gets on the ring. More points spread keys
+        more evenly at the cost of a larger ring.
+
+    .. attribute:: clock_resync_interval
+
+        How often to sample the first server's clock, if at all, see
+        :attr:`RedisStore.clock_resync_interval
+        <rush.stores.redis.RedisStore.clock_resync_interval>`.
+    """
+
+    expires_data: typing.ClassVar[bool] = True
+
+    urls: typing.List[str] = attr.ib(converter=list)
+    client_config: typing.Dict[str, typing.Any] = attr.ib(factory=dict)
+    codec: str = attr.ib(
+        default="hash",
+        validator=attr.validators.in_(redis.CODECS),
+        kw_only=True,
+    )
+    virtual_nodes: int = attr.ib(default=160, kw_only=True)
+    clock_resync_interval: typing.Optional[datetime.timedelta] = attr.ib(
+        default=None, kw_only=True
+    )
+    shards: typing.List[redis.RedisStore] = attr.ib(init=False)
+    _ring: typing.List[int] = attr.ib(init=False, factory=list, repr=False)
+    _ring_shards: typing.List[redis.RedisStore] = attr.ib(
+        init=False, factory=list, repr=False
+    )
+
+    @urls.validator
+    def _validate_urls(self, attribute, value):
+        if not value:
+            raise ValueError("ShardedRedisStore requires at least one URL")
+        if len(set(value)) != len(value):
+            raise ValueError("ShardedRedisStore URLs must be unique")
+
+    @virtual_nodes.validator
+    def _validate_virtual_nodes(self, attribute, value):
+        if value < 1:
+            raise ValueError("virtual_nodes must be a positive integer")
+
+    @shards.default
+    def _make_shards(self):
+        return [
+            redis.RedisStore(
+                url=url,
+                client_config=dict(self.client_config),
+                codec=self.codec,
+                clock_resync_interval=self.clock_resync_interval,
+            )
+            for url in self.urls
+        ]
+
+    def __attrs_post_init__(self):
+        """Place each server on the hash ring."""
+        points = sorted(
+            (_hash(f"{url}#{point}"), index)
+            for index, url in enumerate(self.urls)
+            for point in range(self.virtual_nodes)
+        )
+        self._ring = [point for point, _ in points]
+        self._ring_shards = [self.shards[index] for _, index in points]
+
+    def shard_for(self, key: str) -> redis.RedisStore:
+        """Return the store for the server that owns a key."""
+        index = bisect.bisect_left(self._ring, _hash(hashed_part(key)))
+        return self._ring_shards[index % len(self._ring)]
+
+    def group_by_shard(
+        self, keys: typing.Iterable[str]
+    ) -> typing.List[typing.Tuple[redis.RedisStore, typing.List[int]]]:
+        """Group the positions of keys by the store that owns them.
+
+        :returns:
+            A list of tuples of a server's store and the positions in
+            ``keys`` of the keys it owns.
+        """
+        groups: typing.Dict[
+            int, typing.Tuple[redis.RedisStore, typing.List[int]]
+        ] = {}
+        for position, key in enumerate(keys):
+            shard = self.shard_for(key)
+            groups.setdefault(id(shard), (shard, []))[1].append(position)
+        return list(groups.values())
+
+    def compare_and_swap(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Perform an atomic compare and swap on the key's server.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data does not match ``old``.
+        """
+        return self.shard_for(key).compare_and_swap(
+            key, old=old, new=new, expiry=expiry
+        )
+
+    def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key on its server."""
+        return self.shard_for(key).set(key=key, data=data, expiry=expiry)
+
+    def increment(
+        self,
+        key: str,
+        amount: int,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> int:
+        """Atomically add to the integer counter for a key on its server."""
+        return self.shard_for(key).increment(key, amount, expiry)
+
+    def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
+        """Retrieve the data for a given key from its server."""
+        return self.shard_for(key).get(key)
+
+    def get_many(
+        self, keys: typing.Sequence[str]
+    ) -> typing.List[typing.Optional[limit_data.LimitData]]:
+        """Retrieve the data for several keys with one pipeline per server."""
+        found: typing.List[typing.Optional[limit_data.LimitData]] = [
+            None
+        ] * len(keys)
+        for shard, positions in self.group_by_shard(keys):
+            retrieved = shard.get_many([keys[n] for n in positions])
+            for position, data in zip(positions, retrieved):
+                found[position] = data
+        return found
+
+    def set_many(
+        self, writes: typing.Sequence[base.Write]
+    ) -> typing.List[limit_data.LimitData]:
+        """Store the values for several keys with one pipeline per server."""
+        for shard, positions in self.group_by_shard(w.key for w in writes):
+            shard.set_many([writes[n] for n in positions])
+        return [write.data for write in writes]
+
+    def compare_and_swap_many(
+        self, swaps: typing.Sequence[base.Swap]
+    ) -> typing.List[limit_data.LimitData]:
+        """Compare and swap the data for several keys.
+
+        When one server owns every key, this is a single atomic script on
+        that server, see
+        :meth:`~rush.stores.redis.RedisStore.compare_and_swap_many`. Use a
+        ``{tag}`` in the keys to place them on the same server. Otherwise,
+        each key is swapped atomically on its own server, as described by
+        :meth:`~rush.stores.base.BaseStore.compare_and_swap_many`.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data for a key does not match its ``old`` data.
+        """
+        groups = self.group_by_shard(swap.key for swap in swaps)
+        if len(groups) == 1:
+            shard, _ = groups[0]
+            return shard.compare_and_swap_many(swaps)
+        return super().compare_and_swap_many(swaps)
+
+    def current_time(
+        self, tzinfo: typing.Optional[datetime.tzinfo] = datetime.timezone.utc
+    ) -> datetime.datetime:
+        """Return the curent date and time as a datetime.
+
+        This uses the ``TIME`` command of the first server so that every
+        client shares one clock no matter which server owns a key.
+
+        :returns:
+            Now in UTC
+        :retype:
+            :class:`~datetime.datetime`
+        """
+        return self.shards[0].current_time(tzinfo)
@@ -0,0 +1,302 @@
+"""Shared memory storage logic for multiple processes on one host."""
+import contextlib
+import datetime
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import typing
+
+import attr
+
+from . import base
+from .. import exceptions
+from .. import limit_data
+
+# Header: magic bytes and capacity, padded to a cache line.
+_HEADER = struct.Struct("<8sQ48x")
+_MAGIC = b"RUSHSHM\x01"
+# Bucket: state, key digest, used, remaining, created_at and time in
+# microseconds since the epoch, padded to a cache line.
+_BUCKET = struct.Struct("<B7x16sqqqq8x")
+_EMPTY = 0
+_OCCUPIED = 1
+_NO_TIME = -(2 ** 63)
+_THREAD_LOCK_COUNT = 64
+# fcntl locks are held per process, so every instance in this process that
+# maps the same file must also share the locks used between threads.
+_PROCESS_LOCKS: typing.Dict[
+    str, typing.Tuple[threading.Lock, typing.List[threading.Lock]]
+] = {}
+_PROCESS_LOCKS_GUARD = threading.Lock()
+
+
+def _process_locks_for(
+    path: str,
+) -> typing.Tuple[threading.Lock, typing.List[threading.Lock]]:
+    path = os.path.realpath(path)
+    with _PROCESS_LOCKS_GUARD:
+        if path not in _PROCESS_LOCKS:
+            _PROCESS_LOCKS[path] = (
+                threading.Lock(),
+                [threading.Lock() for _ in range(_THREAD_LOCK_COUNT)],
+            )
+        return _PROCESS_LOCKS[path]
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+@attr.s
+class SharedMemoryStore(base.BaseStore):
+    """Storage shared by every process on a host via a memory-mapped file.
+
+    Limit data lives in a fixed-size, open-addressing hash table in a file
+    that each process maps into memory. Buckets are guarded by ``fcntl``
+    byte-range locks (and a lock per thread stripe inside each process) so
+    :meth:`compare_and_swap` is atomic across every process and thread
+    using the same ``path``.
+
+    Buckets are never freed, so ``capacity`` should comfortably exceed the
+    number of distinct keys expected during the file's lifetime.
+
+    .. attribute:: path
+
+        The path of the file backing the table. Defaults to a file in
+        ``/dev/shm`` so that it never touches a disk.
+
+    .. attribute:: capacity
+
+        The number of buckets in the table. Processes opening an existing
+        file must use the same capacity. Defaults to 65,536.
+
+    .. note::
+
+        Closing any file descriptor for the backing file releases all of the
+        ``fcntl`` locks this process holds on it, so instances sharing a path
+        should only be closed once they are no longer in use.
+    """
+
+    path: str = attr.ib(default="/dev/shm/rush")
+    capacity: int = attr.ib(default=65_536)
+    _fd: int = attr.ib(init=False, repr=False, default=-1)
+    _mmap: mmap.mmap = attr.ib(init=False, repr=False, default=None)
+    _insert_lock: threading.Lock = attr.ib(init=False, repr=False)
+    _thread_locks: typing.List[threading.Lock] = attr.ib(
+        init=False, repr=False
+    )
+
+    @capacity.validator
+    def _capacity_is_positive(self, attribute, value: int) -> None:
+        if value < 1:
+            raise ValueError("The capacity must be a positive value.")
+
+    def __attrs_post_init__(self):
+        """Create or open the backing file and map it into memory."""
+        size = _HEADER.size + (self.capacity * _BUCKET.size)
+        self._insert_lock, self._thread_locks = _process_locks_for(self.path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # The insert lock also serializes initialization of the file
+            with self._locked_for_insert():
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, size)
+                    os.pwrite(
+                        self._fd, _HEADER.pack(_MAGIC, self.capacity), 0
+                    )
+                magic, capacity = _HEADER.unpack(
+                    os.pread(self._fd, _HEADER.size, 0)
+                )
+            if magic != _MAGIC or capacity != self.capacity:
+                raise exceptions.SharedMemoryStoreError(
+                    f"{self.path} is not a shared memory table with a "
+                    f"capacity of {self.capacity}.",
+                    path=self.path,
+                )
+            self._mmap = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def close(self) -> None:
+        """Unmap the table and close the backing file."""
+        self._mmap.close()
+        os.close(self._fd)
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + (index * _BUCKET.size)
+
+    @contextlib.contextmanager
+    def _locked(self, index: int, exclusive: bool = True):
+        offset = self._offset(index)
+        with self._thread_locks[index % _THREAD_LOCK_COUNT]:
+            fcntl.lockf(
+                self._fd,
+                fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH,
+                _BUCKET.size,
+                offset,
+            )
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _BUCKET.size, offset)
+
+    @contextlib.contextmanager
+    def _locked_for_insert(self):
+        with self._insert_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER.size, 0)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER.size, 0)
+
+    def _find(self, digest: bytes) -> typing.Tuple[bool, int]:
+        """Find the bucket for a digest or the first empty bucket.
+
+        Buckets only ever transition from empty to occupied (while holding
+        the insert lock) and the digest is written before the state, so
+        probing does not need to take bucket locks.
+        """
+        start = int.from_bytes(digest[:8], "little") % self.capacity
+        for probe in range(self.capacity):
+            index = (start + probe) % self.capacity
+            offset = self._offset(index)
+            state = self._mmap[offset]
+            if state == _EMPTY:
+                return False, index
+            if self._mmap[offset + 8 : offset + 24] == digest:
+                return True, index
+        return False, -1
+
+    def _read(self, index: int) -> limit_data.LimitData:
+        _, _, used, remaining, created_at, time = _BUCKET.unpack_from(
+            self._mmap, self._offset(index)
+        )
+        return limit_data.LimitData.from_microseconds(
+            used, remaining, created_at, None if time == _NO_TIME else time
+        )
+
+    def _write(
+        self, index: int, digest: bytes, data: limit_data.LimitData
+    ) -> None:
+        offset = self._offset(index)
+        time = _NO_TIME if data.time_us is None else data.time_us
+        packed = _BUCKET.pack(
+            _OCCUPIED,
+            digest,
+            data.used,
+            data.remaining,
+            data.created_at_us,
+            time,
+        )
+        # Write everything but the state first so concurrent probes never
+        # see an occupied bucket with a partial digest.
+        self._mmap[offset + 1 : offset + _BUCKET.size] = packed[1:]
+        self._mmap[offset] = _OCCUPIED
+
+    def _insert(
+        self,
+        key: str,
+        digest: bytes,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        compare: bool,
+    ) -> None:
+        with self._locked_for_insert():
+            # Another process may have inserted this key since we looked
+            found, index = self._find(digest)
+            if index < 0:
+                raise exceptions.SharedMemoryStoreFull(
+                    f"No free buckets left in {self.path} to store {key}.",
+                    path=self.path,
+                    capacity=self.capacity,
+                )
+            with self._locked(index):
+                if found:
+                    self._swap(index, digest, old, new, compare)
+                else:
+                    if compare and old is not None:
+                        raise exceptions.MismatchedDataError(
+                            "old limit data did not match expected limit "
+                            "data",
+                            expected_limit_data=old,
+                            actual_limit_data=None,
+                        )
+                    self._write(index, digest, new)
+
+    def _swap(
+        self,
+        index: int,
+        digest: bytes,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        compare: bool,
+    ) -> None:
+        # NOTE: Callers must hold the lock for this bucket
+        if compare:
+            current = self._read(index)
+            if old != current:
+                raise exceptions.MismatchedDataError(
+                    "old limit data did not match expected limit data",
+                    expected_limit_data=old,
+                    actual_limit_data=current,
+                )
+        self._write(index, digest, new)
+
+    def _store(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        compare: bool,
+    ) -> None:
+        digest = _digest(key)
+        found, index = self._find(digest)
+        if not found:
+            self._insert(key, digest, old, new, compare)
+            return
+        with self._locked(index):
+            self._swap(index, digest, old, new, compare)
+
+    def compare_and_swap(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Atomically compare the stored data for a key and swap it.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data does not match ``old``.
+        :raises rush.exceptions.SharedMemoryStoreFull:
+            If the key is new and there are no free buckets left.
+        """
+        self._store(key, old, new, compare=True)
+        return new
+
+    def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
+        """Retrieve the data for a given key."""
+        found, index = self._find(_digest(key))
+        if not found:
+            return None
+        with self._locked(index, exclusive=False):
+            return self._read(index)
+
+    def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key.
+
+        :raises rush.exceptions.SharedMemoryStoreFull:
+            If the key is new and there are no free buckets left.
+        """
+        self._store(key, None, data, compare=False)
+        return data
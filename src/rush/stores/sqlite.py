@@ -0,0 +1,253 @@
+"""SQLite storage logic."""
+import datetime
+import re
+import sqlite3
+import threading
+import typing
+import weakref
+
+import attr
+
+from . import base
+from .. import exceptions
+from .. import limit_data
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY NOT NULL,
+    used INTEGER NOT NULL,
+    remaining INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    time INTEGER
+) WITHOUT ROWID
+"""
+_SELECT = "SELECT used, remaining, created_at, time FROM {table} WHERE key = ?"
+_UPSERT = "INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?)"
+_INSERT_IF_MISSING = "INSERT OR IGNORE INTO {table} VALUES (?, ?, ?, ?, ?)"
+_UPDATE_IF_UNCHANGED = """
+UPDATE {table} SET used = ?, remaining = ?, created_at = ?, time = ?
+WHERE key = ? AND used = ? AND remaining = ? AND created_at = ? AND time IS ?
+"""
+
+
+def _to_row(
+    data: limit_data.LimitData,
+) -> typing.Tuple[int, int, int, typing.Optional[int]]:
+    return (data.used, data.remaining, data.created_at_us, data.time_us)
+
+
+def _from_row(row: typing.Tuple[int, ...]) -> limit_data.LimitData:
+    used, remaining, created_at, time = row
+    return limit_data.LimitData.from_microseconds(
+        used, remaining, created_at, time
+    )
+
+
+def _commit_periodically(
+    store_ref: "weakref.ref[SQLiteStore]",
+    closed: threading.Event,
+    interval: float,
+) -> None:
+    """Flush a store every interval until it is closed or collected.
+
+    Only a weak reference to the store is held between flushes so the
+    thread does not keep it alive.
+    """
+    while not closed.wait(interval):
+        store = store_ref()
+        if store is None:
+            return
+        store.flush()
+        del store
+
+
+def _close(
+    connection: sqlite3.Connection,
+    lock: threading.RLock,
+    closed: threading.Event,
+) -> None:
+    """Commit outstanding writes, stop committing and close the database."""
+    with lock:
+        if connection.in_transaction:
+            connection.execute("COMMIT")
+        closed.set()
+        connection.close()
+
+
+@attr.s
+class SQLiteStore(base.BaseStore):
+    """Logic for storing things in a SQLite database.
+
+    The database is opened in WAL mode and times are stored as integer
+    microseconds since the epoch. Writes are grouped into a single
+    transaction which is committed after ``commit_every`` writes or once
+    ``commit_interval`` has elapsed, whichever comes first. The interval is
+    kept by a daemon thread started with the first grouped write, which
+    stops when the store is closed or garbage collected. Outstanding writes
+    are committed then too.
+
+    The open transaction holds SQLite's write lock, so other processes
+    writing to the same database wait up to ``commit_interval`` for it, or
+    fail with :class:`sqlite3.OperationalError` if that is longer than
+    SQLite's busy timeout, and read only the data committed so far.
+
+    .. attribute:: path
+
+        The path to the SQLite database file.
+
+    .. attribute:: table
+
+        The name of the table to store limit data in. Defaults to
+        ``rush_limit_data``.
+
+    .. attribute:: commit_every
+
+        The maximum number of writes grouped into one transaction. Setting
+        this to 1 commits every write. Defaults to 100.
+
+    .. attribute:: commit_interval
+
+        The maximum :class:`~datetime.timedelta` a write may wait before it
+        is committed. Defaults to 50 milliseconds.
+    """
+
+    path: str = attr.ib()
+    table: str = attr.ib(default="rush_limit_data")
+    commit_every: int = attr.ib(default=100)
+    commit_interval: datetime.timedelta = attr.ib(
+        default=datetime.timedelta(milliseconds=50)
+    )
+    connection: sqlite3.Connection = attr.ib(init=False, repr=False)
+    _lock: threading.RLock = attr.ib(
+        factory=threading.RLock, init=False, repr=False
+    )
+    _pending: int = attr.ib(default=0, init=False, repr=False)
+    _closed: threading.Event = attr.ib(
+        factory=threading.Event, init=False, repr=False
+    )
+    _committer: typing.Optional[threading.Thread] = attr.ib(
+        default=None, init=False, repr=False
+    )
+
+    @table.validator
+    def _validate_table(self, attribute, value: str) -> None:
+        if not _IDENTIFIER.match(value):
+            raise ValueError(f"{value!r} is not a valid table name.")
+
+    @commit_every.validator
+    def _commit_every_is_positive(self, attribute, value: int) -> None:
+        if value < 1:
+            raise ValueError("The commit_every must be a positive value.")
+
+    def __attrs_post_init__(self):
+        """Open the database, create our table and start committing."""
+        # We manage transactions ourselves to group commits together
+        self.connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(_CREATE_TABLE.format(table=self.table))
+        self._select = _SELECT.format(table=self.table)
+        self._upsert = _UPSERT.format(table=self.table)
+        self._insert_if_missing = _INSERT_IF_MISSING.format(table=self.table)
+        self._update_if_unchanged = _UPDATE_IF_UNCHANGED.format(
+            table=self.table
+        )
+        self._finalizer = weakref.finalize(
+            self, _close, self.connection, self._lock, self._closed
+        )
+
+    def _start_committing(self) -> None:
+        # NOTE: Callers must hold self._lock
+        self._committer = threading.Thread(
+            target=_commit_periodically,
+            args=(
+                weakref.ref(self),
+                self._closed,
+                self.commit_interval.total_seconds(),
+            ),
+            name=f"rush-sqlite-commit-{self.table}",
+            daemon=True,
+        )
+        self._committer.start()
+
+    def _write(self, statement: str, parameters: typing.Tuple) -> int:
+        # NOTE: Callers must hold self._lock
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN IMMEDIATE")
+            if self._committer is None and self.commit_every > 1:
+                self._start_committing()
+        rowcount = self.connection.execute(statement, parameters).rowcount
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._commit()
+        return rowcount
+
+    def _commit(self) -> None:
+        # NOTE: Callers must hold self._lock
+        if self.connection.in_transaction:
+            self.connection.execute("COMMIT")
+        self._pending = 0
+
+    def flush(self) -> None:
+        """Commit any writes that are waiting to be grouped."""
+        with self._lock:
+            if not self._closed.is_set():
+                self._commit()
+
+    def close(self) -> None:
+        """Commit outstanding writes and close the database."""
+        self._finalizer()
+
+    def compare_and_swap(
+        self,
+        key: str,
+        old: typing.Optional[limit_data.LimitData],
+        new: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Perform an atomic compare and swap operation.
+
+        This is a single conditional ``INSERT`` or ``UPDATE`` statement.
+
+        :raises rush.exceptions.MismatchedDataError:
+            If the stored data does not match ``old``.
+        """
+        with self._lock:
+            if old is None:
+                changed = self._write(
+                    self._insert_if_missing, (key,) + _to_row(new)
+                )
+            else:
+                changed = self._write(
+                    self._update_if_unchanged,
+                    _to_row(new) + (key,) + _to_row(old),
+                )
+            if not changed:
+                raise exceptions.MismatchedDataError(
+                    "old limit data did not match expected limit data",
+                    expected_limit_data=old,
+                    actual_limit_data=self.get(key),
+                )
+        return new
+
+    def get(self, key: str) -> typing.Optional[limit_data.LimitData]:
+        """Retrieve the data for a given key."""
+        with self._lock:
+            row = self.connection.execute(self._select, (key,)).fetchone()
+        return _from_row(row) if row is not None else None
+
+    def set(
+        self,
+        *,
+        key: str,
+        data: limit_data.LimitData,
+        expiry: typing.Optional[datetime.timedelta] = None,
+    ) -> limit_data.LimitData:
+        """Store the values for a given key."""
+        with self._lock:
+            self._write(self._upsert, (key,) + _to_row(data))
+        return data
@@ -1,4 +1,6 @@
 """The main throttle interface."""
+import typing
+
 import attr
 
 from rush import limiters
@@ -41,6 +43,25 @@ class Throttle:
         """
         return self.limiter.rate_limit(key, quantity, self.rate)
 
+    def check_many(
+        self, requests: typing.Sequence[typing.Tuple[str, int]]
+    ) -> typing.List[result.RateLimitResult]:
+        """Check several keys at once.
+
+        This is equivalent to calling :meth:`check` for each request in
+        order, but limiters that support it apply every request in a few
+        round trips to the store.
+
+        :param requests:
+            Tuples of the key to use for rate limiting and the quantity
+            requested against it. A key may appear more than once.
+        :returns:
+            The result for each request, in the order of ``requests``.
+        :rtype:
+            list of :class:`~rush.result.RateLimitResult`
+        """
+        return self.limiter.rate_limit_many(requests, self.rate)
+
     def clear(self, key: str) -> result.RateLimitResult:
         """Clear any existing limits for the given key.
 
@@ -68,3 +89,68 @@ class Throttle:
             :class:`~rush.result.RateLimitResult`
         """
         return self.limiter.rate_limit(key, 0, self.rate)
+
+
+@attr.s
+class AsyncThrottle:
+    """The primary interface for throttles in asyncio applications.
+
+    This works like :class:`Throttle` with an asyncio limiter, e.g.,
+    :class:`~rush.limiters.gcra.AsyncGenericCellRatelimiter`, and its
+    methods must be awaited.
+
+    .. attribute:: limiter
+
+        The instance of the asyncio rate limiting algorithm that should be
+        used by the throttle.
+
+    .. attribute:: rate
+
+        The instantiated :class:`~rush.quota.Quota` that tells the throttle
+        and limiter what the limits and periods are for rate limiting.
+    """
+
+    rate: quota.Quota = attr.ib()
+    limiter: limiters.AsyncBaseLimiter = attr.ib()
+
+    async def check(self, key: str, quantity: int) -> result.RateLimitResult:
+        """Check if the user should be rate limited.
+
+        :param str key:
+            The key to use for rate limiting.
+        :param int quantity:
+            How many resources is being requested against the rate limit.
+        :returns:
+            The result of calculating whether the user should be rate-limited.
+        :rtype:
+            :class:`~rush.result.RateLimitResult`
+        """
+        return await self.limiter.rate_limit(key, quantity, self.rate)
+
+    async def clear(self, key: str) -> result.RateLimitResult:
+        """Clear any existing limits for the given key.
+
+        :param str key:
+            The key to use for rate limiting that should be cleared.
+        :returns:
+            The result of resetting the rate-limit.
+        :rtype:
+            :class:`~rush.result.RateLimitResult`
+        """
+        return await self.limiter.reset(key, self.rate)
+
+    async def peek(self, key: str) -> result.RateLimitResult:
+        """Peek at the user's current rate-limit usage.
+
+        .. note::
+
+            This is equivalent to calling :meth:`check` with a quantity of 0.
+
+        :param str key:
+            The key to use for rate limiting.
+        :returns:
+            The current rate-limit usage.
+        :rtype:
+            :class:`~rush.result.RateLimitResult`
+        """
+        return await self.limiter.rate_limit(key, 0, self.rate)
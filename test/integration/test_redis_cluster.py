@@ -0,0 +1,54 @@
+r"""Test our limiters against a running Redis Cluster.
+
+These tests only run when ``RUSH_REDIS_CLUSTER_URL`` points at a node of a
+cluster, e.g., one started locally with::
+
+    for port in 7000 7001 7002; do
+        redis-server --port $port --cluster-enabled yes \\
+            --cluster-config-file nodes-$port.conf --daemonize yes
+    done
+    redis-cli --cluster create 127.0.0.1:7000 127.0.0.1:7001 \\
+        127.0.0.1:7002 --cluster-yes
+    RUSH_REDIS_CLUSTER_URL=redis://127.0.0.1:7000 pytest test/integration
+"""
+import os
+
+import pytest
+
+from rush import quota
+from rush import throttle
+from rush.limiters import gcra
+from rush.limiters import redis_gcra
+from rush.stores import redis_cluster
+
+CLUSTER_URL = os.environ.get("RUSH_REDIS_CLUSTER_URL")
+
+pytestmark = pytest.mark.skipif(
+    CLUSTER_URL is None, reason="RUSH_REDIS_CLUSTER_URL is not set"
+)
+
+
+@pytest.fixture
+def store():
+    """Provide a store connected to the cluster."""
+    return redis_cluster.RedisClusterStore(url=CLUSTER_URL)
+
+
+@pytest.mark.parametrize(
+    "limiter_class",
+    [gcra.GenericCellRatelimiter, redis_gcra.GenericCellRatelimiter],
+)
+def test_keys_on_every_node_are_limited(store, limiter_class):
+    """Verify keys spread across slots are each limited."""
+    limiter = limiter_class(store=store)
+    cluster_throttle = throttle.Throttle(
+        rate=quota.Quota.per_minute(5), limiter=limiter
+    )
+    keys = [redis_cluster.hash_tag(f"user-{n}", ":test") for n in range(20)]
+    assert len({store.keyslot(key) for key in keys}) > 1
+
+    for key in keys:
+        cluster_throttle.clear(key)
+        assert cluster_throttle.check(key, 5).limited is False
+        assert cluster_throttle.check(key, 1).limited is True
+        cluster_throttle.clear(key)
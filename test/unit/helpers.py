@@ -1,10 +1,14 @@
 """Helpers for writing tests."""
+import asyncio
 import datetime
+import random
 
 import mock
+import pytest
 
 from rush import quota
 from rush import stores
+from rush.stores import redis
 
 
 class MockStore(stores.BaseStore):
@@ -33,9 +37,9 @@ class MockStore(stores.BaseStore):
             return dt, data
         return super().get_with_time(key, tzinfo=tzinfo)
 
-    def set(self, *, key, data):
+    def set(self, *, key, data, expiry=None):
         """Mock set call."""
-        return self.recording_store.set(key=key, data=data)
+        return self.recording_store.set(key=key, data=data, expiry=expiry)
 
     def set_with_time(self, *, key, data, time=None):
         """Mock set_with_time call."""
@@ -46,10 +50,10 @@ class MockStore(stores.BaseStore):
             return data
         return super().set_with_time(key=key, data=data, time=time)
 
-    def compare_and_swap(self, key, old, new):
+    def compare_and_swap(self, key, old, new, expiry=None):
         """Perform an atomic compare-and-swap operation if supported."""
         return self.recording_store.compare_and_swap(
-            key=key, old=old, new=new
+            key=key, old=old, new=new, expiry=expiry
         )
 
 
@@ -64,3 +68,110 @@ def new_quota(
         maximum_burst=maximum_burst,
         limit=(count + maximum_burst),
     )
+
+
+def race_once(store, race):
+    """Run ``race`` before the store's first compare-and-swap.
+
+    This simulates another client changing the data between a limiter
+    reading and writing it.
+    """
+    swap = store.compare_and_swap
+    races = [race]
+
+    def compare_and_swap(*args, **kwargs):
+        while races:
+            races.pop()()
+        return swap(*args, **kwargs)
+
+    return mock.patch.object(
+        store, "compare_and_swap", side_effect=compare_and_swap
+    )
+
+
+def run(coroutine):
+    """Run a coroutine to completion on a new event loop.
+
+    This stands in for :func:`asyncio.run` which is new in Python 3.7.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class Clock:
+    """A stand-in for :func:`time.time` which only moves when told to."""
+
+    def __init__(self, microseconds=1_600_000_000_000_000):
+        """Start the clock at a number of microseconds since the epoch."""
+        self.microseconds = microseconds
+
+    def __call__(self):
+        """Return the time in seconds since the epoch."""
+        return self.microseconds / 1_000_000
+
+    def advance(self, microseconds):
+        """Move the clock forward."""
+        self.microseconds += microseconds
+
+
+def fake_redis_store():
+    """Provide a RedisStore backed by its own fakeredis server.
+
+    The calling test is skipped unless fakeredis can run Lua scripts. The
+    server reads the time, and expires keys, with :func:`time.time` so it
+    can be controlled with a :class:`Clock`.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return redis.RedisStore(
+        url="redis://",
+        client=fakeredis.FakeStrictRedis(
+            server=fakeredis.FakeServer(), decode_responses=True
+        ),
+    )
+
+
+def random_requests(
+    seed,
+    *,
+    count=500,
+    keys="ab",
+    quantities=(0, 1, 1, 2, 3, 6),
+    advances=(0, 1_000, 50_000, 200_000, 700_000, 1_000_000),
+):
+    """Generate requests as microseconds to wait, a key and a quantity.
+
+    Waits are whole milliseconds because Redis expires keys in them.
+    """
+    rng = random.Random(seed)
+    return [
+        (rng.choice(advances), rng.choice(keys), rng.choice(quantities))
+        for _ in range(count)
+    ]
+
+
+def outcome(ratelimitresult):
+    """Summarise a result without when it was decided."""
+    return (
+        ratelimitresult.limited,
+        ratelimitresult.remaining,
+        ratelimitresult.reset_after,
+        ratelimitresult.retry_after,
+    )
+
+
+def assert_same_results(limiter, reference, rate, requests):
+    """Verify a limiter decides requests exactly like a reference limiter.
+
+    Both limiters should be given stores made by :func:`fake_redis_store`.
+    """
+    clock = Clock()
+    with mock.patch("time.time", clock):
+        for step, (advance, key, quantity) in enumerate(requests):
+            clock.advance(advance)
+            expected = reference.rate_limit(key, quantity, rate)
+            actual = limiter.rate_limit(key, quantity, rate)
+            assert (step, outcome(actual)) == (step, outcome(expected))
@@ -0,0 +1,180 @@
+"""Tests for our bounded in-memory store."""
+import datetime
+
+import pytest
+
+from rush import exceptions
+from rush import limit_data
+from rush.stores import base
+from rush.stores import bounded
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class TestBoundedDictionaryStore:
+    """Test methods on our bounded dictionary store."""
+
+    def test_begins_life_empty(self):
+        """Verify that by default no data exists."""
+        store = bounded.BoundedDictionaryStore()
+        assert len(store.store) == 0
+        assert store.max_keys == 10_000
+        assert store.evictions == 0
+        assert store.expirations == 0
+
+    def test_requires_positive_max_keys(self):
+        """Verify we refuse to hold zero keys."""
+        with pytest.raises(ValueError):
+            bounded.BoundedDictionaryStore(max_keys=0)
+
+    def test_set_and_get(self):
+        """Verify we can add and retrieve data."""
+        store = bounded.BoundedDictionaryStore()
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        assert store.set(key="mykey", data=data) == data
+        assert store.get("mykey") == data
+        assert store.get("otherkey") is None
+
+    def test_evicts_least_recently_used_key(self):
+        """Verify we stay within max_keys by evicting the oldest key."""
+        store = bounded.BoundedDictionaryStore(max_keys=2)
+        data = limit_data.LimitData(used=1, remaining=4)
+        store.set(key="a", data=data)
+        store.set(key="b", data=data)
+        # Touch "a" so that "b" is the least recently used
+        store.get("a")
+
+        store.set(key="c", data=data)
+
+        assert list(store.store) == ["a", "c"]
+        assert store.evictions == 1
+        assert store.expirations == 0
+
+    def test_expires_data_whose_time_has_passed(self):
+        """Verify GCRA data expires after its theoretical arrival time."""
+        store = bounded.BoundedDictionaryStore()
+        past = _now() - datetime.timedelta(seconds=1)
+        store.set(key="a", data=limit_data.LimitData(1, 4, time=past))
+
+        assert store.get("a") is None
+        assert store.expirations == 1
+        assert "a" not in store.store
+
+    def test_expires_data_older_than_ttl(self):
+        """Verify data without a time expires after the ttl."""
+        store = bounded.BoundedDictionaryStore(
+            ttl=datetime.timedelta(seconds=1)
+        )
+        created_at = _now() - datetime.timedelta(seconds=2)
+        fresh = limit_data.LimitData(used=1, remaining=4)
+        store.set(key="a", data=limit_data.LimitData(1, 4, created_at))
+
+        store.set(key="b", data=fresh)
+
+        assert list(store.store) == ["b"]
+        assert store.expirations == 1
+
+    def test_data_without_time_or_ttl_never_expires(self):
+        """Verify we only evict data we cannot tell has expired."""
+        store = bounded.BoundedDictionaryStore(max_keys=1)
+        created_at = _now() - datetime.timedelta(days=365)
+        old = limit_data.LimitData(1, 4, created_at)
+        store.set(key="a", data=old)
+
+        assert store.get("a") == old
+
+        store.set(key="b", data=old)
+        assert store.evictions == 1
+
+    def test_evicting_expired_data_counts_as_expiration(self):
+        """Verify expired data popped for space is counted as expired."""
+        store = bounded.BoundedDictionaryStore(max_keys=1)
+        store.sweep_size = 0
+        past = _now() - datetime.timedelta(seconds=1)
+        store.set(key="a", data=limit_data.LimitData(1, 4, time=past))
+
+        store.set(key="b", data=limit_data.LimitData(1, 4))
+
+        assert store.evictions == 0
+        assert store.expirations == 1
+
+    def test_compare_and_swap(self):
+        """Verify we swap data when the old data matches."""
+        store = bounded.BoundedDictionaryStore()
+        old = limit_data.LimitData(used=1, remaining=4)
+        new = old.copy_with(used=2, remaining=3)
+
+        store.compare_and_swap("mykey", old=None, new=old)
+        assert store.compare_and_swap("mykey", old=old, new=new) == new
+        assert store.get("mykey") == new
+
+    def test_compare_and_swap_raises_mismatched_data_error(self):
+        """Verify the fact that we check current data against old data."""
+        store = bounded.BoundedDictionaryStore()
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        with pytest.raises(exceptions.MismatchedDataError):
+            store.compare_and_swap("mykey", old=data, new=data)
+
+    def test_expiry_hint_overrides_data(self):
+        """Verify the limiter's expiry hint decides when data expires."""
+        store = bounded.BoundedDictionaryStore()
+        future = _now() + datetime.timedelta(hours=1)
+        data = limit_data.LimitData(1, 4, time=future)
+
+        store.set(key="a", data=data, expiry=datetime.timedelta(0))
+        assert store.get("a") is None
+        assert store._deadlines == {}
+
+        store.compare_and_swap(
+            "a", old=None, new=data, expiry=datetime.timedelta(hours=2)
+        )
+        store.set(key="b", data=data, expiry=datetime.timedelta(hours=2))
+        assert store.get("a") == data
+        assert set(store._deadlines) == {"a", "b"}
+
+        store.set(key="a", data=data)
+        assert set(store._deadlines) == {"b"}
+
+    def test_increment_restarts_expired_counters(self):
+        """Verify counters restart from zero once they expire."""
+        store = bounded.BoundedDictionaryStore()
+
+        assert store.increment("a", 2, datetime.timedelta(hours=1)) == 2
+        assert store.increment("a", 1, datetime.timedelta(hours=1)) == 3
+        assert store.increment("b", 2, datetime.timedelta(0)) == 2
+        assert store.increment("b", 1, datetime.timedelta(hours=1)) == 1
+        assert store.expirations == 1
+
+    def test_many(self):
+        """Verify we read, write and swap several keys at once."""
+        store = bounded.BoundedDictionaryStore()
+        old = limit_data.LimitData(used=1, remaining=4)
+        new = old.copy_with(used=2, remaining=3)
+        expiry = datetime.timedelta(hours=1)
+
+        store.set_many([base.Write("a", old, expiry), base.Write("b", old)])
+        assert store.get_many(["a", "b", "c"]) == [old, old, None]
+        assert set(store._deadlines) == {"a"}
+        assert store.compare_and_swap_many(
+            [base.Swap("a", old, new), base.Swap("c", None, new, expiry)]
+        ) == [new, new]
+        assert store.get_many(["a", "c"]) == [new, new]
+        assert set(store._deadlines) == {"c"}
+
+    def test_compare_and_swap_many_is_all_or_nothing(self):
+        """Verify we swap nothing unless every key matches."""
+        store = bounded.BoundedDictionaryStore()
+        data = limit_data.LimitData(used=1, remaining=4)
+        store.set(key="b", data=data)
+
+        with pytest.raises(exceptions.MismatchedDataError) as excinfo:
+            store.compare_and_swap_many(
+                [base.Swap("a", None, data), base.Swap("b", None, data)]
+            )
+
+        assert excinfo.value.key == "b"
+        assert store.get_many(["a", "b"]) == [None, data]
@@ -0,0 +1,179 @@
+"""Tests for estimating a store's clock locally."""
+import datetime
+
+import mock
+import pytest
+
+from rush import clock
+
+# A store clock reading of 2020-09-13T12:26:40Z in microseconds
+STORE_TIME = 1_600_000_000_000_000
+
+
+class FakeMonotonic:
+    """A controllable stand-in for time.monotonic_ns."""
+
+    def __init__(self):
+        """Start at an arbitrary point like the real clock."""
+        self.now_ns = 5_000_000_000
+
+    def __call__(self):
+        """Return the current fake time."""
+        return self.now_ns
+
+    def advance(self, **kwargs):
+        """Move the fake time forward."""
+        elapsed = datetime.timedelta(**kwargs)
+        self.now_ns += elapsed // datetime.timedelta(microseconds=1) * 1_000
+
+
+@pytest.fixture
+def monotonic():
+    """Provide a fake monotonic clock."""
+    return FakeMonotonic()
+
+
+@pytest.fixture
+def synced(monotonic):
+    """Provide a clock without an estimate yet."""
+    return clock.SynchronizedClock(monotonic_ns=monotonic)
+
+
+def _sample(synced, monotonic, store_time, round_trip_us):
+    """Record a sample whose response arrives round_trip_us later."""
+    sent_ns = monotonic()
+    monotonic.advance(microseconds=round_trip_us)
+    synced.add_sample(sent_ns, store_time, monotonic())
+
+
+class TestSynchronizedClock:
+    """Tests for our SynchronizedClock class."""
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"resync_interval": datetime.timedelta(0)},
+            {"max_drift": -0.1},
+            {"max_drift": 1},
+        ],
+    )
+    def test_validates_arguments(self, kwargs):
+        """Verify we refuse nonsensical configuration."""
+        with pytest.raises(ValueError):
+            clock.SynchronizedClock(**kwargs)
+
+    def test_requires_a_sample(self, synced):
+        """Verify we cannot estimate a clock we have never read."""
+        assert synced.needs_sample() is True
+        assert synced.uncertainty is None
+        with pytest.raises(ValueError):
+            synced.now_microseconds()
+
+    def test_assumes_the_midpoint_of_the_round_trip(self, synced, monotonic):
+        """Verify the store read its clock halfway through the request."""
+        _sample(synced, monotonic, STORE_TIME, round_trip_us=400)
+
+        assert synced.now_microseconds() == STORE_TIME + 200
+        assert synced.uncertainty == datetime.timedelta(microseconds=200)
+        monotonic.advance(seconds=1)
+        assert synced.now_microseconds() == STORE_TIME + 1_000_200
+
+    def test_uncertainty_grows_with_max_drift(self, synced, monotonic):
+        """Verify the error bound grows until the drift is estimated."""
+        _sample(synced, monotonic, STORE_TIME, round_trip_us=400)
+
+        monotonic.advance(seconds=5)
+
+        # 200us from the round trip plus 200 parts per million of 5 seconds
+        assert synced.uncertainty == datetime.timedelta(microseconds=1_200)
+
+    def test_resyncs_after_interval(self, synced, monotonic):
+        """Verify we ask for a sample once the resync interval passes."""
+        _sample(synced, monotonic, STORE_TIME, round_trip_us=400)
+
+        assert synced.needs_sample() is False
+        monotonic.advance(seconds=9)
+        assert synced.needs_sample() is False
+        monotonic.advance(seconds=1)
+        assert synced.needs_sample() is True
+
+    def test_estimates_drift(self, synced, monotonic):
+        """Verify we correct for a store clock running fast."""
+        _sample(synced, monotonic, STORE_TIME, round_trip_us=400)
+        monotonic.advance(seconds=10)
+        # The store's clock gained 100us over those 10 seconds
+        store_time = STORE_TIME + 400 + 10_000_000 + 100
+        _sample(synced, monotonic, store_time, round_trip_us=400)
+
+        monotonic.advance(seconds=10)
+
+        # Rounding down to whole microseconds may lose one
+        expected = store_time + 200 + 10_000_100
+        assert expected - 1 <= synced.now_microseconds() <= expected
+        # 200us from the round trip plus the drift's error of 40 parts per
+        # million over 10 seconds
+        assert synced.uncertainty == datetime.timedelta(microseconds=600)
+
+    def test_discards_imprecise_samples(self, synced, monotonic):
+        """Verify a slow sample does not replace a precise estimate."""
+        _sample(synced, monotonic, STORE_TIME, round_trip_us=400)
+        monotonic.advance(seconds=10)
+        expected = synced.now_microseconds()
+
+        # Consistent with the estimate but far less precise
+        _sample(synced, monotonic, expected + 5_000, round_trip_us=10_000)
+
+        assert synced.needs_sample() is False
+        assert synced.now_microseconds() == expected + 10_000
+        assert synced.uncertainty == datetime.timedelta(microseconds=2_202)
+
+    def test_starts_over_when_the_store_clock_steps(self, synced, monotonic):
+        """Verify a contradicting sample replaces the estimate."""
+        _sample(synced, monotonic, STORE_TIME, round_trip_us=400)
+        monotonic.advance(seconds=10)
+        stepped = STORE_TIME + 60_000_000
+
+        _sample(synced, monotonic, stepped, round_trip_us=10_000)
+
+        assert synced.now_microseconds() == stepped + 5_000
+        # Half the round trip plus 200 parts per million of the 5ms since
+        assert synced.uncertainty == datetime.timedelta(microseconds=5_001)
+
+    def test_sample_reads_the_store_clock(self, synced, monotonic):
+        """Verify sample times a reading of the store's clock."""
+
+        def read():
+            monotonic.advance(microseconds=300)
+            return STORE_TIME
+
+        synced.sample(read)
+
+        assert synced.now_microseconds() == STORE_TIME + 150
+
+    def test_keeps_max_drift_for_close_samples(self, synced, monotonic):
+        """Verify samples too close together do not estimate the drift."""
+        _sample(synced, monotonic, STORE_TIME, round_trip_us=400)
+        monotonic.advance(seconds=1)
+        # The round trips bound the drift to 400 parts per million at best
+        _sample(synced, monotonic, STORE_TIME + 1_000_400, round_trip_us=400)
+
+        monotonic.advance(seconds=5)
+
+        assert synced.uncertainty == datetime.timedelta(microseconds=1_200)
+
+    def test_ignores_repeated_samples_for_drift(self, synced, monotonic):
+        """Verify a sample at the same instant does not divide by zero."""
+        sent_ns = monotonic()
+        monotonic.advance(microseconds=400)
+
+        synced.add_sample(sent_ns, STORE_TIME, monotonic())
+        synced.add_sample(sent_ns, STORE_TIME, monotonic())
+
+        assert synced.now_microseconds() == STORE_TIME + 200
+        assert synced.uncertainty == datetime.timedelta(microseconds=200)
+
+
+def test_monotonic_fallback_counts_nanoseconds():
+    """Verify the Python 3.6 fallback reads time.monotonic in nanoseconds."""
+    with mock.patch.object(clock.time, "monotonic", return_value=5.25):
+        assert clock._monotonic_ns() == 5_250_000_000
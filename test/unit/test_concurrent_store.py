@@ -0,0 +1,156 @@
+"""Tests for our thread-safe dictionary store."""
+import threading
+
+import pytest
+
+from rush import exceptions
+from rush import limit_data
+from rush.stores import base
+from rush.stores import concurrent
+
+
+class TestConcurrentDictionaryStore:
+    """Test methods on our thread-safe dictionary store."""
+
+    def test_begins_life_empty(self):
+        """Verify that by default no data exists."""
+        store = concurrent.ConcurrentDictionaryStore()
+        assert store.store == {}
+        assert store.lock_count == 64
+
+    def test_requires_positive_lock_count(self):
+        """Verify we refuse to stripe across zero locks."""
+        with pytest.raises(ValueError):
+            concurrent.ConcurrentDictionaryStore(lock_count=0)
+
+    def test_set_and_get(self):
+        """Verify we can add and retrieve data."""
+        store = concurrent.ConcurrentDictionaryStore(lock_count=4)
+        data = limit_data.LimitData(used=9999, remaining=1)
+
+        assert store.set(key="mykey", data=data) == data
+        assert store.get("mykey") == data
+
+    def test_compare_and_swap_inserts_new_key(self):
+        """Verify we can swap from no data to some data."""
+        store = concurrent.ConcurrentDictionaryStore()
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        assert store.compare_and_swap("mykey", old=None, new=data) == data
+        assert store.get("mykey") == data
+
+    def test_compare_and_swap_raises_mismatched_data_error(self):
+        """Verify the fact that we check current data against old data."""
+        data = limit_data.LimitData(used=1, remaining=4)
+        store = concurrent.ConcurrentDictionaryStore(
+            store={"mykey": data.copy_with(used=2, remaining=3)}
+        )
+
+        with pytest.raises(exceptions.MismatchedDataError) as excinfo:
+            store.compare_and_swap("mykey", old=data, new=data)
+
+        assert excinfo.value.expected_limit_data == data
+        assert excinfo.value.actual_limit_data.used == 2
+
+    def test_compare_and_swap_is_atomic_across_threads(self):
+        """Verify racing threads never lose an update."""
+        store = concurrent.ConcurrentDictionaryStore(lock_count=2)
+        start = limit_data.LimitData(used=0, remaining=0)
+        store.set(key="mykey", data=start)
+        barrier = threading.Barrier(8)
+
+        def increment():
+            barrier.wait()
+            for _ in range(200):
+                while True:
+                    old = store.get("mykey")
+                    try:
+                        new = old.copy_with(used=old.used + 1)
+                        store.compare_and_swap("mykey", old=old, new=new)
+                    except exceptions.MismatchedDataError:
+                        continue
+                    break
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.get("mykey").used == 1600
+
+    def test_increment_is_atomic_across_threads(self):
+        """Verify racing threads never lose an increment."""
+        store = concurrent.ConcurrentDictionaryStore(lock_count=2)
+        barrier = threading.Barrier(8)
+
+        def increment():
+            barrier.wait()
+            for _ in range(100):
+                store.increment("mykey", 1)
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.increment("mykey", 0) == 800
+
+    def test_many(self):
+        """Verify we read, write and swap several keys at once."""
+        store = concurrent.ConcurrentDictionaryStore(lock_count=2)
+        old = limit_data.LimitData(used=1, remaining=4)
+        new = old.copy_with(used=2, remaining=3)
+        keys = [f"key-{n}" for n in range(10)]
+
+        store.set_many([base.Write(key, old) for key in keys])
+        assert store.get_many(keys) == [old] * 10
+        store.compare_and_swap_many(
+            [base.Swap(key, old, new) for key in keys]
+        )
+        assert store.get_many(keys) == [new] * 10
+
+        with pytest.raises(exceptions.MismatchedDataError):
+            store.compare_and_swap_many(
+                [base.Swap("key-0", new, old), base.Swap("key-1", old, old)]
+            )
+        assert store.get("key-0") == new
+
+    def test_compare_and_swap_many_does_not_deadlock(self):
+        """Verify threads swapping overlapping keys all make progress."""
+        store = concurrent.ConcurrentDictionaryStore(lock_count=4)
+        keys = [f"key-{n}" for n in range(4)]
+        start = limit_data.LimitData(used=0, remaining=0)
+        store.set_many([base.Write(key, start) for key in keys])
+        barrier = threading.Barrier(4)
+
+        def increment(offset):
+            # Each thread lists the keys in a different order
+            mine = keys[offset:] + keys[:offset]
+            barrier.wait()
+            for _ in range(100):
+                while True:
+                    olds = store.get_many(mine)
+                    try:
+                        store.compare_and_swap_many(
+                            [
+                                base.Swap(
+                                    key, old, old.copy_with(used=old.used + 1)
+                                )
+                                for key, old in zip(mine, olds)
+                            ]
+                        )
+                    except exceptions.MismatchedDataError:
+                        continue
+                    break
+
+        threads = [
+            threading.Thread(target=increment, args=(n,)) for n in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [data.used for data in store.get_many(keys)] == [400] * 4
@@ -5,8 +5,11 @@ import pytest
 
 from rush import exceptions
 from rush import limit_data
+from rush.stores import base
 from rush.stores import dictionary as dictstore
 
+from . import helpers  # noqa: I100,I202
+
 
 class TestDictionaryStore:
     """Test methods on our dictionary store."""
@@ -134,3 +137,80 @@ class TestDictionaryStore:
 
         with pytest.raises(exceptions.MismatchedDataError):
             store.compare_and_swap("mykey", old=data, new=data)
+
+    def test_increment(self):
+        """Verify we add to counters, starting new ones from zero."""
+        store = dictstore.DictionaryStore()
+
+        assert store.increment("mykey", 3) == 3
+        assert store.increment("mykey", -1) == 2
+        assert store.increment("mykey", 0) == 2
+        assert store.get("mykey").used == 2
+
+    def test_many(self):
+        """Verify we read, write and swap several keys at once."""
+        store = dictstore.DictionaryStore()
+        old = limit_data.LimitData(used=1, remaining=4)
+        new = old.copy_with(used=2, remaining=3)
+
+        assert store.set_many([base.Write("a", old)]) == [old]
+        assert store.get_many(["a", "b"]) == [old, None]
+        assert store.compare_and_swap_many(
+            [base.Swap("a", old, new), base.Swap("b", None, new)]
+        ) == [new, new]
+        assert store.store == {"a": new, "b": new}
+
+    def test_compare_and_swap_many_is_all_or_nothing(self):
+        """Verify we swap nothing unless every key matches."""
+        data = limit_data.LimitData(used=1, remaining=4)
+        store = dictstore.DictionaryStore(store={"b": data})
+
+        with pytest.raises(exceptions.MismatchedDataError) as excinfo:
+            store.compare_and_swap_many(
+                [base.Swap("a", None, data), base.Swap("b", None, data)]
+            )
+
+        assert excinfo.value.key == "b"
+        assert store.store == {"b": data}
+
+
+class TestAsyncDictionaryStore:
+    """Test methods on our asyncio dictionary store."""
+
+    def test_set_and_get(self):
+        """Verify we can add and retrieve data."""
+        store = dictstore.AsyncDictionaryStore()
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        assert helpers.run(store.set(key="mykey", data=data)) == data
+        assert helpers.run(store.get("mykey")) == data
+        assert helpers.run(store.get("otherkey")) is None
+
+    def test_compare_and_swap(self):
+        """Verify we swap data when the old data matches."""
+        store = dictstore.AsyncDictionaryStore()
+        old = limit_data.LimitData(used=1, remaining=4)
+        new = old.copy_with(used=2, remaining=3)
+
+        helpers.run(store.compare_and_swap("mykey", old=None, new=old))
+        swapped = helpers.run(store.compare_and_swap("mykey", old, new))
+
+        assert swapped == new
+        assert store.store == {"mykey": new}
+
+    def test_compare_and_swap_raises_mismatched_data_error(self):
+        """Verify we refuse to swap data that changed."""
+        store = dictstore.AsyncDictionaryStore()
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        with pytest.raises(exceptions.MismatchedDataError) as excinfo:
+            helpers.run(store.compare_and_swap("mykey", old=data, new=data))
+
+        assert excinfo.value.actual_limit_data is None
+
+    def test_increment(self):
+        """Verify we add to counters, starting new ones from zero."""
+        store = dictstore.AsyncDictionaryStore()
+
+        assert helpers.run(store.increment("mykey", 2)) == 2
+        assert helpers.run(store.increment("mykey", 2)) == 4
@@ -0,0 +1,14 @@
+"""Tests for our exceptions."""
+from rush import exceptions
+
+
+def test_data_changed_in_store_error():
+    """Verify we keep the exception that interrupted the operation."""
+    original = RuntimeError("watched key changed")
+
+    err = exceptions.DataChangedInStoreError(
+        "error swapping the limit data", original_exception=original
+    )
+
+    assert isinstance(err, exceptions.AtomicOperationError)
+    assert err.original_exception is original
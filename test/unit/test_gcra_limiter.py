@@ -1,10 +1,14 @@
 """Tests for our fancy Generic Cell Ratelimiter."""
 import datetime
 
+import mock
 import pytest
 
 from rush import limit_data
+from rush import limiters
+from rush import quota
 from rush.limiters import gcra
+from rush.stores import dictionary
 
 from . import helpers  # noqa: I202
 
@@ -29,6 +33,7 @@ class TestGenericCellRatelimiter:
         _, kwargs = mockstore.set.call_args
         limit_data = kwargs["data"]
         assert kwargs["key"] == "key"
+        assert kwargs["expiry"] == rate.period
         assert (limit_data.created_at - limit_data.time) == (2 * rate.period)
         assert limitresult.remaining == 5
         assert limitresult.limit == 5
@@ -50,6 +55,8 @@ class TestGenericCellRatelimiter:
         assert limitresult.remaining == 49
         assert limitresult.reset_after == datetime.timedelta(seconds=-1)
         assert limitresult.retry_after == datetime.timedelta(seconds=-1)
+        _, kwargs = mockstore.compare_and_swap.call_args
+        assert limitresult.decided_at == kwargs["new"].created_at
 
     def test_ratelimit_existing_key_within_cell(self, limiter):
         """Verify that if we're inside our cell, we reduce remaining."""
@@ -71,6 +78,13 @@ class TestGenericCellRatelimiter:
 
         limitresult = limiter.rate_limit(key="key", rate=rate, quantity=1)
 
+        _, kwargs = mockstore.compare_and_swap.call_args
+        # The new TAT is one emission interval (1.2s) after the stored TAT
+        assert (
+            datetime.timedelta(seconds=2)
+            < kwargs["expiry"]
+            < datetime.timedelta(seconds=3)
+        )
         assert limitresult.limited is False
         assert limitresult.remaining == 48
         assert (
@@ -112,3 +126,153 @@ class TestGenericCellRatelimiter:
             < limitresult.retry_after
             <= datetime.timedelta(seconds=3)
         )
+
+    def test_rate_limit_many_matches_rate_limit(self):
+        """Verify checking many keys at once matches checking each."""
+        rate = quota.Quota.per_minute(3)
+        requests = [("a", 1), ("b", 2), ("a", 1), ("a", 2), ("b", 0)]
+        batched = gcra.GenericCellRatelimiter(
+            store=dictionary.DictionaryStore()
+        )
+        looped = gcra.GenericCellRatelimiter(
+            store=dictionary.DictionaryStore()
+        )
+
+        results = batched.rate_limit_many(requests, rate)
+        expected = [looped.rate_limit(k, q, rate) for k, q in requests]
+
+        assert [r.limited for r in results] == [r.limited for r in expected]
+        assert [r.remaining for r in results] == [
+            r.remaining for r in expected
+        ]
+        assert batched.store.store.keys() == looped.store.store.keys()
+
+    def test_ratelimit_retries_conflicts(self):
+        """Verify we re-read and recompute when another client wins."""
+        rate = quota.Quota.per_minute(5)
+        store = dictionary.DictionaryStore()
+        limiter = gcra.GenericCellRatelimiter(
+            store=store,
+            retry_policy=limiters.RetryPolicy(
+                base_delay=datetime.timedelta(0)
+            ),
+        )
+        other = gcra.GenericCellRatelimiter(store=store)
+
+        with helpers.race_once(
+            store, lambda: other.rate_limit("key", 1, rate)
+        ):
+            limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.remaining == 3
+        assert limiter.contention.conflicts == 1
+        assert limiter.contention.retries == 1
+
+    def test_rate_limit_many_swaps_each_key_once(self):
+        """Verify we read and write every key in one store call each."""
+        rate = quota.Quota.per_minute(3)
+        store = dictionary.DictionaryStore()
+        limiter = gcra.GenericCellRatelimiter(store=store)
+
+        with mock.patch.object(
+            store, "get_many", wraps=store.get_many
+        ) as get_many, mock.patch.object(
+            store, "compare_and_swap_many", wraps=store.compare_and_swap_many
+        ) as swap_many:
+            limiter.rate_limit_many([("a", 1), ("b", 1), ("a", 1)], rate)
+
+        get_many.assert_called_once_with(["a", "b"])
+        ((swaps,), _) = swap_many.call_args
+        assert [(swap.key, swap.old) for swap in swaps] == [
+            ("a", None),
+            ("b", None),
+        ]
+        assert swaps[0].new.used == 2
+        assert swaps[0].expiry > swaps[1].expiry
+
+    def test_constants(self):
+        """Verify we precompute each quota's intervals in microseconds."""
+        rate = quota.Quota.per_second(2, maximum_burst=1)
+
+        assert gcra._constants(rate) == (333333, 999999)
+        assert gcra._constants(quota.Quota.per_second(2, maximum_burst=1)) is (
+            gcra._constants(rate)
+        )
+
+    def test_apply_exactly(self):
+        """Verify the outcome of requests down to the microsecond."""
+        rate = quota.Quota.per_second(4)
+        now = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+
+        data, expiry, allowed = gcra._apply(rate, 3, now, None)
+        assert data.time == now + datetime.timedelta(microseconds=750000)
+        assert expiry == datetime.timedelta(microseconds=750000)
+        assert allowed.remaining == 1
+        assert allowed.reset_after == datetime.timedelta(seconds=-1)
+
+        limited, expiry, denied = gcra._apply(rate, 2, now, data)
+        assert limited.time_us == data.time_us
+        assert expiry == datetime.timedelta(microseconds=750000)
+        assert denied.limited is True
+        assert denied.retry_after == datetime.timedelta(microseconds=500000)
+        assert denied.reset_after == datetime.timedelta(microseconds=750000)
+
+
+class TestAsyncGenericCellRatelimiter:
+    """Tests that exercise our GCRA implementation for asyncio."""
+
+    @pytest.fixture
+    def limiter(self):
+        """Provide an instantiated asyncio GCRA limiter."""
+        store = dictionary.AsyncDictionaryStore()
+        return gcra.AsyncGenericCellRatelimiter(store=store)
+
+    def test_matches_the_synchronous_limiter(self, limiter):
+        """Verify asyncio limits requests like the synchronous limiter."""
+        rate = quota.Quota.per_minute(5)
+        sync_limiter = gcra.GenericCellRatelimiter(
+            store=dictionary.DictionaryStore()
+        )
+
+        async def check_all():
+            return [
+                await limiter.rate_limit("key", 1, rate) for _ in range(6)
+            ]
+
+        results = helpers.run(check_all())
+        sync_results = [
+            sync_limiter.rate_limit("key", 1, rate) for _ in range(6)
+        ]
+
+        assert [r.limited for r in results] == [
+            r.limited for r in sync_results
+        ]
+        assert [r.remaining for r in results] == [
+            r.remaining for r in sync_results
+        ]
+
+    def test_ratelimit_passes_expiry(self, limiter):
+        """Verify the stored data expires after its theoretical arrival."""
+        rate = quota.Quota.per_minute(5)
+
+        with mock.patch.object(
+            limiter.store,
+            "compare_and_swap",
+            wraps=limiter.store.compare_and_swap,
+        ) as cas:
+            helpers.run(limiter.rate_limit("key", 1, rate))
+
+        _, kwargs = cas.call_args
+        assert kwargs["expiry"] == datetime.timedelta(seconds=12)
+
+    def test_reset(self, limiter):
+        """Verify we reset our asyncio GCRA limiter properly."""
+        rate = quota.Quota.per_minute(5)
+        helpers.run(limiter.rate_limit("key", 5, rate))
+
+        limitresult = helpers.run(limiter.reset("key", rate))
+
+        data = limiter.store.store["key"]
+        assert (data.created_at - data.time) == (2 * rate.period)
+        assert limitresult.limited is False
+        assert limitresult.remaining == 5
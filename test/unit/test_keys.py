@@ -0,0 +1,108 @@
+"""Tests for our key building helpers."""
+import pytest
+
+from rush import keys
+from rush import quota
+
+
+@pytest.mark.parametrize(
+    "key, tag",
+    [
+        ("{user-1}:requests", "user-1"),
+        ("requests:{user-1}", "user-1"),
+        ("{}{user-1}", None),
+        ("{user-1", None),
+        ("user-1", None),
+    ],
+)
+def test_hash_tag_of(key, tag):
+    """Verify we find hash tags like Redis Cluster does."""
+    assert keys.hash_tag_of(key) == tag
+
+
+def test_quota_fingerprint():
+    """Verify equal quotas share a short fingerprint."""
+    fingerprint = keys.quota_fingerprint(quota.Quota.per_minute(60))
+
+    assert len(fingerprint) == 6
+    assert fingerprint == keys.quota_fingerprint(quota.Quota.per_minute(60))
+    assert fingerprint != keys.quota_fingerprint(quota.Quota.per_second(1))
+    assert fingerprint != keys.quota_fingerprint(
+        quota.Quota.per_minute(60, maximum_burst=1)
+    )
+
+
+def test_shorten_keeps_short_keys():
+    """Verify keys within the maximum length are kept as they are."""
+    assert keys.shorten("user-1", 6) == "user-1"
+
+
+def test_shorten_long_keys():
+    """Verify long keys are replaced by a fixed-width digest."""
+    shortened = keys.shorten("user-" + "1" * 100, 32)
+
+    assert len(shortened) == 22
+    assert shortened == keys.shorten("user-" + "1" * 100, 32)
+    assert shortened != keys.shorten("user-" + "2" * 100, 32)
+
+
+def test_shorten_keeps_hash_tags():
+    """Verify digests keep the key's hash tag."""
+    shortened = keys.shorten("{user-1}:" + "a" * 100, 32)
+
+    assert shortened.startswith("{user-1}")
+    assert keys.hash_tag_of(shortened) == "user-1"
+    assert len(shortened) == len("{user-1}") + 22
+
+
+def test_namespaced():
+    """Verify we prefix, fingerprint and shorten keys."""
+    rate = quota.Quota.per_second(5)
+    fingerprint = keys.quota_fingerprint(rate)
+
+    assert keys.namespaced("user-1", rate) == "user-1"
+    assert keys.namespaced("user-1", rate, prefix="rush:") == "rush:user-1"
+    assert (
+        keys.namespaced("user-1", rate, prefix="rush:", include_quota=True)
+        == f"rush:{fingerprint}:user-1"
+    )
+    assert keys.namespaced(
+        "a" * 100, rate, prefix="rush:", max_length=32
+    ) == "rush:" + keys.shorten("a" * 100, 32)
+
+
+class PrefixedNamespace(keys.KeyNamespace):
+    """A namespace with its own default prefix."""
+
+    default_key_prefix = "test:"
+
+
+class TestKeyNamespace:
+    """Tests for configuring the keys limiters store data under."""
+
+    def test_defaults_to_the_class_prefix(self):
+        """Verify keys start with the default prefix unless given one."""
+        rate = quota.Quota.per_second(5)
+
+        assert keys.KeyNamespace().stored_key("user-1", rate) == "user-1"
+        assert PrefixedNamespace().stored_key("user-1", rate) == "test:user-1"
+        assert (
+            PrefixedNamespace(key_prefix="").stored_key("user-1", rate)
+            == "user-1"
+        )
+
+    def test_configures_stored_keys(self):
+        """Verify we pass the configuration through to namespaced."""
+        rate = quota.Quota.per_second(5)
+        namespace = keys.KeyNamespace(
+            key_prefix="rush:", include_quota=True, max_key_length=32
+        )
+
+        assert namespace.stored_key("a" * 100, rate) == keys.namespaced(
+            "a" * 100, rate, prefix="rush:", include_quota=True, max_length=32
+        )
+
+    def test_rejects_hash_tags_in_the_prefix(self):
+        """Verify prefixes cannot break hash tags in keys."""
+        with pytest.raises(ValueError):
+            keys.KeyNamespace(key_prefix="{rush}:")
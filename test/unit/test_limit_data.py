@@ -1,6 +1,8 @@
 """Tests for our rush.limit_data module."""
 import datetime
+import pickle
 
+import mock
 import pytest
 
 from rush import limit_data
@@ -100,6 +102,19 @@ class TestLimitData:
         assert new_ld.used == 10
         assert new_ld.created_at == new_ld.created_at
 
+    def test_aspacked_round_trips(self):
+        """Verify the compact representation of LimitData."""
+        created_at = datetime.datetime(
+            2018, 12, 11, 12, 12, 15, 123_456, tzinfo=datetime.timezone.utc
+        )
+        ld = limit_data.LimitData(used=1, remaining=4, created_at=created_at)
+        timed = ld.copy_with(time=created_at)
+
+        assert ld.aspacked() == "1:4:1544530335123456:"
+        assert timed.aspacked() == "1:4:1544530335123456:1544530335123456"
+        assert limit_data.LimitData.frompacked(ld.aspacked()) == ld
+        assert limit_data.LimitData.frompacked(timed.aspacked()) == timed
+
     def test_conversion(self):
         """Test attrs conversion just to be safe."""
         kwargs = {
@@ -124,3 +139,162 @@ class TestLimitData:
         assert ld.remaining == 5
         assert ld.created_at == created_at
         assert ld.time is None
+
+
+def test_microsecond_conversion_round_trips():
+    """Verify we convert datetimes to and from epoch microseconds."""
+    dt = datetime.datetime(
+        2018, 12, 11, 12, 12, 15, 123_456, tzinfo=datetime.timezone.utc
+    )
+
+    microseconds = limit_data.datetime_to_microseconds(dt)
+
+    assert microseconds == 1_544_530_335_123_456
+    assert limit_data.microseconds_to_datetime(microseconds) == dt
+
+
+def test_current_microseconds():
+    """Verify we report the current time in epoch microseconds."""
+    before = limit_data.datetime_to_microseconds(
+        datetime.datetime.now(datetime.timezone.utc)
+    )
+
+    current = limit_data.current_microseconds()
+
+    after = limit_data.datetime_to_microseconds(
+        datetime.datetime.now(datetime.timezone.utc)
+    )
+    assert before - 1 <= current <= after + 1
+
+
+def test_naive_datetimes_are_utc():
+    """Verify naive datetimes convert to microseconds as UTC."""
+    naive = datetime.datetime(2018, 12, 11, 12, 12, 15, 123_456)
+
+    assert limit_data.datetime_to_microseconds(naive) == 1_544_530_335_123_456
+
+
+@pytest.mark.parametrize(
+    "value, expected_retval",
+    [
+        (
+            "2018-12-11T12:12:15.123456+0530",
+            datetime.datetime(
+                2018,
+                12,
+                11,
+                12,
+                12,
+                15,
+                123_456,
+                tzinfo=datetime.timezone(datetime.timedelta(minutes=330)),
+            ),
+        ),
+        (
+            "2018-12-11T12:12:15.123456",
+            datetime.datetime(2018, 12, 11, 12, 12, 15, 123_456),
+        ),
+        (
+            "2018-1-1T12:12:15.123456+0000",
+            datetime.datetime(
+                2018, 1, 1, 12, 12, 15, 123_456, tzinfo=datetime.timezone.utc
+            ),
+        ),
+    ],
+)
+@pytest.mark.parametrize("fromisoformat", [limit_data._fromisoformat, None])
+def test_parses_other_formats(value, expected_retval, fromisoformat):
+    """Verify we parse offsets, naive times and unpadded dates.
+
+    Python 3.6 has no datetime.fromisoformat so we check the strptime
+    fallback parses them too.
+    """
+    with mock.patch.object(limit_data, "_fromisoformat", fromisoformat):
+        parsed = limit_data.convert_str_to_datetime(value)
+
+    assert parsed == expected_retval
+    assert parsed.utcoffset() == expected_retval.utcoffset()
+
+
+class TestFastLimitData:
+    """Test the integer microsecond representation of LimitData."""
+
+    def test_from_microseconds(self):
+        """Verify trusted values are converted to datetimes lazily."""
+        ld = limit_data.LimitData.from_microseconds(
+            1, 4, 1_544_530_335_123_456, 1_544_530_336_000_000
+        )
+
+        assert ld.created_at == datetime.datetime(
+            2018, 12, 11, 12, 12, 15, 123_456, tzinfo=datetime.timezone.utc
+        )
+        assert ld.time is ld.time
+        assert ld.time == datetime.datetime(
+            2018, 12, 11, 12, 12, 16, tzinfo=datetime.timezone.utc
+        )
+        assert limit_data.LimitData.from_microseconds(1, 4, 0).time is None
+
+    def test_equality_uses_microseconds(self):
+        """Verify data is equal no matter how it was created."""
+        created_at = datetime.datetime(
+            2018, 12, 11, 12, 12, 15, 123_456, tzinfo=datetime.timezone.utc
+        )
+        ld = limit_data.LimitData(
+            used=1, remaining=4, created_at=created_at, time=created_at
+        )
+        fast = limit_data.LimitData.from_microseconds(
+            1, 4, ld.created_at_us, ld.time_us
+        )
+
+        assert ld == fast
+        assert hash(ld) == hash(fast)
+        assert ld.created_at is created_at
+        assert ld.asdict() == fast.asdict()
+
+    def test_asdict_keeps_offsets(self):
+        """Verify asdict formats times exactly like strftime did."""
+        tz = datetime.timezone(datetime.timedelta(hours=-5))
+        created_at = datetime.datetime(2018, 12, 11, 7, 12, 15, tzinfo=tz)
+        ld = limit_data.LimitData(used=0, remaining=5, created_at=created_at)
+
+        assert ld.asdict()["created_at"] == "2018-12-11T07:12:15.000000-0500"
+        assert ld.asdict()["created_at"] == created_at.strftime(
+            limit_data.DATETIME_FORMAT
+        )
+
+    def test_copy_with_datetimes(self):
+        """Verify copies convert the datetimes they are given."""
+        ld = limit_data.LimitData.from_microseconds(1, 4, 0, 0)
+        created_at = datetime.datetime(
+            1970, 1, 1, 0, 0, 1, tzinfo=datetime.timezone.utc
+        )
+
+        copy = ld.copy_with(created_at=created_at, time=created_at)
+
+        assert copy.created_at_us == copy.time_us == 1_000_000
+        assert copy.created_at is created_at
+        assert (copy.used, copy.remaining) == (1, 4)
+
+    def test_is_frozen(self):
+        """Verify limit data cannot be changed."""
+        ld = limit_data.LimitData.from_microseconds(1, 4, 0)
+
+        with pytest.raises(AttributeError):
+            ld.used = 2
+        with pytest.raises(AttributeError):
+            del ld.remaining
+
+    def test_pickles(self):
+        """Verify limit data survives pickling."""
+        ld = limit_data.LimitData(used=1, remaining=4, time="")
+
+        assert pickle.loads(pickle.dumps(ld)) == ld
+
+    def test_repr_shows_the_values(self):
+        """Verify the repr shows the values of limit data."""
+        ld = limit_data.LimitData.from_microseconds(1, 4, 0)
+
+        assert repr(ld) == (
+            "LimitData(used=1, remaining=4, created_at="
+            f"{limit_data.EPOCH!r}, time=None)"
+        )
@@ -1,9 +1,15 @@
 """Tests for our BaseLimiter interface."""
+import datetime
+
+import mock
 import pytest
 
+from rush import exceptions
 from rush import limiters
 from rush import stores
 
+from . import helpers  # noqa: I100,I202
+
 
 def _test_must_be_implemented(method, args, kwargs={}):
     with pytest.raises(NotImplementedError):
@@ -24,3 +30,149 @@ def test_rate_limit_must_be_implemented(base_limiter):
 def test_get_with_time_must_be_implemented(base_limiter):
     """Verify BaseLimiter.reset raises NotImplementedError."""
     _test_must_be_implemented(base_limiter.reset, ("key", None))
+
+
+def test_rate_limit_many_defaults_to_rate_limit(base_limiter):
+    """Verify BaseLimiter.rate_limit_many applies each request in order."""
+    with mock.patch.object(
+        base_limiter, "rate_limit", side_effect=["first", "second"]
+    ) as rate_limit:
+        results = base_limiter.rate_limit_many([("a", 1), ("b", 2)], "rate")
+
+    assert results == ["first", "second"]
+    assert rate_limit.call_args_list == [
+        mock.call("a", 1, "rate"),
+        mock.call("b", 2, "rate"),
+    ]
+
+
+@pytest.fixture
+def async_base_limiter():
+    """Provide the instantiated AsyncBaseLimiter for testing."""
+    return limiters.AsyncBaseLimiter(store=stores.AsyncBaseStore())
+
+
+def test_async_rate_limit_must_be_implemented(async_base_limiter):
+    """Verify AsyncBaseLimiter.rate_limit raises NotImplementedError."""
+    with pytest.raises(NotImplementedError):
+        helpers.run(async_base_limiter.rate_limit("key", 10, None))
+
+
+def test_async_rate_limit_many_defaults_to_rate_limit(async_base_limiter):
+    """Verify AsyncBaseLimiter.rate_limit_many awaits each request."""
+    with mock.patch.object(
+        async_base_limiter, "rate_limit", side_effect=["first", "second"]
+    ) as rate_limit:
+        results = helpers.run(
+            async_base_limiter.rate_limit_many([("a", 1), ("b", 2)], "rate")
+        )
+
+    assert results == ["first", "second"]
+    assert rate_limit.await_args_list == [
+        mock.call("a", 1, "rate"),
+        mock.call("b", 2, "rate"),
+    ]
+
+
+def test_async_reset_must_be_implemented(async_base_limiter):
+    """Verify AsyncBaseLimiter.reset raises NotImplementedError."""
+    with pytest.raises(NotImplementedError):
+        helpers.run(async_base_limiter.reset("key", None))
+
+
+def test_async_limiters_require_async_stores():
+    """Verify asyncio limiters refuse synchronous stores."""
+    with pytest.raises(TypeError):
+        limiters.AsyncBaseLimiter(store=stores.BaseStore())
+
+
+def test_retry_policy_rejects_negative_retries():
+    """Verify a retry policy needs a budget of at least zero retries."""
+    with pytest.raises(ValueError):
+        limiters.RetryPolicy(max_retries=-1)
+
+
+def test_retry_policy_delay_backs_off():
+    """Verify the longest wait doubles with each retry up to the maximum."""
+    policy = limiters.RetryPolicy(
+        base_delay=datetime.timedelta(milliseconds=1),
+        max_delay=datetime.timedelta(milliseconds=5),
+    )
+
+    with mock.patch("random.uniform", return_value=0.0) as uniform:
+        assert policy.delay(0) == 0.0
+        policy.delay(2)
+        policy.delay(100)
+
+    assert uniform.call_args_list == [
+        mock.call(0, 0.001),
+        mock.call(0, 0.004),
+        mock.call(0, 0.005),
+    ]
+
+
+def _conflict():
+    return exceptions.MismatchedDataError(
+        "conflict", expected_limit_data=None, actual_limit_data=None
+    )
+
+
+@pytest.fixture
+def cas_limiter():
+    """Provide a limiter which retries twice without waiting."""
+    return limiters.CompareAndSwapLimiter(
+        store=stores.BaseStore(),
+        retry_policy=limiters.RetryPolicy(
+            max_retries=2, base_delay=datetime.timedelta(0)
+        ),
+    )
+
+
+def test_retrying_retries_conflicts(cas_limiter):
+    """Verify conflicts are retried and counted."""
+    attempt = mock.Mock(side_effect=[_conflict(), _conflict(), "result"])
+
+    assert cas_limiter._retrying(attempt, "key") == "result"
+
+    assert attempt.call_args_list == [mock.call("key")] * 3
+    assert cas_limiter.contention.conflicts == 2
+    assert cas_limiter.contention.retries == 2
+
+
+def test_retrying_raises_when_retries_run_out(cas_limiter):
+    """Verify the conflict escapes once the budget is spent."""
+    attempt = mock.Mock(side_effect=_conflict())
+
+    with pytest.raises(exceptions.MismatchedDataError):
+        cas_limiter._retrying(attempt)
+
+    assert attempt.call_count == 3
+    assert cas_limiter.contention.conflicts == 3
+    assert cas_limiter.contention.retries == 2
+
+
+def test_cas_limiters_require_a_retry_policy():
+    """Verify the retry policy must be a RetryPolicy."""
+    with pytest.raises(TypeError):
+        limiters.CompareAndSwapLimiter(
+            store=stores.BaseStore(), retry_policy=3
+        )
+
+
+def test_async_retrying_retries_conflicts():
+    """Verify asyncio limiters retry conflicts until retries run out."""
+    limiter = limiters.AsyncCompareAndSwapLimiter(
+        store=stores.AsyncBaseStore(),
+        retry_policy=limiters.RetryPolicy(
+            max_retries=1, base_delay=datetime.timedelta(0)
+        ),
+    )
+    succeeds = mock.AsyncMock(side_effect=[_conflict(), "result"])
+    fails = mock.AsyncMock(side_effect=_conflict())
+
+    assert helpers.run(limiter._retrying(succeeds, "key")) == "result"
+    with pytest.raises(exceptions.MismatchedDataError):
+        helpers.run(limiter._retrying(fails, "key"))
+
+    assert limiter.contention.conflicts == 3
+    assert limiter.contention.retries == 2
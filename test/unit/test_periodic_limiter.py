@@ -4,9 +4,14 @@ import datetime
 import mock
 import pytest
 
+from rush import exceptions
 from rush import limit_data
+from rush import limiters
+from rush import quota
 from rush import result
 from rush.limiters import periodic
+from rush.stores import bounded
+from rush.stores import dictionary
 
 from . import helpers  # noqa: I100,I202
 
@@ -33,7 +38,9 @@ class TestPeriodicLimiter:
         assert limitresult.remaining == 5
         assert limitresult.limit == 5
         assert limitresult.limited is False
-        mockstore.set.assert_called_once_with(key="key", data=mock.ANY)
+        mockstore.set.assert_called_once_with(
+            key="key", data=mock.ANY, expiry=rate.period
+        )
 
     def test_no_preexisting_limitdata(self, limiter):
         """Verify we do the right thing when a key's not been seen yet."""
@@ -71,7 +78,10 @@ class TestPeriodicLimiter:
             new=limit_data.LimitData(
                 used=2, remaining=3, created_at=original_created_at
             ),
+            expiry=mock.ANY,
         )
+        _, kwargs = mockstore.compare_and_swap.call_args
+        assert datetime.timedelta(0) < kwargs["expiry"] < rate.period
 
     def test_last_rate_limit_in_period(self, limiter):
         """Verify we allow the last request."""
@@ -96,7 +106,10 @@ class TestPeriodicLimiter:
             new=limit_data.LimitData(
                 used=5, remaining=0, created_at=original_created_at
             ),
+            expiry=mock.ANY,
         )
+        _, kwargs = mockstore.compare_and_swap.call_args
+        assert datetime.timedelta(0) < kwargs["expiry"] < rate.period
 
     def test_rate_limit_exceeded_none_remaining(self, limiter):
         """Verify we allow the last request."""
@@ -122,12 +135,9 @@ class TestPeriodicLimiter:
         mockstore = limiter.store.recording_store
         now = datetime.datetime.now(datetime.timezone.utc)
         original_created_at = now - datetime.timedelta(seconds=2)
-        mockstore.get.return_value = limit_data.LimitData(
+        olddata = mockstore.get.return_value = limit_data.LimitData(
             remaining=0, used=5, created_at=original_created_at
         )
-        mockstore.set.return_value = limit_data.LimitData(
-            remaining=4, used=1, created_at=now
-        )
 
         limitresult = limiter.rate_limit(key="key", quantity=1, rate=rate)
 
@@ -135,7 +145,10 @@ class TestPeriodicLimiter:
         assert limitresult.limit == 5
         assert limitresult.limited is False
         mockstore.get.assert_called_once_with("key")
-        mockstore.set.assert_called_once_with(key="key", data=mock.ANY)
+        mockstore.compare_and_swap.assert_called_once_with(
+            key="key", old=olddata, new=mock.ANY, expiry=rate.period
+        )
+        mockstore.set.assert_not_called()
 
     def test_result_from_quota(self, limiter):
         """Verify the behaviour of result_from_quota."""
@@ -184,3 +197,365 @@ class TestPeriodicLimiter:
         assert limitresult.limit == 5
         assert limitresult.remaining == 0
         assert limitresult.retry_after == datetime.timedelta(seconds=1)
+
+    def test_rate_limit_retries_conflicts(self):
+        """Verify we re-read and recompute when another client wins."""
+        rate = quota.Quota.per_minute(5)
+        store = dictionary.DictionaryStore()
+        limiter = periodic.PeriodicLimiter(
+            store=store,
+            retry_policy=limiters.RetryPolicy(
+                base_delay=datetime.timedelta(0)
+            ),
+        )
+        other = periodic.PeriodicLimiter(store=store)
+        limiter.rate_limit("key", 1, rate)
+
+        with helpers.race_once(
+            store, lambda: other.rate_limit("key", 1, rate)
+        ):
+            limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.remaining == 2
+        assert store.get("key").used == 3
+        assert limiter.contention.conflicts == 1
+        assert limiter.contention.retries == 1
+
+    def test_starts_a_new_period_when_the_period_ends(self):
+        """Verify a period does not include the instant it ends."""
+        rate = quota.Quota.per_second(3)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        old = limit_data.LimitData(
+            used=3, remaining=0, created_at=now - rate.period
+        )
+        store = dictionary.DictionaryStore(store={"key": old})
+        store.current_time = mock.Mock(return_value=now)
+        limiter = periodic.PeriodicLimiter(store=store)
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 2
+        assert limitresult.reset_after == rate.period
+        assert store.get("key").created_at == now
+
+    def test_limits_requests_larger_than_a_new_period(self):
+        """Verify a new period cannot be overdrawn by its first request."""
+        rate = quota.Quota.per_second(3)
+        store = dictionary.DictionaryStore()
+        limiter = periodic.PeriodicLimiter(store=store)
+
+        limitresult = limiter.rate_limit("key", 4, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.remaining == 3
+        assert limitresult.retry_after == rate.period
+        assert store.get("key") is None
+
+    def test_new_period_retries_conflicts(self):
+        """Verify two clients starting a period at once both count."""
+        rate = quota.Quota.per_minute(5)
+        store = dictionary.DictionaryStore()
+        limiter = periodic.PeriodicLimiter(
+            store=store,
+            retry_policy=limiters.RetryPolicy(
+                base_delay=datetime.timedelta(0)
+            ),
+        )
+        other = periodic.PeriodicLimiter(store=store)
+        created_at = datetime.datetime.now(
+            datetime.timezone.utc
+        ) - datetime.timedelta(minutes=2)
+        store.set(
+            key="key",
+            data=limit_data.LimitData(
+                used=5, remaining=0, created_at=created_at
+            ),
+        )
+
+        with helpers.race_once(
+            store, lambda: other.rate_limit("key", 1, rate)
+        ):
+            limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.remaining == 3
+        assert store.get("key").used == 2
+        assert limiter.contention.conflicts == 1
+
+    def test_rate_limit_many_matches_rate_limit(self):
+        """Verify checking many keys at once matches checking each."""
+        rate = quota.Quota.per_minute(3)
+        requests = [("a", 1), ("b", 2), ("a", 1), ("a", 2), ("b", 2)]
+        batched = periodic.PeriodicLimiter(store=dictionary.DictionaryStore())
+        looped = periodic.PeriodicLimiter(store=dictionary.DictionaryStore())
+
+        results = batched.rate_limit_many(requests, rate)
+        expected = [looped.rate_limit(k, q, rate) for k, q in requests]
+
+        assert [r.limited for r in results] == [r.limited for r in expected]
+        assert [r.remaining for r in results] == [
+            r.remaining for r in expected
+        ]
+        assert batched.store.get("a").used == looped.store.get("a").used
+
+    def test_rate_limit_many_skips_unchanged_keys(self):
+        """Verify we only swap keys whose data changed."""
+        rate = quota.Quota.per_minute(3)
+        store = dictionary.DictionaryStore()
+        limiter = periodic.PeriodicLimiter(store=store)
+        limiter.rate_limit("full", 3, rate)
+
+        with mock.patch.object(
+            store, "compare_and_swap_many", wraps=store.compare_and_swap_many
+        ) as swap_many:
+            results = limiter.rate_limit_many([("full", 1), ("new", 1)], rate)
+
+        assert [r.limited for r in results] == [True, False]
+        ((swaps,), _) = swap_many.call_args
+        assert [(swap.key, swap.old) for swap in swaps] == [("new", None)]
+
+    def test_rate_limit_many_starts_new_periods(self):
+        """Verify expired periods are replaced for the whole period."""
+        rate = quota.Quota.per_second(3)
+        created_at = datetime.datetime.now(
+            datetime.timezone.utc
+        ) - datetime.timedelta(seconds=5)
+        old = limit_data.LimitData(used=3, remaining=0, created_at=created_at)
+        store = dictionary.DictionaryStore(store={"key": old})
+        limiter = periodic.PeriodicLimiter(store=store)
+
+        with mock.patch.object(
+            store, "compare_and_swap_many", wraps=store.compare_and_swap_many
+        ) as swap_many:
+            (limitresult,) = limiter.rate_limit_many([("key", 1)], rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 2
+        ((swaps,), _) = swap_many.call_args
+        assert swaps[0].old == old
+        assert swaps[0].expiry == rate.period
+
+
+# 1 minute and 45 seconds after the epoch, i.e., 15 seconds before the end of
+# the second one minute window
+_NOW = datetime.datetime(1970, 1, 1, 0, 1, 45, tzinfo=datetime.timezone.utc)
+_NOW_IN_WINDOW = datetime.timedelta(seconds=45)
+
+
+class ExpiringAsyncDictionaryStore(dictionary.AsyncDictionaryStore):
+    """An asyncio dictionary store which claims to expire data."""
+
+    expires_data = True
+
+
+class TestAlignedPeriodicLimiter:
+    """Tests for our PeriodicLimiter class with epoch-aligned periods."""
+
+    @pytest.fixture
+    def limiter(self):
+        """Provide an epoch-aligned periodic limiter with a fixed clock."""
+        store = bounded.BoundedDictionaryStore()
+        store.current_time = mock.Mock(return_value=_NOW)
+        return periodic.PeriodicLimiter(store=store, align_to_epoch=True)
+
+    def test_needs_a_store_which_expires_data(self):
+        """Verify we refuse stores which would keep every window's key."""
+        with pytest.raises(ValueError):
+            periodic.PeriodicLimiter(
+                store=dictionary.DictionaryStore(), align_to_epoch=True
+            )
+
+    def test_counts_requests_in_the_window(self, limiter):
+        """Verify requests are counted under the window's key."""
+        rate = quota.Quota.per_minute(5)
+
+        limitresult = limiter.rate_limit("key", 2, rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 3
+        assert limitresult.reset_after == datetime.timedelta(seconds=15)
+        assert limitresult.retry_after == datetime.timedelta(seconds=-1)
+        assert limitresult.decided_at == _NOW
+        assert list(limiter.store.store) == ["key:1"]
+        assert limiter.store.store["key:1"].used == 2
+
+    def test_limited_requests_are_not_counted(self, limiter):
+        """Verify limited requests are taken back from the counter."""
+        rate = quota.Quota.per_minute(5)
+        results = [
+            limiter.rate_limit("key", quantity, rate)
+            for quantity in [1, 2, 3, 0, 2, 0, 1]
+        ]
+
+        assert [(r.limited, r.remaining) for r in results] == [
+            (False, 4),
+            (False, 2),
+            (True, 2),
+            (False, 2),
+            (False, 0),
+            (True, 0),
+            (True, 0),
+        ]
+        assert results[2].retry_after == datetime.timedelta(seconds=15)
+        assert limiter.store.store["key:1"].used == 5
+
+    def test_increments_with_the_time_left_as_expiry(self, limiter):
+        """Verify each request is an increment expiring with the window."""
+        rate = quota.Quota.per_minute(5)
+        expiry = datetime.timedelta(seconds=15)
+
+        with mock.patch.object(
+            limiter.store, "increment", wraps=limiter.store.increment
+        ) as increment:
+            limiter.rate_limit("key", 4, rate)
+            limiter.rate_limit("key", 2, rate)
+
+        assert increment.call_args_list == [
+            mock.call("key:1", 4, expiry),
+            mock.call("key:1", 2, expiry),
+            mock.call("key:1", -2, expiry),
+        ]
+
+    def test_past_windows_expire(self, limiter):
+        """Verify a new window has its own counter and the old one expires."""
+        rate = quota.Quota.per_minute(5)
+        limiter.rate_limit("key", 5, rate)
+        limiter.store.current_time.return_value = _NOW + rate.period
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.remaining == 4
+        assert list(limiter.store.store) == ["key:2"]
+        assert limiter.store.store["key:2"].used == 1
+        assert limiter.store.expirations == 1
+
+    def test_rate_limit_retries_conflicts(self, limiter):
+        """Verify increments which conflict are retried."""
+        rate = quota.Quota.per_minute(5)
+        limiter.retry_policy = limiters.RetryPolicy(
+            base_delay=datetime.timedelta(0)
+        )
+        conflicts = [exceptions.AtomicOperationError()]
+        increment = limiter.store.increment
+
+        def conflict_once(*args):
+            while conflicts:
+                raise conflicts.pop()
+            return increment(*args)
+
+        with mock.patch.object(
+            limiter.store, "increment", side_effect=conflict_once
+        ):
+            limitresult = limiter.rate_limit("key", 2, rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 3
+        assert limiter.contention.retries == 1
+
+    def test_rate_limit_many_checks_each_request(self, limiter):
+        """Verify checking many keys at once matches checking each."""
+        rate = quota.Quota.per_minute(3)
+
+        results = limiter.rate_limit_many([("a", 2), ("a", 2), ("b", 3)], rate)
+
+        assert [r.limited for r in results] == [False, True, False]
+        assert limiter.store.store["a:1"].used == 2
+
+    def test_reset(self, limiter):
+        """Verify reset empties the counter of the current window."""
+        rate = quota.Quota.per_minute(5)
+        limiter.rate_limit("key", 4, rate)
+
+        limitresult = limiter.reset("key", rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 5
+        assert limitresult.reset_after == datetime.timedelta(seconds=15)
+        assert limiter.store.store["key:1"].used == 0
+        assert limiter.rate_limit("key", 5, rate).limited is False
+
+
+class TestAsyncPeriodicLimiter:
+    """Tests for our AsyncPeriodicLimiter class."""
+
+    @pytest.fixture
+    def limiter(self):
+        """Provide an instantiated asyncio periodic limiter."""
+        store = dictionary.AsyncDictionaryStore()
+        return periodic.AsyncPeriodicLimiter(store=store)
+
+    def test_limits_requests_within_a_period(self, limiter):
+        """Verify we allow the quota's limit and then limit requests."""
+        rate = quota.Quota.per_minute(5)
+
+        async def check_all():
+            return [
+                await limiter.rate_limit("key", 1, rate) for _ in range(6)
+            ]
+
+        results = helpers.run(check_all())
+
+        assert [r.remaining for r in results] == [4, 3, 2, 1, 0, 0]
+        assert results[-1].limited is True
+        assert results[-1].retry_after == results[-1].reset_after
+        assert limiter.store.store["key"].used == 5
+
+    def test_starts_a_new_period(self, limiter):
+        """Verify we start over once the period has elapsed."""
+        rate = quota.Quota.per_minute(5)
+        created_at = datetime.datetime.now(
+            datetime.timezone.utc
+        ) - datetime.timedelta(minutes=2)
+        olddata = limiter.store.store["key"] = limit_data.LimitData(
+            used=5, remaining=0, created_at=created_at
+        )
+
+        with mock.patch.object(
+            limiter.store,
+            "compare_and_swap",
+            wraps=limiter.store.compare_and_swap,
+        ) as compare_and_swap:
+            limitresult = helpers.run(limiter.rate_limit("key", 1, rate))
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 4
+        compare_and_swap.assert_called_once_with(
+            key="key", old=olddata, new=mock.ANY, expiry=rate.period
+        )
+
+    def test_reset(self, limiter):
+        """Verify reset works appropriately."""
+        rate = quota.Quota.per_minute(5)
+        helpers.run(limiter.rate_limit("key", 5, rate))
+
+        limitresult = helpers.run(limiter.reset("key", rate))
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 5
+        assert limiter.store.store["key"].used == 0
+
+    def test_aligned_to_epoch(self):
+        """Verify asyncio limiters may also align periods to the epoch."""
+        rate = quota.Quota.per_minute(5)
+        store = ExpiringAsyncDictionaryStore()
+        store.current_time = mock.AsyncMock(return_value=_NOW)
+        limiter = periodic.AsyncPeriodicLimiter(
+            store=store, align_to_epoch=True
+        )
+
+        async def check_all():
+            results = [
+                await limiter.rate_limit("key", 2, rate) for _ in range(3)
+            ]
+            return results + [await limiter.reset("key", rate)]
+
+        results = helpers.run(check_all())
+
+        assert [(r.limited, r.remaining) for r in results] == [
+            (False, 3),
+            (False, 1),
+            (True, 1),
+            (False, 5),
+        ]
+        assert results[0].reset_after == datetime.timedelta(seconds=15)
+        assert store.store["key:1"].used == 0
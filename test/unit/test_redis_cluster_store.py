@@ -0,0 +1,151 @@
+"""Unit tests for storing limit data in a Redis Cluster."""
+import datetime
+
+import mock
+import pytest
+from redis import cluster
+from redis import crc
+from redis import exceptions
+
+from rush import exceptions as rexc
+from rush import limit_data
+from rush import quota
+from rush.limiters import redis_gcra
+from rush.stores import redis_cluster
+
+
+def test_hash_tag():
+    """Verify we wrap the tag in braces ahead of the key."""
+    assert redis_cluster.hash_tag("user-1", ":per-ip") == "{user-1}:per-ip"
+
+
+class TestRedisClusterStore:
+    """Test the RedisClusterStore class."""
+
+    def test_creates_cluster_client(self):
+        """Verify we build a cluster-aware client from the URL."""
+        with mock.patch.object(cluster.RedisCluster, "from_url") as from_url:
+            store = redis_cluster.RedisClusterStore(
+                url="redis://node-1:7000", client_config={"password": "pw"}
+            )
+
+        assert store.client is from_url.return_value
+        from_url.assert_called_once_with(
+            url="redis://node-1:7000", password="pw", decode_responses=True
+        )
+
+    def test_invalid_url(self):
+        """Verify we don't allow invalid URLs."""
+        with pytest.raises(rexc.InvalidRedisURL):
+            redis_cluster.RedisClusterStore(url="https://redis.io")
+
+    def test_keyslot(self):
+        """Verify we ask the client which slot a key hashes to."""
+        client = mock.Mock()
+        client.keyslot.return_value = 1234
+        store = redis_cluster.RedisClusterStore(
+            url="redis://node-1:7000", client=client
+        )
+
+        assert store.keyslot("{user-1}:per-ip") == 1234
+        client.keyslot.assert_called_once_with("{user-1}:per-ip")
+
+    def test_tagged_keys_share_a_slot(self):
+        """Verify hash tags keep related keys on the same node."""
+        client = mock.Mock()
+        client.keyslot.side_effect = lambda key: crc.key_slot(key.encode())
+        store = redis_cluster.RedisClusterStore(
+            url="redis://node-1:7000", client=client
+        )
+        per_ip = redis_cluster.hash_tag("user-1", ":per-ip")
+        per_user = redis_cluster.hash_tag("user-1", ":per-user")
+
+        assert store.keyslot(per_ip) == store.keyslot(per_user)
+        assert store.keyslot(":per-ip") != store.keyslot(":per-user")
+
+    def test_usable_with_the_lua_gcra_limiter(self):
+        """Verify the Redis GCRA limiter accepts a cluster store."""
+        client = mock.Mock()
+        store = redis_cluster.RedisClusterStore(
+            url="redis://node-1:7000", client=client
+        )
+
+        limiter = redis_gcra.GenericCellRatelimiter(store=store)
+
+        assert limiter.client is client
+
+    def test_get_with_current_time_reads_the_keys_node(self):
+        """Verify the time and data are read by one script on one node."""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeStrictRedis(decode_responses=True)
+        store = redis_cluster.RedisClusterStore(
+            url="redis://node-1:7000", client=client
+        )
+        data = limit_data.LimitData(used=1, remaining=4)
+        store.set(key="key", data=data)
+
+        with mock.patch(
+            "time.time", return_value=1_600_000_000.25
+        ), mock.patch.object(client, "pipeline") as pipeline:
+            now, stored = store.get_with_current_time("key")
+
+        pipeline.assert_not_called()
+
+        assert now == datetime.datetime(
+            2020, 9, 13, 12, 26, 40, 250000, tzinfo=datetime.timezone.utc
+        )
+        assert (stored.used, stored.remaining) == (1, 4)
+        assert store.get_with_current_time("missing")[1] is None
+
+    def test_run_scripts_loads_scripts_into_every_primary(self):
+        """Verify scripts are loaded before the first cluster pipeline."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [1, 2]
+        script = mock.Mock(sha="sha", script="return 1")
+        store = redis_cluster.RedisClusterStore(
+            url="redis://node-1:7000", client=client
+        )
+
+        for _ in range(2):
+            replies = store.run_scripts(
+                [(script, ["a"], [1]), (script, ["b"], [2])]
+            )
+
+        assert replies == [1, 2]
+        client.script_load.assert_called_once_with("return 1")
+        client.pipeline.assert_called_with(transaction=False)
+        script.assert_called_with(keys=["b"], args=[2], client=pipeline)
+
+    def test_run_scripts_reloads_scripts_after_noscript(self):
+        """Verify scripts are loaded again once a node has lost them."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.side_effect = [exceptions.NoScriptError(), [1]]
+        script = mock.Mock(sha="sha", script="return 1")
+        store = redis_cluster.RedisClusterStore(
+            url="redis://node-1:7000", client=client
+        )
+
+        with pytest.raises(exceptions.NoScriptError):
+            store.run_scripts([(script, ["a"], [])])
+        assert store.run_scripts([(script, ["a"], [])]) == [1]
+
+        assert client.script_load.call_count == 2
+
+    def test_lua_limiters_run_many_scripts_through_the_store(self):
+        """Verify limiters pipeline scripts with the cluster's loading."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [(0, 4, -1000000, 200000)]
+        store = redis_cluster.RedisClusterStore(
+            url="redis://node-1:7000", client=client
+        )
+        limiter = redis_gcra.GenericCellRatelimiter(store=store)
+
+        limiter.rate_limit_many([("key", 1)], quota.Quota.per_second(5))
+
+        client.script_load.assert_called_once_with(
+            limiter.apply_ratelimit.script
+        )
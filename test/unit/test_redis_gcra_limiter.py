@@ -1,18 +1,23 @@
 """Tests for our fancy Generic Cell Ratelimiter."""
 import collections
 import datetime
+import random
 
 import mock
 import pytest
 
+from rush import keys
+from rush import quota
 from rush.limiters import redis_gcra as gcra
 from rush.stores import redis
+from rush.stores import redis_sharded
 
 from . import helpers  # noqa: I202
 
 
 LimiterFixture = collections.namedtuple(
-    "LimiterFixture", "client store check_lua apply_lua limiter"
+    "LimiterFixture",
+    "client store check_lua apply_lua apply_many_lua limiter",
 )
 
 
@@ -22,13 +27,19 @@ def limiterf():
     client = mock.Mock()
     check_lua = mock.MagicMock()
     apply_lua = mock.MagicMock()
-    client.register_script.side_effect = [check_lua, apply_lua]
+    apply_many_lua = mock.MagicMock()
+    client.register_script.side_effect = [
+        check_lua,
+        apply_lua,
+        apply_many_lua,
+    ]
     store = redis.RedisStore("redis://", client=client)
     return LimiterFixture(
         client,
         store,
         check_lua,
         apply_lua,
+        apply_many_lua,
         gcra.GenericCellRatelimiter(store=store),
     )
 
@@ -59,9 +70,9 @@ class TestGenericCellRatelimiter:
         limiter = limiterf.limiter
         apply_lua = limiterf.apply_lua
         apply_lua.reset_mock()
-        apply_lua.return_value = (0, 49, "-1", "-1")
+        apply_lua.return_value = (0, 49, -1000000, -1000000)
         check_lua = limiterf.check_lua
-        check_lua.return_value = (0, 49, "-1", "-1")
+        check_lua.return_value = (0, 49, -1000000, -1000000)
 
         _ = limiter.rate_limit(key="key", rate=rate, quantity=1)
 
@@ -69,8 +80,8 @@ class TestGenericCellRatelimiter:
             keys=["key"],
             args=[
                 rate.limit,
-                rate.count / rate.period.total_seconds(),
-                rate.period.total_seconds(),
+                rate.count,
+                60000000,
                 1,
             ],
         )
@@ -81,8 +92,8 @@ class TestGenericCellRatelimiter:
             keys=["key"],
             args=[
                 rate.limit,
-                rate.count / rate.period.total_seconds(),
-                rate.period.total_seconds(),
+                rate.count,
+                60000000,
             ],
         )
 
@@ -94,7 +105,7 @@ class TestGenericCellRatelimiter:
         limiter = limiterf.limiter
         apply_lua = limiterf.apply_lua
         apply_lua.reset_mock()
-        apply_lua.return_value = (1, 0, "10", "15")
+        apply_lua.return_value = (1, 0, 10000000, 15000000)
 
         limitresult = limiter.rate_limit(key="key", rate=rate, quantity=1)
 
@@ -102,10 +113,498 @@ class TestGenericCellRatelimiter:
             keys=["key"],
             args=[
                 rate.limit,
-                rate.count / rate.period.total_seconds(),
-                rate.period.total_seconds(),
+                rate.count,
+                60000000,
                 1,
             ],
         )
         assert limitresult.limited is True
         assert limitresult.remaining == 0
+
+    def test_rate_limit_many(self, limiterf):
+        """Verify we run every script in one pipeline."""
+        rate = helpers.new_quota(
+            period=datetime.timedelta(seconds=60), count=50
+        )
+        limiterf.client.pipeline.return_value = mock.MagicMock()
+        p = limiterf.client.pipeline.return_value.__enter__.return_value
+        p.execute.return_value = [
+            (0, 49, -1000000, 1000000),
+            (1, 0, 500000, 2000000),
+        ]
+        args = [
+            rate.limit,
+            rate.count,
+            60000000,
+        ]
+
+        results = limiterf.limiter.rate_limit_many([("a", 2), ("b", 0)], rate)
+
+        assert [r.limited for r in results] == [False, True]
+        assert results[1].retry_after == datetime.timedelta(seconds=0.5)
+        assert results[0].retry_after == datetime.timedelta(seconds=-1)
+        limiterf.client.pipeline.assert_called_once_with(transaction=False)
+        limiterf.apply_lua.assert_called_once_with(
+            keys=["a"], args=args + [2], client=p
+        )
+        limiterf.check_lua.assert_called_once_with(
+            keys=["b"], args=args, client=p
+        )
+
+    def test_rate_limit_keys(self, limiterf):
+        """Verify we limit every key with one script call."""
+        per_user = helpers.new_quota(
+            period=datetime.timedelta(seconds=60), count=50
+        )
+        per_tenant = helpers.new_quota(
+            period=datetime.timedelta(seconds=1), count=10
+        )
+        limiterf.apply_many_lua.return_value = [
+            (0, 49, -1000000, 1200000),
+            (1, 0, 100000, 1000000),
+        ]
+
+        results = limiterf.limiter.rate_limit_keys(
+            [("user", 1, per_user), ("tenant", 2, per_tenant)]
+        )
+
+        limiterf.apply_many_lua.assert_called_once_with(
+            keys=["user", "tenant"],
+            args=[
+                0,
+                per_user.limit,
+                per_user.count,
+                60000000,
+                1,
+                per_tenant.limit,
+                per_tenant.count,
+                1000000,
+                2,
+            ],
+            client=None,
+        )
+        assert [r.limited for r in results] == [False, True]
+        assert [r.limit for r in results] == [50, 10]
+        assert results[0].remaining == 49
+        assert results[0].reset_after == datetime.timedelta(seconds=1.2)
+        assert results[1].retry_after == datetime.timedelta(seconds=0.1)
+
+    def test_rate_limit_keys_all_or_nothing(self, limiterf):
+        """Verify we ask the script to charge every key or none."""
+        rate = helpers.new_quota()
+        limiterf.apply_many_lua.return_value = [
+            (1, 3, 0, 1000000),
+            (1, 0, 2000000, 3000000),
+        ]
+
+        results = limiterf.limiter.rate_limit_keys(
+            [("a", 1, rate), ("b", 1, rate)], all_or_nothing=True
+        )
+
+        _, kwargs = limiterf.apply_many_lua.call_args
+        assert kwargs["args"][0] == 1
+        assert all(r.limited for r in results)
+        assert results[0].retry_after == datetime.timedelta(0)
+        assert results[1].retry_after == datetime.timedelta(seconds=2)
+
+    def test_namespaced_keys(self, limiterf):
+        """Verify we store data under prefixed and fingerprinted keys."""
+        rate = helpers.new_quota()
+        limiterf.client.register_script.side_effect = None
+        limiter = gcra.GenericCellRatelimiter(
+            store=limiterf.store, key_prefix="rush:", include_quota=True
+        )
+        limiter.apply_ratelimit = mock.Mock(
+            return_value=(0, 4, -1000000, 1000000)
+        )
+        stored = f"rush:{keys.quota_fingerprint(rate)}:key"
+
+        assert limiter.stored_key("key", rate) == stored
+        limiter.rate_limit("key", 1, rate)
+        limiter.reset("key", rate)
+
+        _, kwargs = limiter.apply_ratelimit.call_args
+        assert kwargs["keys"] == [stored]
+        limiterf.client.delete.assert_called_once_with(stored)
+
+    def test_shortens_long_keys(self, limiterf):
+        """Verify we store long keys under their digests."""
+        rate = helpers.new_quota()
+        limiterf.client.register_script.side_effect = None
+        limiter = gcra.GenericCellRatelimiter(
+            store=limiterf.store, max_key_length=32
+        )
+        limiterf.client.pipeline.return_value = mock.MagicMock()
+        p = limiterf.client.pipeline.return_value.__enter__.return_value
+        p.execute.return_value = [(0, 4, -1000000, 1000000)]
+        limiter.apply_ratelimit = mock.Mock()
+        limiter.apply_ratelimit_many = mock.Mock(
+            return_value=[(0, 4, -1000000, 1000000)]
+        )
+        key = "{user-1}:" + "a" * 100
+
+        limiter.rate_limit_many([(key, 1)], rate)
+        limiter.rate_limit_keys([(key, 1, rate)])
+
+        shortened = keys.shorten(key, 32)
+        limiter.apply_ratelimit.assert_called_once_with(
+            keys=[shortened], args=mock.ANY, client=p
+        )
+        _, kwargs = limiter.apply_ratelimit_many.call_args
+        assert kwargs["keys"] == [shortened]
+
+    def test_refuses_hash_tags_in_prefixes(self, limiterf):
+        """Verify prefixes cannot break hash tags in keys."""
+        with pytest.raises(ValueError):
+            gcra.GenericCellRatelimiter(
+                store=limiterf.store, key_prefix="{rush}:"
+            )
+
+
+_MILLISECOND = datetime.timedelta(milliseconds=1)
+_NO_WAIT = datetime.timedelta(seconds=-1)
+
+
+class TestGenericCellRatelimiterScripts:
+    """Tests that run our Lua scripts on fakeredis."""
+
+    @pytest.fixture
+    def clock(self):
+        """Provide the clock of the fakeredis servers."""
+        clock = helpers.Clock()
+        with mock.patch("time.time", clock):
+            yield clock
+
+    @pytest.fixture
+    def limiter(self, clock):
+        """Provide a limiter using a fakeredis server."""
+        return gcra.GenericCellRatelimiter(store=helpers.fake_redis_store())
+
+    def test_limits_in_integer_microseconds(self, limiter, clock):
+        """Verify the scripts' results and stored TATs are exact."""
+        rate = quota.Quota.per_second(5)
+
+        results = [limiter.rate_limit("key", n, rate) for n in (1, 4, 1)]
+
+        assert [helpers.outcome(r) for r in results] == [
+            (False, 4, 200 * _MILLISECOND, _NO_WAIT),
+            (False, 0, 1000 * _MILLISECOND, _NO_WAIT),
+            (True, 0, 1000 * _MILLISECOND, 200 * _MILLISECOND),
+        ]
+        assert limiter.client.get("key") == str(clock.microseconds + 10 ** 6)
+        assert limiter.client.pttl("key") == 1000
+
+        clock.advance(300_000)
+        checked = limiter.rate_limit("key", 0, rate)
+
+        assert helpers.outcome(checked) == (
+            False,
+            2,
+            700 * _MILLISECOND,
+            _NO_WAIT,
+        )
+        assert limiter.client.get("key") == str(clock.microseconds + 700_000)
+
+    def test_reads_legacy_tats(self, limiter, clock):
+        """Verify TATs stored as seconds since 2017 keep their limits."""
+        rate = quota.Quota.per_second(5)
+        legacy_tat = clock.microseconds // 10 ** 6 + 1 - 1483228800
+        limiter.client.set("key", f"{legacy_tat}.0")
+
+        checked = limiter.rate_limit("key", 0, rate)
+        clock.advance(200_000)
+        allowed = limiter.rate_limit("key", 1, rate)
+
+        assert helpers.outcome(checked) == (
+            True,
+            0,
+            1000 * _MILLISECOND,
+            200 * _MILLISECOND,
+        )
+        assert helpers.outcome(allowed) == (
+            False,
+            0,
+            1000 * _MILLISECOND,
+            _NO_WAIT,
+        )
+        assert limiter.client.get("key") == str(clock.microseconds + 10 ** 6)
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_rate_limit_keys_matches_rate_limit(self, limiter, clock, seed):
+        """Verify the many-key script charges keys like the other scripts."""
+        looped = gcra.GenericCellRatelimiter(store=helpers.fake_redis_store())
+        rates = [
+            quota.Quota.per_second(5),
+            quota.Quota.per_second(3, maximum_burst=2),
+        ]
+        rng = random.Random(seed)
+        for step in range(200):
+            clock.advance(rng.choice((0, 1, 999, 50_000, 333_333)))
+            requests = [
+                (rng.choice("ab"), rng.choice((0, 1, 2, 6)), rng.choice(rates))
+                for _ in range(rng.randint(1, 3))
+            ]
+
+            results = limiter.rate_limit_keys(requests)
+            expected = [looped.rate_limit(*request) for request in requests]
+
+            assert (step, [helpers.outcome(r) for r in results]) == (
+                step,
+                [helpers.outcome(r) for r in expected],
+            )
+
+    def test_rate_limit_keys_all_or_nothing(self, limiter, clock):
+        """Verify no key is charged when one of them is limited."""
+        rate = quota.Quota.per_second(5)
+        limiter.rate_limit("b", 5, rate)
+        stored = limiter.client.get("b")
+
+        results = limiter.rate_limit_keys(
+            [("a", 1, rate), ("b", 1, rate)], all_or_nothing=True
+        )
+
+        assert [helpers.outcome(r) for r in results] == [
+            (True, 5, datetime.timedelta(0), datetime.timedelta(0)),
+            (True, 0, 1000 * _MILLISECOND, 200 * _MILLISECOND),
+        ]
+        assert limiter.client.get("a") is None
+        assert limiter.client.get("b") == stored
+
+
+class TestShardedGenericCellRatelimiter:
+    """Tests for running our GCRA scripts on sharded servers."""
+
+    @pytest.fixture
+    def store(self):
+        """Provide a sharded store whose servers have mock clients."""
+        store = redis_sharded.ShardedRedisStore(
+            ["redis://node-0:6379", "redis://node-1:6379"]
+        )
+        for shard in store.shards:
+            shard.client = mock.Mock()
+        return store
+
+    def test_requires_sharded_store(self, limiterf):
+        """Verify we refuse stores that are not sharded."""
+        with pytest.raises(TypeError):
+            gcra.ShardedGenericCellRatelimiter(store=limiterf.store)
+
+    def test_runs_scripts_on_the_owning_server(self, store):
+        """Verify each key is limited on the server that owns it."""
+        rate = helpers.new_quota(
+            period=datetime.timedelta(seconds=60), count=50
+        )
+        limiter = gcra.ShardedGenericCellRatelimiter(store=store)
+        limiter.apply_ratelimit = mock.Mock(
+            return_value=(0, 49, -1000000, 1000000)
+        )
+        limiter.check_ratelimit = mock.Mock(
+            return_value=(0, 49, -1000000, 1000000)
+        )
+        client = store.shard_for("key").client
+
+        limitresult = limiter.rate_limit(key="key", rate=rate, quantity=1)
+        limiter.rate_limit(key="key", rate=rate, quantity=0)
+
+        assert limitresult.remaining == 49
+        limiter.apply_ratelimit.assert_called_once_with(
+            keys=["key"],
+            args=[
+                rate.limit,
+                rate.count,
+                60000000,
+                1,
+            ],
+            client=client,
+        )
+        limiter.check_ratelimit.assert_called_once_with(
+            keys=["key"],
+            args=[
+                rate.limit,
+                rate.count,
+                60000000,
+            ],
+            client=client,
+        )
+
+    def test_rate_limit_many_uses_a_pipeline_per_server(self, store):
+        """Verify each server runs the scripts for the keys it owns."""
+        rate = helpers.new_quota(
+            period=datetime.timedelta(seconds=60), count=50
+        )
+        limiter = gcra.ShardedGenericCellRatelimiter(store=store)
+        limiter.apply_ratelimit = mock.Mock()
+        pipelines = {}
+        for shard in store.shards:
+            shard.client = mock.MagicMock()
+            p = shard.client.pipeline.return_value.__enter__.return_value
+            # Each server reports how many requests it saw as the remaining
+            p.execute.side_effect = lambda p=p: [
+                (0, p.calls, -1000000, 1000000) for _ in range(p.calls)
+            ]
+            p.calls = 0
+            pipelines[id(shard)] = p
+        limiter.apply_ratelimit.side_effect = lambda keys, args, client: (
+            setattr(client, "calls", client.calls + 1)
+        )
+        keys = [f"key-{n}" for n in range(20)]
+
+        results = limiter.rate_limit_many([(key, 1) for key in keys], rate)
+
+        for key, limitresult in zip(keys, results):
+            p = pipelines[id(store.shard_for(key))]
+            assert limitresult.remaining == p.calls
+            limiter.apply_ratelimit.assert_any_call(
+                keys=[key], args=mock.ANY, client=p
+            )
+        assert sum(p.calls for p in pipelines.values()) == 20
+
+    def test_rate_limit_keys_on_one_server(self, store):
+        """Verify keys sharing a server are limited on that server."""
+        rate = helpers.new_quota()
+        limiter = gcra.ShardedGenericCellRatelimiter(store=store)
+        limiter.apply_ratelimit_many = mock.Mock(
+            return_value=[(0, 4, -1000000, 1000000), (0, 3, -1000000, 2000000)]
+        )
+        keys = ["{user-1}:requests", "{user-1}:bytes"]
+
+        results = limiter.rate_limit_keys([(key, 1, rate) for key in keys])
+
+        assert [r.remaining for r in results] == [4, 3]
+        limiter.apply_ratelimit_many.assert_called_once_with(
+            keys=keys,
+            args=mock.ANY,
+            client=store.shard_for("{user-1}").client,
+        )
+
+    def test_rate_limit_keys_across_servers(self, store):
+        """Verify we refuse keys that live on different servers."""
+        rate = helpers.new_quota()
+        limiter = gcra.ShardedGenericCellRatelimiter(store=store)
+        limiter.apply_ratelimit_many = mock.Mock()
+        keys = [f"key-{n}" for n in range(20)]
+
+        with pytest.raises(ValueError):
+            limiter.rate_limit_keys([(key, 1, rate) for key in keys])
+
+        limiter.apply_ratelimit_many.assert_not_called()
+
+    def test_reset(self, store):
+        """Verify we delete the key from the server that owns it."""
+        rate = helpers.new_quota()
+        limiter = gcra.ShardedGenericCellRatelimiter(
+            store=store, key_prefix="rush:"
+        )
+
+        limitresult = limiter.reset(key="key", rate=rate)
+
+        client = store.shard_for("rush:key").client
+        client.delete.assert_called_once_with("rush:key")
+        assert limitresult.remaining == 5
+        assert limitresult.limited is False
+
+
+class TestAsyncGenericCellRatelimiter:
+    """Tests for running our GCRA scripts from asyncio."""
+
+    @pytest.fixture
+    def limiter(self):
+        """Provide an asyncio limiter whose scripts are mocked."""
+        client = mock.Mock()
+        client.register_script.side_effect = [
+            mock.AsyncMock(),
+            mock.AsyncMock(),
+            mock.AsyncMock(),
+        ]
+        client.delete = mock.AsyncMock()
+        store = redis.AsyncRedisStore("redis://", client=client)
+        return gcra.AsyncGenericCellRatelimiter(store=store)
+
+    def test_requires_asyncio_store(self, limiterf):
+        """Verify we refuse synchronous stores."""
+        with pytest.raises(TypeError):
+            gcra.AsyncGenericCellRatelimiter(store=limiterf.store)
+
+    def test_refuses_hash_tags_in_prefixes(self, limiter):
+        """Verify prefixes cannot break hash tags in keys."""
+        with pytest.raises(ValueError):
+            gcra.AsyncGenericCellRatelimiter(
+                store=limiter.store, key_prefix="{rush}:"
+            )
+
+    def test_ratelimit(self, limiter):
+        """Verify we await the scripts with the quota's parameters."""
+        rate = helpers.new_quota(
+            period=datetime.timedelta(seconds=60), count=50
+        )
+        limiter.apply_ratelimit.return_value = (1, 0, 10000000, 15000000)
+        limiter.check_ratelimit.return_value = (0, 49, -1000000, 1000000)
+        args = [
+            rate.limit,
+            rate.count,
+            60000000,
+        ]
+
+        limitresult = helpers.run(limiter.rate_limit("key", 1, rate))
+        peeked = helpers.run(limiter.rate_limit("key", 0, rate))
+
+        limiter.apply_ratelimit.assert_awaited_once_with(
+            keys=["key"], args=args + [1]
+        )
+        limiter.check_ratelimit.assert_awaited_once_with(
+            keys=["key"], args=args
+        )
+        assert limitresult.limited is True
+        assert limitresult.retry_after == datetime.timedelta(seconds=10)
+        assert limitresult.reset_after == datetime.timedelta(seconds=15)
+        assert peeked.limited is False
+        assert peeked.remaining == 49
+
+    def test_ratelimit_uses_stored_key(self, limiter):
+        """Verify we await the scripts with the namespaced key."""
+        rate = helpers.new_quota()
+        limiter.key_prefix = "rush:"
+        limiter.apply_ratelimit.return_value = (0, 4, -1000000, 1000000)
+        limiter.check_ratelimit.return_value = (0, 4, -1000000, 1000000)
+
+        helpers.run(limiter.rate_limit("key", 1, rate))
+        helpers.run(limiter.rate_limit("key", 0, rate))
+
+        limiter.apply_ratelimit.assert_awaited_once_with(
+            keys=["rush:key"], args=mock.ANY
+        )
+        limiter.check_ratelimit.assert_awaited_once_with(
+            keys=["rush:key"], args=mock.ANY
+        )
+
+    def test_rate_limit_keys(self, limiter):
+        """Verify we await one script call for every key."""
+        rate = helpers.new_quota()
+        limiter.apply_ratelimit_many.return_value = [
+            (0, 4, -1000000, 1000000),
+            (1, 0, 0, 1000000),
+        ]
+
+        results = helpers.run(
+            limiter.rate_limit_keys(
+                [("a", 1, rate), ("b", 0, rate)], all_or_nothing=True
+            )
+        )
+
+        limiter.apply_ratelimit_many.assert_awaited_once_with(
+            keys=["a", "b"], args=mock.ANY
+        )
+        _, kwargs = limiter.apply_ratelimit_many.call_args
+        assert kwargs["args"][0] == 1
+        assert [r.limited for r in results] == [False, True]
+
+    def test_reset(self, limiter):
+        """Verify we delete the key."""
+        rate = helpers.new_quota()
+        limiter.key_prefix = "rush:"
+
+        limitresult = helpers.run(limiter.reset("key", rate))
+
+        limiter.client.delete.assert_awaited_once_with("rush:key")
+        assert limitresult.remaining == 5
+        assert limitresult.limited is False
@@ -0,0 +1,178 @@
+"""Tests for our periodic limiter implemented in Redis Lua."""
+import datetime
+
+import mock
+import pytest
+
+from rush import quota
+from rush.limiters import periodic
+from rush.limiters import redis_periodic
+from rush.stores import redis
+
+from . import helpers  # noqa: I100,I202
+
+
+@pytest.fixture
+def limiter():
+    """Provide a limiter whose script is mocked."""
+    client = mock.MagicMock()
+    client.register_script.return_value = mock.MagicMock()
+    store = redis.RedisStore("redis://", client=client)
+    return redis_periodic.PeriodicLimiter(store=store)
+
+
+class TestPeriodicLimiter:
+    """Tests that exercise our Lua periodic limiter."""
+
+    def test_refuses_hash_tags_in_prefixes(self, limiter):
+        """Verify prefixes cannot break hash tags in keys."""
+        with pytest.raises(ValueError):
+            redis_periodic.PeriodicLimiter(
+                store=limiter.store, key_prefix="{rush}:"
+            )
+
+    def test_rate_limit(self, limiter):
+        """Verify we run the script with the quota's parameters."""
+        rate = quota.Quota.per_minute(50, maximum_burst=10)
+        limiter.apply_periodic.return_value = (0, 59, 60000)
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        limiter.apply_periodic.assert_called_once_with(
+            keys=["periodic:key"], args=[60, 60000, 1]
+        )
+        assert limitresult.limit == 50
+        assert limitresult.limited is False
+        assert limitresult.remaining == 59
+        assert limitresult.reset_after == datetime.timedelta(seconds=60)
+        assert limitresult.retry_after == datetime.timedelta(seconds=-1)
+        assert limitresult.decided_at is not None
+
+    def test_rate_limit_exceeded(self, limiter):
+        """Verify limited requests wait for the window to end."""
+        rate = quota.Quota.per_minute(5)
+        limiter.apply_periodic.return_value = (1, 0, 1500)
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.remaining == 0
+        assert limitresult.reset_after == datetime.timedelta(seconds=1.5)
+        assert limitresult.retry_after == datetime.timedelta(seconds=1.5)
+
+    def test_rounds_periods_up_to_milliseconds(self, limiter):
+        """Verify periods are never shortened to whole milliseconds."""
+        rate = quota.Quota(
+            period=datetime.timedelta(microseconds=1500), count=1
+        )
+        limiter.apply_periodic.return_value = (0, 0, 2)
+
+        limiter.rate_limit("key", 1, rate)
+
+        limiter.apply_periodic.assert_called_once_with(
+            keys=["periodic:key"], args=[1, 2, 1]
+        )
+
+    def test_rate_limit_uses_stored_key(self, limiter):
+        """Verify we run the script with the namespaced key."""
+        rate = quota.Quota.per_minute(5)
+        limiter.key_prefix = "rush:"
+        limiter.apply_periodic.return_value = (0, 4, 60000)
+
+        limiter.rate_limit("key", 1, rate)
+
+        limiter.apply_periodic.assert_called_once_with(
+            keys=["rush:key"], args=mock.ANY
+        )
+
+    def test_rate_limit_many(self, limiter):
+        """Verify we run the script for every request in one pipeline."""
+        rate = quota.Quota.per_minute(5)
+        pipeline = limiter.client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [(0, 4, 60000), (1, 4, 59000)]
+
+        results = limiter.rate_limit_many([("a", 1), ("a", 5)], rate)
+
+        limiter.client.pipeline.assert_called_once_with(transaction=False)
+        assert limiter.apply_periodic.call_args_list == [
+            mock.call(
+                keys=["periodic:a"], args=[5, 60000, 1], client=pipeline
+            ),
+            mock.call(
+                keys=["periodic:a"], args=[5, 60000, 5], client=pipeline
+            ),
+        ]
+        assert [r.limited for r in results] == [False, True]
+        assert results[0].decided_at_us == results[1].decided_at_us
+
+    def test_reset(self, limiter):
+        """Verify we delete the key."""
+        rate = quota.Quota.per_minute(5)
+        limiter.key_prefix = "rush:"
+
+        limitresult = limiter.reset("key", rate)
+
+        limiter.client.delete.assert_called_once_with("rush:key")
+        assert limitresult.limited is False
+        assert limitresult.remaining == 5
+        assert limitresult.reset_after == datetime.timedelta(seconds=60)
+        assert limitresult.retry_after == datetime.timedelta(seconds=-1)
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_limits_like_the_periodic_limiter(self, seed):
+        """Verify the script decides requests like the Python limiter."""
+        helpers.assert_same_results(
+            redis_periodic.PeriodicLimiter(store=helpers.fake_redis_store()),
+            periodic.PeriodicLimiter(store=helpers.fake_redis_store()),
+            quota.Quota.per_second(5),
+            helpers.random_requests(seed),
+        )
+
+
+class TestAsyncPeriodicLimiter:
+    """Tests for running our periodic script from asyncio."""
+
+    @pytest.fixture
+    def limiter(self):
+        """Provide an asyncio limiter whose script is mocked."""
+        client = mock.Mock()
+        client.register_script.return_value = mock.AsyncMock()
+        client.delete = mock.AsyncMock()
+        store = redis.AsyncRedisStore("redis://", client=client)
+        return redis_periodic.AsyncPeriodicLimiter(store=store)
+
+    def test_requires_asyncio_store(self, limiter):
+        """Verify we refuse synchronous stores."""
+        store = redis.RedisStore("redis://", client=mock.Mock())
+        with pytest.raises(TypeError):
+            redis_periodic.AsyncPeriodicLimiter(store=store)
+
+    def test_refuses_hash_tags_in_prefixes(self, limiter):
+        """Verify prefixes cannot break hash tags in keys."""
+        with pytest.raises(ValueError):
+            redis_periodic.AsyncPeriodicLimiter(
+                store=limiter.store, key_prefix="{rush}:"
+            )
+
+    def test_rate_limit(self, limiter):
+        """Verify we await the script with the namespaced key."""
+        rate = quota.Quota.per_minute(5)
+        limiter.key_prefix = "rush:"
+        limiter.apply_periodic.return_value = (1, 0, 30000)
+
+        limitresult = helpers.run(limiter.rate_limit("key", 1, rate))
+
+        limiter.apply_periodic.assert_awaited_once_with(
+            keys=["rush:key"], args=[5, 60000, 1]
+        )
+        assert limitresult.limited is True
+        assert limitresult.retry_after == datetime.timedelta(seconds=30)
+
+    def test_reset(self, limiter):
+        """Verify we delete the key."""
+        rate = quota.Quota.per_minute(5)
+
+        limitresult = helpers.run(limiter.reset("key", rate))
+
+        limiter.client.delete.assert_awaited_once_with("periodic:key")
+        assert limitresult.remaining == 5
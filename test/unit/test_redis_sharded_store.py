@@ -0,0 +1,213 @@
+"""Unit tests for sharding limit data across Redis servers."""
+import collections
+import datetime
+
+import mock
+import pytest
+
+from rush import exceptions as rexc
+from rush import limit_data
+from rush.stores import base
+from rush.stores import redis_sharded
+
+URLS = [f"redis://node-{n}:6379" for n in range(4)]
+
+
+@pytest.fixture
+def store():
+    """Provide a sharded store whose servers have mock clients."""
+    store = redis_sharded.ShardedRedisStore(URLS)
+    for shard in store.shards:
+        shard.client = mock.MagicMock()
+    return store
+
+
+@pytest.mark.parametrize(
+    "key, hashed",
+    [
+        ("user-1", "user-1"),
+        ("{user-1}:per-ip", "user-1"),
+        ("per-ip:{user-1}", "user-1"),
+        ("{}user-1", "{}user-1"),
+        ("{user-1", "{user-1"),
+    ],
+)
+def test_hashed_part(key, hashed):
+    """Verify we only hash non-empty hash tags like Redis Cluster."""
+    assert redis_sharded.hashed_part(key) == hashed
+
+
+class TestShardedRedisStore:
+    """Test the ShardedRedisStore class."""
+
+    def test_creates_a_store_per_url(self):
+        """Verify each server gets its own store and connection pool."""
+        store = redis_sharded.ShardedRedisStore(
+            URLS,
+            client_config={"socket_timeout": 1},
+            codec="packed",
+            clock_resync_interval=datetime.timedelta(seconds=5),
+        )
+
+        assert [shard.url.unsplit() for shard in store.shards] == URLS
+        assert all(shard.codec == "packed" for shard in store.shards)
+        assert all(
+            shard.clock.resync_interval == datetime.timedelta(seconds=5)
+            for shard in store.shards
+        )
+        pools = {id(shard.client.connection_pool) for shard in store.shards}
+        assert len(pools) == len(URLS)
+        assert "decode_responses" not in store.client_config
+
+    def test_invalid_url(self):
+        """Verify we validate every URL like RedisStore does."""
+        with pytest.raises(rexc.InvalidRedisURL):
+            redis_sharded.ShardedRedisStore(URLS + ["https://redis.io"])
+
+    @pytest.mark.parametrize("urls", [[], URLS + URLS[:1]])
+    def test_requires_unique_urls(self, urls):
+        """Verify we refuse to shard over no or duplicate servers."""
+        with pytest.raises(ValueError):
+            redis_sharded.ShardedRedisStore(urls)
+
+    def test_requires_positive_virtual_nodes(self):
+        """Verify every server needs a place on the ring."""
+        with pytest.raises(ValueError):
+            redis_sharded.ShardedRedisStore(URLS, virtual_nodes=0)
+
+    def test_spreads_keys_across_servers(self):
+        """Verify every server owns a fair share of keys."""
+        store = redis_sharded.ShardedRedisStore(URLS)
+        owners = collections.Counter(
+            store.shard_for(f"key-{n}").url.unsplit() for n in range(10_000)
+        )
+
+        assert set(owners) == set(URLS)
+        assert all(1_500 < count < 3_500 for count in owners.values())
+
+    def test_adding_a_server_moves_few_keys(self):
+        """Verify consistent hashing only moves keys to the new server."""
+        store = redis_sharded.ShardedRedisStore(URLS)
+        grown = redis_sharded.ShardedRedisStore(
+            URLS + ["redis://node-4:6379"]
+        )
+        moved = [
+            key
+            for key in (f"key-{n}" for n in range(10_000))
+            if store.shard_for(key).url != grown.shard_for(key).url
+        ]
+
+        assert 1_000 < len(moved) < 3_000
+        assert {grown.shard_for(key).url.unsplit() for key in moved} == {
+            "redis://node-4:6379"
+        }
+
+    def test_url_order_does_not_move_keys(self):
+        """Verify a server's place on the ring depends only on its URL."""
+        store = redis_sharded.ShardedRedisStore(URLS)
+        reordered = redis_sharded.ShardedRedisStore(URLS[::-1])
+
+        for key in (f"key-{n}" for n in range(1_000)):
+            assert store.shard_for(key).url == reordered.shard_for(key).url
+
+    def test_hash_tags_share_a_server(self, store):
+        """Verify keys with the same hash tag live on the same server."""
+        owners = {
+            id(store.shard_for(f"{{user-1}}:key-{n}")) for n in range(100)
+        }
+
+        assert len(owners) == 1
+
+    def test_delegates_to_the_owning_server(self, store):
+        """Verify reads and writes go to the server owning the key."""
+        data = limit_data.LimitData(used=1, remaining=4)
+        expiry = datetime.timedelta(seconds=5)
+        shard = store.shard_for("mykey")
+
+        with mock.patch.object(shard, "set") as set_, mock.patch.object(
+            shard, "get"
+        ) as get, mock.patch.object(shard, "compare_and_swap") as cas:
+            stored = store.set(key="mykey", data=data, expiry=expiry)
+            retrieved = store.get("mykey")
+            swapped = store.compare_and_swap(
+                "mykey", old=None, new=data, expiry=expiry
+            )
+
+        assert stored is set_.return_value
+        assert retrieved is get.return_value
+        assert swapped is cas.return_value
+        set_.assert_called_once_with(key="mykey", data=data, expiry=expiry)
+        get.assert_called_once_with("mykey")
+        cas.assert_called_once_with(
+            "mykey", old=None, new=data, expiry=expiry
+        )
+
+    def test_increment_on_the_owning_server(self, store):
+        """Verify counters are incremented on the server owning the key."""
+        expiry = datetime.timedelta(seconds=5)
+        shard = store.shard_for("mykey")
+
+        with mock.patch.object(shard, "increment", return_value=3) as inc:
+            assert store.increment("mykey", 1, expiry) == 3
+
+        inc.assert_called_once_with("mykey", 1, expiry)
+
+    def test_many_groups_keys_by_server(self, store):
+        """Verify we send one bulk operation to each server."""
+        data = limit_data.LimitData(used=1, remaining=4)
+        keys = [f"key-{n}" for n in range(20)]
+        owners = [store.shard_for(key) for key in keys]
+        for shard in store.shards:
+            shard.get_many = mock.Mock(
+                side_effect=lambda keys: [data if k else None for k in keys]
+            )
+            shard.set_many = mock.Mock()
+
+        assert store.get_many(keys + [""]) == [data] * 20 + [None]
+        store.set_many([base.Write(key, data) for key in keys])
+
+        for shard in store.shards:
+            mine = [key for key, owner in zip(keys, owners) if owner is shard]
+            shard.set_many.assert_called_once_with(
+                [base.Write(key, data) for key in mine]
+            )
+
+    def test_compare_and_swap_many_on_one_server(self, store):
+        """Verify keys on one server are swapped with one script."""
+        data = limit_data.LimitData(used=1, remaining=4)
+        swaps = [
+            base.Swap(f"{{user-1}}:key-{n}", None, data) for n in range(3)
+        ]
+        shard = store.shard_for(swaps[0].key)
+
+        with mock.patch.object(shard, "compare_and_swap_many") as cas_many:
+            swapped = store.compare_and_swap_many(swaps)
+
+        assert swapped is cas_many.return_value
+        cas_many.assert_called_once_with(swaps)
+
+    def test_compare_and_swap_many_across_servers(self, store):
+        """Verify keys on several servers are swapped one at a time."""
+        data = limit_data.LimitData(used=1, remaining=4)
+        swaps = [base.Swap(f"key-{n}", None, data) for n in range(20)]
+        for shard in store.shards:
+            shard.get = mock.Mock(return_value=None)
+            shard.compare_and_swap = mock.Mock(return_value=data)
+
+        assert store.compare_and_swap_many(swaps) == [data] * 20
+        for swap in swaps:
+            store.shard_for(swap.key).compare_and_swap.assert_any_call(
+                swap.key, old=None, new=data, expiry=None
+            )
+
+    def test_current_time_uses_the_first_server(self, store):
+        """Verify every key shares the first server's clock."""
+        client = store.shards[0].client
+        client.time.return_value = (1_600_000_000, 500_000)
+
+        now = store.current_time()
+
+        client.time.assert_called_once_with()
+        assert now == datetime.datetime(
+            2020, 9, 13, 12, 26, 40, 500_000, tzinfo=datetime.timezone.utc
+        )
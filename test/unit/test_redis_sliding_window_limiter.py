@@ -0,0 +1,165 @@
+"""Tests for our sliding window limiter implemented in Redis Lua."""
+import datetime
+
+import mock
+import pytest
+
+from rush import quota
+from rush.limiters import redis_sliding_window
+from rush.limiters import sliding_window
+from rush.stores import redis
+
+from . import helpers  # noqa: I100,I202
+
+
+@pytest.fixture
+def limiter():
+    """Provide a limiter whose script is mocked."""
+    client = mock.MagicMock()
+    client.register_script.return_value = mock.MagicMock()
+    store = redis.RedisStore("redis://", client=client)
+    return redis_sliding_window.SlidingWindowLimiter(store=store)
+
+
+class TestSlidingWindowLimiter:
+    """Tests that exercise our Lua sliding window limiter."""
+
+    def test_refuses_hash_tags_in_prefixes(self, limiter):
+        """Verify prefixes cannot break hash tags in keys."""
+        with pytest.raises(ValueError):
+            redis_sliding_window.SlidingWindowLimiter(
+                store=limiter.store, key_prefix="{rush}:"
+            )
+
+    def test_rate_limit(self, limiter):
+        """Verify we run the script with the quota's parameters."""
+        rate = quota.Quota.per_minute(50, maximum_burst=10)
+        limiter.key_prefix = "rush:"
+        limiter.apply_sliding_window.return_value = (0, 59, -1000000, 90000000)
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        limiter.apply_sliding_window.assert_called_once_with(
+            keys=["rush:key"], args=[60, 60000000, 1]
+        )
+        assert limitresult.limit == 50
+        assert limitresult.limited is False
+        assert limitresult.remaining == 59
+        assert limitresult.reset_after == datetime.timedelta(seconds=90)
+        assert limitresult.retry_after == datetime.timedelta(seconds=-1)
+        assert limitresult.decided_at is not None
+
+    def test_rate_limit_exceeded(self, limiter):
+        """Verify limited requests report how long to wait."""
+        rate = quota.Quota.per_minute(5)
+        limiter.apply_sliding_window.return_value = (1, 0, 1500000, 70000000)
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.remaining == 0
+        assert limitresult.retry_after == datetime.timedelta(seconds=1.5)
+        assert limitresult.reset_after == datetime.timedelta(seconds=70)
+
+    def test_rate_limit_many(self, limiter):
+        """Verify we run the script for every request in one pipeline."""
+        rate = quota.Quota.per_minute(5)
+        pipeline = limiter.client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [
+            (0, 4, -1000000, 90000000),
+            (1, 4, 30000000, 90000000),
+        ]
+
+        results = limiter.rate_limit_many([("a", 1), ("a", 5)], rate)
+
+        limiter.client.pipeline.assert_called_once_with(transaction=False)
+        assert limiter.apply_sliding_window.call_args_list == [
+            mock.call(
+                keys=["sliding-window:a"],
+                args=[5, 60000000, 1],
+                client=pipeline,
+            ),
+            mock.call(
+                keys=["sliding-window:a"],
+                args=[5, 60000000, 5],
+                client=pipeline,
+            ),
+        ]
+        assert [r.limited for r in results] == [False, True]
+        assert results[0].decided_at_us == results[1].decided_at_us
+
+    def test_reset(self, limiter):
+        """Verify we delete the key."""
+        rate = quota.Quota.per_minute(5)
+
+        limitresult = limiter.reset("key", rate)
+
+        limiter.client.delete.assert_called_once_with("sliding-window:key")
+        assert limitresult.limited is False
+        assert limitresult.remaining == 5
+        assert limitresult.retry_after == datetime.timedelta(seconds=-1)
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_limits_like_the_sliding_window_limiter(self, seed):
+        """Verify the script decides requests like the Python limiter."""
+        helpers.assert_same_results(
+            redis_sliding_window.SlidingWindowLimiter(
+                store=helpers.fake_redis_store()
+            ),
+            sliding_window.SlidingWindowLimiter(
+                store=helpers.fake_redis_store()
+            ),
+            quota.Quota.per_second(5),
+            helpers.random_requests(
+                seed, advances=(0, 1, 999, 50_000, 333_333, 1_000_000)
+            ),
+        )
+
+
+class TestAsyncSlidingWindowLimiter:
+    """Tests for running our sliding window script from asyncio."""
+
+    @pytest.fixture
+    def limiter(self):
+        """Provide an asyncio limiter whose script is mocked."""
+        client = mock.Mock()
+        client.register_script.return_value = mock.AsyncMock()
+        client.delete = mock.AsyncMock()
+        store = redis.AsyncRedisStore("redis://", client=client)
+        return redis_sliding_window.AsyncSlidingWindowLimiter(store=store)
+
+    def test_requires_asyncio_store(self, limiter):
+        """Verify we refuse synchronous stores."""
+        store = redis.RedisStore("redis://", client=mock.Mock())
+        with pytest.raises(TypeError):
+            redis_sliding_window.AsyncSlidingWindowLimiter(store=store)
+
+    def test_refuses_hash_tags_in_prefixes(self, limiter):
+        """Verify prefixes cannot break hash tags in keys."""
+        with pytest.raises(ValueError):
+            redis_sliding_window.AsyncSlidingWindowLimiter(
+                store=limiter.store, key_prefix="{rush}:"
+            )
+
+    def test_rate_limit(self, limiter):
+        """Verify we await the script with the namespaced key."""
+        rate = quota.Quota.per_minute(5)
+        limiter.key_prefix = "rush:"
+        limiter.apply_sliding_window.return_value = (1, 0, 30000000, 90000000)
+
+        limitresult = helpers.run(limiter.rate_limit("key", 1, rate))
+
+        limiter.apply_sliding_window.assert_awaited_once_with(
+            keys=["rush:key"], args=[5, 60000000, 1]
+        )
+        assert limitresult.limited is True
+        assert limitresult.retry_after == datetime.timedelta(seconds=30)
+
+    def test_reset(self, limiter):
+        """Verify we delete the key."""
+        rate = quota.Quota.per_minute(5)
+
+        limitresult = helpers.run(limiter.reset("key", rate))
+
+        limiter.client.delete.assert_awaited_once_with("sliding-window:key")
+        assert limitresult.remaining == 5
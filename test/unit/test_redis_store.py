@@ -4,13 +4,15 @@ import datetime
 import mock
 import pytest
 import redis
-import redis.client
+import redis.asyncio
 import rfc3986
 
 from rush import exceptions as rexc
 from rush import limit_data
 from rush.stores import redis as redstore
 
+from . import helpers  # noqa: I100,I202
+
 
 REDIS_URLS = [
     "redis://",
@@ -51,16 +53,106 @@ class TestRedisStore:
     def test_set(self):
         """Verify we call the right method on our Redis client."""
         url = "redis://"
-        client = mock.Mock()
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
         store = redstore.RedisStore(url=url, client=client)
         data = mock.Mock()
         data.asdict.return_value = {"remaining": "4", "used": "1"}
 
         store.set(key="test_key", data=data)
 
-        client.hmset.assert_called_once_with(
+        pipeline.delete.assert_called_once_with("test_key")
+        pipeline.hmset.assert_called_once_with(
             "test_key", {"remaining": "4", "used": "1"}
         )
+        pipeline.pexpire.assert_not_called()
+        pipeline.execute.assert_called_once_with()
+
+    def test_set_with_expiry(self):
+        """Verify we expire the key in the same transaction."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        store = redstore.RedisStore(url="redis://", client=client)
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        store.set(
+            key="test_key", data=data, expiry=datetime.timedelta(seconds=-1)
+        )
+
+        pipeline.pexpire.assert_called_once_with("test_key", 1)
+
+    def test_set_packed(self):
+        """Verify we store a single field with the packed codec."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        store = redstore.RedisStore(
+            url="redis://", client=client, codec="packed"
+        )
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        store.set(key="test_key", data=data)
+
+        pipeline.hmset.assert_called_once_with(
+            "test_key", {"p": data.aspacked()}
+        )
+
+    def test_invalid_codec(self):
+        """Verify we only accept codecs we understand."""
+        with pytest.raises(ValueError):
+            redstore.RedisStore(
+                url="redis://", client=mock.Mock(), codec="pickle"
+            )
+
+    def test_increment(self):
+        """Verify we increment and expire the counter in a pipeline."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [3, True]
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        assert store.increment("key", 2, datetime.timedelta(seconds=2)) == 3
+
+        pipeline.hincrby.assert_called_once_with("key", "used", 2)
+        assert [c.args[1] for c in pipeline.hsetnx.call_args_list] == [
+            "remaining",
+            "created_at",
+            "time",
+        ]
+        pipeline.pexpire.assert_called_once_with("key", 2000)
+
+    def test_increment_keeps_limit_data(self):
+        """Verify counters can still be read as limit data."""
+        fakeredis = pytest.importorskip("fakeredis")
+        store = redstore.RedisStore(
+            url="redis://",
+            client=fakeredis.FakeStrictRedis(decode_responses=True),
+        )
+
+        store.increment("key", 2)
+        assert store.increment("key", 3) == 5
+
+        data = store.get("key")
+        assert (data.used, data.remaining, data.time) == (5, 0, None)
+
+    def test_increment_without_expiry(self):
+        """Verify we only expire counters when given an expiry."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [b"-1"]
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        assert store.increment("key", -1) == -1
+
+        pipeline.pexpire.assert_not_called()
+
+    def test_get_packed(self):
+        """Verify we read data written with the packed codec."""
+        client = mock.Mock()
+        store = redstore.RedisStore(url="redis://", client=client)
+        data = limit_data.LimitData(used=1, remaining=4)
+        client.hgetall.return_value = {"p": data.aspacked()}
+
+        assert store.get("test_key") == data
 
     def test_get(self):
         """Verify we use the right method on our client to retrive data."""
@@ -105,48 +197,477 @@ class TestRedisStore:
         )
         client.time.assert_called_once_with()
 
+    def test_current_time_estimates_redis_time(self):
+        """Verify we only send TIME once per resync interval."""
+        client = mock.Mock()
+        client.time.return_value = (1_545_740_827, 608_937)
+        store = redstore.RedisStore(
+            url="redis://",
+            client=client,
+            clock_resync_interval=datetime.timedelta(seconds=10),
+        )
+
+        first = store.current_time()
+        second = store.current_time()
+
+        client.time.assert_called_once_with()
+        assert store.clock.uncertainty < datetime.timedelta(seconds=1)
+        expected = datetime.datetime(
+            2018, 12, 25, 12, 27, 7, 608_937, tzinfo=datetime.timezone.utc
+        )
+        assert expected <= first <= second
+        assert second - expected < datetime.timedelta(seconds=1)
+
+    def test_get_with_current_time(self):
+        """Verify we send TIME and HGETALL in one pipeline."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        data = limit_data.LimitData(used=1, remaining=4)
+        pipeline.execute.return_value = [
+            (1_545_740_827, 608_937),
+            data.asdict(),
+        ]
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        now, retrieved = store.get_with_current_time("test_key")
+
+        assert now == datetime.datetime(
+            2018, 12, 25, 12, 27, 7, 608_937, tzinfo=datetime.timezone.utc
+        )
+        assert retrieved == data
+        client.pipeline.assert_called_once_with(transaction=False)
+        pipeline.time.assert_called_once_with()
+        pipeline.hgetall.assert_called_once_with("test_key")
+        client.time.assert_not_called()
+
+    def test_get_with_current_time_samples_the_clock(self):
+        """Verify the pipelined TIME also feeds the clock estimate."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [(1_545_740_827, 608_937), {}]
+        client.hgetall.return_value = {}
+        store = redstore.RedisStore(
+            url="redis://",
+            client=client,
+            clock_resync_interval=datetime.timedelta(seconds=10),
+        )
+
+        first, _ = store.get_with_current_time("test_key")
+        second, data = store.get_with_current_time("test_key")
+
+        assert data is None
+        pipeline.execute.assert_called_once_with()
+        client.hgetall.assert_called_once_with("test_key")
+        client.time.assert_not_called()
+        assert first <= second
+        assert second - first < datetime.timedelta(seconds=1)
+
+    def test_clock_is_optional(self):
+        """Verify we send TIME for every call by default."""
+        store = redstore.RedisStore(url="redis://", client=mock.Mock())
+
+        assert store.clock is None
+
     def test_compare_and_set(self):
-        """Verify we call the right things for atomic operation."""
-        pipeline = mock.MagicMock(autospec=redis.client.Pipeline)
-        pipeline.__enter__.return_value = pipeline
+        """Verify we swap data with a single script call."""
         client = mock.Mock()
-        client.pipeline.return_value = pipeline
-        pipeline.hgetall.return_value = {}
+        script = client.register_script.return_value
+        script.return_value = [1]
         data = limit_data.LimitData(used=5, remaining=10)
         store = redstore.RedisStore(url="redis://", client=client)
 
-        store.compare_and_swap("key", old=None, new=data)
-        assert client.pipeline.call_count == 1
-        pipeline.watch.assert_called_once_with("key")
-        pipeline.hgetall.assert_called_once_with("key")
-        pipeline.multi.assert_called_once_with()
-        pipeline.hmset.assert_called_once_with("key", data.asdict())
-        pipeline.execute.assert_called_once_with()
+        assert store.compare_and_swap("key", old=None, new=data) == data
+        store.compare_and_swap("key", old=data, new=data)
+
+        client.register_script.assert_called_once_with(
+            redstore.COMPARE_AND_SWAP_LUA
+        )
+        new_args = [
+            item for pair in data.asdict().items() for item in pair
+        ]
+        assert script.call_args_list == [
+            mock.call(keys=["key"], args=[0, "", 0] + new_args),
+            mock.call(
+                keys=["key"],
+                args=[4] + new_args + [data.aspacked(), 0] + new_args,
+            ),
+        ]
+
+    def test_compare_and_set_with_expiry(self):
+        """Verify we pass the expiry in milliseconds to the script."""
+        client = mock.Mock()
+        script = client.register_script.return_value
+        script.return_value = [1]
+        data = limit_data.LimitData(used=5, remaining=10)
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        store.compare_and_swap(
+            "key",
+            old=None,
+            new=data,
+            expiry=datetime.timedelta(seconds=1, microseconds=1),
+        )
+
+        _, kwargs = script.call_args
+        assert kwargs["args"][:3] == [0, "", 1001]
+
+    def test_compare_and_set_packed(self):
+        """Verify we write the packed codec while comparing either format."""
+        client = mock.Mock()
+        script = client.register_script.return_value
+        script.return_value = [1]
+        old = limit_data.LimitData(used=4, remaining=11)
+        new = old.copy_with(used=5, remaining=10)
+        store = redstore.RedisStore(
+            url="redis://", client=client, codec="packed"
+        )
+
+        store.compare_and_swap("key", old=old, new=new)
+
+        old_args = [item for pair in old.asdict().items() for item in pair]
+        script.assert_called_once_with(
+            keys=["key"],
+            args=[4] + old_args + [old.aspacked(), 0, "p", new.aspacked()],
+        )
 
     def test_compare_and_set_raises_mismatched_data_error(self):
-        """Verify we avoid setting data when we can't verify the old state."""
-        pipeline = mock.MagicMock(autospec=redis.client.Pipeline)
-        pipeline.__enter__.return_value = pipeline
+        """Verify we report the current data when the old data differs."""
         client = mock.Mock()
-        client.pipeline.return_value = pipeline
-        pipeline.hgetall.return_value = {"used": 5, "remaining": 10}
+        client.register_script.return_value.return_value = [
+            0,
+            [
+                "used",
+                "5",
+                "remaining",
+                "10",
+                "created_at",
+                "2018-12-11T12:12:15.123456+0000",
+                "time",
+                "",
+            ],
+        ]
         old = limit_data.LimitData(used=4, remaining=11)
         new = limit_data.LimitData(used=5, remaining=10)
         store = redstore.RedisStore(url="redis://", client=client)
 
-        with pytest.raises(rexc.MismatchedDataError):
+        with pytest.raises(rexc.MismatchedDataError) as excinfo:
             store.compare_and_swap("key", old=old, new=new)
 
-    def test_compare_and_set_raises_data_changed_in_store_error(self):
-        """Verify we avoid setting data when we can't verify the old state."""
-        pipeline = mock.MagicMock(autospec=redis.client.Pipeline)
-        pipeline.__enter__.return_value = pipeline
+        assert excinfo.value.expected_limit_data == old
+        assert excinfo.value.actual_limit_data.used == 5
+        assert excinfo.value.actual_limit_data.remaining == 10
+
+    def test_compare_and_set_raises_mismatched_data_error_for_no_data(self):
+        """Verify we report when there is no current data."""
         client = mock.Mock()
-        client.pipeline.return_value = pipeline
-        pipeline.hgetall.side_effect = redis.WatchError("'key' changed")
+        client.register_script.return_value.return_value = [0, []]
         old = limit_data.LimitData(used=4, remaining=11)
         new = limit_data.LimitData(used=5, remaining=10)
         store = redstore.RedisStore(url="redis://", client=client)
 
-        with pytest.raises(rexc.DataChangedInStoreError):
+        with pytest.raises(rexc.MismatchedDataError) as excinfo:
             store.compare_and_swap("key", old=old, new=new)
+
+        assert excinfo.value.actual_limit_data is None
+
+    def test_get_many(self):
+        """Verify we retrieve every key in one pipeline."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        data = limit_data.LimitData(used=1, remaining=4)
+        pipeline.execute.return_value = [data.asdict(), {}]
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        assert store.get_many(["a", "b"]) == [data, None]
+        client.pipeline.assert_called_once_with(transaction=False)
+        assert pipeline.hgetall.call_args_list == [
+            mock.call("a"),
+            mock.call("b"),
+        ]
+
+    def test_set_many(self):
+        """Verify we store every key in one transaction."""
+        client = mock.MagicMock()
+        pipeline = client.pipeline.return_value.__enter__.return_value
+        data = limit_data.LimitData(used=1, remaining=4)
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        stored = store.set_many(
+            [
+                redstore.base.Write("a", data),
+                redstore.base.Write("b", data, datetime.timedelta(seconds=2)),
+            ]
+        )
+
+        assert stored == [data, data]
+        client.pipeline.assert_called_once_with()
+        assert pipeline.delete.call_args_list == [
+            mock.call("a"),
+            mock.call("b"),
+        ]
+        pipeline.pexpire.assert_called_once_with("b", 2000)
+        pipeline.execute.assert_called_once_with()
+
+    def test_compare_and_swap_many(self):
+        """Verify we swap every key with a single script call."""
+        client = mock.Mock()
+        script = client.register_script.return_value
+        script.return_value = [1]
+        old = limit_data.LimitData(used=4, remaining=11)
+        new = old.copy_with(used=5, remaining=10)
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        swapped = store.compare_and_swap_many(
+            [
+                redstore.base.Swap("a", None, new),
+                redstore.base.Swap("b", old, new, datetime.timedelta(1)),
+            ]
+        )
+
+        assert swapped == [new, new]
+        client.register_script.assert_called_once_with(
+            redstore.COMPARE_AND_SWAP_MANY_LUA
+        )
+        first = redstore.compare_and_swap_args(None, new, None, "hash")
+        second = redstore.compare_and_swap_args(
+            old, new, datetime.timedelta(1), "hash"
+        )
+        script.assert_called_once_with(
+            keys=["a", "b"],
+            args=[len(first)] + first + [len(second)] + second,
+        )
+
+        store.compare_and_swap_many([redstore.base.Swap("a", new, old)])
+        client.register_script.assert_called_once()
+
+    def test_compare_and_swap_many_raises_mismatched_data_error(self):
+        """Verify we report which key's data differs."""
+        client = mock.Mock()
+        data = limit_data.LimitData(used=1, remaining=4)
+        client.register_script.return_value.return_value = [
+            0,
+            2,
+            ["p", data.aspacked()],
+        ]
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        with pytest.raises(rexc.MismatchedDataError) as excinfo:
+            store.compare_and_swap_many(
+                [
+                    redstore.base.Swap("a", None, data),
+                    redstore.base.Swap("b", None, data),
+                ]
+            )
+
+        assert excinfo.value.key == "b"
+        assert excinfo.value.expected_limit_data is None
+        assert excinfo.value.actual_limit_data == data
+
+    def test_compare_and_swap_many_without_swaps(self):
+        """Verify we do not call Redis when there is nothing to swap."""
+        client = mock.Mock()
+        store = redstore.RedisStore(url="redis://", client=client)
+
+        assert store.compare_and_swap_many([]) == []
+        client.register_script.assert_not_called()
+
+
+class TestAsyncRedisStore:
+    """Test the AsyncRedisStore class."""
+
+    def test_creates_asyncio_client(self):
+        """Verify we build a redis.asyncio client from the URL."""
+        store = redstore.AsyncRedisStore(url="redis://localhost")
+
+        assert isinstance(store.client, redis.asyncio.StrictRedis)
+
+    def test_invalid_url(self):
+        """Verify we validate the URL like RedisStore does."""
+        with pytest.raises(rexc.InvalidRedisURL):
+            redstore.AsyncRedisStore(url="https://redis.io")
+
+    def test_set(self):
+        """Verify we replace the hash and set its expiry in a pipeline."""
+        client = mock.MagicMock()
+        pipeline = mock.Mock(execute=mock.AsyncMock())
+        client.pipeline.return_value.__aenter__.return_value = pipeline
+        store = redstore.AsyncRedisStore(
+            url="redis://", client=client, codec="packed"
+        )
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        stored = helpers.run(
+            store.set(
+                key="key", data=data, expiry=datetime.timedelta(seconds=2)
+            )
+        )
+
+        assert stored is data
+        pipeline.delete.assert_called_once_with("key")
+        pipeline.hset.assert_called_once_with(
+            "key", mapping={"p": data.aspacked()}
+        )
+        pipeline.pexpire.assert_called_once_with("key", 2000)
+        pipeline.execute.assert_awaited_once_with()
+
+    def test_set_without_expiry(self):
+        """Verify we only set an expiry when given one."""
+        client = mock.MagicMock()
+        pipeline = mock.Mock(execute=mock.AsyncMock())
+        client.pipeline.return_value.__aenter__.return_value = pipeline
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+        data = limit_data.LimitData(used=1, remaining=4)
+
+        helpers.run(store.set(key="key", data=data))
+
+        pipeline.hset.assert_called_once_with("key", mapping=data.asdict())
+        pipeline.pexpire.assert_not_called()
+
+    def test_increment(self):
+        """Verify we increment and expire the counter in a pipeline."""
+        client = mock.MagicMock()
+        pipeline = mock.Mock(execute=mock.AsyncMock(return_value=[1, True]))
+        client.pipeline.return_value.__aenter__.return_value = pipeline
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+
+        incremented = helpers.run(
+            store.increment("key", 1, datetime.timedelta(seconds=1))
+        )
+
+        assert incremented == 1
+        pipeline.hincrby.assert_called_once_with("key", "used", 1)
+        pipeline.pexpire.assert_called_once_with("key", 1000)
+
+    def test_increment_without_expiry(self):
+        """Verify we only expire counters when given an expiry."""
+        client = mock.MagicMock()
+        pipeline = mock.Mock(execute=mock.AsyncMock(return_value=[0]))
+        client.pipeline.return_value.__aenter__.return_value = pipeline
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+
+        assert helpers.run(store.increment("key", 0)) == 0
+        pipeline.pexpire.assert_not_called()
+
+    def test_get(self):
+        """Verify we decode the hash we retrieve."""
+        client = mock.Mock()
+        data = limit_data.LimitData(used=1, remaining=4)
+        client.hgetall = mock.AsyncMock(return_value=data.asdict())
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+
+        assert helpers.run(store.get("key")) == data
+        client.hgetall.assert_awaited_once_with("key")
+
+    def test_get_with_current_time(self):
+        """Verify we send TIME and HGETALL in one pipeline."""
+        client = mock.Mock()
+        data = limit_data.LimitData(used=1, remaining=4)
+        pipeline = mock.Mock(
+            execute=mock.AsyncMock(
+                return_value=[(1_545_740_827, 608_937), data.asdict()]
+            )
+        )
+        client.pipeline.return_value.__aenter__ = mock.AsyncMock(
+            return_value=pipeline
+        )
+        client.pipeline.return_value.__aexit__ = mock.AsyncMock(
+            return_value=None
+        )
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+
+        now, retrieved = helpers.run(store.get_with_current_time("key"))
+
+        assert now == datetime.datetime(
+            2018, 12, 25, 12, 27, 7, 608_937, tzinfo=datetime.timezone.utc
+        )
+        assert retrieved == data
+        client.pipeline.assert_called_once_with(transaction=False)
+        pipeline.time.assert_called_once_with()
+        pipeline.hgetall.assert_called_once_with("key")
+
+    def test_get_with_current_time_estimates_redis_time(self):
+        """Verify we only send HGETALL once the clock has a sample."""
+        client = mock.Mock()
+        client.time = mock.AsyncMock(return_value=(1_545_740_827, 608_937))
+        client.hgetall = mock.AsyncMock(return_value={})
+        store = redstore.AsyncRedisStore(
+            url="redis://",
+            client=client,
+            clock_resync_interval=datetime.timedelta(seconds=10),
+        )
+        helpers.run(store.current_time())
+
+        now, data = helpers.run(store.get_with_current_time("key"))
+
+        assert data is None
+        assert now.year == 2018
+        client.pipeline.assert_not_called()
+        client.hgetall.assert_awaited_once_with("key")
+
+    def test_current_time_uses_redis_time(self):
+        """Verify we retrieve the current time from Redis."""
+        client = mock.Mock()
+        client.time = mock.AsyncMock(return_value=(1_545_740_827, 608_937))
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+
+        now = helpers.run(store.current_time())
+
+        assert now == datetime.datetime(
+            2018, 12, 25, 12, 27, 7, 608_937, tzinfo=datetime.timezone.utc
+        )
+
+    def test_current_time_estimates_redis_time(self):
+        """Verify we only await TIME once per resync interval."""
+        client = mock.Mock()
+        client.time = mock.AsyncMock(return_value=(1_545_740_827, 608_937))
+        store = redstore.AsyncRedisStore(
+            url="redis://",
+            client=client,
+            clock_resync_interval=datetime.timedelta(seconds=10),
+        )
+
+        first = helpers.run(store.current_time())
+        second = helpers.run(store.current_time())
+
+        client.time.assert_awaited_once_with()
+        expected = datetime.datetime(
+            2018, 12, 25, 12, 27, 7, 608_937, tzinfo=datetime.timezone.utc
+        )
+        assert expected <= first <= second
+        assert second - expected < datetime.timedelta(seconds=1)
+
+    def test_compare_and_set(self):
+        """Verify we run the same script as RedisStore."""
+        client = mock.Mock()
+        script = client.register_script.return_value = mock.AsyncMock()
+        script.return_value = [1]
+        data = limit_data.LimitData(used=5, remaining=10)
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+
+        swapped = helpers.run(store.compare_and_swap("key", None, data))
+        helpers.run(store.compare_and_swap("key", None, data))
+
+        assert swapped == data
+        client.register_script.assert_called_once_with(
+            redstore.COMPARE_AND_SWAP_LUA
+        )
+        new_args = [
+            item for pair in data.asdict().items() for item in pair
+        ]
+        script.assert_awaited_with(keys=["key"], args=[0, "", 0] + new_args)
+
+    def test_compare_and_set_raises_mismatched_data_error(self):
+        """Verify we report the current data when the old data differs."""
+        client = mock.Mock()
+        current = limit_data.LimitData(used=5, remaining=10)
+        client.register_script.return_value = mock.AsyncMock(
+            return_value=[0, ["p", current.aspacked()]]
+        )
+        old = limit_data.LimitData(used=4, remaining=11)
+        store = redstore.AsyncRedisStore(url="redis://", client=client)
+
+        with pytest.raises(rexc.MismatchedDataError) as excinfo:
+            helpers.run(store.compare_and_swap("key", old=old, new=current))
+
+        assert excinfo.value.expected_limit_data == old
+        assert excinfo.value.actual_limit_data == current
@@ -1,7 +1,10 @@
 """Tests for our result module classes."""
 import datetime
+import pickle
 
+import attr
 import mock
+import pytest
 
 from rush import result
 
@@ -79,3 +82,118 @@ class TestRateLimitResult:
         rlresult.retry_at()
 
         dt.now.assert_called_once_with(datetime.timezone.utc)
+
+    def test_resets_at_uses_decision_time(self):
+        """Verify we count from when the decision was made if it is known."""
+        decided_at = datetime.datetime(
+            2018, 12, 1, 12, 1, 1, tzinfo=datetime.timezone.utc
+        )
+        rlresult = result.RateLimitResult(
+            limit=10000,
+            limited=True,
+            remaining=0,
+            reset_after=datetime.timedelta(seconds=5),
+            retry_after=datetime.timedelta(seconds=2),
+            decided_at=decided_at,
+        )
+
+        assert rlresult.decided_at is decided_at
+        assert rlresult.resets_at() == decided_at + datetime.timedelta(
+            seconds=5
+        )
+        assert rlresult.retry_at() == decided_at + datetime.timedelta(
+            seconds=2
+        )
+
+
+class TestFastRateLimitResult:
+    """Test results created from microseconds."""
+
+    def test_from_microseconds(self):
+        """Verify we build the timedeltas and datetimes when first used."""
+        rlresult = result.RateLimitResult.from_microseconds(
+            10000, True, 0, 5_000_000, 2_000_000, 1_543_665_661_000_000
+        )
+        decided_at = datetime.datetime(
+            2018, 12, 1, 12, 1, 1, tzinfo=datetime.timezone.utc
+        )
+
+        assert rlresult.reset_after == datetime.timedelta(seconds=5)
+        assert rlresult.reset_after is rlresult.reset_after
+        assert rlresult.retry_after == datetime.timedelta(seconds=2)
+        assert rlresult.retry_after is rlresult.retry_after
+        assert rlresult.decided_at == decided_at
+        assert rlresult.decided_at is rlresult.decided_at
+        assert rlresult.resets_at() == decided_at + datetime.timedelta(
+            seconds=5
+        )
+        assert rlresult.retry_at() == decided_at + datetime.timedelta(
+            seconds=2
+        )
+
+    def test_without_decision_time(self):
+        """Verify a result may not know when it was decided."""
+        rlresult = result.RateLimitResult.from_microseconds(
+            5, False, 4, -1_000_000, -1_000_000
+        )
+
+        assert rlresult.decided_at is None
+        assert rlresult.decided_at_us is None
+
+    def test_microseconds_match_timedeltas(self):
+        """Verify results created from timedeltas expose microseconds."""
+        rlresult = result.RateLimitResult(
+            limit=5,
+            limited=False,
+            remaining=4,
+            reset_after=datetime.timedelta(milliseconds=800),
+            retry_after=datetime.timedelta(seconds=-1),
+        )
+
+        assert rlresult.reset_after_us == 800_000
+        assert rlresult.retry_after_us == -1_000_000
+
+    def test_equality_ignores_decision_time(self):
+        """Verify results compare their values but not when they were made."""
+        first = result.RateLimitResult.from_microseconds(
+            5, False, 4, 1_000_000, -1_000_000, 1
+        )
+        second = result.RateLimitResult(
+            limit=5,
+            limited=False,
+            remaining=4,
+            reset_after=datetime.timedelta(seconds=1),
+            retry_after=datetime.timedelta(seconds=-1),
+        )
+        other = result.RateLimitResult.from_microseconds(
+            5, False, 3, 1_000_000, -1_000_000, 1
+        )
+
+        assert first == first
+        assert first == second
+        assert hash(first) == hash(second)
+        assert first != other
+        assert first != (5, False, 4, 1_000_000, -1_000_000)
+        assert "remaining=4" in repr(first)
+
+    def test_is_frozen(self):
+        """Verify results cannot be changed."""
+        rlresult = result.RateLimitResult.from_microseconds(
+            5, False, 4, -1_000_000, -1_000_000
+        )
+
+        with pytest.raises(attr.exceptions.FrozenInstanceError):
+            rlresult.remaining = 3
+        with pytest.raises(attr.exceptions.FrozenInstanceError):
+            del rlresult.remaining
+
+    def test_pickles(self):
+        """Verify results survive pickling."""
+        rlresult = result.RateLimitResult.from_microseconds(
+            5, True, 0, 1_000_000, 200_000, 1_543_665_661_000_000
+        )
+
+        unpickled = pickle.loads(pickle.dumps(rlresult))
+
+        assert unpickled == rlresult
+        assert unpickled.decided_at_us == rlresult.decided_at_us
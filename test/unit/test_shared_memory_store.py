@@ -0,0 +1,178 @@
+"""Tests for our shared memory store."""
+import datetime
+import multiprocessing
+import threading
+
+import mock
+import pytest
+
+from rush import exceptions
+from rush import limit_data
+from rush.stores import shared_memory
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Provide a small shared memory store backed by a temporary file."""
+    store = shared_memory.SharedMemoryStore(
+        path=str(tmp_path / "rush-shm"), capacity=8
+    )
+    yield store
+    store.close()
+
+
+def _data(**kwargs):
+    kwargs.setdefault(
+        "created_at",
+        datetime.datetime(
+            2018, 12, 4, 9, 0, 0, 123_456, tzinfo=datetime.timezone.utc
+        ),
+    )
+    return limit_data.LimitData(**kwargs)
+
+
+def _increment_in_child(path, key, count):
+    store = shared_memory.SharedMemoryStore(path=path, capacity=8)
+    for _ in range(count):
+        while True:
+            old = store.get(key)
+            try:
+                store.compare_and_swap(
+                    key, old=old, new=old.copy_with(used=old.used + 1)
+                )
+            except exceptions.MismatchedDataError:
+                continue
+            break
+    store.close()
+
+
+class TestSharedMemoryStore:
+    """Test methods on our shared memory store."""
+
+    def test_requires_positive_capacity(self, tmp_path):
+        """Verify we refuse to create an empty table."""
+        with pytest.raises(ValueError):
+            shared_memory.SharedMemoryStore(
+                path=str(tmp_path / "rush-shm"), capacity=0
+            )
+
+    def test_refuses_mismatched_capacity(self, store):
+        """Verify every process must agree on the table's capacity."""
+        with pytest.raises(exceptions.SharedMemoryStoreError) as excinfo:
+            shared_memory.SharedMemoryStore(path=store.path, capacity=16)
+
+        assert excinfo.value.path == store.path
+
+    def test_get_returns_none(self, store):
+        """Verify we return nothing for keys we have not seen."""
+        assert store.get("mykey") is None
+
+    def test_set_and_get(self, store):
+        """Verify we round-trip limit data through the table."""
+        data = _data(
+            used=1,
+            remaining=4,
+            time=datetime.datetime(
+                2018, 12, 4, 9, 0, 1, tzinfo=datetime.timezone.utc
+            ),
+        )
+
+        assert store.set(key="mykey", data=data) == data
+        assert store.get("mykey") == data
+
+        updated = data.copy_with(used=2, remaining=3)
+        store.set(key="mykey", data=updated)
+        assert store.get("mykey") == updated
+
+    def test_data_is_shared_between_instances(self, store):
+        """Verify another mapping of the same file sees our writes."""
+        data = _data(used=1, remaining=4)
+        store.set(key="mykey", data=data)
+
+        other = shared_memory.SharedMemoryStore(path=store.path, capacity=8)
+        try:
+            assert other.get("mykey") == data
+        finally:
+            other.close()
+
+    def test_compare_and_swap(self, store):
+        """Verify we swap data when the old data matches."""
+        old = _data(used=1, remaining=4)
+        new = old.copy_with(used=2, remaining=3)
+
+        assert store.compare_and_swap("mykey", old=None, new=old) == old
+        assert store.compare_and_swap("mykey", old=old, new=new) == new
+        assert store.get("mykey") == new
+
+    def test_compare_and_swap_raises_mismatched_data_error(self, store):
+        """Verify the fact that we check current data against old data."""
+        old = _data(used=1, remaining=4)
+        store.set(key="mykey", data=old.copy_with(used=2))
+
+        with pytest.raises(exceptions.MismatchedDataError):
+            store.compare_and_swap("mykey", old=old, new=old)
+        with pytest.raises(exceptions.MismatchedDataError):
+            store.compare_and_swap("mykey", old=None, new=old)
+        with pytest.raises(exceptions.MismatchedDataError):
+            store.compare_and_swap("otherkey", old=old, new=old)
+
+    def test_insert_compares_keys_inserted_concurrently(self, store):
+        """Verify we compare against a key inserted after we looked."""
+        stored = _data(used=1, remaining=4)
+        store.set(key="mykey", data=stored)
+        found = store._find(shared_memory._digest("mykey"))
+
+        # Pretend another process inserted the key after our first probe
+        with mock.patch.object(
+            store, "_find", side_effect=[(False, 0), found]
+        ):
+            with pytest.raises(exceptions.MismatchedDataError) as excinfo:
+                store.compare_and_swap("mykey", old=None, new=stored)
+
+        assert excinfo.value.actual_limit_data == stored
+
+    def test_raises_when_full(self, store):
+        """Verify we report running out of buckets."""
+        data = _data(used=1, remaining=4)
+        for n in range(8):
+            store.set(key=f"key-{n}", data=data)
+
+        with pytest.raises(exceptions.SharedMemoryStoreFull) as excinfo:
+            store.set(key="one-too-many", data=data)
+
+        assert excinfo.value.capacity == 8
+        assert store.get("one-too-many") is None
+        assert store.get("key-7") == data
+
+    def test_compare_and_swap_is_atomic_across_threads(self, store):
+        """Verify racing threads never lose an update."""
+        store.set(key="mykey", data=_data(used=0, remaining=0))
+        threads = [
+            threading.Thread(
+                target=_increment_in_child, args=(store.path, "mykey", 100)
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.get("mykey").used == 400
+
+    def test_compare_and_swap_is_atomic_across_processes(self, store):
+        """Verify racing processes never lose an update."""
+        store.set(key="mykey", data=_data(used=0, remaining=0))
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(
+                target=_increment_in_child, args=(store.path, "mykey", 100)
+            )
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert store.get("mykey").used == 400
@@ -0,0 +1,283 @@
+"""Tests for our sliding log limiter."""
+import datetime
+
+import mock
+import pytest
+
+from rush import limit_data
+from rush import limiters
+from rush import quota
+from rush import stores
+from rush.limiters import sliding_log
+from rush.stores import dictionary
+
+from . import helpers  # noqa: I100,I202
+
+_NOW = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+@pytest.fixture
+def limiter():
+    """Provide a sliding log limiter with a controllable clock."""
+    clock = mock.Mock(return_value=limit_data.datetime_to_microseconds(_NOW))
+    return sliding_log.SlidingLogLimiter(clock=clock)
+
+
+def _advance(limiter, **kwargs):
+    limiter.clock.return_value += (
+        datetime.timedelta(**kwargs) // _ONE_MICROSECOND
+    )
+
+
+class TestSlidingLog:
+    """Tests for our SlidingLog ring buffer."""
+
+    def test_wraps_around(self):
+        """Verify the buffer reuses the space of expired requests."""
+        log = sliding_log.SlidingLog(3, 10)
+        log.append(1, 3)
+        log.expire(12)
+        log.append(12, 2)
+
+        assert log.size == 2
+        assert [log.time_at(n) for n in range(log.size)] == [12, 12]
+        assert list(log.times) == [12, 12, 1]
+        assert log.limit == 3
+
+    def test_grows_on_demand(self):
+        """Verify the buffer only grows when it is full, in order."""
+        log = sliding_log.SlidingLog(8, 10)
+        assert len(log.times) == 0
+
+        log.append(1, 1)
+        log.append(2, 1)
+        log.expire(11)
+        log.append(12, 1)
+        assert list(log.times) == [12, 2]
+
+        log.append(13, 1)
+
+        assert list(log.times) == [2, 12, 13, 0]
+        assert [log.time_at(n) for n in range(log.size)] == [2, 12, 13]
+
+    def test_grows_up_to_the_limit(self):
+        """Verify the buffer never holds more than the limit."""
+        log = sliding_log.SlidingLog(3, 10)
+        log.append(1, 2)
+
+        log.append(2, 1)
+
+        assert list(log.times) == [1, 1, 2]
+
+    def test_resized_keeps_the_newest_requests(self):
+        """Verify a smaller log keeps the newest requests."""
+        log = sliding_log.SlidingLog(3, 10)
+        log.append(1, 1)
+        log.append(2, 2)
+
+        resized = log.resized(2, 20)
+
+        assert [resized.time_at(n) for n in range(resized.size)] == [2, 2]
+        assert resized.period_us == 20
+
+    def test_idle(self):
+        """Verify a log is idle once its newest request expires."""
+        log = sliding_log.SlidingLog(2, 10)
+        assert log.idle(0) is True
+
+        log.append(5, 1)
+
+        assert log.idle(14) is False
+        assert log.idle(15) is True
+
+
+class TestSlidingLogLimiter:
+    """Tests for our SlidingLogLimiter class."""
+
+    def test_logs_allowed_requests(self, limiter):
+        """Verify requests are limited once the log is full."""
+        rate = quota.Quota.per_hour(3)
+        results = [limiter.rate_limit("key", 1, rate) for _ in range(4)]
+
+        assert [(r.limited, r.remaining) for r in results] == [
+            (False, 2),
+            (False, 1),
+            (False, 0),
+            (True, 0),
+        ]
+        assert results[0].reset_after == datetime.timedelta(hours=1)
+        assert results[0].retry_after == datetime.timedelta(seconds=-1)
+        assert results[3].retry_after == datetime.timedelta(hours=1)
+        assert results[3].decided_at == _NOW
+        assert limiter.logs.logs["key"].size == 3
+
+    def test_window_slides_exactly(self, limiter):
+        """Verify each request frees its place a period after it was made."""
+        rate = quota.Quota.per_hour(2)
+        limiter.rate_limit("key", 1, rate)
+        _advance(limiter, minutes=30)
+        limiter.rate_limit("key", 1, rate)
+        _advance(limiter, minutes=20)
+
+        limited = limiter.rate_limit("key", 1, rate)
+        assert limited.limited is True
+        assert limited.retry_after == datetime.timedelta(minutes=10)
+
+        _advance(limiter, minutes=10)
+        allowed = limiter.rate_limit("key", 1, rate)
+        assert allowed.limited is False
+        assert allowed.remaining == 0
+        assert allowed.reset_after == datetime.timedelta(hours=1)
+
+    def test_retry_after_waits_for_enough_requests(self, limiter):
+        """Verify larger requests wait for more requests to expire."""
+        rate = quota.Quota.per_hour(3)
+        for _ in range(3):
+            limiter.rate_limit("key", 1, rate)
+            _advance(limiter, minutes=10)
+
+        limitresult = limiter.rate_limit("key", 2, rate)
+
+        assert limitresult.retry_after == datetime.timedelta(minutes=40)
+        assert limitresult.reset_after == datetime.timedelta(minutes=50)
+
+    def test_inspects_full_logs(self, limiter):
+        """Verify checking nothing waits for room for one request."""
+        rate = quota.Quota.per_hour(1)
+        limiter.rate_limit("key", 1, rate)
+        _advance(limiter, minutes=15)
+
+        limitresult = limiter.rate_limit("key", 0, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.retry_after == datetime.timedelta(minutes=45)
+
+    def test_requests_larger_than_the_limit(self, limiter):
+        """Verify requests which never fit wait a whole period."""
+        rate = quota.Quota.per_hour(3)
+
+        limitresult = limiter.rate_limit("key", 4, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.remaining == 3
+        assert limitresult.retry_after == datetime.timedelta(hours=1)
+        assert limitresult.reset_after == datetime.timedelta(seconds=-1)
+
+    def test_quota_changes_resize_the_log(self, limiter):
+        """Verify a key checked with a new quota keeps its newest requests."""
+        limiter.rate_limit("key", 3, quota.Quota.per_hour(3))
+
+        limitresult = limiter.rate_limit("key", 1, quota.Quota.per_hour(5))
+
+        assert limitresult.remaining == 1
+        assert limiter.logs.logs["key"].limit == 5
+
+    def test_forgets_idle_keys(self, limiter):
+        """Verify the least recently used log is freed once it expires."""
+        rate = quota.Quota.per_second(1)
+        limiter.rate_limit("a", 1, rate)
+        limiter.rate_limit("b", 1, rate)
+        limiter.rate_limit("a", 1, rate)
+        _advance(limiter, seconds=1)
+
+        limiter.rate_limit("c", 1, rate)
+
+        assert list(limiter.logs.logs) == ["a", "c"]
+        assert len(limiter.logs) == 2
+
+    def test_reset(self, limiter):
+        """Verify reset forgets the key's log."""
+        rate = quota.Quota.per_hour(3)
+        limiter.rate_limit("key", 3, rate)
+
+        limitresult = limiter.reset("key", rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 3
+        assert "key" not in limiter.logs.logs
+        assert limiter.rate_limit("key", 3, rate).limited is False
+
+    def test_rate_limit_many_checks_each_request(self, limiter):
+        """Verify checking many keys at once matches checking each."""
+        rate = quota.Quota.per_hour(3)
+
+        results = limiter.rate_limit_many([("a", 2), ("a", 2), ("b", 3)], rate)
+
+        assert [r.limited for r in results] == [False, True, False]
+        assert limiter.logs.logs["a"].size == 2
+
+    def test_reads_the_current_time_by_default(self):
+        """Verify we use the system clock unless given another."""
+        limiter = sliding_log.SlidingLogLimiter()
+
+        assert limiter.clock is limit_data.current_microseconds
+        assert limiter.store is None
+        assert isinstance(limiter, limiters.BaseLimiter)
+
+    def test_reads_the_time_from_a_store(self):
+        """Verify a store's clock is used when given one."""
+        store = dictionary.DictionaryStore()
+        store.current_time = mock.Mock(return_value=_NOW)
+        limiter = sliding_log.SlidingLogLimiter(store)
+
+        limitresult = limiter.rate_limit("key", 1, quota.Quota.per_hour(3))
+
+        assert limitresult.decided_at == _NOW
+        assert limiter.reset("key", quota.Quota.per_hour(3)).decided_at == _NOW
+        assert store.store == {}
+
+    def test_refuses_asyncio_stores(self):
+        """Verify the store must be a synchronous store."""
+        with pytest.raises(TypeError):
+            sliding_log.SlidingLogLimiter(store=stores.AsyncBaseStore())
+
+
+class TestAsyncSlidingLogLimiter:
+    """Tests for our AsyncSlidingLogLimiter class."""
+
+    def test_limits_like_the_synchronous_limiter(self):
+        """Verify we log, limit and reset like SlidingLogLimiter."""
+        rate = quota.Quota.per_hour(5)
+        limiter = sliding_log.AsyncSlidingLogLimiter(
+            clock=mock.Mock(
+                return_value=limit_data.datetime_to_microseconds(_NOW)
+            )
+        )
+
+        async def check_all():
+            results = [
+                await limiter.rate_limit("key", 2, rate) for _ in range(3)
+            ]
+            return results + [await limiter.reset("key", rate)]
+
+        results = helpers.run(check_all())
+
+        assert [(r.limited, r.remaining) for r in results] == [
+            (False, 3),
+            (False, 1),
+            (True, 1),
+            (False, 5),
+        ]
+        assert len(limiter.logs) == 0
+
+    def test_rate_limit_many_checks_each_request(self):
+        """Verify checking many keys at once matches checking each."""
+        rate = quota.Quota.per_hour(3)
+        store = dictionary.AsyncDictionaryStore()
+        store.current_time = mock.AsyncMock(return_value=_NOW)
+        limiter = sliding_log.AsyncSlidingLogLimiter(store)
+
+        results = helpers.run(
+            limiter.rate_limit_many([("a", 2), ("a", 2), ("b", 3)], rate)
+        )
+
+        assert [r.limited for r in results] == [False, True, False]
+        assert [r.decided_at for r in results] == [_NOW] * 3
+        assert limiter.logs.logs["a"].size == 2
+        assert isinstance(limiter, limiters.AsyncBaseLimiter)
+
+    def test_refuses_synchronous_stores(self):
+        """Verify the store must be an asyncio store."""
+        with pytest.raises(TypeError):
+            sliding_log.AsyncSlidingLogLimiter(store=stores.BaseStore())
@@ -0,0 +1,213 @@
+"""Tests for our sliding window counter limiter."""
+import datetime
+
+import mock
+import pytest
+
+from rush import limit_data
+from rush import limiters
+from rush import quota
+from rush.limiters import sliding_window
+from rush.stores import dictionary
+
+from . import helpers  # noqa: I100,I202
+
+# 45 seconds into the window of the second minute after the epoch
+_NOW = datetime.datetime(1970, 1, 1, 0, 1, 45, tzinfo=datetime.timezone.utc)
+_WINDOW_STARTED_AT = datetime.datetime(
+    1970, 1, 1, 0, 1, tzinfo=datetime.timezone.utc
+)
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+@pytest.fixture
+def limiter():
+    """Provide a sliding window limiter with a fixed clock."""
+    store = dictionary.DictionaryStore()
+    store.current_time = mock.Mock(return_value=_NOW)
+    return sliding_window.SlidingWindowLimiter(store=store)
+
+
+def _count(limiter, previous, current):
+    limiter.store.store["key"] = limit_data.LimitData(
+        used=current, remaining=previous, created_at=_WINDOW_STARTED_AT
+    )
+
+
+class TestSlidingWindowLimiter:
+    """Tests for our SlidingWindowLimiter class."""
+
+    def test_counts_requests_in_the_current_window(self, limiter):
+        """Verify requests are counted in the current window."""
+        rate = quota.Quota.per_minute(5)
+
+        limitresult = limiter.rate_limit("key", 2, rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 3
+        assert limitresult.reset_after == datetime.timedelta(seconds=75)
+        assert limitresult.retry_after == datetime.timedelta(seconds=-1)
+        assert limitresult.decided_at == _NOW
+        assert limiter.store.store == {
+            "key": limit_data.LimitData(
+                used=2, remaining=0, created_at=_WINDOW_STARTED_AT
+            )
+        }
+
+    def test_swaps_until_the_next_window_ends(self, limiter):
+        """Verify we swap the key's data to expire with the next window."""
+        rate = quota.Quota.per_minute(5)
+
+        with mock.patch.object(
+            limiter.store, "compare_and_swap"
+        ) as compare_and_swap:
+            limiter.rate_limit("key", 1, rate)
+            limiter.rate_limit("key", 0, rate)
+
+        compare_and_swap.assert_called_once_with(
+            key="key",
+            old=None,
+            new=mock.ANY,
+            expiry=datetime.timedelta(seconds=75),
+        )
+
+    def test_weights_the_previous_window(self, limiter):
+        """Verify a quarter of the previous window still counts."""
+        rate = quota.Quota.per_minute(10)
+        _count(limiter, 10, 0)
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.remaining == 7
+
+    def test_moves_counts_into_the_next_window(self, limiter):
+        """Verify the current window's count becomes the previous count."""
+        rate = quota.Quota.per_minute(10)
+        _count(limiter, 6, 8)
+        limiter.store.current_time.return_value = _NOW + rate.period
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.remaining == 7
+        assert limiter.store.store["key"] == limit_data.LimitData(
+            used=1,
+            remaining=8,
+            created_at=_WINDOW_STARTED_AT + rate.period,
+        )
+
+    def test_drops_counts_of_older_windows(self, limiter):
+        """Verify counts two windows old count as nothing."""
+        rate = quota.Quota.per_minute(10)
+        _count(limiter, 10, 10)
+        limiter.store.current_time.return_value = _NOW + 2 * rate.period
+
+        limitresult = limiter.rate_limit("key", 1, rate)
+
+        assert limitresult.remaining == 9
+        assert limiter.store.store["key"].remaining == 0
+
+    def test_inspects_empty_keys(self, limiter):
+        """Verify checking nothing against an empty key waits for nothing."""
+        rate = quota.Quota.per_minute(5)
+
+        limitresult = limiter.rate_limit("key", 0, rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 5
+        assert limitresult.reset_after == datetime.timedelta(seconds=-1)
+
+    def test_limited_requests_are_not_counted(self, limiter):
+        """Verify limited requests leave the stored data alone."""
+        rate = quota.Quota.per_minute(10)
+        _count(limiter, 10, 4)
+
+        limitresult = limiter.rate_limit("key", 5, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.remaining == 4
+        assert limitresult.reset_after == datetime.timedelta(seconds=75)
+        assert limiter.store.store["key"].used == 4
+
+    def test_rate_limit_retries_conflicts(self, limiter):
+        """Verify we re-read and recompute when another client wins."""
+        rate = quota.Quota.per_minute(5)
+        limiter.retry_policy = limiters.RetryPolicy(
+            base_delay=datetime.timedelta(0)
+        )
+        other = sliding_window.SlidingWindowLimiter(store=limiter.store)
+
+        with helpers.race_once(
+            limiter.store, lambda: other.rate_limit("key", 4, rate)
+        ):
+            limitresult = limiter.rate_limit("key", 2, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.remaining == 1
+        assert limiter.store.store["key"].used == 4
+        assert limiter.contention.retries == 1
+
+    @pytest.mark.parametrize(
+        "previous, current, quantity, retry_after",
+        [
+            # the previous window's weight must fall below 2 in this window
+            (10, 4, 5, datetime.timedelta(seconds=3) + _ONE_MICROSECOND),
+            # full windows are limited until one request fits
+            (0, 10, 0, datetime.timedelta(seconds=15) + _ONE_MICROSECOND),
+            # this window must become the previous window and fall below 7
+            (0, 10, 4, datetime.timedelta(seconds=33) + _ONE_MICROSECOND),
+            # requests larger than the limit never fit
+            (0, 0, 11, datetime.timedelta(seconds=75)),
+        ],
+    )
+    def test_retry_after_is_exact(
+        self, limiter, previous, current, quantity, retry_after
+    ):
+        """Verify limited requests fit once retry_after has passed."""
+        rate = quota.Quota.per_minute(10)
+        _count(limiter, previous, current)
+
+        limitresult = limiter.rate_limit("key", quantity, rate)
+
+        assert limitresult.limited is True
+        assert limitresult.retry_after == retry_after
+        if quantity <= rate.limit:
+            limiter.store.current_time.return_value = _NOW + retry_after
+            assert limiter.rate_limit("key", quantity, rate).limited is False
+
+    def test_reset(self, limiter):
+        """Verify reset empties the counts of both windows."""
+        rate = quota.Quota.per_minute(5)
+        _count(limiter, 5, 3)
+
+        limitresult = limiter.reset("key", rate)
+
+        assert limitresult.limited is False
+        assert limitresult.remaining == 5
+        assert limiter.rate_limit("key", 5, rate).limited is False
+
+
+class TestAsyncSlidingWindowLimiter:
+    """Tests for our AsyncSlidingWindowLimiter class."""
+
+    def test_limits_like_the_synchronous_limiter(self):
+        """Verify we count, limit and reset like SlidingWindowLimiter."""
+        rate = quota.Quota.per_minute(5)
+        store = dictionary.AsyncDictionaryStore()
+        store.current_time = mock.AsyncMock(return_value=_NOW)
+        limiter = sliding_window.AsyncSlidingWindowLimiter(store=store)
+
+        async def check_all():
+            results = [
+                await limiter.rate_limit("key", 2, rate) for _ in range(3)
+            ]
+            return results + [await limiter.reset("key", rate)]
+
+        results = helpers.run(check_all())
+
+        assert [(r.limited, r.remaining) for r in results] == [
+            (False, 3),
+            (False, 1),
+            (True, 1),
+            (False, 5),
+        ]
+        assert store.store["key"].used == 0
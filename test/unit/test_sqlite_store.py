@@ -0,0 +1,227 @@
+"""Tests for our SQLite store."""
+import datetime
+import gc
+import sqlite3
+import threading
+import weakref
+
+import pytest
+
+from rush import exceptions
+from rush import limit_data
+from rush.stores import sqlite
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Provide a SQLite store backed by a temporary database."""
+    store = sqlite.SQLiteStore(path=str(tmp_path / "rush.db"))
+    yield store
+    store.close()
+
+
+def _data(**kwargs):
+    kwargs.setdefault(
+        "created_at",
+        datetime.datetime(
+            2018, 12, 4, 9, 0, 0, 123_456, tzinfo=datetime.timezone.utc
+        ),
+    )
+    return limit_data.LimitData(**kwargs)
+
+
+class TestSQLiteStore:
+    """Test methods on our SQLite store."""
+
+    def test_uses_write_ahead_logging(self, store):
+        """Verify we put the database into WAL mode."""
+        (mode,) = store.connection.execute("PRAGMA journal_mode").fetchone()
+        assert mode == "wal"
+
+    @pytest.mark.parametrize("table", ["", "1table", "limits; DROP"])
+    def test_refuses_invalid_table_names(self, tmp_path, table):
+        """Verify we only interpolate plain identifiers into our SQL."""
+        with pytest.raises(ValueError):
+            sqlite.SQLiteStore(path=str(tmp_path / "rush.db"), table=table)
+
+    def test_requires_positive_commit_every(self, tmp_path):
+        """Verify we refuse to never commit."""
+        with pytest.raises(ValueError):
+            sqlite.SQLiteStore(
+                path=str(tmp_path / "rush.db"), commit_every=0
+            )
+
+    def test_get_returns_none(self, store):
+        """Verify we return nothing for keys we have not seen."""
+        assert store.get("mykey") is None
+
+    def test_set_and_get(self, store):
+        """Verify we round-trip limit data through the database."""
+        data = _data(
+            used=1,
+            remaining=4,
+            time=datetime.datetime(
+                2018, 12, 4, 9, 0, 1, tzinfo=datetime.timezone.utc
+            ),
+        )
+
+        assert store.set(key="mykey", data=data) == data
+        assert store.get("mykey") == data
+
+        updated = data.copy_with(used=2, remaining=3)
+        store.set(key="mykey", data=updated)
+        assert store.get("mykey") == updated
+
+    def test_stores_integer_microseconds(self, store):
+        """Verify we do not store formatted datetime strings."""
+        store.set(key="mykey", data=_data(used=1, remaining=4))
+
+        row = store.connection.execute(
+            "SELECT created_at, time FROM rush_limit_data"
+        ).fetchone()
+
+        assert row == (1_543_914_000_123_456, None)
+
+    def test_compare_and_swap(self, store):
+        """Verify we swap data when the old data matches."""
+        old = _data(used=1, remaining=4)
+        new = old.copy_with(used=2, remaining=3)
+
+        assert store.compare_and_swap("mykey", old=None, new=old) == old
+        assert store.compare_and_swap("mykey", old=old, new=new) == new
+        assert store.get("mykey") == new
+
+    def test_compare_and_swap_raises_mismatched_data_error(self, store):
+        """Verify the fact that we check current data against old data."""
+        old = _data(used=1, remaining=4)
+        current = old.copy_with(used=2)
+        store.set(key="mykey", data=current)
+
+        with pytest.raises(exceptions.MismatchedDataError) as excinfo:
+            store.compare_and_swap("mykey", old=old, new=old)
+        assert excinfo.value.actual_limit_data == current
+
+        with pytest.raises(exceptions.MismatchedDataError):
+            store.compare_and_swap("mykey", old=None, new=old)
+
+    def test_groups_writes_into_one_commit(self, tmp_path):
+        """Verify writes are only visible elsewhere once committed."""
+        path = str(tmp_path / "rush.db")
+        store = sqlite.SQLiteStore(
+            path=path,
+            commit_every=2,
+            commit_interval=datetime.timedelta(hours=1),
+        )
+        other = sqlite3.connect(path)
+        count = "SELECT COUNT(*) FROM rush_limit_data"
+        try:
+            store.set(key="a", data=_data(used=1, remaining=4))
+            assert other.execute(count).fetchone() == (0,)
+
+            store.set(key="b", data=_data(used=1, remaining=4))
+            assert other.execute(count).fetchone() == (2,)
+
+            store.set(key="c", data=_data(used=1, remaining=4))
+            store.flush()
+            assert other.execute(count).fetchone() == (3,)
+        finally:
+            other.close()
+            store.close()
+
+    def test_commits_after_interval(self, tmp_path):
+        """Verify writes are committed in the background."""
+        path = str(tmp_path / "rush.db")
+        store = sqlite.SQLiteStore(
+            path=path, commit_interval=datetime.timedelta(milliseconds=1)
+        )
+        try:
+            store.set(key="a", data=_data(used=1, remaining=4))
+            store._closed.wait(0.1)
+            assert store.connection.in_transaction is False
+        finally:
+            store.close()
+
+    def test_starts_committing_with_the_first_grouped_write(self, store):
+        """Verify the commit thread only starts once there is work for it."""
+        assert store._committer is None
+
+        store.set(key="a", data=_data(used=1, remaining=4))
+        committer = store._committer
+        store.set(key="b", data=_data(used=1, remaining=4))
+
+        assert committer.is_alive()
+        assert store._committer is committer
+
+    def test_commits_each_write_without_a_thread(self, tmp_path):
+        """Verify a store committing every write needs no commit thread."""
+        store = sqlite.SQLiteStore(
+            path=str(tmp_path / "rush.db"), commit_every=1
+        )
+        try:
+            store.set(key="a", data=_data(used=1, remaining=4))
+            assert store._committer is None
+            assert store.connection.in_transaction is False
+        finally:
+            store.close()
+
+    def test_collecting_the_store_commits_and_stops_the_thread(
+        self, tmp_path
+    ):
+        """Verify the commit thread does not keep the store alive."""
+        path = str(tmp_path / "rush.db")
+        data = _data(used=1, remaining=4)
+        store = sqlite.SQLiteStore(
+            path=path, commit_interval=datetime.timedelta(milliseconds=1)
+        )
+        store.set(key="mykey", data=data)
+        committer = store._committer
+        collected = weakref.ref(store)
+
+        del store
+        gc.collect()
+        committer.join(1)
+
+        assert collected() is None
+        assert not committer.is_alive()
+        reopened = sqlite.SQLiteStore(path=path)
+        try:
+            assert reopened.get("mykey") == data
+        finally:
+            reopened.close()
+
+    def test_commit_thread_stops_once_the_store_is_gone(self):
+        """Verify the commit loop ends when its store has been collected."""
+        closed = threading.Event()
+
+        sqlite._commit_periodically(lambda: None, closed, 0)
+
+        assert not closed.is_set()
+
+    def test_close_twice_does_nothing(self, tmp_path):
+        """Verify closing a closed store is harmless."""
+        store = sqlite.SQLiteStore(path=str(tmp_path / "rush.db"))
+        store.set(key="a", data=_data(used=1, remaining=4))
+        store.close()
+
+        store.close()
+
+    def test_flush_after_close_does_nothing(self, tmp_path):
+        """Verify flushing a closed store is harmless."""
+        store = sqlite.SQLiteStore(path=str(tmp_path / "rush.db"))
+        store.close()
+
+        store.flush()
+
+    def test_data_survives_reopening(self, tmp_path):
+        """Verify data persists across restarts."""
+        path = str(tmp_path / "rush.db")
+        data = _data(used=1, remaining=4)
+        store = sqlite.SQLiteStore(path=path)
+        store.set(key="mykey", data=data)
+        store.close()
+
+        reopened = sqlite.SQLiteStore(path=path)
+        try:
+            assert reopened.get("mykey") == data
+        finally:
+            reopened.close()
@@ -4,8 +4,12 @@ import datetime
 import mock
 import pytest
 
+from rush import exceptions
 from rush import limit_data
 from rush import stores
+from rush.stores import base
+
+from . import helpers  # noqa: I100,I202
 
 
 def _test_must_be_implemented(method, args, kwargs={}):
@@ -57,6 +61,119 @@ def test_get_with_time():
         get.assert_called_once_with("key")
 
 
+def test_get_with_current_time():
+    """Verify we default to current_time and get."""
+    store = stores.BaseStore()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with mock.patch.object(
+        store, "get", return_value=None
+    ) as get, mock.patch.object(store, "current_time", return_value=now):
+        assert store.get_with_current_time("key") == (now, None)
+
+    get.assert_called_once_with("key")
+
+
+def test_many_default_to_single_key_methods():
+    """Verify the bulk methods fall back to the single-key methods."""
+    store = stores.BaseStore()
+    data = limit_data.LimitData(used=1, remaining=4)
+    with mock.patch.object(
+        store, "get", return_value=None
+    ) as get, mock.patch.object(
+        store, "set", return_value=data
+    ) as set_, mock.patch.object(
+        store, "compare_and_swap", return_value=data
+    ) as cas:
+        assert store.get_many(["a", "b"]) == [None, None]
+        assert store.set_many([stores.Write("a", data)]) == [data]
+        assert store.compare_and_swap_many(
+            [stores.Swap("a", None, data), stores.Swap("b", None, data)]
+        ) == [data, data]
+
+    assert get.call_count == 4
+    set_.assert_called_once_with(key="a", data=data, expiry=None)
+    cas.assert_any_call(key="b", old=None, new=data, expiry=None)
+
+
+def test_compare_and_swap_many_checks_every_key_first():
+    """Verify nothing is swapped when any key's data has changed."""
+    store = stores.BaseStore()
+    data = limit_data.LimitData(used=1, remaining=4)
+    with mock.patch.object(
+        store, "get", side_effect=[None, data]
+    ), mock.patch.object(store, "compare_and_swap") as cas:
+        with pytest.raises(exceptions.MismatchedDataError) as excinfo:
+            store.compare_and_swap_many(
+                [stores.Swap("a", None, data), stores.Swap("b", None, data)]
+            )
+
+    assert excinfo.value.key == "b"
+    assert excinfo.value.actual_limit_data == data
+    cas.assert_not_called()
+
+
+def test_compare_and_swap_many_refuses_duplicate_keys():
+    """Verify we refuse to swap the same key twice."""
+    data = limit_data.LimitData(used=1, remaining=4)
+    with pytest.raises(ValueError):
+        stores.BaseStore().compare_and_swap_many(
+            [stores.Swap("a", None, data), stores.Swap("a", data, data)]
+        )
+
+
+def test_incremented_starts_new_counters():
+    """Verify a new counter holds the amount and when it was created."""
+    data = base.incremented(None, 3)
+
+    assert data.used == 3
+    assert data.remaining == 0
+    assert data.created_at is not None
+
+
+def test_incremented_keeps_the_creation_time():
+    """Verify incrementing a counter keeps when it was created."""
+    data = limit_data.LimitData.from_microseconds(2, 0, 1000000)
+
+    assert base.incremented(data, -1) == (
+        limit_data.LimitData.from_microseconds(1, 0, 1000000)
+    )
+
+
+def test_increment_swaps_the_incremented_data():
+    """Verify the default increment swaps the counter's new data."""
+    store = stores.BaseStore()
+    data = limit_data.LimitData.from_microseconds(2, 0, 1000000)
+    with mock.patch.object(
+        store, "get", return_value=data
+    ), mock.patch.object(store, "compare_and_swap") as cas:
+        assert store.increment("key", 1, datetime.timedelta(seconds=1)) == 3
+
+    cas.assert_called_once_with(
+        key="key",
+        old=data,
+        new=base.incremented(data, 1),
+        expiry=datetime.timedelta(seconds=1),
+    )
+
+
+def test_increment_raises_conflicts():
+    """Verify the default increment leaves retrying conflicts to callers."""
+    store = stores.BaseStore()
+    data = limit_data.LimitData.from_microseconds(2, 0, 1000000)
+    conflict = exceptions.MismatchedDataError(
+        "conflict", expected_limit_data=None, actual_limit_data=data
+    )
+    with mock.patch.object(
+        store, "get", return_value=None
+    ), mock.patch.object(
+        store, "compare_and_swap", side_effect=conflict
+    ) as cas:
+        with pytest.raises(exceptions.MismatchedDataError):
+            store.increment("key", 1)
+
+    cas.assert_called_once()
+
+
 def test_current_time():
     """Verify we default to the local clock."""
     store = stores.BaseStore()
@@ -64,3 +181,70 @@ def test_current_time():
         store.current_time()
 
     dt.now.assert_called_once_with(datetime.timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        ("get", {"key": "key"}),
+        ("set", {"key": "key", "data": None}),
+        ("compare_and_swap", {"key": "key", "old": None, "new": None}),
+    ],
+)
+def test_async_methods_must_be_implemented(method, kwargs):
+    """Verify AsyncBaseStore's coroutines raise NotImplementedError."""
+    coroutine = getattr(stores.AsyncBaseStore(), method)(**kwargs)
+    with pytest.raises(NotImplementedError):
+        helpers.run(coroutine)
+
+
+def test_async_current_time():
+    """Verify asyncio stores also default to the local clock."""
+    store = stores.AsyncBaseStore()
+    with mock.patch("datetime.datetime") as dt:
+        helpers.run(store.current_time())
+
+    dt.now.assert_called_once_with(datetime.timezone.utc)
+
+
+def test_async_get_with_current_time():
+    """Verify asyncio stores default to current_time and get."""
+    store = stores.AsyncBaseStore()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with mock.patch.object(
+        store, "get", mock.AsyncMock(return_value=None)
+    ) as get, mock.patch.object(
+        store, "current_time", mock.AsyncMock(return_value=now)
+    ):
+        assert helpers.run(store.get_with_current_time("key")) == (now, None)
+
+    get.assert_awaited_once_with("key")
+
+
+def test_async_increment_swaps_the_incremented_data():
+    """Verify the default asyncio increment swaps the counter's new data."""
+    store = stores.AsyncBaseStore()
+    with mock.patch.object(
+        store, "get", mock.AsyncMock(return_value=None)
+    ), mock.patch.object(store, "compare_and_swap", mock.AsyncMock()):
+        assert helpers.run(store.increment("key", 2)) == 2
+
+
+def test_async_increment_raises_conflicts():
+    """Verify the default asyncio increment leaves retrying to callers."""
+    store = stores.AsyncBaseStore()
+    data = limit_data.LimitData.from_microseconds(2, 0, 1000000)
+    conflict = exceptions.MismatchedDataError(
+        "conflict", expected_limit_data=None, actual_limit_data=data
+    )
+    with mock.patch.object(
+        store, "get", mock.AsyncMock(return_value=data)
+    ), mock.patch.object(
+        store, "compare_and_swap", mock.AsyncMock(side_effect=conflict)
+    ) as cas:
+        with pytest.raises(exceptions.MismatchedDataError):
+            helpers.run(store.increment("key", -2))
+
+    cas.assert_awaited_once_with(
+        key="key", old=data, new=base.incremented(data, -2), expiry=None
+    )
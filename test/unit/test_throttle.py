@@ -4,6 +4,8 @@ import mock
 
 from rush import throttle
 
+from . import helpers  # noqa: I100,I202
+
 
 class TestThrottle:
     """Tests for our Throttle class."""
@@ -37,3 +39,52 @@ class TestThrottle:
         t.peek("key")
 
         limiter.rate_limit.assert_called_once_with("key", 0, quota)
+
+    def test_check_many(self):
+        """Verify we pass every request to the limiter at once."""
+        limiter = mock.Mock()
+        quota = mock.Mock()
+
+        t = throttle.Throttle(rate=quota, limiter=limiter)
+        results = t.check_many([("a", 1), ("b", 2)])
+
+        assert results is limiter.rate_limit_many.return_value
+        limiter.rate_limit_many.assert_called_once_with(
+            [("a", 1), ("b", 2)], quota
+        )
+
+
+class TestAsyncThrottle:
+    """Tests for our AsyncThrottle class."""
+
+    def test_check(self):
+        """Verify we await the limiter's rate_limit."""
+        limiter = mock.AsyncMock()
+        quota = mock.Mock()
+
+        t = throttle.AsyncThrottle(rate=quota, limiter=limiter)
+        limitresult = helpers.run(t.check("key", 10))
+
+        assert limitresult is limiter.rate_limit.return_value
+        limiter.rate_limit.assert_awaited_once_with("key", 10, quota)
+
+    def test_clear(self):
+        """Verify we await the limiter's reset."""
+        limiter = mock.AsyncMock()
+        quota = mock.Mock()
+
+        t = throttle.AsyncThrottle(rate=quota, limiter=limiter)
+        limitresult = helpers.run(t.clear("key"))
+
+        assert limitresult is limiter.reset.return_value
+        limiter.reset.assert_awaited_once_with("key", quota)
+
+    def test_peek(self):
+        """Verify peeking checks a quantity of 0."""
+        limiter = mock.AsyncMock()
+        quota = mock.Mock()
+
+        t = throttle.AsyncThrottle(rate=quota, limiter=limiter)
+        helpers.run(t.peek("key"))
+
+        limiter.rate_limit.assert_awaited_once_with("key", 0, quota)